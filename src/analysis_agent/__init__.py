@@ -11,6 +11,7 @@ from src.analysis_agent.context_retrieval import ContextRetriever
 from src.analysis_agent.event_correlation import EventCorrelator
 from src.analysis_agent.event_extraction import EventDataExtractor
 from src.analysis_agent.incident_retrieval import IncidentRetriever
+from src.analysis_agent.ioc_index import IocIndex
 from src.analysis_agent.monitoring import MetricsCollector
 from src.analysis_agent.performance_optimizer import (
     AnalysisCache,
@@ -18,7 +19,9 @@ from src.analysis_agent.performance_optimizer import (
     RateLimiter,
     RequestBatcher,
 )
+from src.analysis_agent.prompt_builder import PromptBuilder
 from src.analysis_agent.recommendation_engine import RecommendationEngine
+from src.analysis_agent.similarity_index import IncidentSimilarityIndex
 
 __all__ = [
     "AnalysisAgent",
@@ -28,8 +31,11 @@ __all__ = [
     "EventCorrelator",
     "EventDataExtractor",
     "IncidentRetriever",
+    "IncidentSimilarityIndex",
+    "IocIndex",
     "MetricsCollector",
     "PerformanceOptimizer",
+    "PromptBuilder",
     "RateLimiter",
     "RecommendationEngine",
     "RequestBatcher",
@@ -4,12 +4,14 @@ Analysis Agent using Google ADK - PRODUCTION IMPLEMENTATION
 This agent analyzes security incidents using Gemini AI for threat assessment.
 """
 
+import asyncio
 import json
 import logging
 import os
 import re
+import time
 from datetime import datetime
-from typing import Any, Dict, List, Optional, cast
+from typing import Any, Dict, List, Optional, Tuple, cast
 
 from vertexai.generative_models import GenerativeModel, GenerationConfig
 from google.cloud import aiplatform
@@ -28,6 +30,8 @@ from src.tools.transfer_tools import (
 from src.analysis_agent.recommendation_engine import RecommendationEngine
 from src.analysis_agent.event_correlation import EventCorrelator
 from src.analysis_agent.context_retrieval import ContextRetriever
+from src.analysis_agent.ioc_index import IOC_SOURCES, IocIndex, extract_indicators
+from src.analysis_agent.monitoring import MetricsCollector
 from src.tools.analysis_tools import RecommendationTool, CorrelationTool, ContextTool
 
 # Import performance optimization
@@ -155,9 +159,20 @@ class IncidentAnalysisTool(BaseTool):
 
 
 class ThreatIntelligenceTool(BaseTool):
-    """Production tool for enriching analysis with threat intelligence."""
-
-    def __init__(self, firestore_client: firestore.Client):
+    """Production tool for enriching analysis with threat intelligence.
+
+    Indicators are matched against a local IocIndex that is loaded from the
+    threat intelligence collections on first use and then kept current by
+    delta syncs of documents whose ``updated_at`` is past the last one seen,
+    with a periodic full reload to pick up deletions.
+    """
+
+    def __init__(
+        self,
+        firestore_client: firestore.Client,
+        refresh_interval: float = 60.0,
+        full_sync_interval: float = 3600.0,
+    ):
         """Initialize with Firestore client for threat intel data."""
         super().__init__(
             name="threat_intelligence_tool",
@@ -165,6 +180,118 @@ class ThreatIntelligenceTool(BaseTool):
         )
         self.firestore_client = firestore_client
         self.threat_intel_collection = "threat_intelligence"
+        self.refresh_interval = refresh_interval
+        self.full_sync_interval = full_sync_interval
+
+        self.ioc_index = IocIndex()
+        self._sync_watermark: Optional[datetime] = None
+        self._synced_at: Optional[float] = None
+        self._full_synced_at: Optional[float] = None
+        self._sync_lock = asyncio.Lock()
+        self._refresh_task: Optional["asyncio.Task[None]"] = None
+
+    async def setup(self) -> None:
+        """Load the IOC index and start refreshing it in the background."""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def close(self) -> None:
+        """Stop the background refresh."""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    async def refresh_index(self, full: bool = False) -> int:
+        """Pull threat intelligence updates into the IOC index.
+
+        A full sync rebuilds the index from every document; otherwise only
+        documents updated since the last sync are applied. Returns the number
+        of documents applied.
+        """
+        async with self._sync_lock:
+            full = full or self._synced_at is None
+            since = None if full else self._sync_watermark
+            started = time.monotonic()
+            documents = await asyncio.to_thread(self._pull_updates, since)
+
+            index = IocIndex() if full else self.ioc_index
+            watermark = self._sync_watermark
+            for ioc_type, doc_id, data in documents:
+                index.apply_document(ioc_type, doc_id, data)
+                updated_at = (data or {}).get("updated_at")
+                if isinstance(updated_at, datetime) and (
+                    watermark is None or updated_at > watermark
+                ):
+                    watermark = updated_at
+
+            self.ioc_index = index
+            self._sync_watermark = watermark
+            self._synced_at = started
+            if full:
+                self._full_synced_at = started
+            logger.debug(
+                "Synced %d threat intelligence documents (%s), %d indicators indexed",
+                len(documents),
+                "full" if full else "delta",
+                len(index),
+            )
+            return len(documents)
+
+    def _pull_updates(
+        self, since: Optional[datetime]
+    ) -> List[Tuple[str, str, Dict[str, Any]]]:
+        """Read threat intelligence documents, optionally only recent ones."""
+        documents = []
+        root = self.firestore_client.collection(self.threat_intel_collection)
+        for ioc_type, (document, subcollection, _) in IOC_SOURCES.items():
+            query = root.document(document).collection(subcollection)
+            if since is not None:
+                query = query.where("updated_at", ">", since)
+            for doc in query.stream():
+                documents.append((ioc_type, doc.id, doc.to_dict()))
+        return documents
+
+    async def _ensure_index(self) -> None:
+        """Make sure the IOC index is loaded and not past its refresh interval.
+
+        The first load must succeed. Later refresh failures are logged and
+        the current index keeps answering lookups.
+        """
+        if self._synced_at is None:
+            # Full load, or a delta if the background refresh finished it first
+            await self.refresh_index()
+            return
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        now = time.monotonic()
+        if now - self._synced_at < self.refresh_interval:
+            return
+        full = (
+            self._full_synced_at is None
+            or now - self._full_synced_at >= self.full_sync_interval
+        )
+        try:
+            await self.refresh_index(full=full)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.warning("Threat intelligence refresh failed, using cached index: %s", e)
+
+    async def _refresh_loop(self) -> None:
+        """Keep the IOC index current until cancelled."""
+        while True:
+            now = time.monotonic()
+            full = (
+                self._full_synced_at is None
+                or now - self._full_synced_at >= self.full_sync_interval
+            )
+            try:
+                await self.refresh_index(full=full)
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                logger.warning("Threat intelligence refresh failed: %s", e)
+            await asyncio.sleep(self.refresh_interval)
 
     async def execute(self, context: ToolContext, **kwargs: Any) -> Dict[str, Any]:
         """Enrich incident with threat intelligence data."""
@@ -178,45 +305,23 @@ class ThreatIntelligenceTool(BaseTool):
                 "vulnerabilities": [],
             }
 
-            # Check IoCs against threat intelligence
-            metadata = incident.get("metadata", {})
-            source_ip = metadata.get("source_ip", "")
-            actor = metadata.get("actor", "")
-
-            # Query threat intelligence database
-            if source_ip and source_ip != "unknown":
-                # Check if IP is known malicious
-                ip_intel = (
-                    self.firestore_client.collection(self.threat_intel_collection)
-                    .document("ip_reputation")
-                    .collection("ips")
-                    .document(source_ip)
-                    .get()
-                )
-
-                if ip_intel.exists:
-                    threat_intel["known_iocs"].append(
-                        {
-                            "type": "ip",
-                            "value": source_ip,
-                            "reputation": ip_intel.to_dict(),
-                        }
-                    )
-
-            # Check for known threat actor patterns
-            if actor:
-                # Query known compromised accounts
-                compromised_accounts = (
-                    self.firestore_client.collection(self.threat_intel_collection)
-                    .document("compromised_accounts")
-                    .collection("accounts")
-                    .where("email", "==", actor)
-                    .limit(1)
-                    .get()
-                )
-
-                for doc in compromised_accounts:
-                    threat_intel["threat_actors"].append(doc.to_dict())
+            await self._ensure_index()
+
+            # Check every IoC in the incident and its events against the index
+            indicators = extract_indicators(incident, kwargs.get("indicators"))
+            for match in self.ioc_index.match_all(indicators):
+                if match.ioc_type == "email":
+                    # Known compromised accounts
+                    threat_intel["threat_actors"].append(match.record)
+                    continue
+                ioc = {
+                    "type": match.ioc_type,
+                    "value": match.value,
+                    "reputation": match.record,
+                }
+                if match.matched != match.value:
+                    ioc["matched"] = match.matched
+                threat_intel["known_iocs"].append(ioc)
 
             # Add hardcoded threat intelligence for demo
             if "privilege_escalation" in incident.get("title", "").lower():
@@ -401,13 +506,33 @@ class AnalysisAgent(SentinelOpsBaseAgent):
             },
         )
         self.performance_optimizer = PerformanceOptimizer(performance_config, logger)
+        self.metrics_collector = MetricsCollector(project_id, logger)
 
         # Initialize business logic components
         self.recommendation_engine = RecommendationEngine(config.get("recommendations", {}))
         self.event_correlator = EventCorrelator(
             logger, config.get("correlation", {}).get("correlation_window", 3600)
         )
-        self.context_retriever = ContextRetriever(firestore_client, logger)
+        analysis_config = config.get("analysis", {})
+        embedder = None
+        if analysis_config.get("semantic_similarity", False):
+            # Only imported when enabled, as the Gemini client needs an API key
+            from src.integrations.gemini import (  # pylint: disable=import-outside-toplevel
+                GeminiIntegration,
+            )
+
+            embedder = GeminiIntegration().get_embedding
+        self.context_retriever = ContextRetriever(
+            firestore_client,
+            logger,
+            similarity_index_path=analysis_config.get("similarity_index_path"),
+            similarity_index_refresh_interval=analysis_config.get(
+                "similarity_index_refresh_interval", 3600.0
+            ),
+            embedder=embedder,
+            metrics=self.metrics_collector,
+            default_source_timeout=analysis_config.get("context_source_timeout", 5.0),
+        )
 
         # Set threshold attributes
         self.auto_remediate_threshold = config.get("auto_remediate_threshold", 0.8)
@@ -416,7 +541,12 @@ class AnalysisAgent(SentinelOpsBaseAgent):
         # Initialize production tools
         tools = [
             IncidentAnalysisTool(model_config),
-            ThreatIntelligenceTool(firestore_client),
+            ThreatIntelligenceTool(
+                firestore_client,
+                refresh_interval=config.get("analysis", {}).get(
+                    "threat_intel_refresh_interval", 60.0
+                ),
+            ),
             RecommendationGeneratorTool(model_config),
             TransferToRemediationAgentTool(),
             TransferToCommunicationAgentTool(),
@@ -511,27 +641,41 @@ class AnalysisAgent(SentinelOpsBaseAgent):
         return await self._analyze_incident(incident_data, context, None)
 
     async def _analyze_incident(
-        self, incident: Dict[str, Any], context: Any, config: Optional[RunConfig]
+        self,
+        incident: Dict[str, Any],
+        context: Any,
+        config: Optional[RunConfig],
+        allow_batching: bool = True,
     ) -> Dict[str, Any]:
-        """Perform comprehensive incident analysis."""
+        """Perform comprehensive incident analysis.
+
+        Analyses go through the cache, and concurrent requests for the same
+        incident content share a single analysis. With ``allow_batching`` the
+        request may wait to be analyzed together with similar incidents;
+        batch fallbacks pass False so they analyze the incident directly, as
+        they already run on behalf of the batched requests.
+        """
         _ = config  # Unused but retained for API compatibility
-        # Check cache first
-        cache_key = self.performance_optimizer.generate_cache_key(
+        if not allow_batching:
+            return await self._run_incident_analysis(incident, context, False)
+
+        return await self.performance_optimizer.analyze_once(
             incident.get("id", "unknown"),
-            self.performance_optimizer.compute_data_hash(incident),
+            incident,
+            lambda: self._run_incident_analysis(incident, context, True),
         )
 
-        cached_result = self.performance_optimizer.cache.get(cache_key)
-        if cached_result:
-            logger.info("Cache hit for incident %s", incident.get('id'))
-            return cast(Dict[str, Any], cached_result)
-
+    async def _run_incident_analysis(
+        self, incident: Dict[str, Any], context: Any, allow_batching: bool
+    ) -> Dict[str, Any]:
+        """Analyze an incident through the Gemini, threat intel and recommendation stages."""
         # Check if we can batch this request with similar incidents
-        batch_result = await self.performance_optimizer.batch_similar_requests(
-            incident.get("id", "unknown"), incident, self._batch_analyze_incidents
-        )
-        if batch_result:
-            return cast(Dict[str, Any], batch_result)
+        if allow_batching:
+            batch_result = await self.performance_optimizer.batch_similar_requests(
+                incident.get("id", "unknown"), incident, self._batch_analyze_incidents
+            )
+            if batch_result:
+                return cast(Dict[str, Any], batch_result)
 
         analysis_results: Dict[str, Any] = {
             "status": "success",
@@ -576,6 +720,16 @@ class AnalysisAgent(SentinelOpsBaseAgent):
                 analysis_results["stages"] = {}
             analysis_results["stages"]["ai_analysis"] = analysis
 
+            # Correlate the incident's events, reusing the state kept for its ID
+            if incident.get("events"):
+                correlation_tool = self.tools[7]  # CorrelationTool
+                if isinstance(correlation_tool, CorrelationTool):
+                    correlation_result = await correlation_tool.execute(
+                        tool_context, incident=incident
+                    )
+                    if correlation_result.get("status") == "success":
+                        analysis_results["stages"]["correlation"] = correlation_result
+
             # Stage 2: Threat Intelligence Enrichment
             threat_intel_tool = self.tools[1]  # ThreatIntelligenceTool
 
@@ -687,11 +841,6 @@ class AnalysisAgent(SentinelOpsBaseAgent):
                 confidence
             )
 
-            # Cache the successful analysis result
-            self.performance_optimizer.cache_analysis(
-                incident.get("id", "unknown"), incident, analysis_results
-            )
-
             return analysis_results
 
         except (ValueError, KeyError, AttributeError, TypeError) as e:
@@ -724,23 +873,31 @@ class AnalysisAgent(SentinelOpsBaseAgent):
     async def _batch_analyze_incidents(
         self, incidents: List[Dict[str, Any]]
     ) -> List[Dict[str, Any]]:
-        """Process multiple incidents in a batch for efficiency."""
+        """Process multiple incidents in a batch for efficiency.
+
+        Returns one result per incident, in the order the incidents were
+        given, so each batched request gets its own result back.
+        """
         logger.info("Batch processing %d incidents", len(incidents))
-        results = []
+        results: List[Dict[str, Any]] = [{} for _ in incidents]
 
         # Group incidents by severity for more efficient prompting
         severity_groups: Dict[str, List[Dict[str, Any]]] = {}
-        for incident_data in incidents:
+        group_positions: Dict[str, List[int]] = {}
+        for position, incident_data in enumerate(incidents):
             incident = (
                 incident_data if isinstance(incident_data, dict) else incident_data[1]
             )
             severity = incident.get("severity", "medium")
             if severity not in severity_groups:
                 severity_groups[severity] = []
+                group_positions[severity] = []
             severity_groups[severity].append(incident)
+            group_positions[severity].append(position)
 
         # Process each severity group
         for severity, group_incidents in severity_groups.items():
+            positions = group_positions[severity]
             # Create a batch prompt for similar incidents
             batch_prompt = self._create_batch_analysis_prompt(group_incidents)
 
@@ -788,31 +945,29 @@ class AnalysisAgent(SentinelOpsBaseAgent):
                         }
 
                         # Cache individual results
-                        self.performance_optimizer.cache_analysis(
+                        await self.performance_optimizer.cache_analysis(
                             incident.get("id", "unknown"), incident, individual_result
                         )
 
-                        results.append(individual_result)
+                        results[positions[i]] = individual_result
                 else:
                     # Fallback to individual processing
-                    for incident in group_incidents:
-                        result = await self._analyze_incident(
-                            incident, tool_context, None
+                    for position, incident in zip(positions, group_incidents):
+                        results[position] = await self._analyze_incident(
+                            incident, tool_context, None, allow_batching=False
                         )
-                        results.append(result)
 
             except (ValueError, KeyError, AttributeError, TypeError) as e:
                 logger.error("Batch processing failed: %s", e, exc_info=True)
                 # Fallback to individual processing
-                for incident in group_incidents:
+                for position, incident in zip(positions, group_incidents):
                     # Create test tool context for fallback
                     fallback_context = type("TestToolContext", (), {})()
                     fallback_context.data = {}
                     fallback_context.actions = None
-                    result = await self._analyze_incident(
-                        incident, fallback_context, None
+                    results[position] = await self._analyze_incident(
+                        incident, fallback_context, None, allow_batching=False
                     )
-                    results.append(result)
 
         return results
 
@@ -0,0 +1,159 @@
+"""
+Shared storage tiers for the Analysis Agent cache.
+
+AnalysisCache keeps recent analyses in process memory and can write them
+through to a shared backend, so they survive restarts and are visible to
+every instance. A backend stores opaque bytes under string keys with a TTL.
+DiskCacheBackend keeps one file per key in a directory and suits a single
+host or a mounted volume; RedisCacheBackend works with any Redis-compatible
+server such as Memorystore.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from typing import Any, Optional, Protocol
+
+import redis.asyncio as aioredis
+
+
+class SharedCacheBackend(Protocol):
+    """Storage shared between Analysis Agent instances."""
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Get the value stored under a key, or None if missing or expired."""
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        """Store a value for ttl seconds."""
+
+    async def delete_prefix(self, prefix: str) -> int:
+        """Delete every key starting with prefix and return how many there were."""
+
+
+class DiskCacheBackend:
+    """Shared cache tier keeping one file per key in a directory.
+
+    Each file holds a JSON header line with the key and expiry time followed
+    by the value. Files are written to a temporary name and renamed into
+    place, so concurrent readers never see a partial entry.
+    """
+
+    def __init__(self, directory: str) -> None:
+        """
+        Initialize the disk backend.
+
+        Args:
+            directory: Directory for cache files, created if missing
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Get the value stored under a key, or None if missing or expired."""
+        return await asyncio.to_thread(self._read, self._path(key))
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        """Store a value for ttl seconds."""
+        header = json.dumps({"key": key, "expires_at": time.time() + ttl})
+        await asyncio.to_thread(self._write, self._path(key), header.encode() + b"\n" + value)
+
+    async def delete_prefix(self, prefix: str) -> int:
+        """Delete every key starting with prefix and return how many there were."""
+        return await asyncio.to_thread(self._delete_prefix, prefix)
+
+    def _path(self, key: str) -> str:
+        """File holding a key's entry."""
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return os.path.join(self.directory, f"{digest}.entry")
+
+    @staticmethod
+    def _read_entry(path: str) -> Optional[tuple[dict[str, Any], bytes]]:
+        """Read an entry's header and value, or None if it is unreadable."""
+        try:
+            with open(path, "rb") as f:
+                header_line, _, value = f.read().partition(b"\n")
+            return json.loads(header_line), value
+        except (OSError, ValueError):
+            return None
+
+    def _read(self, path: str) -> Optional[bytes]:
+        entry = self._read_entry(path)
+        if entry is None:
+            return None
+        header, value = entry
+        if header.get("expires_at", 0) <= time.time():
+            self._remove(path)
+            return None
+        return value
+
+    @staticmethod
+    def _write(path: str, data: bytes) -> None:
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _delete_prefix(self, prefix: str) -> int:
+        count = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(".entry"):
+                continue
+            path = os.path.join(self.directory, name)
+            entry = self._read_entry(path)
+            if entry is not None and str(entry[0].get("key", "")).startswith(prefix):
+                self._remove(path)
+                count += 1
+        return count
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+class RedisCacheBackend:
+    """Shared cache tier on a Redis-compatible server."""
+
+    def __init__(
+        self, client: aioredis.Redis, namespace: str = "sentinelops:analysis_cache:"
+    ) -> None:
+        """
+        Initialize the Redis backend.
+
+        Args:
+            client: Redis asyncio client
+            namespace: Prefix added to every key
+        """
+        self.client = client
+        self.namespace = namespace
+
+    @classmethod
+    def from_url(cls, url: str, namespace: str = "sentinelops:analysis_cache:") -> "RedisCacheBackend":
+        """Create a backend connected to a Redis URL."""
+        return cls(aioredis.from_url(url), namespace)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Get the value stored under a key, or None if missing or expired."""
+        value = await self.client.get(self.namespace + key)
+        return value if value is None or isinstance(value, bytes) else str(value).encode()
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        """Store a value for ttl seconds."""
+        await self.client.set(self.namespace + key, value, ex=ttl)
+
+    async def delete_prefix(self, prefix: str) -> int:
+        """Delete every key starting with prefix and return how many there were."""
+        pattern = self.namespace + _escape_glob(prefix) + "*"
+        keys = [key async for key in self.client.scan_iter(match=pattern)]
+        if not keys:
+            return 0
+        return int(await self.client.delete(*keys))
+
+
+def _escape_glob(text: str) -> str:
+    """Escape Redis glob characters in a literal key prefix."""
+    return "".join(f"\\{c}" if c in "*?[]\\" else c for c in text)
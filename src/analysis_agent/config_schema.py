@@ -33,13 +33,29 @@ class AnalysisAgentConfig:
             "max_analysis_time": 300,  # 5 minutes
             "enable_context_retrieval": True,
             "enable_recommendation_engine": True,
+            "similarity_index_path": None,  # Rebuilt from Firestore when unset
+            "context_source_timeout": 5.0,  # Seconds per context source
+            "threat_intel_refresh_interval": 60.0,  # Seconds between IOC delta syncs
         },
         "performance": {
             "cache_enabled": True,
             "cache_ttl": 3600,  # 1 hour
+            "cache_backend": None,  # Shared cache tier: None, "disk" or "redis"
+            "cache_dir": "/tmp/sentinelops/analysis_cache",
+            "cache_redis_url": None,
             "batch_size": 10,
             "max_concurrent_analyses": 5,
-            "rate_limit": {"enabled": True, "max_per_minute": 30, "max_per_hour": 500},
+            "prompt_model": "gemini-pro",  # Model whose context window bounds prompts
+            "prompt_token_budget": None,  # Optional lower cap on prompt input tokens
+            "rate_limit": {
+                "enabled": True,
+                "max_per_minute": 30,
+                "max_per_hour": 500,
+                "burst": None,  # Back-to-back requests before pacing, max_per_minute if unset
+                "backend": None,  # Shared rate limit windows: None, "file" or "redis"
+                "state_path": "/tmp/sentinelops/analysis_rate_limit.json",
+                "redis_url": None,
+            },
         },
         "pubsub": {
             "topics": {
@@ -168,16 +184,11 @@ class AnalysisAgentConfig:
             msg = "max_related_events must be between 1 and 1000"
             raise ValueError(msg)
 
-    @staticmethod
-    def _validate_performance_config(config: dict[str, Any]) -> None:
+    @classmethod
+    def _validate_performance_config(cls, config: dict[str, Any]) -> None:
         """Validate performance configuration."""
-        # Cache TTL validation
         if config.get("cache_enabled", True):
-            cache_ttl = config.get("cache_ttl", 3600)
-            seconds_in_day = 86400
-            if not 60 <= cache_ttl <= seconds_in_day:
-                msg = "cache_ttl must be between 60 and 86400 seconds"
-                raise ValueError(msg)
+            cls._validate_cache_config(config)
 
         # Batch size validation
         batch_size = config.get("batch_size", 10)
@@ -193,20 +204,55 @@ class AnalysisAgentConfig:
             msg = "max_concurrent_analyses must be between 1 and 20"
             raise ValueError(msg)
 
-        # Rate limit validation
         rate_limit = config.get("rate_limit", {})
         if rate_limit.get("enabled", True):
-            max_per_minute = rate_limit.get("max_per_minute", 30)
-            max_rate_per_minute = 100
-            if not 1 <= max_per_minute <= max_rate_per_minute:
-                msg = "max_per_minute must be between 1 and 100"
-                raise ValueError(msg)
+            cls._validate_rate_limit_config(rate_limit)
 
-            max_per_hour = rate_limit.get("max_per_hour", 500)
-            max_rate_per_hour = 2000
-            if not max_per_minute <= max_per_hour <= max_rate_per_hour:
-                msg = "max_per_hour must be between max_per_minute and 2000"
-                raise ValueError(msg)
+    @staticmethod
+    def _validate_cache_config(config: dict[str, Any]) -> None:
+        """Validate the cache settings of the performance configuration."""
+        # Cache TTL validation
+        cache_ttl = config.get("cache_ttl", 3600)
+        seconds_in_day = 86400
+        if not 60 <= cache_ttl <= seconds_in_day:
+            msg = "cache_ttl must be between 60 and 86400 seconds"
+            raise ValueError(msg)
+
+        cache_backend = config.get("cache_backend")
+        if cache_backend not in (None, "memory", "disk", "redis"):
+            msg = "cache_backend must be one of: memory, disk, redis"
+            raise ValueError(msg)
+        if cache_backend == "redis" and not config.get("cache_redis_url"):
+            msg = "cache_redis_url is required for the redis cache backend"
+            raise ValueError(msg)
+
+    @staticmethod
+    def _validate_rate_limit_config(rate_limit: dict[str, Any]) -> None:
+        """Validate rate limit configuration."""
+        max_per_minute = rate_limit.get("max_per_minute", 30)
+        max_rate_per_minute = 100
+        if not 1 <= max_per_minute <= max_rate_per_minute:
+            msg = "max_per_minute must be between 1 and 100"
+            raise ValueError(msg)
+
+        max_per_hour = rate_limit.get("max_per_hour", 500)
+        max_rate_per_hour = 2000
+        if not max_per_minute <= max_per_hour <= max_rate_per_hour:
+            msg = "max_per_hour must be between max_per_minute and 2000"
+            raise ValueError(msg)
+
+        burst = rate_limit.get("burst")
+        if burst is not None and not 1 <= burst <= max_per_minute:
+            msg = "burst must be between 1 and max_per_minute"
+            raise ValueError(msg)
+
+        backend = rate_limit.get("backend")
+        if backend not in (None, "local", "file", "redis"):
+            msg = "rate_limit backend must be one of: local, file, redis"
+            raise ValueError(msg)
+        if backend == "redis" and not rate_limit.get("redis_url"):
+            msg = "rate_limit redis_url is required for the redis backend"
+            raise ValueError(msg)
 
     @classmethod
     def get_config_documentation(cls) -> str:
@@ -235,16 +281,39 @@ ANALYSIS CONFIGURATION:
 - max_analysis_time: Maximum time for analysis in seconds (default: 300)
 - enable_context_retrieval: Enable additional context retrieval (default: true)
 - enable_recommendation_engine: Enable recommendation engine (default: true)
+- similarity_index_path: File persisting the similar-incident index (default: none,
+  the index is rebuilt from Firestore on first use)
+- context_source_timeout: Seconds each context source may take before the analysis
+  continues without it (default: 5.0)
+- threat_intel_refresh_interval: Seconds between delta syncs of the local IOC index
+  from Firestore threat intelligence (default: 60.0)
 
 PERFORMANCE CONFIGURATION:
 - cache_enabled: Enable caching of analysis results (default: true)
 - cache_ttl: Cache time-to-live in seconds (60-86400, default: 3600)
+- cache_backend: Shared tier behind the in-memory analysis cache, so cached analyses
+  survive restarts and are shared between instances: none, "disk" or "redis"
+  (default: none)
+- cache_dir: Directory for the "disk" cache backend
+  (default: /tmp/sentinelops/analysis_cache)
+- cache_redis_url: Redis URL for the "redis" cache backend (default: none)
 - batch_size: Batch size for processing (1-100, default: 10)
 - max_concurrent_analyses: Maximum concurrent analyses (1-20, default: 5)
+- prompt_model: Gemini model whose context window and output size set the prompt
+  input token budget (default: gemini-pro)
+- prompt_token_budget: Optional lower cap on input tokens per prompt (default: none)
 - rate_limit: Rate limiting configuration
   - enabled: Enable rate limiting (default: true)
   - max_per_minute: Maximum requests per minute (1-100, default: 30)
   - max_per_hour: Maximum requests per hour (max_per_minute-2000, default: 500)
+  - burst: Requests allowed back to back before the limiter paces them at
+    max_per_minute / 60 per second (1-max_per_minute, default: max_per_minute)
+  - backend: Where the rate limit windows live, so analysis workers share one quota:
+    none (this process), "file" (every process on the host) or "redis" (every
+    instance) (default: none)
+  - state_path: Admission time file for the "file" backend
+    (default: /tmp/sentinelops/analysis_rate_limit.json)
+  - redis_url: Redis URL for the "redis" backend (default: none)
 
 PUBSUB CONFIGURATION:
 - topics: Pub/Sub topic names
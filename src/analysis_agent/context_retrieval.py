@@ -5,23 +5,58 @@ This module handles fetching related incidents, historical patterns, and
 knowledge base information to enhance incident analysis.
 """
 
+import asyncio
 import logging
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
-from src.common.models import Incident
+from src.analysis_agent.monitoring import MetricsCollector
+from src.analysis_agent.similarity_index import IncidentSimilarityIndex, IndexedIncident
+from src.common.models import Incident, IncidentStatus
+
+SIMILAR_INCIDENT_LOOKBACK = timedelta(days=90)
+DEFAULT_SOURCE_TIMEOUT = 5.0
 
 
 class ContextRetriever:
     """Retrieves additional context for incident analysis."""
 
-    def __init__(self, db: Any, logger: logging.Logger):
+    def __init__(
+        self,
+        db: Any,
+        logger: logging.Logger,
+        similarity_index_path: Optional[str] = None,
+        similarity_index_refresh_interval: Optional[float] = 3600.0,
+        embedder: Optional[Callable[[str], Awaitable[List[float]]]] = None,
+        metrics: Optional[MetricsCollector] = None,
+        concurrent_gather: bool = True,
+        default_source_timeout: Optional[float] = DEFAULT_SOURCE_TIMEOUT,
+        source_timeouts: Optional[Dict[str, Optional[float]]] = None,
+    ):
         """
         Initialize the context retriever.
 
         Args:
             db: Firestore client instance
             logger: Logger instance for logging
+            similarity_index_path: File persisting the similar-incident index,
+                or None to rebuild it from Firestore on first use
+            similarity_index_refresh_interval: Seconds after which the index
+                is rebuilt from Firestore in the background, picking up
+                incidents resolved or reopened by other agents, or None to
+                only update it through ``update_similarity_index``
+            embedder: Optional async function returning the embedding of a
+                text, such as ``GeminiIntegration.get_embedding``. Each
+                analyzed incident's embedding is stored on its document, so
+                it is indexed once the incident is resolved
+            metrics: Optional collector receiving per-source latencies
+            concurrent_gather: Query the context sources concurrently instead
+                of one after another
+            default_source_timeout: Seconds each context source may take, or
+                None for no limit
+            source_timeouts: Per-source overrides of the timeout, keyed by
+                context field name such as ``"related_incidents"``
         """
         self.db = db
         self.logger = logger
@@ -29,12 +64,29 @@ class ContextRetriever:
         self.knowledge_base_collection = db.collection("knowledge_base")
         self.historical_patterns_collection = db.collection("historical_patterns")
 
+        self.metrics = metrics
+        self.concurrent_gather = concurrent_gather
+        self.default_source_timeout = default_source_timeout
+        self.source_timeouts = source_timeouts or {}
+
+        self.embedder = embedder
+        self.similarity_index = IncidentSimilarityIndex(similarity_index_path)
+        self.similarity_index_refresh_interval = similarity_index_refresh_interval
+        self._similarity_index_ready = len(self.similarity_index) > 0
+        # A loaded index counts as stale, as it may predate the last run
+        self._similarity_index_built_at: Optional[float] = None
+        self._similarity_index_build: Optional[asyncio.Task[int]] = None
+
     async def gather_additional_context(
         self, incident: Incident, correlation_results: Dict[str, Any]
     ) -> Dict[str, Any]:
         """
         Gather comprehensive additional context for the incident.
 
+        Each source has its own timeout. A source that times out or fails is
+        left empty and listed in ``unavailable_sources``, so a slow source
+        degrades the context instead of delaying the analysis.
+
         Args:
             incident: The incident being analyzed
             correlation_results: Results from event correlation
@@ -49,32 +101,41 @@ class ContextRetriever:
             "similar_incidents": [],
             "threat_intelligence": {},
             "context_summary": "",
+            "unavailable_sources": {},
         }
 
-        try:
-            # Fetch related incidents
-            context["related_incidents"] = await self._fetch_related_incidents(
+        sources: Dict[str, Callable[[], Awaitable[Any]]] = {
+            "related_incidents": lambda: self._fetch_related_incidents(
                 incident, correlation_results
-            )
-
-            # Retrieve historical patterns
-            context["historical_patterns"] = await self._retrieve_historical_patterns(
+            ),
+            "historical_patterns": lambda: self._retrieve_historical_patterns(
                 incident, correlation_results
-            )
-
-            # Access knowledge base
-            context["knowledge_base_entries"] = await self._query_knowledge_base(
+            ),
+            "knowledge_base_entries": lambda: self._query_knowledge_base(
                 incident, correlation_results
-            )
-
-            # Find similar incidents
-            context["similar_incidents"] = await self._find_similar_incidents(incident)
-
-            # Get threat intelligence (if available)
-            context["threat_intelligence"] = await self._get_threat_intelligence(
+            ),
+            "similar_incidents": lambda: self._find_similar_incidents(incident),
+            "threat_intelligence": lambda: self._get_threat_intelligence(
                 incident, correlation_results
+            ),
+        }
+
+        if self.concurrent_gather:
+            outcomes = await asyncio.gather(
+                *(self._gather_source(name, fetch) for name, fetch in sources.items())
             )
+        else:
+            outcomes = [
+                await self._gather_source(name, fetch) for name, fetch in sources.items()
+            ]
 
+        for name, (status, value) in zip(sources, outcomes):
+            if status == "ok":
+                context[name] = value
+            else:
+                context["unavailable_sources"][name] = status
+
+        try:
             # Generate context summary
             context["context_summary"] = self._generate_context_summary(context)
 
@@ -89,6 +150,37 @@ class ContextRetriever:
 
         return context
 
+    async def _gather_source(
+        self, name: str, fetch: Callable[[], Awaitable[Any]]
+    ) -> Tuple[str, Any]:
+        """
+        Run one context source under its timeout and record its latency.
+
+        Returns:
+            ("ok", result), or ("timeout" or "error", None)
+        """
+        timeout = self.source_timeouts.get(name, self.default_source_timeout)
+        start = time.perf_counter()
+        status, value = "ok", None
+        try:
+            value = await asyncio.wait_for(fetch(), timeout)
+        except asyncio.TimeoutError:
+            status = "timeout"
+            self.logger.warning(
+                f"Context source {name} timed out after {timeout}s; continuing without it"
+            )
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            status = "error"
+            self.logger.error(f"Context source {name} failed: {e}")
+
+        if self.metrics:
+            self.metrics.record_context_source(name, time.perf_counter() - start, status)
+        return status, value
+
+    async def _stream(self, query: Any) -> List[Any]:
+        """Run a blocking Firestore query off the event loop."""
+        return await asyncio.to_thread(lambda: list(query.stream()))
+
     async def _fetch_related_incidents(  # noqa: C901
         self, incident: Incident, correlation_results: Dict[str, Any]
     ) -> List[Dict[str, Any]]:
@@ -119,7 +211,7 @@ class ContextRetriever:
             query = query.where("created_at", "<=", time_window_end)
 
             # Execute query
-            docs = query.stream()
+            docs = await self._stream(query)
 
             for doc in docs:
                 if doc.id == incident.incident_id:
@@ -230,13 +322,17 @@ class ContextRetriever:
 
             # Query historical patterns
             if self.historical_patterns_collection:
-                # Query by attack techniques
-                for technique in attack_techniques[:5]:  # Limit queries
-                    query = self.historical_patterns_collection.where(
+                # Query by attack techniques, all queries at once
+                queries = [
+                    self.historical_patterns_collection.where(
                         "attack_techniques", "array_contains", technique
                     ).limit(3)
+                    for technique in attack_techniques[:5]  # Limit queries
+                ]
+                results = await asyncio.gather(*(self._stream(q) for q in queries))
 
-                    for doc in query.stream():
+                for docs in results:
+                    for doc in docs:
                         pattern_data = doc.to_dict()
                         if pattern_data:
                             patterns.append(
@@ -297,12 +393,20 @@ class ContextRetriever:
             # Query knowledge base
             if self.knowledge_base_collection:
                 # Limit search terms to prevent too many queries
-                for term in list(search_terms)[:10]:
-                    query = self.knowledge_base_collection.where(
-                        "tags", "array_contains", term
-                    ).limit(3)
+                terms = list(search_terms)[:10]
+                results = await asyncio.gather(
+                    *(
+                        self._stream(
+                            self.knowledge_base_collection.where(
+                                "tags", "array_contains", term
+                            ).limit(3)
+                        )
+                        for term in terms
+                    )
+                )
 
-                    for doc in query.stream():
+                for term, docs in zip(terms, results):
+                    for doc in docs:
                         kb_data = doc.to_dict()
                         if kb_data:
                             kb_entries.append(
@@ -337,111 +441,171 @@ class ContextRetriever:
             self.logger.error(f"Error querying knowledge base: {e}")
             return []
 
-    async def _find_similar_incidents(  # noqa: C901
-        self, incident: Incident
-    ) -> List[Dict[str, Any]]:
-        """Find historically similar incidents based on patterns."""
-        similar = []
-
-        try:
-            # Create incident signature
-            event_types = sorted([e.event_type for e in incident.events])
-            severity = incident.severity.value
-            resource_types = sorted(
-                set(
-                    e.source.resource_type
-                    for e in incident.events
-                    if e.source.resource_type
-                )
-            )
+    async def rebuild_similarity_index(self) -> int:
+        """
+        Rebuild the similar-incident index from resolved incidents in Firestore.
 
-            # Query for similar incidents (last 90 days)
-            cutoff_date = datetime.now(timezone.utc) - timedelta(days=90)
+        The ``embedding`` fields stored when the incidents were analyzed are
+        indexed as they are; the embedder is not called for every historical
+        incident.
 
-            query = self.incidents_collection
-            query = query.where("created_at", ">=", cutoff_date)
-            query = query.where("severity", "==", severity)
-            query = query.where("status", "==", "resolved")  # Only resolved incidents
-            query = query.limit(50)
+        Returns:
+            Number of indexed incidents
+        """
+        cutoff_date = datetime.now(timezone.utc) - SIMILAR_INCIDENT_LOOKBACK
+
+        query = self.incidents_collection
+        query = query.where("status", "==", IncidentStatus.RESOLVED.value)
+        query = query.where("created_at", ">=", cutoff_date)
+
+        entries = []
+        for doc in await self._stream(query):
+            incident_data = doc.to_dict()
+            if incident_data:
+                entries.append(
+                    (
+                        IndexedIncident.from_document(doc.id, incident_data),
+                        incident_data.get("embedding"),
+                    )
+                )
 
-            docs = query.stream()
+        # Building and saving the index is CPU and file work, so it runs in a
+        # thread and the finished index replaces the one answering queries
+        self.similarity_index = await asyncio.to_thread(
+            self.similarity_index.rebuilt, entries
+        )
+        count = len(self.similarity_index)
+        self._similarity_index_ready = True
+        self._similarity_index_built_at = time.monotonic()
+        self.logger.info(f"Rebuilt similar-incident index with {count} incidents")
+        return count
 
-            for doc in docs:
-                if doc.id == incident.incident_id:
-                    continue
+    async def _build_similarity_index_once(self) -> None:
+        """
+        Wait for the first index build, starting it if needed.
 
-                incident_data = doc.to_dict()
-                if not incident_data:
-                    continue
+        Concurrent analyses share one build, and the build is shielded so a
+        context source timeout does not cancel it; later analyses use it once
+        it finishes.
+        """
+        await asyncio.shield(self._start_similarity_index_build())
+
+    def _start_similarity_index_build(self) -> asyncio.Task[int]:
+        """Start an index build in the background unless one is running."""
+        if self._similarity_index_build is None:
+            build = asyncio.create_task(self.rebuild_similarity_index())
+            build.add_done_callback(self._similarity_index_build_done)
+            self._similarity_index_build = build
+        return self._similarity_index_build
+
+    def _similarity_index_build_done(self, build: asyncio.Task[int]) -> None:
+        """Let the next analysis start a new build, logging a failed one."""
+        self._similarity_index_build = None
+        if not build.cancelled() and build.exception() is not None:
+            self.logger.warning(
+                f"Rebuilding the similar-incident index failed: {build.exception()}"
+            )
 
-                # Calculate similarity score
-                similarity_score = 0.0
+    def _similarity_index_stale(self) -> bool:
+        """Whether the index is past its refresh interval."""
+        if self.similarity_index_refresh_interval is None:
+            return False
+        return (
+            self._similarity_index_built_at is None
+            or time.monotonic() - self._similarity_index_built_at
+            >= self.similarity_index_refresh_interval
+        )
 
-                # Compare event types
-                other_event_types = sorted(
-                    [
-                        e.get("event_type")
-                        for e in incident_data.get("events", [])
-                        if e.get("event_type")
-                    ]
-                )
+    async def update_similarity_index(self, incident: Incident) -> None:
+        """
+        Update the similar-incident index after an incident changes status.
 
-                # Jaccard similarity for event types
-                if event_types and other_event_types:
-                    intersection = len(set(event_types) & set(other_event_types))
-                    union = len(set(event_types) | set(other_event_types))
-                    if union > 0:
-                        similarity_score += (intersection / union) * 0.5
-
-                # Compare resource types
-                other_resource_types = sorted(
-                    set(
-                        e.get("source", {}).get("resource_type")
-                        for e in incident_data.get("events", [])
-                        if e.get("source", {}).get("resource_type")
-                    )
-                )
+        Call this when an incident is resolved; resolved incidents are added
+        to the index and incidents that are no longer resolved are removed.
 
-                if resource_types and other_resource_types:
-                    intersection = len(set(resource_types) & set(other_resource_types))
-                    union = len(set(resource_types) | set(other_resource_types))
-                    if union > 0:
-                        similarity_score += (intersection / union) * 0.3
+        Args:
+            incident: The incident whose status changed
+        """
+        if incident.status != IncidentStatus.RESOLVED:
+            self.similarity_index.remove(incident.incident_id)
+            return
 
-                # Event count similarity
-                event_count_diff = abs(
-                    len(incident.events) - len(incident_data.get("events", []))
-                )
-                if event_count_diff < 5:
-                    similarity_score += 0.2
-                elif event_count_diff < 10:
-                    similarity_score += 0.1
-
-                # Include if similarity is high enough
-                if similarity_score >= 0.4:
-                    similar.append(
-                        {
-                            "incident_id": doc.id,
-                            "title": incident_data.get("title", ""),
-                            "created_at": incident_data.get("created_at"),
-                            "resolved_at": incident_data.get("updated_at"),
-                            "similarity_score": similarity_score,
-                            "event_count": len(incident_data.get("events", [])),
-                            "resolution_notes": incident_data.get(
-                                "resolution_notes", ""
-                            )[:200],
-                        }
-                    )
+        self.similarity_index.add(
+            IndexedIncident.from_incident(incident), await self._embed(incident)
+        )
 
-            # Sort by similarity score
-            similar.sort(key=lambda x: x["similarity_score"], reverse=True)
+    async def _find_similar_incidents(
+        self, incident: Incident
+    ) -> List[Dict[str, Any]]:
+        """Find historically similar incidents based on patterns."""
+        try:
+            if not self._similarity_index_ready:
+                await self._build_similarity_index_once()
+            elif self._similarity_index_stale():
+                # The current index keeps answering while it is rebuilt
+                self._start_similarity_index_build()
+
+            embedding = await self._embed(incident)
+            if embedding is not None:
+                # Stored on the incident so index rebuilds pick it up once
+                # the incident is resolved
+                await self._store_embedding(incident.incident_id, embedding)
+
+            # Only resolved incidents from the last 90 days are compared
+            cutoff_date = datetime.now(timezone.utc) - SIMILAR_INCIDENT_LOOKBACK
+            matches = self.similarity_index.query(
+                IndexedIncident.from_incident(incident),
+                top_k=5,
+                created_after=cutoff_date,
+                embedding=embedding,
+            )
 
-            return similar[:5]  # Top 5 similar incidents
+            similar = []
+            for match in matches:
+                entry = {
+                    "incident_id": match.incident.incident_id,
+                    "title": match.incident.title,
+                    "created_at": match.incident.created_at,
+                    "resolved_at": match.incident.resolved_at,
+                    "similarity_score": match.similarity_score,
+                    "event_count": match.incident.event_count,
+                    "resolution_notes": match.incident.resolution_notes[:200],
+                }
+                if match.semantic_similarity is not None:
+                    entry["semantic_similarity"] = match.semantic_similarity
+                similar.append(entry)
+
+            return similar  # Top 5 similar incidents
 
         except (ValueError, KeyError, AttributeError) as e:
             self.logger.error(f"Error finding similar incidents: {e}")
             return []
 
+    async def _embed(self, incident: Incident) -> Optional[List[float]]:
+        """Get the embedding of an incident, if an embedder is configured."""
+        if self.embedder is None:
+            return None
+
+        event_types = sorted({e.event_type for e in incident.events})
+        text = "\n".join(
+            [incident.title, incident.description, ", ".join(event_types)]
+        )
+        try:
+            return await self.embedder(text)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            self.logger.warning(f"Could not embed incident {incident.incident_id}: {e}")
+            return None
+
+    async def _store_embedding(self, incident_id: str, embedding: List[float]) -> None:
+        """Save an incident's embedding to its Firestore document."""
+        document = self.incidents_collection.document(incident_id)
+        try:
+            await asyncio.to_thread(document.update, {"embedding": embedding})
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            self.logger.warning(
+                f"Could not store the embedding of incident {incident_id}: {e}"
+            )
+
     async def _get_threat_intelligence(  # noqa: C901
         self, incident: Incident, correlation_results: Dict[str, Any]
     ) -> Dict[str, Any]:
@@ -609,6 +773,13 @@ class ContextRetriever:
                 f"Identified {len(threat_intel['threat_actors'])} suspicious actors"
             )
 
+        # Sources that timed out or failed
+        unavailable = context.get("unavailable_sources", {})
+        if unavailable:
+            summary_parts.append(
+                f"Context incomplete: {', '.join(sorted(unavailable))} unavailable"
+            )
+
         return (
             ". ".join(summary_parts) if summary_parts else "No additional context found"
         )
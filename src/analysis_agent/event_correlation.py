@@ -2,30 +2,194 @@
 Event correlation functionality for the Analysis Agent.
 
 This module implements various correlation strategies to identify relationships
-between security events within an incident.
+between security events within an incident. Events are folded one at a time,
+in time order, into a ``CorrelationState`` of running aggregates (clusters and
+minute buckets, resource and actor profiles, cause-effect candidates, kill
+chain phase coverage), and the correlation result is built from that state.
+``correlate_incident`` keeps the state of each incident between calls, so
+reanalysing a growing incident only folds in the events added since.
 """
 
+import hashlib
+import heapq
 import logging
+from bisect import bisect_left, bisect_right, insort
 from collections import defaultdict
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import Any, Optional
-
-from src.common.models import SecurityEvent, SeverityLevel
+from itertools import islice
+from typing import Any, Iterable, Optional
+
+from src.common.models import Incident, SecurityEvent, SeverityLevel
+
+DATA_ACCESS_INDICATORS = ("database_query", "file_access", "data_collection")
+DATA_TRANSFER_INDICATORS = ("network_traffic", "data_transfer", "file_download")
+PRIVILEGE_INDICATORS = (
+    "privilege",
+    "permission",
+    "role",
+    "binding",
+    "sudo",
+    "admin",
+    "root",
+    "owner",
+    "editor",
+)
+MOVEMENT_INDICATORS = (
+    "remote_login",
+    "rdp_connection",
+    "ssh_connection",
+    "lateral_movement",
+)
+RESOURCE_SEVERITY_WEIGHTS = {
+    SeverityLevel.CRITICAL: 5,
+    SeverityLevel.HIGH: 4,
+    SeverityLevel.MEDIUM: 3,
+    SeverityLevel.LOW: 2,
+    SeverityLevel.INFORMATIONAL: 1,
+}
+
+
+@dataclass(frozen=True)
+class _TypeProfile:
+    """Classification of one event type, shared by all events of that type."""
+
+    cause_rules: tuple[int, ...]
+    effect_rules: frozenset[int]
+    phases: tuple[str, ...]
+    is_data_access: bool
+    is_data_transfer: bool
+    is_login: bool
+    is_privilege: bool
+    is_movement: bool
+
+
+@dataclass(slots=True)
+class _ResourceStats:
+    """Running summary of the events that touched one resource."""
+
+    first_seen: datetime
+    last_seen: datetime
+    event_count: int = 0
+    event_types: set[str] = field(default_factory=set)
+    severity_levels: set[str] = field(default_factory=set)
+
+
+@dataclass(slots=True)
+class _ActorStats:
+    """Running summary of one actor's events."""
+
+    first_seen: datetime
+    last_seen: datetime
+    period_start: datetime
+    event_count: int = 0
+    event_types: set[str] = field(default_factory=set)
+    severity_distribution: dict[str, int] = field(default_factory=dict)
+    resources_accessed: set[str] = field(default_factory=set)
+    closed_periods: list[dict[str, Any]] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class CorrelationState:
+    """Running correlation aggregates over a time-ordered event stream.
+
+    The state is updated by ``EventCorrelator``, which folds events in
+    non-decreasing timestamp order. Patterns that are still open (the current
+    cluster, action sequence, attack chain and activity periods) are closed
+    when the result is built, without changing the state.
+    """
+
+    events: list[SecurityEvent] = field(default_factory=list)
+    timestamps: list[datetime] = field(default_factory=list)
+    minutes: list[datetime] = field(default_factory=list)
+    profiles: list[_TypeProfile] = field(default_factory=list)
+
+    # Temporal
+    event_clusters: list[dict[str, Any]] = field(default_factory=list)
+    cluster_start: int = 0
+    cluster_types: set[str] = field(default_factory=set)
+    time_gaps: list[dict[str, Any]] = field(default_factory=list)
+    minute_counts: dict[datetime, int] = field(default_factory=dict)
+    type_counts: dict[str, int] = field(default_factory=dict)
+    type_first: dict[str, datetime] = field(default_factory=dict)
+    type_last: dict[str, datetime] = field(default_factory=dict)
+
+    # Spatial
+    resource_stats: dict[str, _ResourceStats] = field(default_factory=dict)
+    access_counts: dict[tuple[str, str], int] = field(default_factory=dict)
+    cross_resource_activity: list[dict[str, Any]] = field(default_factory=list)
+    resource_impact: dict[str, list[int]] = field(default_factory=dict)
+    movement_events: list[dict[str, Any]] = field(default_factory=list)
+    movement_is_chain: bool = True
+
+    # Causal
+    cause_effect_pairs: list[dict[str, Any]] = field(default_factory=list)
+    cause_effect_keys: list[tuple[int, int]] = field(default_factory=list)
+    action_sequences: list[dict[str, Any]] = field(default_factory=list)
+    current_sequence: list[SecurityEvent] = field(default_factory=list)
+    action_pair_counts: dict[tuple[str, str], int] = field(default_factory=dict)
+    exfiltration: Optional[dict[str, Any]] = None
+    pending_queries: list[SecurityEvent] = field(default_factory=list)
+    latest_transfer: Optional[SecurityEvent] = None
+    pending_logins: list[SecurityEvent] = field(default_factory=list)
+    escalation_logins: list[SecurityEvent] = field(default_factory=list)
+    privilege_events: list[SecurityEvent] = field(default_factory=list)
+    phase_ranks: dict[str, int] = field(default_factory=dict)
+    attack_chains: list[dict[str, Any]] = field(default_factory=list)
+    current_chain: list[tuple[tuple[datetime, int, int], SecurityEvent, str]] = (
+        field(default_factory=list)
+    )
+
+    # Actor
+    actor_stats: dict[str, _ActorStats] = field(default_factory=dict)
+    resource_actors: dict[str, set[str]] = field(default_factory=dict)
+    actor_resource_positions: dict[str, list[int]] = field(default_factory=dict)
+    actor_pair_counts: dict[tuple[str, str], int] = field(default_factory=dict)
+    actor_pair_first: dict[tuple[str, str], tuple[int, int]] = field(
+        default_factory=dict
+    )
+
+
+@dataclass(slots=True)
+class _TrackedIncident:
+    """Correlation state of an incident and the prefix of its events it covers."""
+
+    state: CorrelationState
+    folded_count: int
+    prefix_digest: bytes  # Digest of the folded events' IDs, in incident order
+
+
+def _update_event_id_digest(digest: Any, events: Iterable[SecurityEvent]) -> None:
+    """Add event IDs, in order, to a running hashlib digest."""
+    for event in events:
+        digest.update(event.event_id.encode())
+        digest.update(b"\0")
 
 
 class EventCorrelator:
     """Handles correlation of security events to identify patterns and relationships."""
 
-    def __init__(self, logger: logging.Logger, correlation_window: int = 3600) -> None:
+    def __init__(
+        self,
+        logger: logging.Logger,
+        correlation_window: int = 3600,
+        max_tracked_incidents: int = 100,
+    ) -> None:
         """
         Initialize the event correlator.
 
         Args:
             logger: Logger instance for logging
             correlation_window: Time window in seconds for correlation (default: 1 hour)
+            max_tracked_incidents: Number of incidents whose correlation state
+                is kept for incremental updates; the least recently correlated
+                incident is dropped first
         """
         self.logger = logger
         self.correlation_window = correlation_window
+        self.max_tracked_incidents = max_tracked_incidents
+        self._type_profiles: dict[str, _TypeProfile] = {}
+        self._incident_states: dict[str, _TrackedIncident] = {}
 
     def correlate_events(self, events: list[SecurityEvent]) -> dict[str, Any]:
         """
@@ -41,13 +205,98 @@ class EventCorrelator:
             return self._empty_correlation_result()
 
         # Sort events by timestamp for temporal analysis
-        sorted_events = sorted(events, key=lambda e: e.timestamp)
+        state = CorrelationState()
+        for event in sorted(events, key=lambda e: e.timestamp):
+            self._fold_event(state, event)
+
+        return self._build_correlation_result(state)
+
+    def correlate_incident(self, incident: Incident) -> dict[str, Any]:
+        """
+        Correlate an incident's events, reusing the state of earlier calls.
+
+        Events appended to ``incident.events`` since the last call are folded
+        into the incident's saved state when none of them is older than the
+        events already folded. Otherwise, or when earlier events were
+        replaced, the state is rebuilt from all events. The folded events are
+        recognised by a digest of their ``event_id`` values, so an incident
+        rebuilt from its dictionary for every call still reuses its state.
+
+        Args:
+            incident: Incident whose events to correlate
+
+        Returns:
+            Dictionary containing correlation results, the same as
+            ``correlate_events(incident.events)``
+        """
+        events = incident.events
+        # Removed while folding so a failed update never leaves partial state
+        tracked = self._incident_states.pop(incident.incident_id, None)
+        if not events:
+            return self._empty_correlation_result()
+
+        folded_count = tracked.folded_count if tracked is not None else 0
+        digest = hashlib.blake2b(digest_size=16)
+        _update_event_id_digest(digest, islice(events, folded_count))
+        new_events = self._unfolded_events(tracked, events, digest.digest())
+        if tracked is None or new_events is None:
+            tracked = _TrackedIncident(CorrelationState(), 0, b"")
+            new_events = sorted(events, key=lambda e: e.timestamp)
+
+        for event in new_events:
+            self._fold_event(tracked.state, event)
+        _update_event_id_digest(digest, islice(events, folded_count, None))
+        tracked.folded_count = len(events)
+        tracked.prefix_digest = digest.digest()
+
+        self._incident_states[incident.incident_id] = tracked
+        while len(self._incident_states) > self.max_tracked_incidents:
+            del self._incident_states[next(iter(self._incident_states))]
+
+        return self._build_correlation_result(tracked.state)
 
+    def forget_incident(self, incident_id: str) -> None:
+        """
+        Drop the saved correlation state of an incident.
+
+        Args:
+            incident_id: ID of the incident
+        """
+        self._incident_states.pop(incident_id, None)
+
+    def _unfolded_events(
+        self,
+        tracked: Optional[_TrackedIncident],
+        events: list[SecurityEvent],
+        prefix_digest: bytes,
+    ) -> Optional[list[SecurityEvent]]:
+        """Get the events appended since the state was saved, if they can be folded in.
+
+        ``prefix_digest`` is the digest of the IDs of the first
+        ``tracked.folded_count`` events.
+        """
+        if (
+            tracked is None
+            or len(events) < tracked.folded_count
+            or prefix_digest != tracked.prefix_digest
+        ):
+            return None
+
+        new_events = events[tracked.folded_count:]
+        latest = tracked.state.timestamps[-1]
+        for event in new_events:
+            if event.timestamp < latest:
+                return None
+            latest = event.timestamp
+        return new_events
+
+    def _build_correlation_result(self, state: CorrelationState) -> dict[str, Any]:
+        """Build the correlation result from the folded state."""
         # Perform different types of correlation
-        temporal_patterns = self._temporal_correlation(sorted_events)
-        spatial_patterns = self._spatial_correlation(sorted_events)
-        causal_patterns = self._causal_correlation(sorted_events)
-        actor_patterns = self._actor_correlation(sorted_events)
+        temporal_patterns = self._temporal_correlation(state)
+        spatial_patterns = self._spatial_correlation(state)
+        causal_patterns = self._causal_correlation(state)
+        actor_patterns = self._actor_correlation(state)
 
         # Calculate correlation scores
         correlation_scores = self._calculate_correlation_scores(
@@ -59,19 +308,19 @@ class EventCorrelator:
 
         # Identify primary events
         primary_events = self._identify_primary_events(
-            sorted_events,
+            state,
             temporal_patterns,
             causal_patterns,
         )
 
         # Filter relevant events
         relevant_events = self._filter_relevant_events(
-            sorted_events,
+            state.events,
             correlation_scores,
         )
 
         correlation_result = {
-            "total_events": len(events),
+            "total_events": len(state.events),
             "correlation_window_seconds": self.correlation_window,
             "temporal_patterns": temporal_patterns,
             "spatial_patterns": spatial_patterns,
@@ -90,13 +339,264 @@ class EventCorrelator:
 
         self.logger.info(
             "Event correlation completed: %d events analyzed, %d primary events identified",
-            len(events),
+            len(state.events),
             len(primary_events),
         )
 
         return correlation_result
 
-    def _temporal_correlation(self, events: list[SecurityEvent]) -> dict[str, Any]:
+    def _profile_event_type(self, event_type: str) -> _TypeProfile:
+        """Classify an event type once against every indicator list."""
+        profile = self._type_profiles.get(event_type)
+        if profile is not None:
+            return profile
+
+        event_type_lower = event_type.lower()
+        cause_effect_rules = list(self._get_cause_effect_rules().items())
+        profile = _TypeProfile(
+            cause_rules=tuple(
+                position
+                for position, (cause_type, _) in enumerate(cause_effect_rules)
+                if cause_type in event_type_lower
+            ),
+            effect_rules=frozenset(
+                position
+                for position, (_, effect_types) in enumerate(cause_effect_rules)
+                if any(effect in event_type_lower for effect in effect_types)
+            ),
+            phases=tuple(
+                phase
+                for phase, indicators in self._get_kill_chain_phases().items()
+                if any(indicator in event_type_lower for indicator in indicators)
+            ),
+            is_data_access=any(
+                indicator in event_type_lower for indicator in DATA_ACCESS_INDICATORS
+            ),
+            is_data_transfer=any(
+                indicator in event_type_lower for indicator in DATA_TRANSFER_INDICATORS
+            ),
+            is_login="login" in event_type_lower,
+            is_privilege=any(
+                indicator in event_type_lower for indicator in PRIVILEGE_INDICATORS
+            ),
+            is_movement=any(
+                indicator in event_type_lower for indicator in MOVEMENT_INDICATORS
+            ),
+        )
+        self._type_profiles[event_type] = profile
+        return profile
+
+    def _fold_event(self, state: CorrelationState, event: SecurityEvent) -> None:
+        """Fold one event, no older than any folded before it, into the state."""
+        position = len(state.events)
+        timestamp = event.timestamp
+        profile = self._profile_event_type(event.event_type)
+
+        state.events.append(event)
+        state.timestamps.append(timestamp)
+        state.minutes.append(timestamp.replace(second=0, microsecond=0))
+        state.profiles.append(profile)
+
+        self._fold_temporal(state, position, event)
+        self._fold_spatial(state, event, profile)
+        self._fold_causal(state, position, event, profile)
+        self._fold_actor(state, position, event)
+
+    def _fold_temporal(
+        self, state: CorrelationState, position: int, event: SecurityEvent
+    ) -> None:
+        """Update clusters, time gaps, minute buckets and type frequencies."""
+        timestamp = state.timestamps[position]
+        minute = state.minutes[position]
+        state.minute_counts[minute] = state.minute_counts.get(minute, 0) + 1
+
+        event_type = event.event_type
+        if event_type not in state.type_counts:
+            state.type_counts[event_type] = 1
+            state.type_first[event_type] = timestamp
+            state.type_last[event_type] = timestamp
+        else:
+            state.type_counts[event_type] += 1
+            if timestamp > state.type_last[event_type]:
+                state.type_last[event_type] = timestamp
+
+        # Event clusters (events happening close together)
+        cluster_threshold = timedelta(seconds=300)  # 5 minutes
+        if position:
+            time_diff = timestamp - state.timestamps[position - 1]
+            if time_diff > cluster_threshold:
+                self._add_cluster_if_valid(
+                    state, position, state.event_clusters
+                )
+                self._record_time_gap(
+                    state.events[position - 1], event, time_diff, state.time_gaps
+                )
+                state.cluster_start = position
+                state.cluster_types = set()
+        state.cluster_types.add(event_type)
+
+    def _fold_spatial(
+        self, state: CorrelationState, event: SecurityEvent, profile: _TypeProfile
+    ) -> None:
+        """Update resource summaries, access pairs, impact and lateral movement."""
+        timestamp = event.timestamp
+        weight = RESOURCE_SEVERITY_WEIGHTS.get(event.severity, 1)
+
+        for resource in event.affected_resources:
+            self._add_resource_event(state, resource, event, timestamp)
+            impact = state.resource_impact.get(resource)
+            if impact is None:
+                impact = state.resource_impact[resource] = [0, 0]
+            impact[0] += 1
+            impact[1] += weight
+
+        # Also consider source resources
+        if event.source.resource_name:
+            source = f"{event.source.resource_type}:{event.source.resource_name}"
+            self._add_resource_event(state, source, event, timestamp)
+            for target in event.affected_resources:
+                pair = (source, target)
+                state.access_counts[pair] = state.access_counts.get(pair, 0) + 1
+
+        if len(event.affected_resources) > 1:
+            state.cross_resource_activity.append(
+                {
+                    "event_id": event.event_id,
+                    "event_type": event.event_type,
+                    "resource_count": len(event.affected_resources),
+                    "resources": event.affected_resources[:10],  # Limit for readability
+                },
+            )
+
+        if profile.is_movement:
+            movement_data = self._extract_movement_data(event)
+            if movement_data:
+                movement_events = state.movement_events
+                if movement_events and state.movement_is_chain:
+                    state.movement_is_chain = self._is_movement_link(
+                        movement_events[-1]["target"], movement_data["source"]
+                    )
+                movement_events.append(movement_data)
+
+    def _add_resource_event(
+        self,
+        state: CorrelationState,
+        resource: str,
+        event: SecurityEvent,
+        timestamp: datetime,
+    ) -> None:
+        """Add an event to the running summary of a resource."""
+        stats = state.resource_stats.get(resource)
+        if stats is None:
+            stats = state.resource_stats[resource] = _ResourceStats(
+                first_seen=timestamp, last_seen=timestamp
+            )
+        stats.last_seen = timestamp
+        stats.event_count += 1
+        stats.event_types.add(event.event_type)
+        stats.severity_levels.add(event.severity.value)
+
+    def _fold_causal(
+        self,
+        state: CorrelationState,
+        position: int,
+        event: SecurityEvent,
+        profile: _TypeProfile,
+    ) -> None:
+        """Update cause-effect pairs, sequences, special patterns and chains."""
+        timestamp = state.timestamps[position]
+
+        # An event can be the effect of any of the four events before it
+        if profile.effect_rules:
+            for cause in range(max(0, position - 4), position):
+                cause_rules = state.profiles[cause].cause_rules
+                if not cause_rules:
+                    continue
+                time_diff = (timestamp - state.timestamps[cause]).total_seconds()
+
+                # Only consider events within 30 minutes
+                if time_diff > 1800:
+                    continue
+
+                self._check_cause_effect_relationship(
+                    state,
+                    (cause, position),
+                    time_diff,
+                    cause_rules,
+                    profile.effect_rules,
+                )
+
+        # Action sequences (consecutive related actions)
+        sequence = state.current_sequence
+        if sequence:
+            previous = sequence[-1]
+            time_diff = (timestamp - previous.timestamp).total_seconds()
+
+            # Consider same actor or same resource as related
+            is_related = time_diff < 300 and (  # Within 5 minutes
+                event.actor == previous.actor
+                or not set(event.affected_resources).isdisjoint(
+                    previous.affected_resources
+                )
+            )
+
+            if not is_related:
+                self._add_action_sequence(sequence, state.action_sequences)
+                sequence = state.current_sequence = []
+        sequence.append(event)
+
+        # Common action patterns
+        if position:
+            previous_timestamp = state.timestamps[position - 1]
+            if (timestamp - previous_timestamp).total_seconds() < 600:
+                pair = (state.events[position - 1].event_type, event.event_type)
+                state.action_pair_counts[pair] = (
+                    state.action_pair_counts.get(pair, 0) + 1
+                )
+
+        self._fold_data_exfiltration(state, event, profile)
+        self._fold_privilege_escalation(state, event, profile)
+
+        for phase in profile.phases:
+            rank = state.phase_ranks.setdefault(phase, len(state.phase_ranks))
+            self._add_chain_event(state, (timestamp, rank, position), event, phase)
+
+    def _fold_actor(
+        self, state: CorrelationState, position: int, event: SecurityEvent
+    ) -> None:
+        """Update actor summaries, multi-actor resources and collaboration."""
+        actor = event.actor
+        if not actor:
+            return
+
+        timestamp = state.timestamps[position]
+        stats = state.actor_stats.get(actor)
+        if stats is None:
+            stats = state.actor_stats[actor] = _ActorStats(
+                first_seen=timestamp, last_seen=timestamp, period_start=timestamp
+            )
+        elif (timestamp - stats.last_seen).total_seconds() > 1800:  # 30 min gap
+            stats.closed_periods.append(
+                self._activity_period(stats.period_start, stats.last_seen)
+            )
+            stats.period_start = timestamp
+        stats.last_seen = timestamp
+
+        stats.event_count += 1
+        stats.event_types.add(event.event_type)
+        severity = event.severity.value
+        stats.severity_distribution[severity] = (
+            stats.severity_distribution.get(severity, 0) + 1
+        )
+        stats.resources_accessed.update(event.affected_resources)
+
+        for resource in event.affected_resources:
+            state.resource_actors.setdefault(resource, set()).add(actor)
+
+        if event.affected_resources:
+            self._fold_actor_collaboration(state, position, event)
+
+    def _temporal_correlation(self, state: CorrelationState) -> dict[str, Any]:
         """Analyze temporal patterns in events."""
         patterns: dict[str, Any] = {
             "event_clusters": [],
@@ -107,47 +607,36 @@ class EventCorrelator:
         }
 
         min_events_for_correlation = 2
-        if len(events) < min_events_for_correlation:
+        if len(state.events) < min_events_for_correlation:
             return patterns
 
-        self._identify_event_clusters(events, patterns)
-        self._identify_burst_periods(events, patterns)
-        self._calculate_event_frequency(events, patterns)
-        self._build_temporal_sequence(events, patterns)
+        patterns["event_clusters"] = list(state.event_clusters)
+        # Handle last cluster
+        self._add_cluster_if_valid(
+            state, len(state.events), patterns["event_clusters"]
+        )
+        patterns["time_gaps"] = list(state.time_gaps)
+        self._identify_burst_periods(state, patterns)
+        self._calculate_event_frequency(state, patterns)
+        self._build_temporal_sequence(state.events, patterns)
 
         return patterns
 
-    def _identify_event_clusters(
-        self, events: list[SecurityEvent], patterns: dict[str, Any]
-    ) -> None:
-        """Identify event clusters (events happening close together)."""
-        cluster_threshold = timedelta(seconds=300)  # 5 minutes
-        current_cluster = [events[0]]
-
-        for i in range(1, len(events)):
-            time_diff = events[i].timestamp - events[i - 1].timestamp
-
-            if time_diff <= cluster_threshold:
-                current_cluster.append(events[i])
-            else:
-                self._add_cluster_if_valid(current_cluster, patterns)
-                self._record_time_gap(events[i - 1], events[i], time_diff, patterns)
-                current_cluster = [events[i]]
-
-        # Handle last cluster
-        self._add_cluster_if_valid(current_cluster, patterns)
-
     def _add_cluster_if_valid(
-        self, cluster: list[SecurityEvent], patterns: dict[str, Any]
+        self,
+        state: CorrelationState,
+        cluster_end: int,
+        clusters: list[dict[str, Any]],
     ) -> None:
-        """Add cluster to patterns if it has more than one event."""
-        if len(cluster) > 1:
-            patterns["event_clusters"].append(
+        """Add the cluster ending before ``cluster_end`` if it has more than one event."""
+        cluster_start = state.cluster_start
+        if cluster_end - cluster_start > 1:
+            clusters.append(
                 {
-                    "start_time": cluster[0].timestamp.isoformat(),
-                    "end_time": cluster[-1].timestamp.isoformat(),
-                    "event_count": len(cluster),
-                    "event_types": list({e.event_type for e in cluster}),
+                    "start_time": state.timestamps[cluster_start].isoformat(),
+                    "end_time": state.timestamps[cluster_end - 1].isoformat(),
+                    "event_count": cluster_end - cluster_start,
+                    "event_types": list(state.cluster_types),
                 },
             )
 
@@ -156,10 +645,10 @@ class EventCorrelator:
         before_event: SecurityEvent,
         after_event: SecurityEvent,
         time_diff: timedelta,
-        patterns: dict[str, Any],
+        time_gaps: list[dict[str, Any]],
     ) -> None:
         """Record time gap between events."""
-        patterns["time_gaps"].append(
+        time_gaps.append(
             {
                 "gap_seconds": time_diff.total_seconds(),
                 "before_event": before_event.event_id,
@@ -168,15 +657,12 @@ class EventCorrelator:
         )
 
     def _identify_burst_periods(
-        self, events: list[SecurityEvent], patterns: dict[str, Any]
+        self, state: CorrelationState, patterns: dict[str, Any]
     ) -> None:
         """Identify burst periods (high frequency of events)."""
-        time_buckets: defaultdict[datetime, int] = defaultdict(int)
-        for event in events:
-            bucket = event.timestamp.replace(second=0, microsecond=0)
-            time_buckets[bucket] += 1
+        time_buckets = state.minute_counts
 
-        avg_events_per_minute = len(events) / max(1, len(time_buckets))
+        avg_events_per_minute = len(state.events) / max(1, len(time_buckets))
         burst_threshold = avg_events_per_minute * 2
 
         for bucket, count in time_buckets.items():
@@ -190,18 +676,14 @@ class EventCorrelator:
                 )
 
     def _calculate_event_frequency(
-        self, events: list[SecurityEvent], patterns: dict[str, Any]
+        self, state: CorrelationState, patterns: dict[str, Any]
     ) -> None:
         """Calculate event frequency by type."""
-        type_frequency = defaultdict(list)
-        for event in events:
-            type_frequency[event.event_type].append(event.timestamp)
-
-        for event_type, timestamps in type_frequency.items():
+        for event_type, count in state.type_counts.items():
             patterns["event_frequency"][event_type] = {
-                "count": len(timestamps),
-                "first_occurrence": min(timestamps).isoformat(),
-                "last_occurrence": max(timestamps).isoformat(),
+                "count": count,
+                "first_occurrence": state.type_first[event_type].isoformat(),
+                "last_occurrence": state.type_last[event_type].isoformat(),
             }
 
     def _build_temporal_sequence(
@@ -217,144 +699,78 @@ class EventCorrelator:
             for e in events[:20]  # Limit to first 20 for readability
         ]
 
-    def _spatial_correlation(self, events: list[SecurityEvent]) -> dict[str, Any]:
+    def _spatial_correlation(self, state: CorrelationState) -> dict[str, Any]:
         """Analyze spatial patterns (resource-based correlations)."""
         patterns: dict[str, Any] = {
             "resource_clusters": {},
             "resource_access_patterns": {},
-            "cross_resource_activity": [],
+            "cross_resource_activity": list(state.cross_resource_activity),
             "resource_targeting": {},
         }
 
-        resource_events = self._group_events_by_resources(events)
-        self._analyze_resource_clusters(resource_events, patterns)
-        self._identify_resource_access_patterns(events, patterns)
-        self._identify_cross_resource_activity(events, patterns)
-        self._analyze_resource_targeting(events, patterns)
-        self._detect_lateral_movement(events, patterns)
+        self._analyze_resource_clusters(state, patterns)
+        self._identify_resource_access_patterns(state, patterns)
+        self._analyze_resource_targeting(state, patterns)
+        self._detect_lateral_movement(state, patterns)
 
         return patterns
 
-    def _group_events_by_resources(
-        self, events: list[SecurityEvent]
-    ) -> defaultdict[str, list[SecurityEvent]]:
-        """Group events by affected resources."""
-        resource_events: defaultdict[str, list[SecurityEvent]] = defaultdict(list)
-        for event in events:
-            for resource in event.affected_resources:
-                resource_events[resource].append(event)
-
-            # Also consider source resources
-            if event.source.resource_name:
-                resource_key = (
-                    f"{event.source.resource_type}:{event.source.resource_name}"
-                )
-                resource_events[resource_key].append(event)
-        return resource_events
-
     def _analyze_resource_clusters(
-        self,
-        resource_events: defaultdict[str, list[SecurityEvent]],
-        patterns: dict[str, Any],
+        self, state: CorrelationState, patterns: dict[str, Any]
     ) -> None:
         """Analyze resource clusters (multiple events on same resource)."""
-        for resource, res_events in resource_events.items():
-            if len(res_events) > 1:
+        for resource, stats in state.resource_stats.items():
+            if stats.event_count > 1:
                 patterns["resource_clusters"][resource] = {
-                    "event_count": len(res_events),
-                    "event_types": list({e.event_type for e in res_events}),
-                    "severity_levels": list({e.severity.value for e in res_events}),
+                    "event_count": stats.event_count,
+                    "event_types": list(stats.event_types),
+                    "severity_levels": list(stats.severity_levels),
                     "time_span_seconds": (
-                        res_events[-1].timestamp - res_events[0].timestamp
+                        stats.last_seen - stats.first_seen
                     ).total_seconds(),
                 }
 
     def _identify_resource_access_patterns(
-        self, events: list[SecurityEvent], patterns: dict[str, Any]
+        self, state: CorrelationState, patterns: dict[str, Any]
     ) -> None:
         """Identify resource access patterns."""
-        source_target_pairs: defaultdict[tuple[str, str], int] = defaultdict(int)
-        for event in events:
-            if event.source.resource_name and event.affected_resources:
-                source = f"{event.source.resource_type}:{event.source.resource_name}"
-                for target in event.affected_resources:
-                    source_target_pairs[(source, target)] += 1
-
         patterns["resource_access_patterns"] = [
             {"source": source, "target": target, "access_count": count}
-            for (source, target), count in source_target_pairs.items()
+            for (source, target), count in state.access_counts.items()
             if count > 1
         ]
 
-    def _identify_cross_resource_activity(
-        self, events: list[SecurityEvent], patterns: dict[str, Any]
-    ) -> None:
-        """Identify cross-resource activity."""
-        for event in events:
-            if len(event.affected_resources) > 1:
-                patterns["cross_resource_activity"].append(
-                    {
-                        "event_id": event.event_id,
-                        "event_type": event.event_type,
-                        "resource_count": len(event.affected_resources),
-                        "resources": event.affected_resources[
-                            :10
-                        ],  # Limit for readability
-                    },
-                )
-
     def _analyze_resource_targeting(
-        self, events: list[SecurityEvent], patterns: dict[str, Any]
+        self, state: CorrelationState, patterns: dict[str, Any]
     ) -> None:
         """Analyze resource targeting (which resources are most affected)."""
-        resource_impact: defaultdict[str, dict[str, int]] = defaultdict(
-            lambda: {"events": 0, "severity_sum": 0},
+        # Top 10 targeted resources by impact score, ties in first-seen order
+        top_targets = heapq.nlargest(
+            10, state.resource_impact.items(), key=lambda item: item[1][1]
         )
-        severity_weights = {
-            SeverityLevel.CRITICAL: 5,
-            SeverityLevel.HIGH: 4,
-            SeverityLevel.MEDIUM: 3,
-            SeverityLevel.LOW: 2,
-            SeverityLevel.INFORMATIONAL: 1,
-        }
-
-        for event in events:
-            weight = severity_weights.get(event.severity, 1)
-            for resource in event.affected_resources:
-                resource_impact[resource]["events"] += 1
-                resource_impact[resource]["severity_sum"] += weight
-
-        # Sort by impact score
-        sorted_targets = sorted(
-            resource_impact.items(),
-            key=lambda x: x[1]["severity_sum"],
-            reverse=True,
-        )[
-            :10
-        ]  # Top 10 targeted resources
 
         patterns["resource_targeting"] = {
             resource: {
-                "event_count": data["events"],
-                "impact_score": data["severity_sum"],
+                "event_count": event_count,
+                "impact_score": severity_sum,
             }
-            for resource, data in sorted_targets
+            for resource, (event_count, severity_sum) in top_targets
         }
 
-    def _causal_correlation(self, events: list[SecurityEvent]) -> dict[str, Any]:
+    def _causal_correlation(self, state: CorrelationState) -> dict[str, Any]:
         """Analyze causal patterns (action-based correlations)."""
         patterns: dict[str, Any] = {
-            "action_sequences": [],
-            "cause_effect_pairs": [],
+            "action_sequences": list(state.action_sequences),
+            "cause_effect_pairs": list(state.cause_effect_pairs),
             "action_chains": [],
             "common_patterns": {},
         }
 
-        self._find_cause_effect_pairs(events, patterns)
-        self._identify_action_sequences(events, patterns)
-        self._identify_common_patterns(events, patterns)
-        self._detect_special_patterns(events, patterns)
-        self._detect_attack_chains(events, patterns)
+        # Handle last sequence
+        self._add_action_sequence(state.current_sequence, patterns["action_sequences"])
+        self._identify_common_patterns(state, patterns)
+        self._detect_special_patterns(state, patterns)
+        self._detect_attack_chains(state, patterns)
 
         return patterns
 
@@ -372,44 +788,27 @@ class EventCorrelator:
             "configuration_change": ["service_disruption", "security_misconfiguration"],
         }
 
-    def _find_cause_effect_pairs(
-        self, events: list[SecurityEvent], patterns: dict[str, Any]
-    ) -> None:
-        """Look for cause-effect pairs in events."""
-        cause_effect_rules = self._get_cause_effect_rules()
-
-        for i in range(len(events) - 1):
-            current_event = events[i]
-
-            # Check next few events for potential effects
-            for j in range(i + 1, min(i + 5, len(events))):
-                next_event = events[j]
-                time_diff = (
-                    next_event.timestamp - current_event.timestamp
-                ).total_seconds()
-
-                # Only consider events within 30 minutes
-                if time_diff > 1800:
-                    break
-
-                self._check_cause_effect_relationship(
-                    current_event, next_event, time_diff, cause_effect_rules, patterns
-                )
-
     def _check_cause_effect_relationship(
         self,
-        current_event: SecurityEvent,
-        next_event: SecurityEvent,
+        state: CorrelationState,
+        pair_key: tuple[int, int],
         time_diff: float,
-        cause_effect_rules: dict[str, list[str]],
-        patterns: dict[str, Any],
+        cause_rules: tuple[int, ...],
+        effect_rules: frozenset[int],
     ) -> None:
-        """Check if two events have a cause-effect relationship."""
-        for cause_type, effect_types in cause_effect_rules.items():
-            if cause_type in current_event.event_type.lower() and any(
-                effect in next_event.event_type.lower() for effect in effect_types
-            ):
-                patterns["cause_effect_pairs"].append(
+        """Record one pair per rule the events match as cause and effect.
+
+        Pairs are kept ordered by cause position, then effect position, so
+        folding events one at a time lists them as a forward scan would.
+        """
+        current_event = state.events[pair_key[0]]
+        next_event = state.events[pair_key[1]]
+        for rule in cause_rules:
+            if rule in effect_rules:
+                index = bisect_right(state.cause_effect_keys, pair_key)
+                state.cause_effect_keys.insert(index, pair_key)
+                state.cause_effect_pairs.insert(
+                    index,
                     {
                         "cause_event": {
                             "id": current_event.event_id,
@@ -425,44 +824,12 @@ class EventCorrelator:
                     },
                 )
 
-    def _identify_action_sequences(
-        self, events: list[SecurityEvent], patterns: dict[str, Any]
-    ) -> None:
-        """Identify action sequences (consecutive related actions)."""
-        current_sequence: list[SecurityEvent] = []
-        for event in events:
-            if not current_sequence:
-                current_sequence.append(event)
-            else:
-                # Check if this event is related to the sequence
-                time_diff = (
-                    event.timestamp - current_sequence[-1].timestamp
-                ).total_seconds()
-
-                # Consider same actor or same resource as related
-                is_related = time_diff < 300 and (  # Within 5 minutes
-                    event.actor == current_sequence[-1].actor
-                    or bool(
-                        set(event.affected_resources)
-                        & set(current_sequence[-1].affected_resources),
-                    )
-                )
-
-                if is_related:
-                    current_sequence.append(event)
-                else:
-                    self._add_action_sequence(current_sequence, patterns)
-                    current_sequence = [event]
-
-        # Handle last sequence
-        self._add_action_sequence(current_sequence, patterns)
-
     def _add_action_sequence(
-        self, sequence: list[SecurityEvent], patterns: dict[str, Any]
+        self, sequence: list[SecurityEvent], sequences: list[dict[str, Any]]
     ) -> None:
-        """Add an action sequence to patterns if it's long enough."""
+        """Add an action sequence to the sequences if it's long enough."""
         if len(sequence) > 2:
-            patterns["action_sequences"].append(
+            sequences.append(
                 {
                     "sequence_length": len(sequence),
                     "duration_seconds": (
@@ -476,22 +843,16 @@ class EventCorrelator:
             )
 
     def _identify_common_patterns(
-        self, events: list[SecurityEvent], patterns: dict[str, Any]
+        self, state: CorrelationState, patterns: dict[str, Any]
     ) -> None:
         """Identify common action patterns."""
-        action_pairs: defaultdict[tuple[str, str], int] = defaultdict(int)
-        for i in range(len(events) - 1):
-            if (events[i + 1].timestamp - events[i].timestamp).total_seconds() < 600:
-                pair = (events[i].event_type, events[i + 1].event_type)
-                action_pairs[pair] += 1
-
         patterns["common_patterns"] = {
             f"{pair[0]} -> {pair[1]}": count
-            for pair, count in action_pairs.items()
+            for pair, count in state.action_pair_counts.items()
             if count > 1
         }
 
-    def _actor_correlation(self, events: list[SecurityEvent]) -> dict[str, Any]:
+    def _actor_correlation(self, state: CorrelationState) -> dict[str, Any]:
         """Analyze actor-based patterns (user behavior correlations)."""
         patterns: dict[str, Any] = {
             "actor_activity": {},
@@ -500,31 +861,18 @@ class EventCorrelator:
             "suspicious_actors": [],
         }
 
-        actor_events = self._group_events_by_actor(events)
-        self._analyze_actor_activities(actor_events, patterns)
-        self._identify_multi_actor_resources(events, patterns)
-        self._detect_actor_collaboration(events, patterns)
+        self._analyze_actor_activities(state, patterns)
+        self._identify_multi_actor_resources(state, patterns)
+        self._detect_actor_collaboration(state, patterns)
 
         return patterns
 
-    def _group_events_by_actor(
-        self, events: list[SecurityEvent]
-    ) -> defaultdict[str, list[SecurityEvent]]:
-        """Group events by actor."""
-        actor_events: defaultdict[str, list[SecurityEvent]] = defaultdict(list)
-        for event in events:
-            if event.actor:
-                actor_events[event.actor].append(event)
-        return actor_events
-
     def _analyze_actor_activities(
-        self,
-        actor_events: defaultdict[str, list[SecurityEvent]],
-        patterns: dict[str, Any],
+        self, state: CorrelationState, patterns: dict[str, Any]
     ) -> None:
         """Analyze each actor's activity."""
-        for actor, actor_event_list in actor_events.items():
-            actor_data = self._build_actor_data(actor_event_list)
+        for actor, stats in state.actor_stats.items():
+            actor_data = self._build_actor_data(stats)
             patterns["actor_activity"][actor] = actor_data
 
             if self._is_actor_suspicious(actor_data):
@@ -535,71 +883,38 @@ class EventCorrelator:
                     },
                 )
 
-    def _build_actor_data(
-        self, actor_event_list: list[SecurityEvent]
-    ) -> dict[str, Any]:
-        """Build actor data from their events."""
-        severity_distribution: dict[str, int] = defaultdict(int)
-        resources_accessed: set[str] = set()
-
-        # Calculate severity distribution and resources
-        for event in actor_event_list:
-            severity_distribution[event.severity.value] += 1
-            resources_accessed.update(event.affected_resources)
-
+    def _build_actor_data(self, stats: _ActorStats) -> dict[str, Any]:
+        """Build actor data from the running summary of their events."""
         actor_data: dict[str, Any] = {
-            "event_count": len(actor_event_list),
-            "event_types": list(set(e.event_type for e in actor_event_list)),
-            "severity_distribution": dict(severity_distribution),
-            "resources_accessed": list(resources_accessed),
+            "event_count": stats.event_count,
+            "event_types": list(stats.event_types),
+            "severity_distribution": dict(stats.severity_distribution),
+            "resources_accessed": list(stats.resources_accessed),
             "time_span_seconds": 0,
             "activity_periods": [],
         }
 
         # Calculate time span
-        if len(actor_event_list) > 1:
+        if stats.event_count > 1:
             actor_data["time_span_seconds"] = (
-                actor_event_list[-1].timestamp - actor_event_list[0].timestamp
+                stats.last_seen - stats.first_seen
             ).total_seconds()
 
-        # Identify activity periods
-        if len(actor_event_list) > 2:
-            actor_data["activity_periods"] = self._calculate_activity_periods(
-                actor_event_list
-            )
+        # Identify activity periods, closing the current one
+        if stats.event_count > 2:
+            actor_data["activity_periods"] = stats.closed_periods + [
+                self._activity_period(stats.period_start, stats.last_seen)
+            ]
 
         return actor_data
 
-    def _calculate_activity_periods(
-        self, actor_event_list: list[SecurityEvent]
-    ) -> list[dict[str, Any]]:
-        """Calculate activity periods for an actor."""
-        periods = []
-        period_start = actor_event_list[0].timestamp
-        last_time = actor_event_list[0].timestamp
-
-        for event in actor_event_list[1:]:
-            if (event.timestamp - last_time).total_seconds() > 1800:  # 30 min gap
-                periods.append(
-                    {
-                        "start": period_start.isoformat(),
-                        "end": last_time.isoformat(),
-                        "duration_seconds": (last_time - period_start).total_seconds(),
-                    },
-                )
-                period_start = event.timestamp
-            last_time = event.timestamp
-
-        # Add last period
-        periods.append(
-            {
-                "start": period_start.isoformat(),
-                "end": last_time.isoformat(),
-                "duration_seconds": (last_time - period_start).total_seconds(),
-            },
-        )
-
-        return periods
+    def _activity_period(self, start: datetime, end: datetime) -> dict[str, Any]:
+        """Describe one period of an actor's activity."""
+        return {
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "duration_seconds": (end - start).total_seconds(),
+        }
 
     def _is_actor_suspicious(self, actor_data: dict[str, Any]) -> bool:
         """Check if an actor's activity is suspicious."""
@@ -611,65 +926,65 @@ class EventCorrelator:
         )
 
     def _identify_multi_actor_resources(
-        self, events: list[SecurityEvent], patterns: dict[str, Any]
+        self, state: CorrelationState, patterns: dict[str, Any]
     ) -> None:
         """Identify resources accessed by multiple actors."""
-        resource_actors = defaultdict(set)
-        for event in events:
-            if event.actor:
-                for resource in event.affected_resources:
-                    resource_actors[resource].add(event.actor)
-
-        for resource, actors in resource_actors.items():
+        for resource, actors in state.resource_actors.items():
             if len(actors) > 1:
                 patterns["multi_actor_resources"][resource] = list(actors)
 
-    def _detect_actor_collaboration(
-        self, events: list[SecurityEvent], patterns: dict[str, Any]
+    def _fold_actor_collaboration(
+        self, state: CorrelationState, position: int, event: SecurityEvent
     ) -> None:
-        """Look for potential actor collaboration."""
-        actor_pairs: defaultdict[tuple[str, str], int] = defaultdict(int)
-        time_window = timedelta(minutes=5)
+        """Pair an event with earlier events by other actors on a shared resource.
 
-        for i, event_i in enumerate(events):
-            if not event_i.actor:
+        Only events within the last five minutes can pair with this or any
+        later event, so older positions are dropped from the resource lists.
+        """
+        time_window = timedelta(minutes=5)
+        window_start = bisect_left(
+            state.timestamps, state.timestamps[position] - time_window, hi=position
+        )
+        resources = set(event.affected_resources)
+
+        partners: set[int] = set()
+        for resource in resources:
+            positions = state.actor_resource_positions.setdefault(resource, [])
+            start = bisect_left(positions, window_start)
+            partners.update(positions[start:])
+            if start > 64 and 2 * start > len(positions):
+                del positions[:start]
+            positions.append(position)
+
+        actor = event.actor
+        for partner in partners:
+            partner_actor = state.events[partner].actor
+            if partner_actor == actor:
                 continue
+            # Only events with an actor are folded into resource positions
+            assert actor is not None and partner_actor is not None
+            actor1, actor2 = sorted([partner_actor, actor])
+            pair = (actor1, actor2)
+            state.actor_pair_counts[pair] = state.actor_pair_counts.get(pair, 0) + 1
+            # Report pairs in the order a forward scan first meets them
+            pair_key = (partner, position)
+            first_key = state.actor_pair_first.get(pair)
+            if first_key is None or pair_key < first_key:
+                state.actor_pair_first[pair] = pair_key
 
-            for j in range(i + 1, len(events)):
-                if not events[j].actor or events[j].actor == event_i.actor:
-                    continue
-
-                if events[j].timestamp - event_i.timestamp > time_window:
-                    break
-
-                self._check_actor_collaboration(event_i, events[j], actor_pairs)
-
-        patterns["actor_collaboration"] = [
-            {"actors": list(pair), "interaction_count": count}
-            for pair, count in actor_pairs.items()
-            if count > 1
-        ]
-
-    def _check_actor_collaboration(
-        self,
-        event_i: SecurityEvent,
-        event_j: SecurityEvent,
-        actor_pairs: defaultdict[tuple[str, str], int],
+    def _detect_actor_collaboration(
+        self, state: CorrelationState, patterns: dict[str, Any]
     ) -> None:
-        """Check if two events show actor collaboration."""
-        # Check if they're working on same resources
-        common_resources = set(event_i.affected_resources) & set(
-            event_j.affected_resources,
+        """Look for potential actor collaboration."""
+        collaborating = sorted(
+            (state.actor_pair_first[pair], pair)
+            for pair, count in state.actor_pair_counts.items()
+            if count > 1
         )
-
-        if common_resources and event_i.actor and event_j.actor:
-            actor1 = event_i.actor
-            actor2 = event_j.actor
-            if actor1 is not None and actor2 is not None:
-                sorted_actors = sorted([actor1, actor2])
-                if len(sorted_actors) == 2:
-                    pair = (sorted_actors[0], sorted_actors[1])
-                    actor_pairs[pair] += 1
+        patterns["actor_collaboration"] = [
+            {"actors": list(pair), "interaction_count": state.actor_pair_counts[pair]}
+            for _, pair in collaborating
+        ]
 
     def _get_suspicion_reasons(self, actor_data: dict[str, Any]) -> list[str]:
         """Determine reasons why an actor is suspicious."""
@@ -787,17 +1102,17 @@ class EventCorrelator:
 
     def _identify_primary_events(
         self,
-        events: list[SecurityEvent],
+        state: CorrelationState,
         temporal: dict[str, Any],
         causal: dict[str, Any],
     ) -> list[dict[str, Any]]:
         """Identify the most important events in the incident."""
-        event_scores = self._score_events(events, temporal, causal)
-        return self._select_top_events(events, event_scores)
+        event_scores = self._score_events(state, temporal, causal)
+        return self._select_top_events(state.events, event_scores)
 
     def _score_events(
         self,
-        events: list[SecurityEvent],
+        state: CorrelationState,
         temporal: dict[str, Any],
         causal: dict[str, Any],
     ) -> defaultdict[str, float]:
@@ -805,7 +1120,7 @@ class EventCorrelator:
         event_scores: defaultdict[str, float] = defaultdict(float)
 
         # Score based on severity
-        self._apply_severity_scores(events, event_scores)
+        self._apply_severity_scores(state.events, event_scores)
 
         # Boost score for events that appear as causes
         self._boost_cause_event_scores(causal, event_scores)
@@ -814,7 +1129,7 @@ class EventCorrelator:
         self._boost_sequence_start_scores(causal, event_scores)
 
         # Boost score for events in burst periods
-        self._boost_burst_period_scores(events, temporal, event_scores)
+        self._boost_burst_period_scores(state, temporal, event_scores)
 
         return event_scores
 
@@ -854,7 +1169,7 @@ class EventCorrelator:
 
     def _boost_burst_period_scores(
         self,
-        events: list[SecurityEvent],
+        state: CorrelationState,
         temporal: dict[str, Any],
         event_scores: defaultdict[str, float],
     ) -> None:
@@ -863,9 +1178,10 @@ class EventCorrelator:
             datetime.fromisoformat(burst["timestamp"])
             for burst in temporal.get("burst_periods", [])
         }
+        if not burst_times:
+            return
 
-        for event in events:
-            event_minute = event.timestamp.replace(second=0, microsecond=0)
+        for event, event_minute in zip(state.events, state.minutes):
             if event_minute in burst_times:
                 event_scores[event.event_id] += 0.2
 
@@ -874,13 +1190,10 @@ class EventCorrelator:
     ) -> list[dict[str, Any]]:
         """Select top scoring events."""
         primary_events = []
-        sorted_events = sorted(
-            events,
-            key=lambda e: event_scores[e.event_id],
-            reverse=True,
-        )
+        # Same order as a stable descending sort, without sorting every event
+        top_events = heapq.nlargest(5, events, key=lambda e: event_scores[e.event_id])
 
-        for event in sorted_events[:5]:  # Top 5 primary events
+        for event in top_events:  # Top 5 primary events
             if event_scores[event.event_id] > 0.3:  # Minimum threshold
                 primary_events.append(
                     {
@@ -927,56 +1240,46 @@ class EventCorrelator:
         return list(relevant_ids)
 
     def _detect_special_patterns(
-        self, events: list[SecurityEvent], patterns: dict[str, Any]
+        self, state: CorrelationState, patterns: dict[str, Any]
     ) -> None:
         """Detect special security patterns like data exfiltration and privilege escalation."""
-        self._detect_data_exfiltration(events, patterns)
-        self._detect_privilege_escalation(events, patterns)
-
-    def _detect_data_exfiltration(
-        self, events: list[SecurityEvent], patterns: dict[str, Any]
-    ) -> None:
-        """Detect data exfiltration patterns."""
-        data_query_events = self._find_data_query_events(events)
-        data_transfer_events = self._find_data_transfer_events(events)
-
-        # Check for data exfiltration pattern: large query followed by large transfer
-        if data_query_events and data_transfer_events:
-            self._check_exfiltration_pattern(
-                data_query_events, data_transfer_events, patterns
-            )
-
-    def _find_data_query_events(
-        self, events: list[SecurityEvent]
-    ) -> list[SecurityEvent]:
-        """Find events related to data queries."""
-        data_query_events = []
-        data_access_indicators = ["database_query", "file_access", "data_collection"]
+        if state.exfiltration is not None:
+            patterns["data_exfiltration_suspected"] = True
+            patterns["exfiltration_details"] = dict(state.exfiltration)
 
-        for event in events:
-            event_type_lower = event.event_type.lower()
-            if any(
-                indicator in event_type_lower for indicator in data_access_indicators
-            ):
-                if self._is_large_data_access(event):
-                    data_query_events.append(event)
-
-        return data_query_events
-
-    def _find_data_transfer_events(
-        self, events: list[SecurityEvent]
-    ) -> list[SecurityEvent]:
-        """Find events related to data transfers."""
-        data_transfer_events = []
-        transfer_indicators = ["network_traffic", "data_transfer", "file_download"]
+        all_priv_events = self._remove_duplicate_events(
+            state.escalation_logins + state.privilege_events
+        )
+        if len(all_priv_events) >= 2:
+            self._check_privilege_escalation_pattern(all_priv_events, patterns)
 
-        for event in events:
-            event_type_lower = event.event_type.lower()
-            if any(indicator in event_type_lower for indicator in transfer_indicators):
-                if self._is_large_data_transfer(event):
-                    data_transfer_events.append(event)
+    def _fold_data_exfiltration(
+        self, state: CorrelationState, event: SecurityEvent, profile: _TypeProfile
+    ) -> None:
+        """Track large data queries until a large transfer follows one.
 
-        return data_transfer_events
+        The first query, in time order, whose earliest following transfer is
+        within 30 minutes is reported. Queries are only pending until the next
+        transfer: later transfers are further away from them.
+        """
+        is_query = profile.is_data_access and self._is_large_data_access(event)
+        is_transfer = profile.is_data_transfer and self._is_large_data_transfer(event)
+        if state.exfiltration is not None:
+            return
+
+        if is_query:
+            latest = state.latest_transfer
+            if latest is not None and latest.timestamp == event.timestamp:
+                self._check_exfiltration_pattern([event], latest, state)
+                return
+            state.pending_queries.append(event)
+
+        if is_transfer:
+            latest = state.latest_transfer
+            if latest is None or event.timestamp > latest.timestamp:
+                state.latest_transfer = event
+            self._check_exfiltration_pattern(state.pending_queries, event, state)
+            state.pending_queries = []
 
     def _is_large_data_access(self, event: SecurityEvent) -> bool:
         """Check if event represents large data access."""
@@ -996,85 +1299,43 @@ class EventCorrelator:
     def _check_exfiltration_pattern(
         self,
         data_query_events: list[SecurityEvent],
-        data_transfer_events: list[SecurityEvent],
-        patterns: dict[str, Any],
+        transfer: SecurityEvent,
+        state: CorrelationState,
     ) -> None:
-        """Check for data exfiltration pattern."""
+        """Check queries, in time order, against the first transfer after them."""
         for query in data_query_events:
-            for transfer in data_transfer_events:
-                time_diff = (transfer.timestamp - query.timestamp).total_seconds()
-                if 0 <= time_diff <= 1800:  # Within 30 minutes
-                    patterns["data_exfiltration_suspected"] = True
-                    patterns["exfiltration_details"] = {
-                        "query_event": query.event_id,
-                        "transfer_event": transfer.event_id,
-                        "time_gap_seconds": time_diff,
-                    }
-                    return
+            time_diff = (transfer.timestamp - query.timestamp).total_seconds()
+            if 0 <= time_diff <= 1800:  # Within 30 minutes
+                state.exfiltration = {
+                    "query_event": query.event_id,
+                    "transfer_event": transfer.event_id,
+                    "time_gap_seconds": time_diff,
+                }
+                return
 
-    def _detect_privilege_escalation(
-        self, events: list[SecurityEvent], patterns: dict[str, Any]
+    def _fold_privilege_escalation(
+        self, state: CorrelationState, event: SecurityEvent, profile: _TypeProfile
     ) -> None:
-        """Detect privilege escalation patterns."""
-        login_events = self._find_login_events(events)
-        privilege_events = self._find_privilege_events(events)
-        all_priv_events = self._combine_login_and_privilege_events(
-            login_events, privilege_events
-        )
-
-        if len(all_priv_events) >= 2:
-            self._check_privilege_escalation_pattern(all_priv_events, patterns)
-
-    def _find_login_events(self, events: list[SecurityEvent]) -> list[SecurityEvent]:
-        """Find login events."""
-        return [e for e in events if "login" in e.event_type.lower()]
-
-    def _find_privilege_events(
-        self, events: list[SecurityEvent]
-    ) -> list[SecurityEvent]:
-        """Find privilege-related events."""
-        privilege_indicators = [
-            "privilege",
-            "permission",
-            "role",
-            "binding",
-            "sudo",
-            "admin",
-            "root",
-            "owner",
-            "editor",
-        ]
-        privilege_events = []
-
-        for event in events:
-            event_type_lower = event.event_type.lower()
-            if any(indicator in event_type_lower for indicator in privilege_indicators):
-                privilege_events.append(event)
-
-        return privilege_events
+        """Track privilege events and the logins they follow.
 
-    def _combine_login_and_privilege_events(
-        self,
-        login_events: list[SecurityEvent],
-        privilege_events: list[SecurityEvent],
-    ) -> list[SecurityEvent]:
-        """Combine login and privilege events that are related."""
-        all_priv_events = []
-
-        # Include login events if followed by privilege events
-        if login_events and privilege_events:
-            for login in login_events:
-                for priv in privilege_events:
-                    time_diff = (priv.timestamp - login.timestamp).total_seconds()
-                    if 0 <= time_diff <= 3600:  # Within 1 hour
-                        if login not in all_priv_events:
-                            all_priv_events.append(login)
-                        break
-
-        all_priv_events.extend(privilege_events)
+        A login counts toward escalation if the first privilege event at or
+        after it is within an hour, so a login is only pending until the next
+        privilege event.
+        """
+        if profile.is_login:
+            privilege_events = state.privilege_events
+            if privilege_events and privilege_events[-1].timestamp == event.timestamp:
+                state.escalation_logins.append(event)
+            else:
+                state.pending_logins.append(event)
 
-        # Remove duplicates by event_id while preserving order
-        return self._remove_duplicate_events(all_priv_events)
+        if profile.is_privilege:
+            for login in state.pending_logins:
+                time_diff = (event.timestamp - login.timestamp).total_seconds()
+                if 0 <= time_diff <= 3600:  # Within 1 hour
+                    state.escalation_logins.append(login)
+            state.pending_logins = []
+            state.privilege_events.append(event)
 
     def _remove_duplicate_events(
         self, events: list[SecurityEvent]
@@ -1146,38 +1407,26 @@ class EventCorrelator:
         return any(escalation_indicators)
 
     def _detect_lateral_movement(
-        self, events: list[SecurityEvent], patterns: dict[str, Any]
+        self, state: CorrelationState, patterns: dict[str, Any]
     ) -> None:
         """Detect lateral movement patterns in events."""
-        movement_events = self._find_movement_events(events)
+        movement_events = state.movement_events
 
-        if len(movement_events) >= 2:
-            self._analyze_movement_chain(movement_events, patterns)
-
-    def _find_movement_events(
-        self, events: list[SecurityEvent]
-    ) -> list[dict[str, Any]]:
-        """Find events related to lateral movement."""
-        movement_indicators = [
-            "remote_login",
-            "rdp_connection",
-            "ssh_connection",
-            "lateral_movement",
-        ]
-        movement_events = []
-
-        for event in events:
-            if any(
-                indicator in event.event_type.lower()
-                for indicator in movement_indicators
-            ):
-                movement_data = self._extract_movement_data(event)
-                if movement_data:
-                    movement_events.append(movement_data)
-
-        # Sort by timestamp
-        movement_events.sort(key=lambda x: x["timestamp"])
-        return movement_events
+        # If it's a proper chain or we have enough movement events, flag it
+        if len(movement_events) >= 2 and (
+            state.movement_is_chain or len(movement_events) >= 3
+        ):
+            patterns["lateral_movement_detected"] = True
+            patterns["movement_path"] = self._build_movement_path(movement_events)
+            patterns["movement_events"] = [
+                {
+                    "event_id": move["event"].event_id,
+                    "source": move["source"],
+                    "target": move["target"],
+                    "timestamp": move["timestamp"].isoformat(),
+                }
+                for move in movement_events
+            ]
 
     def _extract_movement_data(self, event: SecurityEvent) -> Optional[dict[str, Any]]:
         """Extract source and target machines from event."""
@@ -1207,27 +1456,6 @@ class EventCorrelator:
             }
         return None
 
-    def _analyze_movement_chain(
-        self, movement_events: list[dict[str, Any]], patterns: dict[str, Any]
-    ) -> None:
-        """Analyze movement events to detect chains."""
-        movement_path = self._build_movement_path(movement_events)
-        is_chain = self._is_movement_chain(movement_events)
-
-        # If it's a proper chain or we have enough movement events, flag it
-        if is_chain or len(movement_events) >= 3:
-            patterns["lateral_movement_detected"] = True
-            patterns["movement_path"] = movement_path
-            patterns["movement_events"] = [
-                {
-                    "event_id": move["event"].event_id,
-                    "source": move["source"],
-                    "target": move["target"],
-                    "timestamp": move["timestamp"].isoformat(),
-                }
-                for move in movement_events
-            ]
-
     def _build_movement_path(self, movement_events: list[dict[str, Any]]) -> list[str]:
         """Build a path of unique machines involved in movement."""
         movement_path = []
@@ -1243,29 +1471,29 @@ class EventCorrelator:
 
         return movement_path
 
-    def _is_movement_chain(self, movement_events: list[dict[str, Any]]) -> bool:
-        """Check if movements form a chain (target of one is source of next)."""
-        for i in range(len(movement_events) - 1):
-            curr_target = movement_events[i]["target"]
-            next_source = movement_events[i + 1]["source"]
-            # Allow for some flexibility in matching (e.g., instances/vm-001 vs vm-001)
-            if not (
-                curr_target == next_source
-                or curr_target.endswith(f"/{next_source}")
-                or next_source.endswith(f"/{curr_target}")
-            ):
-                return False
-        return True
+    def _is_movement_link(self, curr_target: str, next_source: str) -> bool:
+        """Check if a movement continues from the target of the previous one."""
+        # Allow for some flexibility in matching (e.g., instances/vm-001 vs vm-001)
+        return (
+            curr_target == next_source
+            or curr_target.endswith(f"/{next_source}")
+            or next_source.endswith(f"/{curr_target}")
+        )
 
     def _detect_attack_chains(
-        self, events: list[SecurityEvent], patterns: dict[str, Any]
+        self, state: CorrelationState, patterns: dict[str, Any]
     ) -> None:
         """Detect attack chains based on kill chain phases."""
-        kill_chain_phases = self._get_kill_chain_phases()
-        phase_events = self._map_events_to_phases(events, kill_chain_phases)
+        if len(state.phase_ranks) < 2:
+            return
 
-        if len(phase_events) >= 2:
-            self._analyze_attack_chains(phase_events, patterns)
+        patterns["action_sequences"].extend(state.attack_chains)
+        # Don't forget the last chain
+        if len(state.current_chain) >= 2:
+            self._add_chains_to_patterns(
+                [[(event, phase) for _, event, phase in state.current_chain]],
+                patterns["action_sequences"],
+            )
 
     def _get_kill_chain_phases(self) -> dict[str, list[str]]:
         """Get kill chain phase mappings."""
@@ -1320,76 +1548,37 @@ class EventCorrelator:
             "impact": ["service_disruption", "data_deletion", "ransomware_detected"],
         }
 
-    def _map_events_to_phases(
-        self, events: list[SecurityEvent], kill_chain_phases: dict[str, list[str]]
-    ) -> defaultdict[str, list[SecurityEvent]]:
-        """Map events to kill chain phases."""
-        phase_events: defaultdict[str, list[SecurityEvent]] = defaultdict(list)
-        for event in events:
-            event_type_lower = event.event_type.lower()
-            for phase, indicators in kill_chain_phases.items():
-                if any(indicator in event_type_lower for indicator in indicators):
-                    phase_events[phase].append(event)
-        return phase_events
-
-    def _analyze_attack_chains(
+    def _add_chain_event(
         self,
-        phase_events: defaultdict[str, list[SecurityEvent]],
-        patterns: dict[str, Any],
+        state: CorrelationState,
+        chain_key: tuple[datetime, int, int],
+        event: SecurityEvent,
+        phase: str,
     ) -> None:
-        """Analyze phase events to find attack chains."""
-        all_chain_events = self._prepare_chain_events(phase_events)
-        chains = self._group_events_into_chains(all_chain_events)
-        self._add_chains_to_patterns(chains, patterns)
-
-    def _prepare_chain_events(
-        self, phase_events: defaultdict[str, list[SecurityEvent]]
-    ) -> list[tuple[SecurityEvent, str]]:
-        """Prepare events for chain analysis."""
-        all_chain_events = []
-        for phase, phase_event_list in phase_events.items():
-            all_chain_events.extend([(e, phase) for e in phase_event_list])
-        all_chain_events.sort(key=lambda x: x[0].timestamp)
-        return all_chain_events
-
-    def _group_events_into_chains(
-        self, all_chain_events: list[tuple[SecurityEvent, str]]
-    ) -> list[list[tuple[SecurityEvent, str]]]:
-        """Group events into chains based on time proximity."""
-        chains = []
-        current_chain: list[tuple[SecurityEvent, str]] = []
-        last_time: Optional[datetime] = None
-
-        for event, phase in all_chain_events:
-            if not current_chain:
-                current_chain.append((event, phase))
-                last_time = event.timestamp
-            else:
-                # last_time is always set when current_chain is not empty
-                assert last_time is not None
-                time_diff = (event.timestamp - last_time).total_seconds()
-                # Group if within 1 hour
-                if time_diff <= 3600:
-                    current_chain.append((event, phase))
-                    last_time = event.timestamp
-                else:
-                    if len(current_chain) >= 2:
-                        chains.append(current_chain)
-                    current_chain = [(event, phase)]
-                    last_time = event.timestamp
+        """Add an event's kill chain phase to the current chain.
 
-        # Don't forget the last chain
-        if len(current_chain) >= 2:
-            chains.append(current_chain)
-
-        return chains
+        Chain entries are ordered by time, then by the order phases were first
+        seen, then by event; only entries sharing the latest timestamp can be
+        reordered by a new event, so they are inserted in place.
+        """
+        chain = state.current_chain
+        if chain:
+            time_diff = (chain_key[0] - chain[-1][0][0]).total_seconds()
+            # Group if within 1 hour
+            if time_diff > 3600:
+                if len(chain) >= 2:
+                    self._add_chains_to_patterns(
+                        [[(e, p) for _, e, p in chain]], state.attack_chains
+                    )
+                chain = state.current_chain = []
+        insort(chain, (chain_key, event, phase), key=lambda entry: entry[0])
 
     def _add_chains_to_patterns(
         self,
         chains: list[list[tuple[SecurityEvent, str]]],
-        patterns: dict[str, Any],
+        sequences: list[dict[str, Any]],
     ) -> None:
-        """Add detected chains to patterns."""
+        """Add detected chains to the action sequences."""
         for chain in chains:
             phases_in_chain = list(dict.fromkeys([phase for _, phase in chain]))
             chain_events = [event for event, _ in chain]
@@ -1410,7 +1599,7 @@ class EventCorrelator:
                 "phases_identified": ", ".join(phases_in_chain),
             }
 
-            patterns["action_sequences"].append(sequence_data)
+            sequences.append(sequence_data)
 
     def _generate_correlation_summary(
         self,
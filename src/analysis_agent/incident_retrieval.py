@@ -4,8 +4,11 @@ Incident retrieval functionality for the Analysis Agent.
 This module handles retrieving and validating incident data from Firestore.
 """
 
+import asyncio
 import logging
+from collections.abc import AsyncIterator, Iterable
 from datetime import datetime, timezone
+from functools import lru_cache
 from typing import TYPE_CHECKING, Any, Optional
 
 from google.cloud import firestore_v1 as firestore
@@ -21,6 +24,27 @@ from src.common.models import (
 if TYPE_CHECKING:
     pass
 
+# Documents read per Firestore get_all call in retrieve_incidents
+DEFAULT_BATCH_SIZE = 100
+
+
+@lru_cache(maxsize=4096)
+def _parse_iso_timestamp(text: str) -> Optional[datetime]:
+    """Parse an ISO 8601 timestamp, or None if it is invalid."""
+    try:
+        return datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=64)
+def _parse_severity_text(text: str) -> Optional[SeverityLevel]:
+    """Parse a severity name in any case, or None if it is unknown."""
+    try:
+        return SeverityLevel(text.lower())
+    except ValueError:
+        return None
+
 
 class IncidentRetriever:
     """Handles incident data retrieval and validation from Firestore."""
@@ -55,24 +79,104 @@ class IncidentRetriever:
                 self.logger.error("Incident %s not found in Firestore", incident_id)
                 return None
 
-            # Extract and validate the data
-            incident_data = incident_doc.to_dict()
-            if not incident_data:
-                self.logger.error(f"Incident {incident_id} has no data")
-                return None
+            return self._build_incident(incident_id, incident_doc.to_dict())
 
-            # Convert to Incident object
-            incident = self._convert_to_incident(incident_id, incident_data)
+        except (ValueError, KeyError, AttributeError) as e:
+            self.logger.error(f"Error retrieving incident {incident_id}: {e}")
+            return None
 
-            # Validate the incident
-            self._validate_incident_completeness(incident)
+    async def retrieve_incidents(
+        self, incident_ids: Iterable[str], batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> AsyncIterator[tuple[str, Optional[Incident]]]:
+        """
+        Retrieve many incidents with batched Firestore reads.
 
-            return incident
+        Documents are read batch_size at a time with one get_all round trip
+        per batch, and the next batch is read while the current one is being
+        converted. Results are yielded as each batch arrives, in the order
+        the IDs were given, with duplicate IDs returned once.
 
-        except (ValueError, KeyError, AttributeError) as e:
-            self.logger.error(f"Error retrieving incident {incident_id}: {e}")
+        Args:
+            incident_ids: The IDs of the incidents to retrieve
+            batch_size: Documents read per round trip
+
+        Yields:
+            Tuples of (incident ID, validated Incident or None if not found
+            or invalid)
+        """
+        ids = list(dict.fromkeys(incident_ids))
+        batches = [ids[i:i + batch_size] for i in range(0, len(ids), batch_size)]
+        if not batches:
+            return
+
+        pending = asyncio.create_task(asyncio.to_thread(self._get_documents, batches[0]))
+        try:
+            for position, batch in enumerate(batches):
+                documents = await pending
+                if position + 1 < len(batches):
+                    pending = asyncio.create_task(
+                        asyncio.to_thread(self._get_documents, batches[position + 1])
+                    )
+
+                for incident_id in batch:
+                    if incident_id not in documents:
+                        self.logger.error("Incident %s not found in Firestore", incident_id)
+                        yield incident_id, None
+                        continue
+                    try:
+                        incident = self._build_incident(incident_id, documents[incident_id])
+                    except (ValueError, KeyError, AttributeError) as e:
+                        self.logger.error(f"Error retrieving incident {incident_id}: {e}")
+                        incident = None
+                    yield incident_id, incident
+        finally:
+            pending.cancel()
+
+    def _get_documents(self, incident_ids: list[str]) -> dict[str, Optional[dict[str, Any]]]:
+        """
+        Read incident documents in one round trip.
+
+        Args:
+            incident_ids: The IDs of the documents to read
+
+        Returns:
+            Document data by ID for the documents that exist
+        """
+        references = [self.incidents_collection.document(i) for i in incident_ids]
+        return {
+            snapshot.id: snapshot.to_dict()
+            for snapshot in self.db.get_all(references)
+            if snapshot.exists
+        }
+
+    def _build_incident(
+        self, incident_id: str, incident_data: Optional[dict[str, Any]]
+    ) -> Optional[Incident]:
+        """
+        Convert and validate incident document data.
+
+        Args:
+            incident_id: The incident ID
+            incident_data: The document data from Firestore
+
+        Returns:
+            The validated Incident object, or None if the document is empty
+
+        Raises:
+            ValueError: If the incident is missing required data
+        """
+        if not incident_data:
+            self.logger.error(f"Incident {incident_id} has no data")
             return None
 
+        # Convert to Incident object
+        incident = self._convert_to_incident(incident_id, incident_data)
+
+        # Validate the incident
+        self._validate_incident_completeness(incident)
+
+        return incident
+
     def _convert_to_incident(self, incident_id: str, data: dict[str, Any]) -> Incident:
         """
         Convert Firestore document data to an Incident object.
@@ -104,14 +208,22 @@ class IncidentRetriever:
         )
 
         # Convert events
-        events_data = data.get("events", [])
-        for event_data in events_data:
-            event = self._convert_to_event(event_data)
-            if event:
-                incident.events.append(event)
+        incident.events = self._convert_events(data.get("events", []))
 
         return incident
 
+    def _convert_events(self, events_data: list[dict[str, Any]]) -> list[SecurityEvent]:
+        """
+        Convert a list of event data to SecurityEvent objects.
+
+        Args:
+            events_data: The event data dictionaries
+
+        Returns:
+            The events that converted successfully
+        """
+        return [event for event in map(self._convert_to_event, events_data) if event]
+
     def _convert_to_event(self, event_data: dict[str, Any]) -> Optional[SecurityEvent]:
         """
         Convert event data to a SecurityEvent object.
@@ -170,11 +282,11 @@ class IncidentRetriever:
         if isinstance(timestamp_value, datetime):
             return timestamp_value
         if isinstance(timestamp_value, str):
-            try:
-                return datetime.fromisoformat(timestamp_value.replace("Z", "+00:00"))
-            except ValueError:
+            timestamp = _parse_iso_timestamp(timestamp_value)
+            if timestamp is None:
                 self.logger.warning(f"Invalid timestamp format: {timestamp_value}")
                 return datetime.now(timezone.utc)
+            return timestamp
         else:
             return datetime.now(timezone.utc)
 
@@ -191,11 +303,11 @@ class IncidentRetriever:
         if isinstance(severity_value, SeverityLevel):
             return severity_value
         if isinstance(severity_value, str):
-            try:
-                return SeverityLevel(severity_value.lower())
-            except ValueError:
+            severity = _parse_severity_text(severity_value)
+            if severity is None:
                 self.logger.warning(f"Invalid severity value: {severity_value}")
                 return SeverityLevel.INFORMATIONAL
+            return severity
         else:
             return SeverityLevel.INFORMATIONAL
 
@@ -0,0 +1,317 @@
+"""
+In-memory index of threat intelligence indicators of compromise.
+
+Exact indicators (IP addresses, domains, file hashes and email addresses)
+are kept in hash tables keyed by their normalized value. Network ranges are
+kept in one hash table per prefix length, so an address is matched against
+the longest containing range with at most one probe per prefix length in
+use. Domains also match any listed parent domain.
+
+The index holds no I/O of its own: ThreatIntelligenceTool fills it from the
+Firestore threat intelligence collections and keeps it current with delta
+syncs, so enriching an incident is one pass over its indicators instead of
+one Firestore round trip per indicator.
+"""
+
+import ipaddress
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+IOC_TYPES = ("ip", "network", "domain", "hash", "email")
+
+# Firestore location of each indicator type under the threat intelligence
+# collection: (document, subcollection, field holding the value). A field of
+# None means the document id is the value.
+IOC_SOURCES: Dict[str, Tuple[str, str, Optional[str]]] = {
+    "ip": ("ip_reputation", "ips", None),
+    "network": ("network_ranges", "ranges", "cidr"),
+    "domain": ("domain_reputation", "domains", None),
+    "hash": ("file_hashes", "hashes", None),
+    "email": ("compromised_accounts", "accounts", "email"),
+}
+
+# Incident and event fields that carry indicators, by indicator type
+INDICATOR_FIELDS: Dict[str, str] = {
+    "ip": "ip",
+    "ip_address": "ip",
+    "ip_addresses": "ip",
+    "source_ip": "ip",
+    "destination_ip": "ip",
+    "caller_ip": "ip",
+    "domain": "domain",
+    "domains": "domain",
+    "file_hash": "hash",
+    "file_hashes": "hash",
+    "md5": "hash",
+    "sha1": "hash",
+    "sha256": "hash",
+    "email": "email",
+    "email_addresses": "email",
+    "actor": "email",
+}
+
+_HASH_PATTERN = re.compile(r"^[0-9a-f]{32}$|^[0-9a-f]{40}$|^[0-9a-f]{64}$")
+_DOMAIN_PATTERN = re.compile(r"^(?:[a-z0-9_-]+\.)+[a-z]{2,}$")
+
+
+@dataclass(frozen=True, slots=True)
+class IocMatch:
+    """An indicator found in the index."""
+
+    ioc_type: str
+    value: str
+    record: Dict[str, Any]
+    matched: str  # Listed value that matched: the value, a range or a parent domain
+
+
+def normalize_ioc(ioc_type: str, value: Any) -> Optional[str]:
+    """Return the canonical form of an indicator, or None if it is not valid."""
+    if not isinstance(value, str):
+        return None
+    text = value.strip().lower()
+    if not text or text == "unknown":
+        return None
+    if ioc_type == "ip":
+        try:
+            return str(ipaddress.ip_address(text))
+        except ValueError:
+            return None
+    if ioc_type == "network":
+        try:
+            return str(ipaddress.ip_network(text, strict=False))
+        except ValueError:
+            return None
+    if ioc_type == "domain":
+        return text.rstrip(".") or None
+    return text
+
+
+def classify_indicator(value: Any) -> Optional[str]:
+    """Guess the type of an untyped indicator from its shape."""
+    if not isinstance(value, str):
+        return None
+    value = value.strip().lower()
+    if "@" in value:
+        return "email"
+    if normalize_ioc("ip", value):
+        return "ip"
+    if "/" in value and normalize_ioc("network", value):
+        return "network"
+    if _HASH_PATTERN.match(value):
+        return "hash"
+    if _DOMAIN_PATTERN.match(value.rstrip(".")):
+        return "domain"
+    return None
+
+
+def _add_indicator(
+    found: Dict[Tuple[str, str], None], ioc_type: Optional[str], value: Any
+) -> None:
+    """Add the valid values of one indicator field to ``found``."""
+    if ioc_type is None:
+        return
+    values = value if isinstance(value, (list, tuple, set)) else (value,)
+    for item in values:
+        normalized = normalize_ioc(ioc_type, item)
+        if normalized is not None:
+            found.setdefault((ioc_type, normalized), None)
+
+
+def _add_indicator_fields(found: Dict[Tuple[str, str], None], data: Any) -> None:
+    """Add the indicators held in the known fields of a mapping to ``found``."""
+    if not isinstance(data, Mapping):
+        return
+    for key, value in data.items():
+        ioc_type = INDICATOR_FIELDS.get(key)
+        if ioc_type is not None and value:
+            _add_indicator(found, ioc_type, value)
+
+
+def extract_indicators(
+    incident: Mapping[str, Any],
+    indicators: Optional[Iterable[Mapping[str, Any]]] = None,
+) -> List[Tuple[str, str]]:
+    """Collect the distinct indicators of an incident in one pass.
+
+    Looks at the incident metadata, then each event's top-level fields,
+    ``indicators`` and ``raw_data``, then any ``{"type", "value"}`` indicators
+    given explicitly. Indicators keep the order they were first seen in.
+    """
+    found: Dict[Tuple[str, str], None] = {}
+    _add_indicator_fields(found, incident.get("metadata"))
+    for event in incident.get("events") or ():
+        if isinstance(event, Mapping):
+            _add_indicator_fields(found, event)
+            _add_indicator_fields(found, event.get("indicators"))
+            _add_indicator_fields(found, event.get("raw_data"))
+
+    for indicator in indicators or ():
+        value = indicator.get("value")
+        ioc_type = indicator.get("type")
+        if ioc_type not in IOC_TYPES:
+            ioc_type = classify_indicator(value)
+        _add_indicator(found, ioc_type, value)
+
+    return list(found)
+
+
+class IocIndex:
+    """Hash tables of exact indicators plus a longest-prefix network table."""
+
+    def __init__(self) -> None:
+        """Initialize an empty index."""
+        self._exact: Dict[str, Dict[str, Dict[str, Any]]] = {
+            ioc_type: {} for ioc_type in ("ip", "domain", "hash", "email")
+        }
+        # IP version -> prefix length -> network address >> host bits -> (range, record)
+        self._networks: Dict[int, Dict[int, Dict[int, Tuple[str, Dict[str, Any]]]]] = {
+            4: {},
+            6: {},
+        }
+        # Prefix lengths in use per IP version, longest first
+        self._prefix_lengths: Dict[int, List[int]] = {4: [], 6: []}
+
+    def __len__(self) -> int:
+        """Return the number of indexed indicators."""
+        return sum(len(table) for table in self._exact.values()) + sum(
+            len(table)
+            for tables in self._networks.values()
+            for table in tables.values()
+        )
+
+    def add(self, ioc_type: str, value: str, record: Dict[str, Any]) -> bool:
+        """Add or replace an indicator. Returns False if the value is invalid."""
+        if ioc_type == "ip" and "/" in str(value):
+            ioc_type = "network"
+        normalized = normalize_ioc(ioc_type, value)
+        if normalized is None:
+            return False
+
+        if ioc_type == "network":
+            network = ipaddress.ip_network(normalized)
+            tables = self._networks[network.version]
+            if network.prefixlen not in tables:
+                tables[network.prefixlen] = {}
+                self._prefix_lengths[network.version] = sorted(tables, reverse=True)
+            key = int(network.network_address) >> (
+                network.max_prefixlen - network.prefixlen
+            )
+            tables[network.prefixlen][key] = (normalized, record)
+            return True
+
+        if ioc_type not in self._exact:
+            raise ValueError(f"Unknown indicator type: {ioc_type}")
+        self._exact[ioc_type][normalized] = record
+        return True
+
+    def remove(self, ioc_type: str, value: str) -> bool:
+        """Remove an indicator. Returns whether it was indexed."""
+        if ioc_type == "ip" and "/" in str(value):
+            ioc_type = "network"
+        normalized = normalize_ioc(ioc_type, value)
+        if normalized is None:
+            return False
+
+        if ioc_type == "network":
+            network = ipaddress.ip_network(normalized)
+            tables = self._networks[network.version]
+            table = tables.get(network.prefixlen)
+            key = int(network.network_address) >> (
+                network.max_prefixlen - network.prefixlen
+            )
+            if table is None or table.pop(key, None) is None:
+                return False
+            if not table:
+                del tables[network.prefixlen]
+                self._prefix_lengths[network.version] = sorted(tables, reverse=True)
+            return True
+
+        return self._exact.get(ioc_type, {}).pop(normalized, None) is not None
+
+    def lookup(self, ioc_type: str, value: str) -> Optional[IocMatch]:
+        """Look up one indicator."""
+        if ioc_type == "ip":
+            try:
+                return self._lookup_ip(ipaddress.ip_address(value.strip()))
+            except (AttributeError, ValueError):
+                return None
+        normalized = normalize_ioc(ioc_type, value)
+        if normalized is None:
+            return None
+        if ioc_type == "domain":
+            return self._lookup_domain(normalized)
+        if ioc_type == "network":
+            return self._lookup_network(normalized)
+        record = self._exact.get(ioc_type, {}).get(normalized)
+        if record is None:
+            return None
+        return IocMatch(ioc_type, normalized, record, normalized)
+
+    def match_all(self, indicators: Iterable[Tuple[str, str]]) -> List[IocMatch]:
+        """Look up many indicators, returning the ones that are listed."""
+        matches = []
+        for ioc_type, value in indicators:
+            match = self.lookup(ioc_type, value)
+            if match is not None:
+                matches.append(match)
+        return matches
+
+    def apply_document(
+        self, ioc_type: str, doc_id: str, data: Optional[Dict[str, Any]]
+    ) -> bool:
+        """Apply one threat intelligence document from Firestore.
+
+        Documents marked ``deleted`` or ``active: False`` remove their
+        indicator. Returns whether the document named a valid indicator.
+        """
+        field = IOC_SOURCES[ioc_type][2]
+        data = data or {}
+        value = data.get(field) if field else doc_id
+        if not isinstance(value, str):
+            return False
+        if data.get("deleted") or data.get("active") is False:
+            self.remove(ioc_type, value)
+            return True
+        return self.add(ioc_type, value, data)
+
+    def _lookup_ip(self, ip: Any) -> Optional[IocMatch]:
+        """Match an address exactly, then against the longest listed range."""
+        address = str(ip)
+        record = self._exact["ip"].get(address)
+        if record is not None:
+            return IocMatch("ip", address, record, address)
+
+        tables = self._networks[ip.version]
+        as_int = int(ip)
+        for prefixlen in self._prefix_lengths[ip.version]:
+            hit = tables[prefixlen].get(as_int >> (ip.max_prefixlen - prefixlen))
+            if hit is not None:
+                return IocMatch("ip", address, hit[1], hit[0])
+        return None
+
+    def _lookup_network(self, network_value: str) -> Optional[IocMatch]:
+        """Match a range against an equal or larger listed range."""
+        network = ipaddress.ip_network(network_value)
+        tables = self._networks[network.version]
+        as_int = int(network.network_address)
+        for prefixlen in self._prefix_lengths[network.version]:
+            if prefixlen > network.prefixlen:
+                continue
+            hit = tables[prefixlen].get(as_int >> (network.max_prefixlen - prefixlen))
+            if hit is not None:
+                return IocMatch("network", network_value, hit[1], hit[0])
+        return None
+
+    def _lookup_domain(self, domain: str) -> Optional[IocMatch]:
+        """Match a domain or the nearest listed parent domain."""
+        domains = self._exact["domain"]
+        candidate = domain
+        while True:
+            record = domains.get(candidate)
+            if record is not None:
+                return IocMatch("domain", domain, record, candidate)
+            _, dot, parent = candidate.partition(".")
+            if not dot:
+                return None
+            candidate = parent
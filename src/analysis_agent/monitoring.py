@@ -64,6 +64,14 @@ class MetricsCollector:
         self.error_counts: DefaultDict[str, int] = defaultdict(int)
         self.recent_errors: Deque[Dict[str, Any]] = deque(maxlen=100)
 
+        # Context source latency and outcomes, keyed by source name
+        self.context_source_latency: DefaultDict[str, Deque[float]] = defaultdict(
+            lambda: deque(maxlen=1000)
+        )
+        self.context_source_outcomes: DefaultDict[str, DefaultDict[str, int]] = (
+            defaultdict(lambda: defaultdict(int))
+        )
+
     def record_analysis_start(self, incident_id: str) -> Dict[str, Any]:
         """Record the start of an analysis."""
         return {
@@ -179,6 +187,21 @@ class MetricsCollector:
                 (datetime.now(timezone.utc), 1)
             )
 
+    def record_context_source(self, source: str, latency: float, status: str) -> None:
+        """
+        Record how long a context source took and how it ended.
+
+        Args:
+            source: Context source name, such as ``"related_incidents"``
+            latency: Seconds spent waiting for the source
+            status: ``"ok"``, ``"timeout"`` or ``"error"``
+        """
+        self.context_source_latency[source].append(latency)
+        self.context_source_outcomes[source][status] += 1
+        self.time_series[f"context_{source}_latency"].append(
+            (datetime.now(timezone.utc), latency)
+        )
+
     def record_rate_limit_hit(self) -> None:
         """Record a rate limit hit."""
         self.metrics["rate_limit_hits"] += 1
@@ -247,6 +270,7 @@ class MetricsCollector:
                 ),
                 "rate_limit_hits": self.metrics["rate_limit_hits"],
             },
+            "context_sources": self._context_source_summary(),
             "errors": {
                 "error_counts": dict(self.error_counts),
                 "recent_errors": list(self.recent_errors)[-10:],  # Last 10 errors
@@ -254,6 +278,22 @@ class MetricsCollector:
             "timestamp": datetime.now(timezone.utc).isoformat(),
         }
 
+    def _context_source_summary(self) -> Dict[str, Dict[str, Any]]:
+        """Summarize latency and outcomes per context source."""
+        summary = {}
+        for source, latencies in self.context_source_latency.items():
+            ordered = sorted(latencies)
+            outcomes = self.context_source_outcomes[source]
+            summary[source] = {
+                "calls": sum(outcomes.values()),
+                "timeouts": outcomes.get("timeout", 0),
+                "errors": outcomes.get("error", 0),
+                "avg_latency": sum(ordered) / len(ordered),
+                "p95_latency": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                "max_latency": ordered[-1],
+            }
+        return summary
+
     def get_time_series_data(
         self, metric_name: str, duration_minutes: int = 60
     ) -> List[Dict[str, Any]]:
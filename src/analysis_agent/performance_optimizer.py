@@ -10,60 +10,176 @@ import hashlib
 import json
 import logging
 import time
-from collections import defaultdict, deque
+from bisect import bisect_left
+from collections import OrderedDict, deque
 from collections.abc import Awaitable
 from datetime import datetime, timezone
 from typing import Any, Callable, Optional, cast
 
-from src.common.token_optimizer import TokenOptimizer
+from src.analysis_agent.cache_backends import (
+    DiskCacheBackend,
+    RedisCacheBackend,
+    SharedCacheBackend,
+)
+from src.analysis_agent.prompt_builder import DEFAULT_PROMPT_MODEL, PromptBuilder
+from src.analysis_agent.rate_limit_backends import (
+    BucketBackend,
+    FileBucketBackend,
+    LocalBucketBackend,
+    RedisBucketBackend,
+    WindowSpec,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = "/tmp/sentinelops/analysis_cache"
+DEFAULT_RATE_LIMIT_STATE_PATH = "/tmp/sentinelops/analysis_rate_limit.json"
+# Incident fields that change without changing what is analyzed
+VOLATILE_INCIDENT_FIELDS = frozenset(
+    {"updated_at", "last_updated", "analysis", "analysis_results", "cached_at"}
+)
 
 
 class AnalysisCache:
-    """In-memory cache for analysis results and intermediate data."""
+    """Two-tier cache for analysis results.
 
-    def __init__(self, ttl: int = 3600, max_size: int = 1000) -> None:
+    Recent entries are kept in process memory in least recently used order.
+    With a shared backend, entries are also written there, and async lookups
+    that miss in memory fall back to it, so analyses survive restarts and are
+    shared between instances. get_or_compute runs one computation per key at
+    a time; concurrent callers for the same key wait for its result.
+    """
+
+    def __init__(
+        self,
+        ttl: int = 3600,
+        max_size: int = 1000,
+        backend: Optional[SharedCacheBackend] = None,
+    ) -> None:
         """
         Initialize the analysis cache.
 
         Args:
             ttl: Time to live in seconds (default: 1 hour)
-            max_size: Maximum number of entries in cache
+            max_size: Maximum number of entries in memory
+            backend: Optional shared tier behind the in-memory entries
         """
-        self._cache: dict[str, tuple[Any, float]] = {}
-        self._access_times: deque[tuple[str, float]] = deque(maxlen=max_size)
+        self._cache: OrderedDict[str, tuple[Any, float]] = OrderedDict()
         self._ttl = ttl
         self._max_size = max_size
+        self._backend = backend
+        self._inflight: dict[str, asyncio.Future[Any]] = {}
         self._hits = 0
         self._misses = 0
+        self._shared_hits = 0
+        self._shared_errors = 0
+        self._single_flight_joins = 0
 
     def get(self, key: str) -> Optional[Any]:
-        """Get a value from cache if it exists and is not expired."""
-        if key in self._cache:
-            value, timestamp = self._cache[key]
-            if time.time() - timestamp < self._ttl:
-                self._hits += 1
-                # Update access time
-                self._access_times.append((key, time.time()))
+        """Get a value from memory if it exists and is not expired."""
+        value = self._get_local(key)
+        if value is None:
+            self._misses += 1
+        else:
+            self._hits += 1
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Set a value in memory with current timestamp."""
+        self._cache[key] = (value, time.time())
+        self._cache.move_to_end(key)
+        while len(self._cache) > self._max_size:
+            self._cache.popitem(last=False)
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """Get a value from memory, falling back to the shared tier."""
+        value = self._get_local(key)
+        if value is not None:
+            self._hits += 1
+            return value
+
+        if self._backend is not None:
+            try:
+                data = await self._backend.get(key)
+                if data is not None:
+                    value = json.loads(data)
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                self._shared_errors += 1
+                logger.warning("Shared cache read failed for %s: %s", key, e)
+            if value is not None:
+                self._shared_hits += 1
+                self.set(key, value)
                 return value
-            else:
-                # Expired entry
-                del self._cache[key]
 
         self._misses += 1
         return None
 
-    def set(self, key: str, value: Any) -> None:
-        """Set a value in cache with current timestamp."""
-        # Evict oldest entries if cache is full
-        if len(self._cache) >= self._max_size:
-            self._evict_oldest()
+    async def aset(self, key: str, value: Any) -> None:
+        """Set a value in memory and write it through to the shared tier."""
+        self.set(key, value)
+        if self._backend is None:
+            return
+        try:
+            data = json.dumps(value, default=str).encode()
+            await self._backend.set(key, data, self._ttl)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            self._shared_errors += 1
+            logger.warning("Shared cache write failed for %s: %s", key, e)
 
-        self._cache[key] = (value, time.time())
-        self._access_times.append((key, time.time()))
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        should_cache: Callable[[Any], bool] = bool,
+    ) -> Any:
+        """
+        Get a cached value, or compute and cache it once for all callers.
+
+        Args:
+            key: Cache key
+            compute: Coroutine function producing the value on a miss
+            should_cache: Whether a computed value may be cached
+
+        Returns:
+            The cached or computed value. If the computation raises, every
+            caller waiting on it gets the exception. If the caller computing
+            the value is cancelled, a waiting caller computes it instead.
+        """
+        inflight = self._inflight.get(key)
+        while inflight is not None:
+            self._single_flight_joins += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise  # This caller was cancelled
+            # The computing caller was cancelled; retry, possibly as its successor
+            inflight = self._inflight.get(key)
+
+        future: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await self.aget(key)
+            if value is None:
+                value = await compute()
+                if should_cache(value):
+                    await self.aset(key, value)
+            future.set_result(value)
+            return value
+        except Exception as e:
+            future.set_exception(e)
+            # Only waiters should see the exception, not the event loop
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+            if not future.done():
+                # Cancelled: wake the waiters so one of them takes over
+                future.cancel()
 
     def invalidate(self, pattern: Optional[str] = None) -> int:
         """
-        Invalidate cache entries.
+        Invalidate in-memory cache entries.
 
         Args:
             pattern: Optional pattern to match keys (prefix match)
@@ -75,7 +191,6 @@ class AnalysisCache:
             # Clear entire cache
             count = len(self._cache)
             self._cache.clear()
-            self._access_times.clear()
             return count
 
         # Invalidate entries matching pattern
@@ -86,10 +201,26 @@ class AnalysisCache:
 
         return len(keys_to_remove)
 
+    async def ainvalidate(self, pattern: Optional[str] = None) -> int:
+        """Invalidate entries in memory and in the shared tier.
+
+        Returns the number of in-memory entries invalidated.
+        """
+        count = self.invalidate(pattern)
+        if self._backend is not None:
+            try:
+                await self._backend.delete_prefix(pattern or "")
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                self._shared_errors += 1
+                logger.warning("Shared cache invalidation failed: %s", e)
+        return count
+
     def get_stats(self) -> dict[str, Any]:
         """Get cache statistics."""
-        total_requests = self._hits + self._misses
-        hit_rate = self._hits / total_requests if total_requests > 0 else 0
+        total_requests = self._hits + self._shared_hits + self._misses
+        hit_rate = (
+            (self._hits + self._shared_hits) / total_requests if total_requests > 0 else 0
+        )
 
         return {
             "size": len(self._cache),
@@ -98,24 +229,77 @@ class AnalysisCache:
             "misses": self._misses,
             "hit_rate": hit_rate,
             "ttl": self._ttl,
+            "shared_backend": type(self._backend).__name__ if self._backend else None,
+            "shared_hits": self._shared_hits,
+            "shared_errors": self._shared_errors,
+            "single_flight_joins": self._single_flight_joins,
+            "in_flight": len(self._inflight),
         }
 
-    def _evict_oldest(self) -> None:
-        """Evict oldest entries to make room."""
-        # Remove 10% of entries
-        entries_to_remove = max(1, self._max_size // 10)
+    def _get_local(self, key: str) -> Optional[Any]:
+        """Get an unexpired in-memory value and mark it recently used."""
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        value, timestamp = entry
+        if time.time() - timestamp >= self._ttl:
+            # Expired entry
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return value
 
-        # Sort by timestamp and remove oldest
-        sorted_entries = sorted(
-            self._cache.items(), key=lambda x: x[1][1]  # Sort by timestamp
-        )
 
-        for key, _ in sorted_entries[:entries_to_remove]:
-            del self._cache[key]
+BATCH_SIZE_BUCKETS = (1, 2, 5, 10, 20, 50)
+BATCH_WAIT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0)
+
+
+class Histogram:
+    """Fixed-bucket histogram of observed values."""
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        """
+        Initialize the histogram.
+
+        Args:
+            bounds: Increasing upper bounds of the buckets; larger values are
+                counted in a final overflow bucket
+        """
+        self._bounds = bounds
+        self._counts = [0] * (len(bounds) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+
+    def observe(self, value: float) -> None:
+        """Record one value."""
+        self._counts[bisect_left(self._bounds, value)] += 1
+        self._count += 1
+        self._sum += value
+        self._max = max(self._max, value)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Get bucket counts, keyed by upper bound, and summary values."""
+        buckets = {f"le_{bound:g}": count for bound, count in zip(self._bounds, self._counts)}
+        buckets["overflow"] = self._counts[-1]
+        return {
+            "buckets": buckets,
+            "count": self._count,
+            "sum": self._sum,
+            "mean": self._sum / self._count if self._count else 0.0,
+            "max": self._max,
+        }
 
 
 class RequestBatcher:
-    """Batches similar requests to optimize API usage."""
+    """Micro-batches similar requests to optimize API usage.
+
+    Each request waits on its own future. A batch is flushed as soon as it
+    reaches ``batch_size`` or when ``batch_timeout`` has passed since its
+    first request, and the processor's results are handed back to the
+    callers by position. Requests arriving while a batch is processed start
+    the next batch.
+    """
 
     def __init__(self, batch_size: int = 10, batch_timeout: float = 1.0) -> None:
         """
@@ -127,10 +311,12 @@ class RequestBatcher:
         """
         self._batch_size = batch_size
         self._batch_timeout = batch_timeout
-        self._batches: dict[str, list[tuple[Any, asyncio.Future[Any]]]] = defaultdict(
-            list
-        )
-        self._batch_timers: dict[str, asyncio.Task[None]] = {}
+        self._batches: dict[str, list[tuple[Any, asyncio.Future[Any], float]]] = {}
+        self._batch_timers: dict[str, asyncio.TimerHandle] = {}
+        self._processing: set[asyncio.Task[None]] = set()
+        self._flushes = {"size": 0, "deadline": 0}
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.wait_times = Histogram(BATCH_WAIT_BUCKETS)
 
     async def add_request(
         self,
@@ -144,158 +330,191 @@ class RequestBatcher:
         Args:
             batch_key: Key to group similar requests
             request_data: The request data
-            processor_func: Function to process the batch
+            processor_func: Function to process the batch, returning one
+                result per request in request order
 
         Returns:
             The result of the request
         """
-        # Create a future for this request
-        future: asyncio.Future[Any] = asyncio.Future()
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[Any] = loop.create_future()
 
-        # Add to batch
-        self._batches[batch_key].append((request_data, future))
+        batch = self._batches.setdefault(batch_key, [])
+        batch.append((request_data, future, time.monotonic()))
 
-        # Check if batch is full
-        if len(self._batches[batch_key]) >= self._batch_size:
-            await self._process_batch(batch_key, processor_func)
+        if len(batch) >= self._batch_size:
+            self._flush(batch_key, processor_func, "size")
         elif batch_key not in self._batch_timers:
-            # Start timer for this batch
-            self._batch_timers[batch_key] = asyncio.create_task(
-                self._batch_timer(batch_key, processor_func)
+            self._batch_timers[batch_key] = loop.call_later(
+                self._batch_timeout, self._flush, batch_key, processor_func, "deadline"
             )
 
         # Wait for result
         return await future
 
-    async def _batch_timer(
-        self,
-        batch_key: str,
-        processor_func: Callable[[list[Any]], Awaitable[list[Any]]],
-    ) -> None:
-        """Timer to process batch after timeout."""
-        await asyncio.sleep(self._batch_timeout)
-        await self._process_batch(batch_key, processor_func)
+    def get_stats(self) -> dict[str, Any]:
+        """Get batching statistics."""
+        return {
+            "pending_requests": sum(len(batch) for batch in self._batches.values()),
+            "batches_in_flight": len(self._processing),
+            "flushes_on_size": self._flushes["size"],
+            "flushes_on_deadline": self._flushes["deadline"],
+            "batch_size_histogram": self.batch_sizes.to_dict(),
+            "wait_time_histogram": self.wait_times.to_dict(),
+        }
 
-    async def _process_batch(
+    def _flush(
         self,
         batch_key: str,
         processor_func: Callable[[list[Any]], Awaitable[list[Any]]],
+        reason: str,
     ) -> None:
-        """Process a batch of requests."""
-        if batch_key not in self._batches:
-            return
+        """Take the pending batch for a key and start processing it."""
+        timer = self._batch_timers.pop(batch_key, None)
+        if timer is not None:
+            timer.cancel()
 
-        batch = self._batches[batch_key]
+        batch = self._batches.pop(batch_key, None)
         if not batch:
             return
 
-        # Cancel timer if exists
-        if batch_key in self._batch_timers:
-            self._batch_timers[batch_key].cancel()
-            del self._batch_timers[batch_key]
+        now = time.monotonic()
+        self._flushes[reason] += 1
+        self.batch_sizes.observe(len(batch))
+        for _, _, enqueued_at in batch:
+            self.wait_times.observe(now - enqueued_at)
 
-        # Extract request data
-        requests = [req for req, _ in batch]
-        futures = [future for _, future in batch]
+        task = asyncio.get_running_loop().create_task(
+            self._process_batch(batch, processor_func)
+        )
+        self._processing.add(task)
+        task.add_done_callback(self._processing.discard)
+
+    async def _process_batch(
+        self,
+        batch: list[tuple[Any, asyncio.Future[Any], float]],
+        processor_func: Callable[[list[Any]], Awaitable[list[Any]]],
+    ) -> None:
+        """Process a batch of requests and resolve each request's future."""
+        requests = [req for req, _, _ in batch]
+        futures = [future for _, future, _ in batch]
 
         try:
             # Process batch
             results = await processor_func(requests)
-
-            # Distribute results
-            for i, future in enumerate(futures):
-                if i < len(results):
-                    future.set_result(results[i])
-                else:
-                    future.set_exception(Exception("No result for request in batch"))
-        except (ValueError, KeyError, AttributeError, TypeError) as e:
-            # Set exception for all futures
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            # Every waiting caller must be released, whatever failed
             for future in futures:
-                future.set_exception(e)
-        finally:
-            # Clear batch
-            del self._batches[batch_key]
+                if not future.done():
+                    future.set_exception(e)
+            return
 
+        # Distribute results
+        for i, future in enumerate(futures):
+            if future.done():
+                continue  # Caller gave up waiting
+            if i < len(results):
+                future.set_result(results[i])
+            else:
+                future.set_exception(Exception("No result for request in batch"))
 
-class RateLimiter:
-    """Rate limiter for API calls."""
 
-    def __init__(self, max_per_minute: int = 30, max_per_hour: int = 500) -> None:
+class RateLimiter:
+    """Sliding window rate limiter for API calls.
+
+    A request is admitted only if the last 60 seconds hold fewer than
+    max_per_minute requests and the last hour fewer than max_per_hour, so no
+    minute or hour ever exceeds its quota. A burst below max_per_minute
+    spreads the minute's requests: at most burst of them are admitted in any
+    burst / max_per_minute of a minute. Callers that must wait are served in
+    arrival order because the lock wakes its waiters first in, first out. A
+    shared backend lets several processes draw from the same windows; the
+    request counts in get_stats are those of this limiter.
+    """
+
+    def __init__(
+        self,
+        max_per_minute: int = 30,
+        max_per_hour: int = 500,
+        burst: Optional[int] = None,
+        backend: Optional[BucketBackend] = None,
+    ) -> None:
         """
         Initialize the rate limiter.
 
         Args:
             max_per_minute: Maximum requests per minute
             max_per_hour: Maximum requests per hour
+            burst: Requests allowed back to back before pacing starts
+                (defaults to max_per_minute, at most max_per_minute)
+            backend: Storage for the admission times (defaults to this process)
         """
         self._max_per_minute = max_per_minute
         self._max_per_hour = max_per_hour
-        self._minute_window: deque[float] = deque()
-        self._hour_window: deque[float] = deque()
+        self._burst = min(burst or max_per_minute, max_per_minute)
+        specs = [WindowSpec(max_per_minute, 60.0), WindowSpec(max_per_hour, 3600.0)]
+        if self._burst < max_per_minute:
+            specs.append(WindowSpec(self._burst, 60.0 * self._burst / max_per_minute))
+        self._specs = tuple(specs)
+        self._backend: BucketBackend = backend or LocalBucketBackend()
+        self._fallback = LocalBucketBackend()
         self._lock = asyncio.Lock()
+        self._waiting = 0
+        self._acquired = 0
+        # Acquisition times in the last hour, oldest first
+        self._recent: deque[float] = deque()
+        self._total_wait = 0.0
+        self._backend_errors = 0
 
     async def acquire(self) -> None:
         """Acquire permission to make a request."""
-        async with self._lock:
-            now = time.time()
-
-            # Clean old entries
-            self._clean_windows(now)
-
-            # Check limits
-            while (
-                len(self._minute_window) >= self._max_per_minute
-                or len(self._hour_window) >= self._max_per_hour
-            ):
-                # Calculate wait time
-                wait_time = self._calculate_wait_time(now)
-                if wait_time > 0:
-                    await asyncio.sleep(wait_time)
-
-                # Clean again after waiting
-                now = time.time()
-                self._clean_windows(now)
-
-            # Add current request
-            self._minute_window.append(now)
-            self._hour_window.append(now)
-
-    def _clean_windows(self, now: float) -> None:
-        """Remove old entries from windows."""
-        minute_ago = now - 60
-        hour_ago = now - 3600
-
-        # Clean minute window
-        while self._minute_window and self._minute_window[0] < minute_ago:
-            self._minute_window.popleft()
-
-        # Clean hour window
-        while self._hour_window and self._hour_window[0] < hour_ago:
-            self._hour_window.popleft()
-
-    def _calculate_wait_time(self, now: float) -> float:
-        """Calculate how long to wait before next request."""
-        wait_times = []
-
-        # Check minute limit
-        if len(self._minute_window) >= self._max_per_minute:
-            oldest_minute = self._minute_window[0]
-            wait_times.append(60 - (now - oldest_minute))
-
-        # Check hour limit
-        if len(self._hour_window) >= self._max_per_hour:
-            oldest_hour = self._hour_window[0]
-            wait_times.append(3600 - (now - oldest_hour))
-
-        return max(wait_times) if wait_times else 0
+        start = time.monotonic()
+        self._waiting += 1
+        try:
+            async with self._lock:
+                while True:
+                    wait = await self._take()
+                    if wait <= 0:
+                        break
+                    await asyncio.sleep(wait)
+        finally:
+            self._waiting -= 1
+
+        now = time.monotonic()
+        self._acquired += 1
+        self._total_wait += now - start
+        self._recent.append(now)
+        while self._recent[0] <= now - 3600:
+            self._recent.popleft()
+
+    async def _take(self) -> float:
+        """Take a slot from the backend, limiting locally if it fails."""
+        try:
+            wait, _ = await self._backend.take(self._specs)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            self._backend_errors += 1
+            logger.warning("Shared rate limit backend failed, limiting locally: %s", e)
+            wait, _ = await self._fallback.take(self._specs)
+        return wait
+
+    def _acquired_within(self, seconds: float) -> int:
+        """Number of acquisitions in the last ``seconds`` seconds, up to an hour."""
+        cutoff = time.monotonic() - seconds
+        return len(self._recent) - bisect_left(self._recent, cutoff)
 
     def get_stats(self) -> dict[str, Any]:
         """Get rate limiter statistics."""
         return {
-            "minute_window_size": len(self._minute_window),
-            "hour_window_size": len(self._hour_window),
+            "requests_this_minute": self._acquired_within(60),
+            "requests_this_hour": self._acquired_within(3600),
             "max_per_minute": self._max_per_minute,
             "max_per_hour": self._max_per_hour,
+            "burst": self._burst,
+            "waiting": self._waiting,
+            "acquired": self._acquired,
+            "avg_wait_seconds": self._total_wait / self._acquired if self._acquired else 0.0,
+            "backend": type(self._backend).__name__,
+            "backend_errors": self._backend_errors,
         }
 
 
@@ -319,6 +538,7 @@ class PerformanceOptimizer:
         self.cache = AnalysisCache(
             ttl=config.get("cache_ttl", 3600),
             max_size=config.get("cache_max_size", 1000),
+            backend=self._create_cache_backend(config),
         )
 
         self.batcher = RequestBatcher(
@@ -331,28 +551,74 @@ class PerformanceOptimizer:
             self.rate_limiter = RateLimiter(
                 max_per_minute=rate_limit_config.get("max_per_minute", 30),
                 max_per_hour=rate_limit_config.get("max_per_hour", 500),
+                burst=rate_limit_config.get("burst"),
+                backend=self._create_rate_limit_backend(rate_limit_config),
             )
         else:
             self.rate_limiter = None
 
-        # Initialize token optimizer
-        self.token_optimizer = TokenOptimizer()
-
-        # Batch queue for similar incidents
-        self._batch_queue: dict[str, list[tuple[str, dict[str, Any]]]] = defaultdict(
-            list
+        # Prompts are assembled within the model's input token budget
+        self.prompt_builder = PromptBuilder(
+            model=config.get("prompt_model", DEFAULT_PROMPT_MODEL),
+            max_input_tokens=config.get("prompt_token_budget"),
         )
-        self._batch_processors: dict[str, asyncio.Task[None]] = {}
+        self.prompt_stats = {"prompts": 0, "original_tokens": 0, "estimated_tokens": 0}
 
     def generate_cache_key(self, incident_id: str, data_hash: str) -> str:
         """Generate a cache key for an analysis."""
         return f"analysis:{incident_id}:{data_hash}"
 
     def compute_data_hash(self, data: dict[str, Any]) -> str:
-        """Compute a hash of incident data for caching."""
-        # Create a stable string representation
-        data_str = json.dumps(data, sort_keys=True)
-        return hashlib.sha256(data_str.encode()).hexdigest()[:16]
+        """Compute a content address of incident data for caching.
+
+        The incident is canonicalized first: keys are sorted, fields that
+        change without changing the analysis are dropped, and events are put
+        in time order, so the same incident always gets the same key on
+        every instance.
+        """
+        canonical = {
+            key: value for key, value in data.items() if key not in VOLATILE_INCIDENT_FIELDS
+        }
+        events = canonical.get("events")
+        if isinstance(events, list):
+            canonical["events"] = sorted(
+                events,
+                key=lambda e: (
+                    (str(e.get("timestamp", "")), str(e.get("event_id", e.get("id", ""))))
+                    if isinstance(e, dict)
+                    else ("", str(e))
+                ),
+            )
+        data_str = json.dumps(canonical, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(data_str.encode()).hexdigest()[:32]
+
+    async def analyze_once(
+        self,
+        incident_id: str,
+        incident_data: dict[str, Any],
+        analyze: Callable[[], Awaitable[dict[str, Any]]],
+    ) -> dict[str, Any]:
+        """
+        Return the cached analysis of an incident, or run analyze once.
+
+        Concurrent requests for the same incident content share one analysis
+        instead of each calling Gemini. Only successful analyses are cached.
+        """
+        if not self.config.get("cache_enabled", True):
+            return await analyze()
+
+        cache_key = self.generate_cache_key(
+            incident_id, self.compute_data_hash(incident_data)
+        )
+        return cast(
+            dict[str, Any],
+            await self.cache.get_or_compute(
+                cache_key,
+                analyze,
+                should_cache=lambda result: bool(result)
+                and result.get("status") == "success",
+            ),
+        )
 
     async def get_cached_analysis(
         self, incident_id: str, incident_data: dict[str, Any]
@@ -364,14 +630,14 @@ class PerformanceOptimizer:
         data_hash = self.compute_data_hash(incident_data)
         cache_key = self.generate_cache_key(incident_id, data_hash)
 
-        cached_result = self.cache.get(cache_key)
+        cached_result = await self.cache.aget(cache_key)
         if cached_result:
             self.logger.debug(f"Cache hit for incident {incident_id}")
             return cast(dict[str, Any], cached_result)
 
         return None
 
-    def cache_analysis(
+    async def cache_analysis(
         self, incident_id: str, incident_data: dict[str, Any], result: dict[str, Any]
     ) -> None:
         """Cache an analysis result."""
@@ -381,7 +647,7 @@ class PerformanceOptimizer:
         data_hash = self.compute_data_hash(incident_data)
         cache_key = self.generate_cache_key(incident_id, data_hash)
 
-        self.cache.set(cache_key, result)
+        await self.cache.aset(cache_key, result)
         self.logger.debug(f"Cached analysis for incident {incident_id}")
 
     async def check_rate_limit(self) -> None:
@@ -399,10 +665,23 @@ class PerformanceOptimizer:
         if self.rate_limiter:
             metrics["rate_limiter_stats"] = self.rate_limiter.get_stats()
 
+        metrics["batch_stats"] = self.batcher.get_stats()
+        metrics["prompt_stats"] = {
+            **self.prompt_stats,
+            "tokens_saved": max(
+                0,
+                self.prompt_stats["original_tokens"] - self.prompt_stats["estimated_tokens"],
+            ),
+            "token_budget": self.prompt_builder.token_budget,
+        }
+
         return metrics
 
     def invalidate_cache(self, pattern: Optional[str] = None) -> int:
-        """Invalidate cache entries."""
+        """Invalidate in-memory cache entries.
+
+        Use ``cache.ainvalidate`` to invalidate the shared tier as well.
+        """
         count = self.cache.invalidate(pattern)
         self.logger.info(f"Invalidated {count} cache entries")
         return count
@@ -416,13 +695,20 @@ class PerformanceOptimizer:
         """
         Batch similar analysis requests to optimize API usage.
 
+        The request waits until its batch is flushed, either because it is
+        full or because the batch timeout passed, and then gets its own
+        result back from the batch.
+
         Args:
             incident_id: The incident ID
             incident_data: The incident data
-            processor_func: Function to process the batch
+            processor_func: Function to process the batch; it receives a list
+                of (incident_id, incident_data) tuples and must return one
+                result per tuple in the same order
 
         Returns:
-            The analysis result if batching is used, None otherwise
+            The analysis result for this incident if batching is enabled,
+            None otherwise
         """
         if not self.config.get("batch_enabled", False):
             return None
@@ -430,20 +716,33 @@ class PerformanceOptimizer:
         # Determine batch key based on incident characteristics
         batch_key = self._get_batch_key(incident_data)
 
-        # Add to batch queue
-        self._batch_queue[batch_key].append((incident_id, incident_data))
-
-        # Check if we should process the batch
-        if len(self._batch_queue[batch_key]) >= self.config.get("batch_size", 5):
-            # Process batch immediately
-            return await self._process_incident_batch(batch_key, processor_func)
-        elif batch_key not in self._batch_processors:
-            # Schedule batch processing
-            self._batch_processors[batch_key] = asyncio.create_task(
-                self._delayed_batch_processing(batch_key, processor_func)
-            )
+        return await self.batcher.add_request(
+            batch_key, (incident_id, incident_data), processor_func
+        )
 
-        return None
+    @staticmethod
+    def _create_cache_backend(config: dict[str, Any]) -> Optional[SharedCacheBackend]:
+        """Create the shared cache tier named in the configuration."""
+        backend = config.get("cache_backend")
+        if backend in (None, "memory"):
+            return None
+        if backend == "disk":
+            return DiskCacheBackend(config.get("cache_dir", DEFAULT_CACHE_DIR))
+        if backend == "redis":
+            return RedisCacheBackend.from_url(config["cache_redis_url"])
+        raise ValueError(f"Unknown cache backend: {backend}")
+
+    @staticmethod
+    def _create_rate_limit_backend(config: dict[str, Any]) -> Optional[BucketBackend]:
+        """Create the rate limit window storage named in the configuration."""
+        backend = config.get("backend")
+        if backend in (None, "local"):
+            return None
+        if backend == "file":
+            return FileBucketBackend(config.get("state_path", DEFAULT_RATE_LIMIT_STATE_PATH))
+        if backend == "redis":
+            return RedisBucketBackend.from_url(config["redis_url"])
+        raise ValueError(f"Unknown rate limit backend: {backend}")
 
     def _get_batch_key(self, incident_data: dict[str, Any]) -> str:
         """Generate a batch key based on incident characteristics."""
@@ -458,44 +757,6 @@ class PerformanceOptimizer:
         event_signature = "_".join(sorted(event_types))
         return f"{severity}:{event_signature}"
 
-    async def _delayed_batch_processing(
-        self,
-        batch_key: str,
-        processor_func: Callable[[list[Any]], Awaitable[list[Any]]],
-    ) -> None:
-        """Process a batch after a delay."""
-        await asyncio.sleep(self.config.get("batch_timeout", 2.0))
-        await self._process_incident_batch(batch_key, processor_func)
-
-    async def _process_incident_batch(
-        self,
-        batch_key: str,
-        processor_func: Callable[[list[Any]], Awaitable[list[Any]]],
-    ) -> Any:
-        """Process a batch of similar incidents."""
-        if batch_key not in self._batch_queue:
-            return None
-
-        batch = self._batch_queue[batch_key]
-        if not batch:
-            return None
-
-        try:
-            # Clear the batch
-            del self._batch_queue[batch_key]
-            if batch_key in self._batch_processors:
-                del self._batch_processors[batch_key]
-
-            self.logger.info(f"Processing batch of {len(batch)} incidents")
-
-            # Process the batch using the provided function
-            results = await processor_func(batch)
-            return results
-
-        except (ValueError, KeyError, AttributeError, TypeError) as e:
-            self.logger.error("Error processing batch: %s", e)
-            return None
-
     def optimize_prompt_tokens(
         self,
         incident: Any,
@@ -504,7 +765,7 @@ class PerformanceOptimizer:
         additional_context: Optional[dict[str, Any]] = None,
     ) -> tuple[str, dict[str, Any]]:
         """
-        Optimize a prompt to minimize token usage.
+        Build a compact prompt within the model's input token budget.
 
         Args:
             incident: The incident object
@@ -513,28 +774,14 @@ class PerformanceOptimizer:
             additional_context: Optional additional context
 
         Returns:
-            Tuple of (optimized_prompt, optimization_stats)
+            Tuple of (optimized_prompt, optimization_stats), where the stats
+            include the input tokens saved by folding repeats and trimming
         """
-        # Generate optimized prompt
-        # Create a combined prompt from all the data
-        prompt_parts = [
-            f"Incident: {incident}",
-            f"Metadata: {metadata}",
-            f"Correlation Results: {correlation_results}"
-        ]
-        if additional_context:
-            prompt_parts.append(f"Additional Context: {additional_context}")
-
-        full_prompt = "\n\n".join(prompt_parts)
-        optimized_prompt = self.token_optimizer.optimize_prompt(full_prompt)
-
-        # Get stats (if we had the original prompt)
-        stats = {
-            "optimized_length": len(optimized_prompt),
-            "estimated_tokens": self.token_optimizer.estimate_tokens(optimized_prompt),
-        }
-
-        return optimized_prompt, stats
+        prompt = self.prompt_builder.build_incident_prompt(
+            incident, metadata, correlation_results, additional_context
+        )
+        self._record_prompt(prompt.estimated_tokens, prompt.original_tokens)
+        return prompt.text, prompt.get_stats()
 
     def prepare_batch_prompts(
         self, incidents: list[tuple[Any, dict[str, Any]]]
@@ -550,7 +797,13 @@ class PerformanceOptimizer:
         """
         prompts = []
         for incident, metadata in incidents:
-            prompt = f"Incident: {incident}\n\nMetadata: {metadata}"
-            optimized = self.token_optimizer.optimize_prompt(prompt)
-            prompts.append(optimized)
+            prompt = self.prompt_builder.build_incident_prompt(incident, metadata)
+            self._record_prompt(prompt.estimated_tokens, prompt.original_tokens)
+            prompts.append(prompt.text)
         return prompts
+
+    def _record_prompt(self, estimated_tokens: int, original_tokens: int) -> None:
+        """Add a built prompt to the token statistics."""
+        self.prompt_stats["prompts"] += 1
+        self.prompt_stats["original_tokens"] += original_tokens
+        self.prompt_stats["estimated_tokens"] += estimated_tokens
@@ -0,0 +1,349 @@
+"""
+Token-budgeted prompt assembly for incident analysis.
+
+Incident data is serialized as compact JSON with empty values dropped and
+long lists and deep nesting capped, instead of Python reprs. Each section is
+split into items that are admitted in relevance order (incident summary,
+then events with the most severe first and repeats folded together, then
+correlation results, metadata and additional context) until the model's
+input token budget is spent, so nothing is cut mid-structure.
+"""
+
+import json
+from dataclasses import asdict, dataclass, field, is_dataclass
+from datetime import datetime
+from enum import Enum
+from typing import Any, Optional
+
+from src.integrations.gemini.models import MODEL_CHARACTERISTICS, ModelCharacteristics
+
+DEFAULT_PROMPT_MODEL = "gemini-pro"
+# Same rough estimate the Gemini integration uses for truncation
+CHARS_PER_TOKEN = 4
+MAX_DEPTH = 4
+MAX_LIST_ITEMS = 20
+MAX_STRING_CHARS = 2000
+# Budget kept per section for its "(N more omitted)" line
+_OMITTED_NOTE_TOKENS = 8
+
+SEVERITY_RANK = {"critical": 4, "high": 3, "medium": 2, "low": 1, "informational": 0}
+# Event fields that differ between repeats of the same event
+_VOLATILE_EVENT_FIELDS = ("event_id", "timestamp")
+_EVENT_FIELDS = ("event_type", "severity", "description", "actor", "source",
+                 "affected_resources", "indicators", "raw_data")
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in a text."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def get_model_characteristics(model: str) -> ModelCharacteristics:
+    """Find the characteristics of a model name such as "gemini-1.5-pro-002".
+
+    Falls back to the smallest context window when the model is unknown.
+    """
+    by_name = {c.name: c for c in MODEL_CHARACTERISTICS.values()}
+    if model in by_name:
+        return by_name[model]
+    prefixes = [name for name in by_name if model.startswith(name)]
+    if prefixes:
+        return by_name[max(prefixes, key=len)]
+    return min(by_name.values(), key=lambda c: c.context_window)
+
+
+def to_plain(value: Any, depth: int = 0) -> Any:
+    """Convert a value to compact JSON-ready data.
+
+    Drops None and empty values, caps nesting, list length and string length.
+    """
+    if hasattr(value, "to_dict") and callable(value.to_dict):
+        value = value.to_dict()
+    elif is_dataclass(value) and not isinstance(value, type):
+        value = asdict(value)
+
+    if value is None or isinstance(value, (Enum, datetime, str, bool, int, float)):
+        return _plain_scalar(value)
+    if depth >= MAX_DEPTH:
+        return "{...}" if isinstance(value, dict) else "[...]"
+    if isinstance(value, dict):
+        return _plain_dict(value, depth)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return _plain_items(value, depth)
+    return str(value)
+
+
+def _plain_scalar(value: Any) -> Any:
+    """Convert an enum, datetime, string, number, bool or None."""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, str) and len(value) > MAX_STRING_CHARS:
+        return value[:MAX_STRING_CHARS] + f"...(+{len(value) - MAX_STRING_CHARS} chars)"
+    return value
+
+
+def _plain_dict(value: dict[Any, Any], depth: int) -> dict[str, Any]:
+    """Convert a dict's values, dropping the empty ones."""
+    plain = {}
+    for key, item in value.items():
+        item = to_plain(item, depth + 1)
+        if item is not None and item != "" and item != [] and item != {}:
+            plain[str(key)] = item
+    return plain
+
+
+def _plain_items(value: Any, depth: int) -> list[Any]:
+    """Convert a list, tuple or set, sets in a stable order, up to the item cap."""
+    items = sorted(value, key=str) if isinstance(value, (set, frozenset)) else value
+    plain_items = [to_plain(item, depth + 1) for item in list(items)[:MAX_LIST_ITEMS]]
+    if len(items) > MAX_LIST_ITEMS:
+        plain_items.append(f"(+{len(items) - MAX_LIST_ITEMS} more)")
+    return plain_items
+
+
+def compact_json(value: Any) -> str:
+    """Serialize a value as compact JSON."""
+    return json.dumps(to_plain(value), separators=(",", ":"), ensure_ascii=False)
+
+
+@dataclass
+class PromptSection:
+    """A titled part of a prompt whose items are admitted in order."""
+
+    title: str
+    items: list[str]
+    priority: int
+    required: bool = False
+
+
+@dataclass
+class BuiltPrompt:
+    """An assembled prompt and its token accounting."""
+
+    text: str
+    estimated_tokens: int
+    original_tokens: int
+    token_budget: int
+    omitted_items: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def tokens_saved(self) -> int:
+        """Input tokens saved by folding repeated events and trimming to the budget."""
+        return max(0, self.original_tokens - self.estimated_tokens)
+
+    def get_stats(self) -> dict[str, Any]:
+        """Get token statistics for this prompt."""
+        return {
+            "optimized_length": len(self.text),
+            "estimated_tokens": self.estimated_tokens,
+            "original_tokens": self.original_tokens,
+            "tokens_saved": self.tokens_saved,
+            "token_budget": self.token_budget,
+            "omitted_items": dict(self.omitted_items),
+        }
+
+
+class PromptBuilder:
+    """Assembles incident prompts within a model's input token budget."""
+
+    def __init__(
+        self, model: str = DEFAULT_PROMPT_MODEL, max_input_tokens: Optional[int] = None
+    ) -> None:
+        """
+        Initialize the prompt builder.
+
+        Args:
+            model: Gemini model name the prompts are for
+            max_input_tokens: Optional lower cap on input tokens per prompt
+        """
+        self.model = get_model_characteristics(model)
+        self.token_budget = self.model.context_window - self.model.max_output_tokens
+        if max_input_tokens is not None:
+            self.token_budget = min(self.token_budget, max_input_tokens)
+
+    def build_incident_prompt(
+        self,
+        incident: Any,
+        metadata: Optional[dict[str, Any]] = None,
+        correlation_results: Optional[dict[str, Any]] = None,
+        additional_context: Optional[dict[str, Any]] = None,
+        instructions: str = "",
+    ) -> BuiltPrompt:
+        """Build an analysis prompt for one incident."""
+        if isinstance(incident, dict):
+            events = incident.get("events") or []
+            incident_data = {k: v for k, v in incident.items() if k != "events"}
+        else:
+            events = getattr(incident, "events", None) or []
+            incident_data = to_plain(incident)
+            if isinstance(incident_data, dict):
+                incident_data.pop("events", None)
+            else:
+                incident_data = {"incident": incident_data}
+
+        event_items, unfolded_event_chars = self._event_items(events)
+        sections = [
+            PromptSection("Incident", self._dict_items(incident_data), 0, required=True),
+            PromptSection("Events", event_items, 1),
+            PromptSection("Metadata", self._dict_items(metadata), 3),
+            PromptSection("Correlation Results", self._dict_items(correlation_results), 2),
+        ]
+        if additional_context:
+            sections.append(
+                PromptSection("Additional Context", self._dict_items(additional_context), 4)
+            )
+
+        # The prompt without folded repeats or budget trimming, sized from the
+        # serialized sections rather than by serializing the incident again
+        original_chars = len(instructions) + unfolded_event_chars
+        for section in sections:
+            original_chars += len(f"{section.title}:\n\n")
+            if section.title != "Events":
+                original_chars += sum(len(item) + 1 for item in section.items)
+        original_tokens = (original_chars + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+        return self.build(sections, instructions, original_tokens)
+
+    def build(
+        self, sections: list[PromptSection], instructions: str = "", original_tokens: int = 0
+    ) -> BuiltPrompt:
+        """Fill the token budget with section items by priority.
+
+        Required items are always kept, clipped if they alone exceed the
+        budget. Other items are admitted in priority order while they fit;
+        items that do not fit are counted as omitted.
+        """
+        remaining = self.token_budget - estimate_tokens(instructions)
+        admitted: dict[str, list[str]] = {section.title: [] for section in sections}
+        omitted: dict[str, int] = {}
+        for section in sorted(sections, key=lambda s: s.priority):
+            if section.items or section.required:
+                remaining = self._admit_section(section, remaining, admitted, omitted)
+
+        parts = [instructions] if instructions else []
+        for section in sections:
+            items = admitted[section.title]
+            if not items and not section.required:
+                continue
+            if omitted.get(section.title):
+                items = items + [f"({omitted[section.title]} more omitted)"]
+            parts.append(f"{section.title}:\n" + "\n".join(items))
+
+        text = "\n\n".join(parts)
+        return BuiltPrompt(
+            text=text,
+            estimated_tokens=estimate_tokens(text),
+            original_tokens=original_tokens,
+            token_budget=self.token_budget,
+            omitted_items=omitted,
+        )
+
+    def _admit_section(
+        self,
+        section: PromptSection,
+        remaining: int,
+        admitted: dict[str, list[str]],
+        omitted: dict[str, int],
+    ) -> int:
+        """Admit a section's items that fit, returning the tokens left."""
+        # Header line, separating blank line and room for an omission note
+        reserved = estimate_tokens(f"{section.title}:\n\n") + (
+            0 if section.required else _OMITTED_NOTE_TOKENS
+        )
+        if not section.required and reserved >= remaining:
+            omitted[section.title] = len(section.items)
+            return remaining
+        remaining -= reserved
+        for item in section.items:
+            cost = estimate_tokens(item) + 1
+            if cost <= remaining:
+                admitted[section.title].append(item)
+                remaining -= cost
+            elif section.required:
+                keep_chars = max(0, (remaining - 1) * CHARS_PER_TOKEN - 3)
+                admitted[section.title].append(item[:keep_chars] + "...")
+                remaining = 0
+            else:
+                omitted[section.title] = omitted.get(section.title, 0) + 1
+        if not admitted[section.title] and not section.required:
+            remaining += reserved
+        elif not omitted.get(section.title):
+            remaining += reserved - estimate_tokens(f"{section.title}:\n\n")
+        return remaining
+
+    def _dict_items(self, data: Any) -> list[str]:
+        """Render each top-level entry of a mapping as one compact line."""
+        plain = to_plain(data)
+        if not plain:
+            return []
+        if not isinstance(plain, dict):
+            return [compact_json(plain)]
+        return [f"{key}: {compact_json(value)}" for key, value in plain.items()]
+
+    def _event_items(self, events: list[Any]) -> tuple[list[str], int]:
+        """Render events most relevant first, folding repeats into one line.
+
+        Events are ordered by severity, then time. Events that differ only in
+        id and timestamp are shown once with their repeat count and time span.
+
+        Returns:
+            Tuple of (event lines, approximate characters the events would
+            take with one line each)
+        """
+        groups: dict[str, dict[str, Any]] = {}
+        unfolded_chars = 0
+        for position, event in enumerate(events):
+            plain = to_plain(event)
+            if not isinstance(plain, dict):
+                plain = {"event": plain}
+            body = {
+                key: value for key, value in plain.items()
+                if key not in _VOLATILE_EVENT_FIELDS
+            }
+            ordered = {key: body[key] for key in _EVENT_FIELDS if key in body}
+            ordered.update({k: v for k, v in body.items() if k not in ordered})
+            key = json.dumps(ordered, sort_keys=True, separators=(",", ":"))
+
+            timestamp = str(plain.get("timestamp", ""))
+            event_id = str(plain.get("event_id", ""))
+            unfolded_chars += len(key) + len(timestamp) + len(event_id) + 1
+            group = groups.get(key)
+            if group is None:
+                groups[key] = {
+                    "event": ordered,
+                    "event_id": plain.get("event_id"),
+                    "first_seen": timestamp,
+                    "last_seen": timestamp,
+                    "count": 1,
+                    "position": position,
+                }
+                continue
+            group["count"] += 1
+            if timestamp and (not group["first_seen"] or timestamp < group["first_seen"]):
+                group["first_seen"] = timestamp
+            if timestamp > group["last_seen"]:
+                group["last_seen"] = timestamp
+
+        ranked = sorted(
+            groups.values(),
+            key=lambda g: (
+                -SEVERITY_RANK.get(str(g["event"].get("severity", "")).lower(), 0),
+                g["first_seen"] or "~",
+                g["position"],
+            ),
+        )
+
+        items = []
+        for group in ranked:
+            entry: dict[str, Any] = {}
+            if group["event_id"]:
+                entry["event_id"] = group["event_id"]
+            if group["first_seen"]:
+                entry["timestamp"] = group["first_seen"]
+            entry.update(group["event"])
+            if group["count"] > 1:
+                entry["repeats"] = group["count"]
+                entry["last_seen"] = group["last_seen"]
+            items.append(json.dumps(entry, separators=(",", ":"), ensure_ascii=False))
+        return items, unfolded_chars
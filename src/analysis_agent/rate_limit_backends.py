@@ -0,0 +1,204 @@
+"""
+Sliding window state for the Analysis Agent rate limiter.
+
+RateLimiter admits a request only if no window (requests per minute, per
+hour and, when set, per burst interval) would then hold more requests than
+its limit, so the quota holds over every minute and hour, not just on
+average. A backend keeps the admission times of the busiest window and
+checks every limit in one step. LocalBucketBackend limits one process;
+FileBucketBackend keeps the times in a file under an exclusive lock so every
+process on a host shares them; RedisBucketBackend does the same step in a
+Lua script so a whole fleet of instances shares one quota.
+"""
+
+import asyncio
+import fcntl
+import json
+import os
+import time
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Optional, Protocol, Sequence
+
+import redis.asyncio as aioredis
+
+
+@dataclass(frozen=True)
+class WindowSpec:
+    """Most requests admitted in any window of ``period`` seconds."""
+
+    limit: int
+    period: float
+
+
+def take_slot(
+    specs: Sequence[WindowSpec],
+    times: Optional[Sequence[float]],
+    now: float,
+) -> tuple[float, list[float]]:
+    """
+    Admit one request at now if every window has room for it.
+
+    Args:
+        specs: Window limits and lengths
+        times: Earlier admission times, oldest first, or None for none
+        now: Current time
+
+    Returns:
+        Tuple of (seconds to wait, admission times still inside a window).
+        A wait of 0 means the request was admitted and now was appended;
+        otherwise nothing is recorded.
+    """
+    horizon = max((spec.period for spec in specs), default=0.0)
+    keep = max((spec.limit for spec in specs), default=0)
+    recent = [t for t in times or () if t > now - horizon]
+    # Only the newest ``limit`` times can decide any window
+    del recent[: max(0, len(recent) - keep)]
+
+    wait = 0.0
+    for spec in specs:
+        in_window = len(recent) - bisect_right(recent, now - spec.period)
+        if in_window >= spec.limit:
+            # Wait for the oldest request counted against the limit to leave
+            wait = max(wait, recent[-spec.limit] + spec.period - now)
+    if wait > 0:
+        return wait, recent
+    recent.append(now)
+    return 0.0, recent
+
+
+class BucketBackend(Protocol):
+    """Storage of recent admission times."""
+
+    async def take(self, specs: Sequence[WindowSpec]) -> tuple[float, list[float]]:
+        """Admit one request if every window has room; see take_slot."""
+
+
+class LocalBucketBackend:
+    """Rate limit windows for a single process."""
+
+    def __init__(self) -> None:
+        """Initialize with no admissions."""
+        self._times: list[float] = []
+
+    async def take(self, specs: Sequence[WindowSpec]) -> tuple[float, list[float]]:
+        """Admit one request if every window has room; see take_slot."""
+        wait, self._times = take_slot(specs, self._times, time.monotonic())
+        return wait, self._times
+
+
+class FileBucketBackend:
+    """Rate limit windows shared by every process using the same file.
+
+    Each take locks the file exclusively, reads the admission times, adds one
+    and writes them back, so processes never both fill the last slot.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Initialize the file backend.
+
+        Args:
+            path: State file, created empty if missing
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    async def take(self, specs: Sequence[WindowSpec]) -> tuple[float, list[float]]:
+        """Admit one request if every window has room; see take_slot."""
+        return await asyncio.to_thread(self._take, specs)
+
+    def _take(self, specs: Sequence[WindowSpec]) -> tuple[float, list[float]]:
+        with open(self.path, "a+", encoding="utf-8") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                try:
+                    state = json.loads(f.read() or "{}")
+                except ValueError:
+                    state = {}
+                wait, times = take_slot(specs, state.get("times"), time.time())
+                if wait == 0:
+                    f.seek(0)
+                    f.truncate()
+                    f.write(json.dumps({"times": times}))
+                    f.flush()
+                return wait, times
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+# Same step as take_slot, run atomically on the Redis server. KEYS[1] holds
+# the admission times as a JSON array; ARGV is the current time then a limit
+# and period per window.
+_TAKE_SLOT_SCRIPT = """
+local now = tonumber(ARGV[1])
+local count = (#ARGV - 1) / 2
+local horizon, keep = 0, 0
+for i = 1, count do
+  keep = math.max(keep, tonumber(ARGV[2 * i]))
+  horizon = math.max(horizon, tonumber(ARGV[2 * i + 1]))
+end
+local recent = {}
+local state = redis.call('GET', KEYS[1])
+if state then
+  for _, t in ipairs(cjson.decode(state)) do
+    if t > now - horizon then recent[#recent + 1] = t end
+  end
+end
+local times = {}
+for i = math.max(1, #recent - keep + 1), #recent do times[#times + 1] = recent[i] end
+local wait = 0
+for i = 1, count do
+  local limit = tonumber(ARGV[2 * i])
+  local period = tonumber(ARGV[2 * i + 1])
+  local in_window = 0
+  for _, t in ipairs(times) do
+    if t > now - period then in_window = in_window + 1 end
+  end
+  if in_window >= limit then
+    wait = math.max(wait, times[#times - limit + 1] + period - now)
+  end
+end
+if wait <= 0 then
+  wait = 0
+  times[#times + 1] = now
+  redis.call('SET', KEYS[1], cjson.encode(times), 'EX', math.max(1, math.ceil(horizon)))
+end
+return cjson.encode({wait, times})
+"""
+
+
+class RedisBucketBackend:
+    """Rate limit windows shared by every instance using the same Redis key."""
+
+    def __init__(
+        self, client: aioredis.Redis, key: str = "sentinelops:analysis_rate_limit"
+    ) -> None:
+        """
+        Initialize the Redis backend.
+
+        Args:
+            client: Redis asyncio client
+            key: Key holding the admission times
+        """
+        self.client = client
+        self.key = key
+        self._script = client.register_script(_TAKE_SLOT_SCRIPT)
+
+    @classmethod
+    def from_url(
+        cls, url: str, key: str = "sentinelops:analysis_rate_limit"
+    ) -> "RedisBucketBackend":
+        """Create a backend connected to a Redis URL."""
+        return cls(aioredis.from_url(url), key)
+
+    async def take(self, specs: Sequence[WindowSpec]) -> tuple[float, list[float]]:
+        """Admit one request if every window has room; see take_slot."""
+        args: list[float] = [time.time()]
+        for spec in specs:
+            args.extend((spec.limit, spec.period))
+        wait, times = json.loads(await self._script(keys=[self.key], args=args))
+        return float(wait), [float(t) for t in times]
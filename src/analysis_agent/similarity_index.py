@@ -0,0 +1,591 @@
+"""
+Local similarity index over resolved incidents.
+
+Each resolved incident is reduced to its event-type and resource-type sets,
+which are stored as MinHash signatures in NumPy matrices. A query estimates
+the similarity score of every indexed incident in one vectorized pass, then
+scores the best candidates exactly, so it stays fast with 100k+ incidents
+without a Firestore round trip. Embedding vectors, when available, are kept
+in a matrix as well and reported as a semantic similarity.
+
+The index can be persisted as an append-only log: every update appends one
+line and a rebuild rewrites the file.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.common.models import Incident
+
+EVENT_TYPE_WEIGHT = 0.5
+RESOURCE_TYPE_WEIGHT = 0.3
+MIN_SIMILARITY_SCORE = 0.4
+
+# Largest prime below 2**32, so hashed values fit in uint32 signatures
+_MINHASH_PRIME = 4294967291
+_MINHASH_SEED = 1337
+# Margin below the score threshold for MinHash estimation error
+_ESTIMATE_SLACK = 0.15
+
+
+@dataclass(frozen=True, slots=True)
+class IndexedIncident:
+    """Features and display fields of an incident in the similarity index."""
+
+    incident_id: str
+    severity: str
+    event_types: frozenset[str]
+    resource_types: frozenset[str]
+    event_count: int
+    created_at: Optional[datetime] = None
+    resolved_at: Optional[datetime] = None
+    title: str = ""
+    resolution_notes: str = ""
+
+    @classmethod
+    def from_incident(cls, incident: Incident) -> "IndexedIncident":
+        """Build the index entry of an incident."""
+        return cls(
+            incident_id=incident.incident_id,
+            severity=incident.severity.value,
+            event_types=frozenset(e.event_type for e in incident.events if e.event_type),
+            resource_types=frozenset(
+                e.source.resource_type for e in incident.events if e.source.resource_type
+            ),
+            event_count=len(incident.events),
+            created_at=incident.created_at,
+            resolved_at=incident.updated_at,
+            title=incident.title,
+            resolution_notes=str(incident.metadata.get("resolution_notes", "")),
+        )
+
+    @classmethod
+    def from_document(cls, doc_id: str, data: Dict[str, Any]) -> "IndexedIncident":
+        """Build the index entry of a stored incident document."""
+        events = data.get("events", [])
+        return cls(
+            incident_id=doc_id,
+            severity=str(data.get("severity", "")),
+            event_types=frozenset(e.get("event_type") for e in events if e.get("event_type")),
+            resource_types=frozenset(
+                e.get("source", {}).get("resource_type")
+                for e in events
+                if e.get("source", {}).get("resource_type")
+            ),
+            event_count=len(events),
+            created_at=_to_datetime(data.get("created_at")),
+            resolved_at=_to_datetime(data.get("updated_at")),
+            title=data.get("title", ""),
+            resolution_notes=data.get("resolution_notes", ""),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the entry to a JSON-serializable dictionary."""
+        return {
+            "incident_id": self.incident_id,
+            "severity": self.severity,
+            "event_types": sorted(self.event_types),
+            "resource_types": sorted(self.resource_types),
+            "event_count": self.event_count,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "resolved_at": self.resolved_at.isoformat() if self.resolved_at else None,
+            "title": self.title,
+            "resolution_notes": self.resolution_notes,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "IndexedIncident":
+        """Create an entry from its dictionary representation."""
+        return cls(
+            incident_id=data["incident_id"],
+            severity=data["severity"],
+            event_types=frozenset(data["event_types"]),
+            resource_types=frozenset(data["resource_types"]),
+            event_count=data["event_count"],
+            created_at=_to_datetime(data.get("created_at")),
+            resolved_at=_to_datetime(data.get("resolved_at")),
+            title=data.get("title", ""),
+            resolution_notes=data.get("resolution_notes", ""),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class SimilarIncident:
+    """A query match."""
+
+    incident: IndexedIncident
+    similarity_score: float
+    semantic_similarity: Optional[float] = None
+
+
+def similarity_score(query: IndexedIncident, other: IndexedIncident) -> float:
+    """
+    Score how similar two incidents are.
+
+    Event types and resource types are compared by Jaccard similarity, and
+    incidents with a close number of events get a bonus.
+
+    Args:
+        query: Incident being analyzed
+        other: Historical incident
+
+    Returns:
+        Similarity score between 0 and 1
+    """
+    score = 0.0
+    if query.event_types and other.event_types:
+        score += _jaccard(query.event_types, other.event_types) * EVENT_TYPE_WEIGHT
+    if query.resource_types and other.resource_types:
+        score += _jaccard(query.resource_types, other.resource_types) * RESOURCE_TYPE_WEIGHT
+    difference = abs(query.event_count - other.event_count)
+    if difference < 5:
+        score += 0.2
+    elif difference < 10:
+        score += 0.1
+    return score
+
+
+def _jaccard(a: frozenset[str], b: frozenset[str]) -> float:
+    return len(a & b) / len(a | b)
+
+
+def _to_datetime(value: Any) -> Optional[datetime]:
+    """Convert a stored timestamp to an aware datetime."""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    timestamp: datetime = value
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp
+
+
+class IncidentSimilarityIndex:
+    """MinHash index answering top-k similar incident queries."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        num_perm: int = 64,
+        candidate_pool: int = 200,
+    ):
+        """
+        Initialize the index, loading it from ``path`` if the file exists.
+
+        Args:
+            path: Index log file, or None to keep the index in memory only
+            num_perm: Number of MinHash permutations per feature set
+            candidate_pool: Maximum number of candidates scored exactly per query
+        """
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+        self.num_perm = num_perm
+        self.candidate_pool = candidate_pool
+
+        rng = np.random.default_rng(_MINHASH_SEED)
+        self._hash_a = rng.integers(1, _MINHASH_PRIME, num_perm, dtype=np.uint64)
+        self._hash_b = rng.integers(0, _MINHASH_PRIME, num_perm, dtype=np.uint64)
+        self._token_hashes: Dict[str, int] = {}
+        self._severity_codes: Dict[str, int] = {}
+
+        self._reset()
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, incident_id: object) -> bool:
+        return incident_id in self._rows
+
+    def get(self, incident_id: str) -> Optional[IndexedIncident]:
+        """Get an indexed incident by ID."""
+        row = self._rows.get(incident_id)
+        return None if row is None else self._record(row)
+
+    def add(
+        self, incident: IndexedIncident, embedding: Optional[Sequence[float]] = None
+    ) -> None:
+        """
+        Add an incident, replacing any entry with the same ID.
+
+        Args:
+            incident: Incident to index
+            embedding: Optional embedding vector of the incident
+        """
+        self._insert(incident, embedding)
+        self._append_log({"op": "add", "incident": incident.to_dict(),
+                          "embedding": _embedding_list(embedding)})
+
+    def remove(self, incident_id: str) -> bool:
+        """
+        Remove an incident from the index.
+
+        Returns:
+            True if the incident was indexed
+        """
+        if not self._delete(incident_id):
+            return False
+        self._append_log({"op": "remove", "incident_id": incident_id})
+        return True
+
+    def rebuild(
+        self,
+        incidents: Iterable[Tuple[IndexedIncident, Optional[Sequence[float]]]],
+    ) -> int:
+        """
+        Replace the whole index.
+
+        Args:
+            incidents: (incident, embedding or None) pairs
+
+        Returns:
+            Number of indexed incidents
+        """
+        self._reset()
+        for incident, embedding in incidents:
+            self._insert(incident, embedding)
+        self.save()
+        return len(self)
+
+    def rebuilt(
+        self,
+        incidents: Iterable[Tuple[IndexedIncident, Optional[Sequence[float]]]],
+    ) -> "IncidentSimilarityIndex":
+        """
+        Build a replacement index with the same settings and file.
+
+        Unlike ``rebuild`` this index is left untouched, so the replacement
+        can be built and saved in a worker thread while this one answers
+        queries.
+
+        Args:
+            incidents: (incident, embedding or None) pairs
+
+        Returns:
+            The new index, already saved to the file
+        """
+        index = IncidentSimilarityIndex(None, self.num_perm, self.candidate_pool)
+        index.path = self.path
+        index.rebuild(incidents)
+        return index
+
+    def query(
+        self,
+        incident: IndexedIncident,
+        top_k: int = 5,
+        min_score: float = MIN_SIMILARITY_SCORE,
+        created_after: Optional[datetime] = None,
+        embedding: Optional[Sequence[float]] = None,
+    ) -> List[SimilarIncident]:
+        """
+        Find the indexed incidents most similar to an incident.
+
+        Only incidents with the same severity are considered, and the
+        incident itself is skipped.
+
+        Args:
+            incident: Incident to compare against the index
+            top_k: Maximum number of matches
+            min_score: Minimum similarity score of a match
+            created_after: Only consider incidents created at or after this time
+            embedding: Optional embedding vector of the incident
+
+        Returns:
+            Matches, most similar first
+        """
+        severity_code = self._severity_codes.get(incident.severity)
+        if severity_code is None or not self._rows:
+            return []
+
+        n = self._size
+        mask = self._active[:n] & (self._severity[:n] == severity_code)
+        if created_after is not None:
+            mask &= self._created_at[:n] >= created_after.timestamp()
+        own_row = self._rows.get(incident.incident_id)
+        if own_row is not None:
+            mask[own_row] = False
+
+        # Scanning every row keeps the signature columns contiguous, which is
+        # faster than gathering the rows that pass the filters
+        estimate = self._estimate_scores(incident, n)
+        candidates = np.flatnonzero(mask & (estimate >= min_score - _ESTIMATE_SLACK))
+        estimate = estimate[candidates]
+        if len(candidates) > self.candidate_pool:
+            best = np.argpartition(-estimate, self.candidate_pool - 1)
+            candidates = candidates[best[: self.candidate_pool]]
+
+        semantic = self._semantic_similarity(candidates, embedding)
+        matches = []
+        for i, row in enumerate(candidates):
+            record = self._record(int(row))
+            score = similarity_score(incident, record)
+            if score >= min_score:
+                matches.append(
+                    SimilarIncident(
+                        record,
+                        float(score),
+                        None if semantic is None or math.isnan(semantic[i])
+                        else float(semantic[i]),
+                    )
+                )
+
+        matches.sort(
+            key=lambda m: (
+                -m.similarity_score,
+                -(m.semantic_similarity or 0.0),
+                m.incident.incident_id,
+            )
+        )
+        return matches[:top_k]
+
+    def load(self) -> None:
+        """Load the index from its log file, if present."""
+        self._reset()
+        if not self.path or not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line_number, line in enumerate(f, 1):
+                    try:
+                        entry = json.loads(line)
+                        if entry["op"] == "add":
+                            self._insert(
+                                IndexedIncident.from_dict(entry["incident"]),
+                                entry.get("embedding"),
+                            )
+                        else:
+                            self._delete(entry["incident_id"])
+                    except (ValueError, KeyError, TypeError) as e:
+                        self.logger.warning(
+                            "Skipping unreadable similarity index entry %s:%d: %s",
+                            self.path, line_number, e,
+                        )
+        except OSError as e:
+            self.logger.warning(
+                "Ignoring unreadable similarity index %s: %s", self.path, e
+            )
+            self._reset()
+
+    def save(self) -> None:
+        """Rewrite the log file with the current entries only."""
+        if not self.path:
+            return
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for incident_id, row in self._rows.items():
+                embedding = (
+                    self._embeddings[row] if self._has_embedding[row] else None
+                )
+                f.write(json.dumps({
+                    "op": "add",
+                    "incident": self._record(row).to_dict(),
+                    "embedding": _embedding_list(embedding),
+                }) + "\n")
+        os.replace(temp_path, self.path)
+
+    def _reset(self) -> None:
+        """Drop every entry."""
+        capacity = 64
+        self._records: List[Optional[IndexedIncident]] = []
+        self._rows: Dict[str, int] = {}
+        self._free_rows: List[int] = []
+        self._size = 0
+        # Signatures are stored one permutation per row, so a query compares
+        # contiguous columns of all incidents at once
+        self._event_sigs = np.zeros((self.num_perm, capacity), dtype=np.uint32)
+        self._resource_sigs = np.zeros((self.num_perm, capacity), dtype=np.uint32)
+        self._has_event_types = np.zeros(capacity, dtype=bool)
+        self._has_resource_types = np.zeros(capacity, dtype=bool)
+        self._event_counts = np.zeros(capacity, dtype=np.int64)
+        self._created_at = np.full(capacity, np.nan)
+        self._severity = np.full(capacity, -1, dtype=np.int32)
+        self._active = np.zeros(capacity, dtype=bool)
+        self._embeddings = np.zeros((capacity, 0), dtype=np.float32)
+        self._has_embedding = np.zeros(capacity, dtype=bool)
+
+    def _insert(
+        self, incident: IndexedIncident, embedding: Optional[Sequence[float]]
+    ) -> None:
+        """Store an entry in its existing row or a new one."""
+        row = self._rows.get(incident.incident_id)
+        if row is None:
+            row = self._free_rows.pop() if self._free_rows else self._new_row()
+            self._rows[incident.incident_id] = row
+        self._records[row] = incident
+
+        self._event_sigs[:, row] = self._signature(incident.event_types)
+        self._resource_sigs[:, row] = self._signature(incident.resource_types)
+        self._has_event_types[row] = bool(incident.event_types)
+        self._has_resource_types[row] = bool(incident.resource_types)
+        self._event_counts[row] = incident.event_count
+        self._created_at[row] = (
+            incident.created_at.timestamp() if incident.created_at else np.nan
+        )
+        self._severity[row] = self._severity_codes.setdefault(
+            incident.severity, len(self._severity_codes)
+        )
+        self._active[row] = True
+        self._set_embedding(row, embedding)
+
+    def _record(self, row: int) -> IndexedIncident:
+        """Get the entry stored in an occupied row."""
+        record = self._records[row]
+        assert record is not None
+        return record
+
+    def _delete(self, incident_id: str) -> bool:
+        """Free an entry's row."""
+        row = self._rows.pop(incident_id, None)
+        if row is None:
+            return False
+        self._records[row] = None
+        self._active[row] = False
+        self._has_embedding[row] = False
+        self._free_rows.append(row)
+        return True
+
+    def _new_row(self) -> int:
+        """Allocate a row, doubling the matrices when they are full."""
+        if self._size == len(self._active):
+            capacity = 2 * self._size
+            for name in ("_event_sigs", "_resource_sigs"):
+                old = getattr(self, name)
+                new = np.zeros((self.num_perm, capacity), dtype=old.dtype)
+                new[:, : self._size] = old
+                setattr(self, name, new)
+            for name in (
+                "_has_event_types", "_has_resource_types", "_event_counts",
+                "_created_at", "_severity", "_active", "_embeddings",
+                "_has_embedding",
+            ):
+                old = getattr(self, name)
+                new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+                new[: self._size] = old
+                setattr(self, name, new)
+        self._records.append(None)
+        self._size += 1
+        return self._size - 1
+
+    def _set_embedding(self, row: int, embedding: Optional[Sequence[float]]) -> None:
+        """Store a normalized embedding vector for a row."""
+        self._has_embedding[row] = False
+        if embedding is None or len(embedding) == 0:
+            return
+
+        vector = np.asarray(embedding, dtype=np.float32)
+        if self._embeddings.shape[1] == 0:
+            self._embeddings = np.zeros(
+                (len(self._active), len(vector)), dtype=np.float32
+            )
+        if len(vector) != self._embeddings.shape[1]:
+            self.logger.warning(
+                "Ignoring embedding of incident %s: dimension %d, expected %d",
+                self._record(row).incident_id, len(vector),
+                self._embeddings.shape[1],
+            )
+            return
+
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            self._embeddings[row] = vector / norm
+            self._has_embedding[row] = True
+
+    def _signature(self, tokens: frozenset[str]) -> np.ndarray:
+        """Compute the MinHash signature of a token set."""
+        if not tokens:
+            return np.zeros(self.num_perm, dtype=np.uint32)
+        hashes = np.fromiter(
+            (self._token_hash(token) for token in tokens), dtype=np.uint64
+        )
+        permuted = (
+            self._hash_a[None, :] * hashes[:, None] + self._hash_b[None, :]
+        ) % np.uint64(_MINHASH_PRIME)
+        signature: np.ndarray = permuted.min(axis=0).astype(np.uint32)
+        return signature
+
+    def _token_hash(self, token: str) -> int:
+        """Hash a token to an integer below the MinHash prime."""
+        value = self._token_hashes.get(token)
+        if value is None:
+            digest = hashlib.blake2b(token.encode(), digest_size=8).digest()
+            value = int.from_bytes(digest, "big") % _MINHASH_PRIME
+            self._token_hashes[token] = value
+        return value
+
+    def _estimate_scores(self, incident: IndexedIncident, n: int) -> np.ndarray:
+        """Estimate the similarity score of the first ``n`` rows."""
+        differences = np.abs(self._event_counts[:n] - incident.event_count)
+        estimate = np.where(differences < 5, 0.2, np.where(differences < 10, 0.1, 0.0))
+        if incident.event_types:
+            jaccard = self._signature_similarity(self._event_sigs, incident.event_types, n)
+            estimate += np.where(self._has_event_types[:n], jaccard, 0.0) * EVENT_TYPE_WEIGHT
+        if incident.resource_types:
+            jaccard = self._signature_similarity(
+                self._resource_sigs, incident.resource_types, n
+            )
+            estimate += (
+                np.where(self._has_resource_types[:n], jaccard, 0.0) * RESOURCE_TYPE_WEIGHT
+            )
+        return estimate
+
+    def _signature_similarity(
+        self, signatures: np.ndarray, tokens: frozenset[str], n: int
+    ) -> np.ndarray:
+        """Estimate the Jaccard similarity of a token set to the first ``n`` rows."""
+        query = self._signature(tokens)
+        matches: np.ndarray = np.zeros(
+            n, dtype=np.uint8 if self.num_perm < 256 else np.uint16
+        )
+        equal = np.empty(n, dtype=bool)
+        for permutation, value in enumerate(query):
+            np.equal(signatures[permutation, :n], value, out=equal)
+            matches += equal
+        similarity: np.ndarray = matches / self.num_perm
+        return similarity
+
+    def _semantic_similarity(
+        self, rows: np.ndarray, embedding: Optional[Sequence[float]]
+    ) -> Optional[np.ndarray]:
+        """Cosine similarity of the rows to an embedding, NaN where unknown."""
+        if embedding is None or len(embedding) != self._embeddings.shape[1]:
+            return None
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return None
+        similarity = self._embeddings[rows] @ (query / norm)
+        return np.where(self._has_embedding[rows], similarity, np.nan)
+
+    def _append_log(self, entry: Dict[str, Any]) -> None:
+        """Append one update to the log file."""
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+
+def _embedding_list(embedding: Optional[Sequence[float]]) -> Optional[List[float]]:
+    """Convert an embedding to a JSON-serializable list."""
+    if embedding is None or len(embedding) == 0:
+        return None
+    return [float(value) for value in embedding]
@@ -201,6 +201,99 @@ class SecureQueryBuilder:
 
         return "\n".join(query_parts)
 
+    @classmethod
+    def build_fused_select_query(
+        cls,
+        table_identifier: str,
+        fields: List[str],
+        shared_conditions: List[str],
+        branches: Dict[str, str],
+        label_field: str = "query_type",
+        branch_limits: Optional[Dict[str, int]] = None,
+        order_by: Optional[str] = "timestamp DESC"
+    ) -> str:
+        """
+        Build a single SELECT that serves several filtered queries in one scan.
+
+        Each table row is emitted once per branch it matches, with the branch
+        name in the label column, by unnesting an array of the matching
+        labels. Branch limits are applied per label with QUALIFY, so a row
+        matching several branches counts against each of their limits.
+        """
+        cls._validate_fused_query(table_identifier, fields, branches, label_field)
+
+        label_arrays = ",\n        ".join(
+            f"IF(({condition}), ['{branch_name}'], [])"
+            for branch_name, condition in branches.items()
+        )
+        query_parts = ["SELECT"]
+        query_parts.append("    " + ",\n    ".join(list(fields) + [label_field]))
+        query_parts.append(f"FROM `{table_identifier}`")
+        query_parts.append(
+            f"CROSS JOIN UNNEST(ARRAY_CONCAT(\n        {label_arrays}\n    )) AS {label_field}"
+        )
+
+        branch_filter = " OR ".join(f"({condition})" for condition in branches.values())
+        where_conditions = list(shared_conditions) + [f"({branch_filter})"]
+        query_parts.append("WHERE")
+        query_parts.append("    " + "\n    AND ".join(where_conditions))
+
+        if branch_limits:
+            query_parts.append(
+                cls._build_branch_limit_clause(branches, label_field, branch_limits, order_by)
+            )
+
+        if order_by:
+            query_parts.append(f"ORDER BY {order_by}")
+
+        if branch_limits:
+            query_parts.append(f"LIMIT {sum(int(v) for v in branch_limits.values())}")
+
+        return "\n".join(query_parts)
+
+    @classmethod
+    def _validate_fused_query(
+        cls,
+        table_identifier: str,
+        fields: List[str],
+        branches: Dict[str, str],
+        label_field: str
+    ) -> None:
+        """Validate the table, fields and branch names of a fused query."""
+        if not cls.validate_table_identifier(table_identifier):
+            raise ValueError(f"Invalid table identifier: {table_identifier}")
+
+        if not branches:
+            raise ValueError("At least one branch is required")
+
+        for field in fields:
+            field_name = field.split(" as ")[0].strip()
+            if not cls.validate_field_name(field_name):
+                raise ValueError(f"Invalid field name: {field_name}")
+
+        for branch_name in list(branches) + [label_field]:
+            if not branch_name.isidentifier():
+                raise ValueError(f"Invalid branch name: {branch_name}")
+
+    @staticmethod
+    def _build_branch_limit_clause(
+        branches: Dict[str, str],
+        label_field: str,
+        branch_limits: Dict[str, int],
+        order_by: Optional[str]
+    ) -> str:
+        """Build the QUALIFY clause keeping the first rows of each label."""
+        limit_cases = " ".join(
+            f"WHEN '{branch_name}' THEN {int(limit)}"
+            for branch_name, limit in branch_limits.items()
+            if branch_name in branches
+        )
+        window_order = f" ORDER BY {order_by}" if order_by else ""
+        return (
+            f"QUALIFY ROW_NUMBER() OVER (PARTITION BY {label_field}{window_order}) "
+            f"<= CASE {label_field} {limit_cases} END"
+        )
+
     @classmethod
     def build_pattern_query(
         cls,
@@ -4,17 +4,19 @@ Detection Agent using Google ADK - PRODUCTION IMPLEMENTATION
 This agent monitors cloud logs for security anomalies and creates incidents.
 """
 
+import asyncio
 import logging
+import time
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
 
 from google.adk.tools import BaseTool, ToolContext
 from google.adk.agents.invocation_context import InvocationContext
 from google.adk.agents.run_config import RunConfig
 from google.cloud import bigquery
+from google.cloud.exceptions import GoogleCloudError
 
 from src.common.adk_agent_base import SentinelOpsBaseAgent
-from src.common.secure_query_builder import SecureQueryBuilder
 from src.common.models import (
     Incident,
     IncidentStatus,
@@ -28,6 +30,29 @@ from src.tools.transfer_tools import TransferToOrchestratorAgentTool
 from src.detection_agent.rules_engine import RulesEngine
 from src.detection_agent.event_correlator import EventCorrelator
 from src.detection_agent.query_builder import QueryBuilder
+from src.detection_agent.concurrent_query_executor import (
+    ConcurrentQueryExecutor,
+    QueryExecutionResult,
+)
+from src.detection_agent.performance_config import PerformanceTuningConfig
+from src.detection_agent.query_optimizer import QueryOptimizer
+from src.detection_agent.event_grouping import (
+    IndexedEventGrouper,
+    StreamingEventGrouper,
+)
+from src.detection_agent.query_pagination import PaginatedQueryExecutor
+from src.detection_agent.query_cache import QueryCache
+from src.detection_agent.detection_event import DetectionEvent
+from src.detection_agent.anomaly_rules import (
+    DEFAULT_ANOMALY_RULES,
+    AnomalyRule,
+    AnomalyRuleEvaluator,
+)
+from src.detection_agent.audit_log_queries import (
+    DETECTION_QUERY_SPECS,
+    FUSED_QUERY_NAME,
+    AuditLogQueries,
+)
 from src.tools.detection_tools import (
     RulesEngineTool,
     EventCorrelatorTool,
@@ -41,8 +66,24 @@ logger = logging.getLogger(__name__)
 class LogMonitoringTool(BaseTool):
     """Production-grade tool for monitoring BigQuery security logs."""
 
-    def __init__(self, bigquery_client: bigquery.Client, dataset: str, table: str, project_id: str):
-        """Initialize the log monitoring tool."""
+    def __init__(
+        self,
+        bigquery_client: bigquery.Client,
+        dataset: str,
+        table: str,
+        project_id: str,
+        query_executor: Optional[ConcurrentQueryExecutor] = None,
+        fuse_queries: bool = False,
+        query_optimizer: Optional[QueryOptimizer] = None,
+        stream_page_size: int = 1000,
+        stream_raw_data: bool = False,
+        query_cache: Optional[QueryCache] = None,
+    ):
+        """Initialize the log monitoring tool.
+
+        With a query cache, separate-mode scans reuse per-time-bucket results
+        from earlier overlapping scans and only query the uncovered ranges.
+        """
         super().__init__(
             name="log_monitoring_tool",
             description="Monitor BigQuery security logs for security events",
@@ -51,208 +92,102 @@ class LogMonitoringTool(BaseTool):
         self.dataset = dataset
         self.table = table
         self.project_id = project_id
+        self.query_executor = query_executor or ConcurrentQueryExecutor(
+            bigquery_client
+        )
+        self.fuse_queries = fuse_queries
+        self.query_optimizer = query_optimizer or QueryOptimizer({})
+        self.stream_page_size = stream_page_size
+        self.stream_raw_data = stream_raw_data
+        self.query_cache = query_cache
 
     async def execute(self, _context: ToolContext, **kwargs: Any) -> Dict[str, Any]:
         """Execute production log monitoring queries."""
+        result = await self.scan(kwargs.get("last_scan_time"))
+        # Tool results must be JSON serializable, so events leave as dicts
+        result["events"] = [event.to_dict() for event in result["events"]]
+        return result
+
+    async def scan(self, last_scan_time: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Run the detection queries and collect their events.
+
+        Same result as ``execute`` but with compact ``DetectionEvent``
+        objects, for the agent's own scan pipeline.
+
+        Args:
+            last_scan_time: Start of the scan window (exclusive), five
+                minutes ago by default
+
+        Returns:
+            Scan result with the events found
+        """
         try:
             current_time = datetime.now()
-            last_scan_time = kwargs.get(
-                "last_scan_time", current_time - timedelta(minutes=5)
-            )
+            if last_scan_time is None:
+                last_scan_time = current_time - timedelta(minutes=5)
 
-            # Production detection queries
             # Create base table name (validated through config)
-            # nosec B608 - table name components are validated config values, not user input
-            table_name = (
-                f"`{self.project_id}.{self.dataset}.cloudaudit_googleapis_com_activity`"
+            table_identifier = AuditLogQueries.table_identifier(
+                self.project_id, self.dataset
+            )
+            detection_queries = AuditLogQueries.build_detection_queries(
+                table_identifier
             )
 
-            queries = {
-                "failed_authentication": {
-                    # Build query using secure query builder
-                    "query": SecureQueryBuilder.build_select_query(
-                        table_name.replace('`', ''),
-                        [
-                            "timestamp",
-                            "protoPayload.authenticationInfo.principalEmail as actor",
-                            "protoPayload.requestMetadata.callerIp as source_ip",
-                            "protoPayload.methodName as method_name",
-                            "protoPayload.status.code as status_code",
-                            "protoPayload.status.message as error_message",
-                            "resource.type as resource_type",
-                            "resource.labels.project_id as project"
-                        ],
-                        [
-                            "timestamp > TIMESTAMP(@last_scan_time)",
-                            "timestamp <= TIMESTAMP(@current_time)",
-                            "protoPayload.status.code IN (401, 403)"
-                        ],
-                        limit=1000
-                    ) + "\nORDER BY timestamp DESC",
-                    "params": [
-                        bigquery.ScalarQueryParameter(
-                            "last_scan_time", "STRING", last_scan_time.isoformat()
-                        ),
-                        bigquery.ScalarQueryParameter(
-                            "current_time", "STRING", current_time.isoformat()
-                        ),
-                    ],
-                },
-                "privilege_escalation": {
-                    # Build query using secure query builder
-                    "query": SecureQueryBuilder.build_select_query(
-                        table_name.replace('`', ''),
-                        [
-                            "timestamp",
-                            "protoPayload.authenticationInfo.principalEmail as actor",
-                            "protoPayload.requestMetadata.callerIp as source_ip",
-                            "protoPayload.resourceName as resource_name",
-                            "protoPayload.methodName as method_name",
-                            "protoPayload.request.policy.bindings as bindings",
-                            "resource.type as resource_type"
-                        ],
-                        [
-                            "timestamp > TIMESTAMP(@last_scan_time)",
-                            "timestamp <= TIMESTAMP(@current_time)",
-                            "protoPayload.methodName IN ("
-                            "'SetIamPolicy', 'UpdateRole', 'CreateRole', "
-                            "'google.iam.admin.v1.CreateServiceAccount', "
-                            "'google.iam.admin.v1.CreateServiceAccountKey')"
-                        ],
-                        limit=1000
-                    ) + "\nORDER BY timestamp DESC",
-                    "params": [
-                        bigquery.ScalarQueryParameter(
-                            "last_scan_time", "STRING", last_scan_time.isoformat()
-                        ),
-                        bigquery.ScalarQueryParameter(
-                            "current_time", "STRING", current_time.isoformat()
-                        ),
-                    ],
-                },
-                "suspicious_api_activity": {
-                    # Build query using secure query builder
-                    "query": SecureQueryBuilder.build_select_query(
-                        table_name.replace('`', ''),
-                        [
-                            "timestamp",
-                            "protoPayload.authenticationInfo.principalEmail as actor",
-                            "protoPayload.requestMetadata.callerIp as source_ip",
-                            "protoPayload.methodName as method_name",
-                            "protoPayload.resourceName as resource_name",
-                            "protoPayload.requestMetadata.callerSuppliedUserAgent as user_agent",
-                            "resource.type as resource_type"
-                        ],
-                        [
-                            "timestamp > TIMESTAMP(@last_scan_time)",
-                            "timestamp <= TIMESTAMP(@current_time)",
-                            "(protoPayload.methodName LIKE '%Delete%' OR "
-                            "protoPayload.methodName LIKE '%Remove%' OR "
-                            "protoPayload.methodName LIKE '%Destroy%')"
-                        ],
-                        limit=1000
-                    ) + "\nORDER BY timestamp DESC",
-                    "params": [
-                        bigquery.ScalarQueryParameter(
-                            "last_scan_time", "STRING", last_scan_time.isoformat()
-                        ),
-                        bigquery.ScalarQueryParameter(
-                            "current_time", "STRING", current_time.isoformat()
-                        ),
-                    ],
-                },
-                "firewall_modifications": {
-                    # Build query using secure query builder
-                    "query": SecureQueryBuilder.build_select_query(
-                        table_name.replace('`', ''),
-                        [
-                            "timestamp",
-                            "protoPayload.authenticationInfo.principalEmail as actor",
-                            "protoPayload.requestMetadata.callerIp as source_ip",
-                            "protoPayload.methodName as method_name",
-                            "protoPayload.resourceName as resource_name",
-                            "protoPayload.request.name as rule_name",
-                            "protoPayload.request.sourceRanges as source_ranges",
-                            "protoPayload.request.allowed as allowed_rules"
-                        ],
-                        [
-                            "timestamp > TIMESTAMP(@last_scan_time)",
-                            "timestamp <= TIMESTAMP(@current_time)",
-                            "resource.type = 'gce_firewall_rule'",
-                            "protoPayload.methodName IN ("
-                            "'v1.compute.firewalls.insert', "
-                            "'v1.compute.firewalls.patch', "
-                            "'v1.compute.firewalls.delete')"
-                        ],
-                        limit=500
-                    ) + "\nORDER BY timestamp DESC",
-                    "params": [
-                        bigquery.ScalarQueryParameter(
-                            "last_scan_time", "STRING", last_scan_time.isoformat()
-                        ),
-                        bigquery.ScalarQueryParameter(
-                            "current_time", "STRING", current_time.isoformat()
-                        ),
-                    ],
-                },
-            }
+            fused_query = AuditLogQueries.build_fused_query(table_identifier)
+            bytes_estimate = self.query_optimizer.estimate_fusion_savings(
+                list(detection_queries.values()),
+                fused_query,
+                last_scan_time,
+                current_time,
+            )
+
+            if self.fuse_queries:
+                # One table scan serves every detection type
+                scan_queries = {FUSED_QUERY_NAME: fused_query}
+                estimated_bytes = bytes_estimate["fused_bytes"]
+                bytes_saved = bytes_estimate["bytes_saved"]
+            else:
+                scan_queries = detection_queries
+                estimated_bytes = bytes_estimate["separate_bytes"]
+                bytes_saved = 0
+
+            # Run the scan queries concurrently off the event loop
+            query_results = await self._run_scan_queries(
+                scan_queries, last_scan_time, current_time
+            )
 
-            # Execute queries and collect events
-            all_events = []
+            # Collect events in query order
+            all_events: List[DetectionEvent] = []
             queries_executed = 0
+            query_latencies = {}
 
-            for query_type, query_info in queries.items():
-                try:
-                    logger.info("Executing %s detection query", query_type)
-                    # Configure query with parameters
-                    job_config = bigquery.QueryJobConfig(
-                        query_parameters=query_info["params"]
+            for query_name, result in query_results.items():
+                query_latencies[query_name] = round(result.duration_seconds, 3)
+                if not result.succeeded:
+                    logger.error(
+                        "Error executing %s query: %s", query_name, result.error
                     )
-                    query_job = self.bigquery_client.query(
-                        str(query_info["query"]), job_config=job_config
-                    )
-                    results = query_job.result()
-                    queries_executed += 1
+                    continue
 
-                    for row in results:
-                        event = {
-                            "query_type": query_type,
-                            "timestamp": (
-                                row.timestamp.isoformat()
-                                if hasattr(row, "timestamp")
-                                else datetime.now().isoformat()
-                            ),
-                            "actor": getattr(row, "actor", "unknown"),
-                            "source_ip": getattr(row, "source_ip", "unknown"),
-                            "method_name": getattr(row, "method_name", "unknown"),
-                            "resource_type": getattr(row, "resource_type", "unknown"),
-                            "raw_data": dict(row),
-                        }
+                if query_name == FUSED_QUERY_NAME:
+                    rows_by_type = AuditLogQueries.demultiplex_rows(result.rows)
+                else:
+                    rows_by_type = {query_name: result.rows}
 
-                        # Add query-specific fields
-                        if query_type == "failed_authentication":
-                            event["status_code"] = getattr(row, "status_code", 0)
-                            event["error_message"] = getattr(row, "error_message", "")
-                        elif query_type == "privilege_escalation":
-                            event["resource_name"] = getattr(row, "resource_name", "")
-                            event["bindings"] = getattr(row, "bindings", [])
-                        elif query_type == "suspicious_api_activity":
-                            event["user_agent"] = getattr(row, "user_agent", "")
-                            event["resource_name"] = getattr(row, "resource_name", "")
-                        elif query_type == "firewall_modifications":
-                            event["rule_name"] = getattr(row, "rule_name", "")
-                            event["source_ranges"] = getattr(row, "source_ranges", [])
-                            event["allowed_rules"] = getattr(row, "allowed_rules", [])
-
-                        all_events.append(event)
-
-                except (ValueError, RuntimeError, KeyError) as e:
-                    logger.error("Error executing %s query: %s", query_type, e)
+                for query_type, rows in rows_by_type.items():
+                    queries_executed += 1
+                    for row in rows:
+                        all_events.append(self._row_to_event(query_type, row))
 
             return {
                 "status": "success",
                 "events": all_events,
                 "queries_executed": queries_executed,
+                "query_latencies": query_latencies,
+                "estimated_bytes_processed": estimated_bytes,
+                "estimated_bytes_saved": bytes_saved,
                 "scan_time": current_time.isoformat(),
             }
 
@@ -265,17 +200,158 @@ class LogMonitoringTool(BaseTool):
                 "queries_executed": 0,
             }
 
+    async def _run_scan_queries(
+        self,
+        scan_queries: Dict[str, str],
+        last_scan_time: datetime,
+        current_time: datetime,
+    ) -> Dict[str, QueryExecutionResult]:
+        """Run the scan queries, serving cached time buckets when possible."""
+        if self.query_cache is None or self.fuse_queries:
+            query_params = AuditLogQueries.build_query_parameters(
+                last_scan_time, current_time
+            )
+            return await self.query_executor.execute_all(
+                {
+                    query_name: (
+                        query,
+                        bigquery.QueryJobConfig(query_parameters=query_params),
+                    )
+                    for query_name, query in scan_queries.items()
+                }
+            )
+
+        results = await asyncio.gather(
+            *(
+                self._run_cached_query(query_name, query, last_scan_time, current_time)
+                for query_name, query in scan_queries.items()
+            )
+        )
+        return dict(zip(scan_queries, results))
+
+    async def _run_cached_query(
+        self,
+        query_name: str,
+        query: str,
+        last_scan_time: datetime,
+        current_time: datetime,
+    ) -> QueryExecutionResult:
+        """
+        Run one detection query, querying only ranges missing from the cache.
+
+        Results that reach the query's row limit may be truncated, so the
+        cache does not store them.
+        """
+        assert self.query_cache is not None
+        start = time.monotonic()
+
+        async def fetch(
+            range_start: datetime, range_end: datetime
+        ) -> Tuple[List[Any], Optional[int]]:
+            result = await self.query_executor.execute_query(
+                query_name,
+                query,
+                bigquery.QueryJobConfig(
+                    query_parameters=AuditLogQueries.build_query_parameters(
+                        range_start, range_end
+                    )
+                ),
+            )
+            if not result.succeeded:
+                raise RuntimeError(result.error or result.status)
+            return result.rows, result.bytes_processed
+
+        try:
+            rows = await self.query_cache.get_or_fetch_window(
+                query,
+                last_scan_time,
+                current_time,
+                fetch,
+                rule_type=query_name,
+                row_limit=DETECTION_QUERY_SPECS[query_name]["limit"],
+            )
+        except RuntimeError as e:
+            return QueryExecutionResult(
+                name=query_name,
+                status="error",
+                duration_seconds=time.monotonic() - start,
+                error=str(e),
+            )
+
+        return QueryExecutionResult(
+            name=query_name,
+            status="success",
+            rows=rows,
+            duration_seconds=time.monotonic() - start,
+        )
+
+    async def stream_events(
+        self, last_scan_time: datetime, current_time: datetime
+    ) -> AsyncIterator[List[DetectionEvent]]:
+        """
+        Stream scan events page by page in ascending time order.
+
+        Runs the fused audit log scan without per-type limits and converts
+        each result page as it arrives, so only one page of rows is held at a
+        time. Events omit ``raw_data`` unless ``stream_raw_data`` is set.
+
+        Args:
+            last_scan_time: Start of the scan window (exclusive)
+            current_time: End of the scan window (inclusive)
+
+        Yields:
+            Lists of events, one per result page
+        """
+        table_identifier = AuditLogQueries.table_identifier(
+            self.project_id, self.dataset
+        )
+        query = AuditLogQueries.build_fused_query(table_identifier, streaming=True)
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=AuditLogQueries.build_query_parameters(
+                last_scan_time, current_time
+            )
+        )
+        paginator = PaginatedQueryExecutor(
+            self.bigquery_client,
+            page_size=self.stream_page_size,
+            timeout_ms=int(self.query_executor.query_timeout_seconds * 1000),
+        )
+
+        try:
+            async for page in paginator.execute_query(query, job_config):
+                yield [
+                    self._row_to_event(
+                        query_type, type_row, include_raw_data=self.stream_raw_data
+                    )
+                    for row in page
+                    for query_type, type_row in AuditLogQueries.demultiplex_row(row)
+                ]
+        finally:
+            await paginator.cleanup()
+
+    def _row_to_event(
+        self, query_type: str, row: Any, include_raw_data: bool = True
+    ) -> DetectionEvent:
+        """Convert a BigQuery result row into a detection event."""
+        return DetectionEvent.from_row(query_type, row, include_raw_data)
+
 
 class AnomalyDetectionTool(BaseTool):
     """Production anomaly detection tool with sophisticated rules."""
 
-    def __init__(self, detection_rules: Dict[str, Any], _metrics_client: Optional[Any] = None):
+    def __init__(
+        self,
+        detection_rules: Dict[str, Any],
+        _metrics_client: Optional[Any] = None,
+        anomaly_rules: Sequence[AnomalyRule] = DEFAULT_ANOMALY_RULES,
+    ):
         """Initialize with detection rules configuration."""
         super().__init__(
             name="anomaly_detection_tool",
             description="Apply detection rules to identify security anomalies",
         )
         self.detection_rules = detection_rules
+        self.rule_evaluator = AnomalyRuleEvaluator(anomaly_rules)
 
     async def execute(self, _context: ToolContext, **kwargs: Any) -> Dict[str, Any]:
         """Apply production detection rules to identify anomalies."""
@@ -283,70 +359,32 @@ class AnomalyDetectionTool(BaseTool):
         anomalies = []
 
         try:
-            # Production detection rules
+            # Production detection rules, evaluated in one pass per group
             for event_group in events:
-                # Multiple failed authentications from same IP
-                if self._check_brute_force_pattern(event_group):
-                    anomalies.append(
-                        {
-                            "type": "brute_force_attempt",
-                            "severity": "high",
-                            "confidence": 0.9,
-                            "event": event_group[0],
-                            "related_events": event_group,
-                            "detected_at": datetime.now().isoformat(),
-                            "description": (
-                                f"Multiple failed authentication attempts from "
-                                f"{event_group[0].get('source_ip')}"
-                            ),
-                        }
-                    )
+                matched_rules = self.rule_evaluator.evaluate(
+                    self._to_compact(event_group)
+                )
+                if not matched_rules:
+                    continue
 
-                # Privilege escalation followed by suspicious activity
-                if self._check_privilege_escalation_pattern(event_group):
+                related_events = self._to_dicts(event_group)
+                first_event = related_events[0]
+                for rule in matched_rules:
                     anomalies.append(
                         {
-                            "type": "privilege_escalation_abuse",
-                            "severity": "critical",
-                            "confidence": 0.85,
-                            "event": event_group[0],
-                            "related_events": event_group,
+                            "type": rule.anomaly_type,
+                            "severity": rule.severity,
+                            "confidence": rule.confidence,
+                            "event": first_event,
+                            "related_events": related_events,
                             "detected_at": datetime.now().isoformat(),
-                            "description": (
-                                f"Privilege escalation by {event_group[0].get('actor')} "
-                                f"followed by suspicious activity"
+                            "description": rule.description.format(
+                                actor=first_event.get("actor"),
+                                source_ip=first_event.get("source_ip"),
                             ),
                         }
                     )
 
-                # Rapid API deletions
-                if self._check_destructive_pattern(event_group):
-                    anomalies.append(
-                        {
-                            "type": "potential_data_destruction",
-                            "severity": "critical",
-                            "confidence": 0.8,
-                            "event": event_group[0],
-                            "related_events": event_group,
-                            "detected_at": datetime.now().isoformat(),
-                            "description": f"Rapid deletion operations by {event_group[0].get('actor')}",
-                        }
-                    )
-
-                # Firewall rule weakening
-                if self._check_firewall_weakening(event_group):
-                    anomalies.append(
-                        {
-                            "type": "security_control_weakening",
-                            "severity": "high",
-                            "confidence": 0.75,
-                            "event": event_group[0],
-                            "related_events": event_group,
-                            "detected_at": datetime.now().isoformat(),
-                            "description": "Firewall rules modified to allow broader access",
-                        }
-                    )
-
             return {
                 "status": "success",
                 "anomalies": anomalies,
@@ -357,86 +395,24 @@ class AnomalyDetectionTool(BaseTool):
             logger.error("Error in anomaly detection: %s", e, exc_info=True)
             return {"status": "error", "error": str(e), "anomalies": []}
 
-    def _check_brute_force_pattern(self, events: List[Dict[str, Any]]) -> bool:
-        """Check for brute force authentication patterns."""
-        if not events:
-            return False
-
-        failed_auth_events = [
-            e for e in events if e.get("query_type") == "failed_authentication"
-        ]
-        if len(failed_auth_events) >= 5:
-            # Check if from same IP within short time
-            first_event = failed_auth_events[0]
-            source_ip = first_event.get("source_ip")
-
-            same_ip_count = sum(
-                1 for e in failed_auth_events if e.get("source_ip") == source_ip
-            )
-            return same_ip_count >= 5
-
-        return False
-
-    def _check_privilege_escalation_pattern(self, events: List[Dict[str, Any]]) -> bool:
-        """Check for privilege escalation followed by suspicious activity."""
-        if len(events) < 2:
-            return False
-
-        # Look for privilege escalation
-        priv_esc_events = [
-            e for e in events if e.get("query_type") == "privilege_escalation"
-        ]
-        if not priv_esc_events:
-            return False
-
-        # Look for subsequent suspicious activity by same actor
-        actor = priv_esc_events[0].get("actor")
-        subsequent_suspicious = [
-            e
-            for e in events
-            if e.get("actor") == actor
-            and e.get("query_type")
-            in ["suspicious_api_activity", "firewall_modifications"]
-            and e.get("timestamp", "") > priv_esc_events[0].get("timestamp", "")
-        ]
-
-        return len(subsequent_suspicious) > 0
-
-    def _check_destructive_pattern(self, events: List[Dict[str, Any]]) -> bool:
-        """Check for rapid deletion operations."""
-        if not events:
-            return False
-
-        delete_events = [
-            e
-            for e in events
-            if e.get("query_type") == "suspicious_api_activity"
-            and any(
-                keyword in e.get("method_name", "").lower()
-                for keyword in ["delete", "destroy", "remove"]
-            )
+    @staticmethod
+    def _to_compact(event_group: List[Any]) -> List[DetectionEvent]:
+        """Get the compact form of a group of events or event dictionaries."""
+        return [
+            event
+            if isinstance(event, DetectionEvent)
+            else DetectionEvent.from_dict(event)
+            for event in event_group
         ]
 
-        # More than 10 deletions in the time window is suspicious
-        return len(delete_events) >= 10
-
-    def _check_firewall_weakening(self, events: List[Dict[str, Any]]) -> bool:
-        """Check for firewall rules being weakened."""
-        if not events:
-            return False
-
-        firewall_events = [
-            e for e in events if e.get("query_type") == "firewall_modifications"
+    @staticmethod
+    def _to_dicts(event_group: List[Any]) -> List[Dict[str, Any]]:
+        """Get the dictionary form of a group of events for anomaly payloads."""
+        return [
+            event.to_dict() if isinstance(event, DetectionEvent) else event
+            for event in event_group
         ]
 
-        for event in firewall_events:
-            source_ranges = event.get("source_ranges", [])
-            # Check for overly permissive rules
-            if "0.0.0.0/0" in source_ranges or "::/0" in source_ranges:
-                return True
-
-        return False
-
 
 class IncidentCreationTool(BaseTool):
     """Tool for creating security incidents from detected anomalies."""
@@ -451,6 +427,8 @@ class IncidentCreationTool(BaseTool):
     async def execute(self, _context: ToolContext, **kwargs: Any) -> Dict[str, Any]:
         """Create an incident from anomaly data."""
         anomaly = kwargs.get("anomaly", {})
+        if isinstance(anomaly.get("event"), DetectionEvent):
+            anomaly = {**anomaly, "event": anomaly["event"].to_dict()}
 
         try:
             # Map severity string to SeverityLevel enum
@@ -530,6 +508,16 @@ class DetectionAgent(SentinelOpsBaseAgent):
 
         # Initialize BigQuery client
         bigquery_client = bigquery.Client(project=project_id)
+        performance_config = PerformanceTuningConfig.from_config(config)
+        query_executor = ConcurrentQueryExecutor(
+            bigquery_client,
+            max_concurrent_queries=performance_config.max_concurrent_queries,
+            query_timeout_seconds=performance_config.query_timeout_seconds,
+        )
+        streaming_config = config.get("streaming_scan", {})
+        query_cache = (
+            QueryCache(config) if performance_config.enable_query_cache else None
+        )
 
         # Initialize business logic components
         rules_engine = RulesEngine()
@@ -542,7 +530,15 @@ class DetectionAgent(SentinelOpsBaseAgent):
         # Initialize production tools
         tools = [
             LogMonitoringTool(
-                bigquery_client, bigquery_dataset, bigquery_table, project_id=project_id
+                bigquery_client,
+                bigquery_dataset,
+                bigquery_table,
+                project_id=project_id,
+                query_executor=query_executor,
+                fuse_queries=config.get("fuse_detection_queries", False),
+                stream_page_size=streaming_config.get("page_size", 1000),
+                stream_raw_data=streaming_config.get("retain_raw_data", False),
+                query_cache=query_cache,
             ),
             AnomalyDetectionTool(config.get("detection_rules", {})),
             IncidentCreationTool(),
@@ -568,6 +564,7 @@ class DetectionAgent(SentinelOpsBaseAgent):
         self._stored_config["rules_engine"] = rules_engine
         self._stored_config["event_correlator"] = event_correlator
         self._stored_config["query_builder"] = query_builder
+        self._event_grouper = IndexedEventGrouper(window_minutes=10)
         self._stored_config["last_scan_time"] = datetime.now() - timedelta(
             minutes=scan_interval
         )
@@ -599,52 +596,34 @@ class DetectionAgent(SentinelOpsBaseAgent):
         }
 
         try:
-            # Step 1: Monitor logs
             log_tool = self.tools[0]  # LogMonitoringTool
+            anomaly_tool = self.tools[1]  # AnomalyDetectionTool
             tool_context = ToolContext(invocation_context=context)
 
-            if hasattr(log_tool, 'execute'):
-                log_results = await log_tool.execute(
-                    tool_context, last_scan_time=self._stored_config["last_scan_time"]
-                )
-            else:
-                log_results = {"status": "error", "error": "Tool does not have execute method"}
-
-            if log_results.get("status") != "success":
-                errors_list = scan_results["errors"]
-                if isinstance(errors_list, list):
-                    errors_list.append(
-                        f"Log monitoring failed: {log_results.get('error')}"
+            streaming_scan = self._stored_config.get("streaming_scan", {})
+            if (
+                streaming_scan.get("enabled", False)
+                and isinstance(log_tool, LogMonitoringTool)
+                and isinstance(anomaly_tool, AnomalyDetectionTool)
+            ):
+                # Steps 1-3 incrementally, one result page at a time
+                try:
+                    anomalies = await self._perform_streaming_detection(
+                        log_tool, anomaly_tool, tool_context, scan_results
                     )
-                return scan_results
-
-            events = log_results.get("events", [])
-            scan_results["events_processed"] = len(events)
-
-            # Update last scan time
-            self._stored_config["last_scan_time"] = datetime.now()
-
-            if not events:
-                logger.info("No new events detected in this scan")
-                return scan_results
-
-            # Step 2: Correlate and group events
-            correlated_events = self._correlate_events(events)
-
-            # Step 3: Detect anomalies
-            anomaly_tool = self.tools[1]  # AnomalyDetectionTool
-            if hasattr(anomaly_tool, 'execute'):
-                anomaly_results = await anomaly_tool.execute(
-                    tool_context, events=correlated_events
-                )
+                except GoogleCloudError as e:
+                    # Reported like a failed query of the batch scan
+                    logger.error("Error streaming scan events: %s", e)
+                    errors_list = scan_results["errors"]
+                    if isinstance(errors_list, list):
+                        errors_list.append(f"Log monitoring failed: {e}")
+                    return scan_results
             else:
-                anomaly_results = {"status": "error", "error": "Tool does not have execute method"}
-
-            anomalies = anomaly_results.get("anomalies", [])
-            scan_results["anomalies_detected"] = len(anomalies)
-
+                # Steps 1-3 over the whole scan window at once
+                anomalies = await self._perform_batch_detection(
+                    log_tool, anomaly_tool, tool_context, scan_results
+                )
             if not anomalies:
-                logger.info("Processed %s events, no anomalies detected", len(events))
                 return scan_results
 
             # Step 4: Create incidents and transfer to orchestrator
@@ -705,45 +684,140 @@ class DetectionAgent(SentinelOpsBaseAgent):
                 errors_list.append(str(e))
             return scan_results
 
-    def _correlate_events(self, events: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
-        """Correlate related events for anomaly detection."""
-        # Group events by actor and time window
-        correlated = []
-        processed = set()
-
-        for i, event in enumerate(events):
-            if i in processed:
-                continue
+    async def _perform_batch_detection(
+        self,
+        log_tool: Any,
+        anomaly_tool: Any,
+        tool_context: ToolContext,
+        scan_results: Dict[str, Any],
+    ) -> List[Dict[str, Any]]:
+        """
+        Scan the whole window, then group the events and detect anomalies.
+
+        Args:
+            log_tool: Log monitoring tool scanning for events
+            anomaly_tool: Anomaly detection tool applied to the event groups
+            tool_context: Tool context for the scan
+            scan_results: Scan results updated with event and anomaly counts
+                and any log monitoring error
+
+        Returns:
+            Detected anomalies
+        """
+        # Step 1: Monitor logs
+        last_scan_time = self._stored_config["last_scan_time"]
+        if isinstance(log_tool, LogMonitoringTool):
+            log_results = await log_tool.scan(last_scan_time)
+        elif hasattr(log_tool, 'execute'):
+            log_results = await log_tool.execute(
+                tool_context, last_scan_time=last_scan_time
+            )
+        else:
+            log_results = {
+                "status": "error",
+                "error": "Tool does not have execute method",
+            }
 
-            group = [event]
-            processed.add(i)
+        if log_results.get("status") != "success":
+            errors_list = scan_results["errors"]
+            if isinstance(errors_list, list):
+                errors_list.append(
+                    f"Log monitoring failed: {log_results.get('error')}"
+                )
+            return []
 
-            actor = event.get("actor", "")
-            source_ip = event.get("source_ip", "")
-            event_time = datetime.fromisoformat(
-                event.get("timestamp", datetime.now().isoformat())
-            )
+        events = log_results.get("events", [])
+        scan_results["events_processed"] = len(events)
 
-            # Find related events within 10 minute window
-            for j, other in enumerate(events[i + 1 :], start=i + 1):
-                if j in processed:
-                    continue
+        # Update last scan time
+        self._stored_config["last_scan_time"] = datetime.now()
 
-                other_time = datetime.fromisoformat(
-                    other.get("timestamp", datetime.now().isoformat())
-                )
+        if not events:
+            logger.info("No new events detected in this scan")
+            return []
 
-                # Group by same actor or IP within time window
-                if abs(event_time - other_time) <= timedelta(minutes=10):
-                    if (actor and actor == other.get("actor")) or (
-                        source_ip and source_ip == other.get("source_ip")
-                    ):
-                        group.append(other)
-                        processed.add(j)
+        # Step 2: Correlate and group events
+        correlated_events = self._correlate_events(events)
 
-            correlated.append(group)
+        # Step 3: Detect anomalies
+        if hasattr(anomaly_tool, 'execute'):
+            anomaly_results = await anomaly_tool.execute(
+                tool_context, events=correlated_events
+            )
+        else:
+            anomaly_results = {
+                "status": "error",
+                "error": "Tool does not have execute method",
+            }
 
-        return correlated
+        anomalies: List[Dict[str, Any]] = anomaly_results.get("anomalies", [])
+        scan_results["anomalies_detected"] = len(anomalies)
+
+        if not anomalies:
+            logger.info("Processed %s events, no anomalies detected", len(events))
+        return anomalies
+
+    async def _perform_streaming_detection(
+        self,
+        log_tool: LogMonitoringTool,
+        anomaly_tool: AnomalyDetectionTool,
+        tool_context: ToolContext,
+        scan_results: Dict[str, Any],
+    ) -> List[Dict[str, Any]]:
+        """
+        Stream events through grouping and anomaly detection page by page.
+
+        Groups are handed to the anomaly tool as soon as their time window
+        closes, so memory stays bounded by the page size and the grouping
+        window rather than by the size of the scan window.
+
+        Args:
+            log_tool: Log monitoring tool providing the event stream
+            anomaly_tool: Anomaly detection tool applied to completed groups
+            tool_context: Tool context for the scan
+            scan_results: Scan results updated with event and anomaly counts
+
+        Returns:
+            Detected anomalies
+        """
+        grouper = StreamingEventGrouper(window_minutes=10)
+        anomalies: List[Dict[str, Any]] = []
+        events_processed = 0
+        scan_time = datetime.now()
+
+        async def detect(groups: List[List[DetectionEvent]]) -> None:
+            if not groups:
+                return
+            anomaly_results = await anomaly_tool.execute(tool_context, events=groups)
+            anomalies.extend(anomaly_results.get("anomalies", []))
+
+        async for events in log_tool.stream_events(
+            self._stored_config["last_scan_time"], scan_time
+        ):
+            events_processed += len(events)
+            completed: List[List[DetectionEvent]] = []
+            for event in events:
+                completed.extend(grouper.add(event))
+            await detect(completed)
+        await detect(grouper.flush())
+
+        # Update last scan time
+        self._stored_config["last_scan_time"] = scan_time
+        scan_results["events_processed"] = events_processed
+        scan_results["anomalies_detected"] = len(anomalies)
+
+        if not events_processed:
+            logger.info("No new events detected in this scan")
+        elif not anomalies:
+            logger.info("Processed %s events, no anomalies detected", events_processed)
+        return anomalies
+
+    def _correlate_events(
+        self, events: List[DetectionEvent]
+    ) -> List[List[DetectionEvent]]:
+        """Correlate related events for anomaly detection."""
+        # Group events by actor or source IP within a 10 minute window
+        return self._event_grouper.group_events(events)
 
     async def _handle_transfer(
         self, context: Any, transfer_data: Dict[str, Any]
@@ -0,0 +1,195 @@
+"""
+Declarative anomaly rules for the Detection Agent.
+
+Each group of correlated events is walked once to extract every feature the
+rules need (per-type counts, repeated-IP counts, destructive operations,
+permissive firewall changes, follow-up activity after privilege escalation).
+Rules are plain data evaluated against those features, so adding a pattern
+does not add another pass over the group.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.detection_agent.detection_event import DetectionEvent
+
+DESTRUCTIVE_KEYWORDS = ("delete", "destroy", "remove")
+PERMISSIVE_SOURCE_RANGES = ("0.0.0.0/0", "::/0")
+FOLLOW_UP_QUERY_TYPES = ("suspicious_api_activity", "firewall_modifications")
+
+
+@dataclass(slots=True)
+class GroupFeatures:
+    """Features of one event group, extracted in a single pass."""
+
+    event_count: int = 0
+    type_counts: Dict[str, int] = field(default_factory=dict)
+    first_failed_auth_ip: Any = None
+    failed_auth_from_first_ip: int = 0
+    escalation_actor: Any = None
+    escalation_time_us: Optional[int] = None
+    latest_follow_up_us: Dict[Any, int] = field(default_factory=dict)
+    destructive_count: int = 0
+    permissive_firewall_change: bool = False
+
+    @property
+    def escalation_followed_up(self) -> bool:
+        """Whether the first escalating actor acted suspiciously afterwards."""
+        if self.escalation_time_us is None:
+            return False
+        latest = self.latest_follow_up_us.get(self.escalation_actor)
+        return latest is not None and latest > self.escalation_time_us
+
+
+@dataclass(frozen=True)
+class AnomalyRule:
+    """A detection pattern evaluated against group features.
+
+    Attributes:
+        anomaly_type: Type recorded on the anomaly
+        severity: Anomaly severity
+        confidence: Detection confidence between 0 and 1
+        description: Description template; ``{actor}`` and ``{source_ip}``
+            are filled from the group's first event
+        matches: Predicate over the group's features
+    """
+
+    anomaly_type: str
+    severity: str
+    confidence: float
+    description: str
+    matches: Callable[[GroupFeatures], bool]
+
+
+DEFAULT_ANOMALY_RULES: Tuple[AnomalyRule, ...] = (
+    # Multiple failed authentications from same IP
+    AnomalyRule(
+        anomaly_type="brute_force_attempt",
+        severity="high",
+        confidence=0.9,
+        description="Multiple failed authentication attempts from {source_ip}",
+        matches=lambda f: f.failed_auth_from_first_ip >= 5,
+    ),
+    # Privilege escalation followed by suspicious activity
+    AnomalyRule(
+        anomaly_type="privilege_escalation_abuse",
+        severity="critical",
+        confidence=0.85,
+        description=(
+            "Privilege escalation by {actor} followed by suspicious activity"
+        ),
+        matches=lambda f: f.event_count >= 2 and f.escalation_followed_up,
+    ),
+    # More than 10 deletions in the time window is suspicious
+    AnomalyRule(
+        anomaly_type="potential_data_destruction",
+        severity="critical",
+        confidence=0.8,
+        description="Rapid deletion operations by {actor}",
+        matches=lambda f: f.destructive_count >= 10,
+    ),
+    # Firewall rules opened to any source
+    AnomalyRule(
+        anomaly_type="security_control_weakening",
+        severity="high",
+        confidence=0.75,
+        description="Firewall rules modified to allow broader access",
+        matches=lambda f: f.permissive_firewall_change,
+    ),
+)
+
+
+class AnomalyRuleEvaluator:
+    """Evaluates anomaly rules over event groups with one pass per group."""
+
+    def __init__(self, rules: Sequence[AnomalyRule] = DEFAULT_ANOMALY_RULES):
+        """
+        Initialize the evaluator.
+
+        Args:
+            rules: Rules to evaluate, in reporting order
+        """
+        self.rules = tuple(rules)
+        self._destructive_methods: Dict[Any, bool] = {}
+
+    def extract_features(self, events: Sequence[DetectionEvent]) -> GroupFeatures:
+        """
+        Walk a group once and collect the features every rule uses.
+
+        Args:
+            events: Events of one correlated group
+
+        Returns:
+            Group features
+        """
+        features = GroupFeatures(event_count=len(events))
+        type_counts = features.type_counts
+
+        for event in events:
+            query_type = event.query_type
+            type_counts[query_type] = type_counts.get(query_type, 0) + 1
+
+            if query_type == "failed_authentication":
+                self._add_failed_auth(features, event)
+            elif query_type == "privilege_escalation":
+                self._add_escalation(features, event)
+            elif query_type in FOLLOW_UP_QUERY_TYPES:
+                self._add_follow_up(features, event)
+
+        return features
+
+    @staticmethod
+    def _add_failed_auth(features: GroupFeatures, event: DetectionEvent) -> None:
+        """Count failed logins from the first failing source IP."""
+        if features.type_counts[event.query_type] == 1:
+            features.first_failed_auth_ip = event.source_ip
+        if event.source_ip == features.first_failed_auth_ip:
+            features.failed_auth_from_first_ip += 1
+
+    @staticmethod
+    def _add_escalation(features: GroupFeatures, event: DetectionEvent) -> None:
+        """Keep the actor and time of the first privilege escalation."""
+        if features.escalation_time_us is None:
+            features.escalation_actor = event.actor
+            features.escalation_time_us = event.timestamp_us
+
+    def _add_follow_up(self, features: GroupFeatures, event: DetectionEvent) -> None:
+        """Track the latest follow-up per actor and what it did."""
+        latest_follow_up = features.latest_follow_up_us
+        previous = latest_follow_up.get(event.actor)
+        if previous is None or event.timestamp_us > previous:
+            latest_follow_up[event.actor] = event.timestamp_us
+
+        if event.query_type == "suspicious_api_activity":
+            if self._is_destructive(event.method_name):
+                features.destructive_count += 1
+        elif not features.permissive_firewall_change:
+            source_ranges = event.source_ranges or []
+            features.permissive_firewall_change = any(
+                source_range in source_ranges
+                for source_range in PERMISSIVE_SOURCE_RANGES
+            )
+
+    def evaluate(self, events: Sequence[DetectionEvent]) -> List[AnomalyRule]:
+        """
+        Get the rules matched by a group of events.
+
+        Args:
+            events: Events of one correlated group
+
+        Returns:
+            Matching rules, in rule order
+        """
+        if not events:
+            return []
+        features = self.extract_features(events)
+        return [rule for rule in self.rules if rule.matches(features)]
+
+    def _is_destructive(self, method_name: Any) -> bool:
+        """Check a method name for destructive keywords, cached per name."""
+        destructive = self._destructive_methods.get(method_name)
+        if destructive is None:
+            lowered = (method_name or "").lower()
+            destructive = any(keyword in lowered for keyword in DESTRUCTIVE_KEYWORDS)
+            self._destructive_methods[method_name] = destructive
+        return destructive
@@ -0,0 +1,268 @@
+"""
+Audit log detection queries for the Detection Agent.
+
+This module defines the detection queries run against the Cloud Audit Logs
+activity table, either as one query per detection type or fused into a single
+scan whose rows are demultiplexed back into per-type results. The fused scan
+can also be built unbounded and in time order for streaming consumption.
+"""
+
+from typing import Any, Dict, List, Tuple
+
+from google.cloud import bigquery
+
+from src.common.secure_query_builder import SecureQueryBuilder
+
+AUDIT_ACTIVITY_TABLE = "cloudaudit_googleapis_com_activity"
+
+FUSED_QUERY_NAME = "fused_audit_scan"
+
+TIME_WINDOW_CONDITIONS = [
+    "timestamp > TIMESTAMP(@last_scan_time)",
+    "timestamp <= TIMESTAMP(@current_time)",
+]
+
+DETECTION_QUERY_SPECS: Dict[str, Dict[str, Any]] = {
+    "failed_authentication": {
+        "fields": [
+            "timestamp",
+            "protoPayload.authenticationInfo.principalEmail as actor",
+            "protoPayload.requestMetadata.callerIp as source_ip",
+            "protoPayload.methodName as method_name",
+            "protoPayload.status.code as status_code",
+            "protoPayload.status.message as error_message",
+            "resource.type as resource_type",
+            "resource.labels.project_id as project"
+        ],
+        "conditions": [
+            "protoPayload.status.code IN (401, 403)"
+        ],
+        "limit": 1000,
+    },
+    "privilege_escalation": {
+        "fields": [
+            "timestamp",
+            "protoPayload.authenticationInfo.principalEmail as actor",
+            "protoPayload.requestMetadata.callerIp as source_ip",
+            "protoPayload.resourceName as resource_name",
+            "protoPayload.methodName as method_name",
+            "protoPayload.request.policy.bindings as bindings",
+            "resource.type as resource_type"
+        ],
+        "conditions": [
+            "protoPayload.methodName IN ("
+            "'SetIamPolicy', 'UpdateRole', 'CreateRole', "
+            "'google.iam.admin.v1.CreateServiceAccount', "
+            "'google.iam.admin.v1.CreateServiceAccountKey')"
+        ],
+        "limit": 1000,
+    },
+    "suspicious_api_activity": {
+        "fields": [
+            "timestamp",
+            "protoPayload.authenticationInfo.principalEmail as actor",
+            "protoPayload.requestMetadata.callerIp as source_ip",
+            "protoPayload.methodName as method_name",
+            "protoPayload.resourceName as resource_name",
+            "protoPayload.requestMetadata.callerSuppliedUserAgent as user_agent",
+            "resource.type as resource_type"
+        ],
+        "conditions": [
+            "(protoPayload.methodName LIKE '%Delete%' OR "
+            "protoPayload.methodName LIKE '%Remove%' OR "
+            "protoPayload.methodName LIKE '%Destroy%')"
+        ],
+        "limit": 1000,
+    },
+    "firewall_modifications": {
+        "fields": [
+            "timestamp",
+            "protoPayload.authenticationInfo.principalEmail as actor",
+            "protoPayload.requestMetadata.callerIp as source_ip",
+            "protoPayload.methodName as method_name",
+            "protoPayload.resourceName as resource_name",
+            "protoPayload.request.name as rule_name",
+            "protoPayload.request.sourceRanges as source_ranges",
+            "protoPayload.request.allowed as allowed_rules"
+        ],
+        "conditions": [
+            "resource.type = 'gce_firewall_rule'",
+            "protoPayload.methodName IN ("
+            "'v1.compute.firewalls.insert', "
+            "'v1.compute.firewalls.patch', "
+            "'v1.compute.firewalls.delete')"
+        ],
+        "limit": 500,
+    },
+}
+
+
+def _column_name(field: str) -> str:
+    """Get the result column name of a projected field."""
+    if " as " in field:
+        return field.split(" as ")[1].strip()
+    return field.split(".")[-1].strip()
+
+
+_TYPE_COLUMNS: Dict[str, List[str]] = {
+    query_type: [_column_name(field) for field in spec["fields"]]
+    for query_type, spec in DETECTION_QUERY_SPECS.items()
+}
+
+_TYPE_FIELD_INDEXES: Dict[str, Dict[str, int]] = {
+    query_type: {name: index for index, name in enumerate(names)}
+    for query_type, names in _TYPE_COLUMNS.items()
+}
+
+
+class AuditLogQueries:
+    """Query builders for audit log detection scans."""
+
+    @staticmethod
+    def table_identifier(project_id: str, dataset: str) -> str:
+        """
+        Get the activity audit log table identifier.
+
+        Args:
+            project_id: GCP project ID
+            dataset: BigQuery dataset containing the audit logs
+
+        Returns:
+            Fully qualified table identifier (without backticks)
+        """
+        return f"{project_id}.{dataset}.{AUDIT_ACTIVITY_TABLE}"
+
+    @staticmethod
+    def build_query_parameters(
+        last_scan_time: Any, current_time: Any
+    ) -> List[bigquery.ScalarQueryParameter]:
+        """
+        Build the scan window parameters shared by all detection queries.
+
+        Args:
+            last_scan_time: Start of the scan window (exclusive)
+            current_time: End of the scan window (inclusive)
+
+        Returns:
+            BigQuery query parameters
+        """
+        return [
+            bigquery.ScalarQueryParameter(
+                "last_scan_time", "STRING", last_scan_time.isoformat()
+            ),
+            bigquery.ScalarQueryParameter(
+                "current_time", "STRING", current_time.isoformat()
+            ),
+        ]
+
+    @staticmethod
+    def build_detection_queries(table_identifier: str) -> Dict[str, str]:
+        """
+        Build one query per detection type.
+
+        Args:
+            table_identifier: Audit log table identifier
+
+        Returns:
+            Dictionary mapping detection type to query text
+        """
+        return {
+            query_type: SecureQueryBuilder.build_select_query(
+                table_identifier,
+                spec["fields"],
+                TIME_WINDOW_CONDITIONS + spec["conditions"],
+                limit=spec["limit"]
+            ) + "\nORDER BY timestamp DESC"
+            for query_type, spec in DETECTION_QUERY_SPECS.items()
+        }
+
+    @staticmethod
+    def build_fused_query(table_identifier: str, streaming: bool = False) -> str:
+        """
+        Build a single query that serves every detection type in one scan.
+
+        The projection is the union of all per-type columns plus a
+        ``query_type`` label; a log entry matching several detection types is
+        returned once per type.
+
+        Args:
+            table_identifier: Audit log table identifier
+            streaming: Drop the per-type row limits and order by ascending
+                timestamp so results can be consumed page by page in time order
+
+        Returns:
+            Fused query text
+        """
+        fields: List[str] = []
+        for spec in DETECTION_QUERY_SPECS.values():
+            for field in spec["fields"]:
+                if field not in fields:
+                    fields.append(field)
+
+        return SecureQueryBuilder.build_fused_select_query(
+            table_identifier,
+            fields,
+            TIME_WINDOW_CONDITIONS,
+            {
+                query_type: " AND ".join(spec["conditions"])
+                for query_type, spec in DETECTION_QUERY_SPECS.items()
+            },
+            branch_limits=None if streaming else {
+                query_type: spec["limit"]
+                for query_type, spec in DETECTION_QUERY_SPECS.items()
+            },
+            order_by="timestamp ASC" if streaming else "timestamp DESC",
+        )
+
+    @staticmethod
+    def demultiplex_row(row: Any) -> List[Tuple[str, bigquery.Row]]:
+        """
+        Convert one fused query row into the row of its detection type.
+
+        Args:
+            row: Row (or column mapping) returned by the fused query
+
+        Returns:
+            List holding the (detection type, per-type row) pair, empty if
+            the row's label is not a known detection type
+        """
+        query_type = row.get("query_type")
+        if query_type not in DETECTION_QUERY_SPECS:
+            return []
+        return [
+            (
+                query_type,
+                bigquery.Row(
+                    tuple(row.get(name) for name in _TYPE_COLUMNS[query_type]),
+                    _TYPE_FIELD_INDEXES[query_type],
+                ),
+            )
+        ]
+
+    @staticmethod
+    def demultiplex_rows(rows: Any) -> Dict[str, List[bigquery.Row]]:
+        """
+        Split fused query rows back into per-type rows.
+
+        Each per-type row only carries the columns the standalone query for
+        that type projects, so downstream event conversion is unchanged. The
+        fused query returns a log entry once for each detection type it
+        matches.
+
+        Args:
+            rows: Rows returned by the fused query
+
+        Returns:
+            Dictionary mapping detection type to its rows, in scan order
+        """
+        demultiplexed: Dict[str, List[bigquery.Row]] = {
+            query_type: [] for query_type in DETECTION_QUERY_SPECS
+        }
+
+        for row in rows:
+            for query_type, type_row in AuditLogQueries.demultiplex_row(row):
+                type_rows = demultiplexed[query_type]
+                if len(type_rows) < DETECTION_QUERY_SPECS[query_type]["limit"]:
+                    type_rows.append(type_row)
+
+        return demultiplexed
@@ -2,14 +2,23 @@
 Catch-up scan management for the Detection Agent.
 
 This module handles scanning of historical logs when the agent has been offline.
+Chunks from all catch-up tasks share one concurrency budget, completed chunks
+are checkpointed to disk so a restarted agent resumes where it stopped, and
+chunk sizes can adapt to the observed scan latency.
 """
 
 import asyncio
-from dataclasses import dataclass
+import json
+import math
+import os
+import time
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional, Tuple, Callable
 import logging
 
+TimeRange = Tuple[datetime, datetime]
+
 
 @dataclass
 class CatchUpTask:
@@ -36,6 +45,172 @@ class CatchUpTask:
         return chunks
 
 
+class CatchUpCheckpoint:
+    """Durable record of completed catch-up time ranges per log type.
+
+    Completed ranges are merged as they are recorded and written to a JSON
+    file with an atomic replace, so a crash never leaves a partial file.
+    """
+
+    def __init__(self, path: Optional[str]):
+        """
+        Initialize the checkpoint.
+
+        Args:
+            path: Checkpoint file path, or None to keep progress in memory only
+        """
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+        self.completed: Dict[str, List[TimeRange]] = {}
+
+    def load(self) -> None:
+        """Load completed ranges from the checkpoint file, if present."""
+        self.completed = {}
+        if not self.path or not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for log_type, ranges in data.get("completed", {}).items():
+                self.completed[log_type] = [
+                    (datetime.fromisoformat(start), datetime.fromisoformat(end))
+                    for start, end in ranges
+                ]
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            self.logger.warning(
+                "Ignoring unreadable catch-up checkpoint %s: %s", self.path, e
+            )
+            self.completed = {}
+
+    def save(self) -> None:
+        """Write completed ranges to the checkpoint file."""
+        if not self.path:
+            return
+
+        data = {
+            "completed": {
+                log_type: [[start.isoformat(), end.isoformat()] for start, end in ranges]
+                for log_type, ranges in self.completed.items()
+            }
+        }
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(temp_path, self.path)
+
+    def record(self, log_type: str, start_time: datetime, end_time: datetime) -> None:
+        """
+        Record a completed range, merging it with touching ranges.
+
+        Args:
+            log_type: Log type scanned
+            start_time: Start of the completed range
+            end_time: End of the completed range
+        """
+        ranges = sorted(self.completed.get(log_type, []) + [(start_time, end_time)])
+        merged: List[TimeRange] = []
+        for start, end in ranges:
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        self.completed[log_type] = merged
+
+    def prune(self, before: datetime) -> None:
+        """
+        Drop completed ranges that end before a cutoff.
+
+        Args:
+            before: Ranges ending before this time are no longer needed
+        """
+        for log_type in list(self.completed):
+            ranges = [r for r in self.completed[log_type] if r[1] >= before]
+            if ranges:
+                self.completed[log_type] = ranges
+            else:
+                del self.completed[log_type]
+
+    def remaining(self, task: CatchUpTask) -> List[TimeRange]:
+        """
+        Get the parts of a task's time range not yet completed.
+
+        Args:
+            task: Catch-up task
+
+        Returns:
+            Uncovered time ranges in time order
+        """
+        gaps: List[TimeRange] = []
+        cursor = task.start_time
+        for start, end in self.completed.get(task.log_type, []):
+            if end <= cursor or start >= task.end_time:
+                continue
+            if start > cursor:
+                gaps.append((cursor, start))
+            cursor = max(cursor, end)
+        if cursor < task.end_time:
+            gaps.append((cursor, task.end_time))
+        return gaps
+
+
+@dataclass
+class _TaskProgress:
+    """Dispatch state of one catch-up task."""
+
+    task: CatchUpTask
+    remaining: List[TimeRange]
+    chunk_minutes: float
+    started: bool = False
+    in_flight: int = 0
+    dispatched: int = 0
+    failures: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def exhausted(self) -> bool:
+        """Whether every chunk of the task has been dispatched."""
+        return not self.remaining
+
+    @property
+    def running(self) -> bool:
+        """Whether the task has started and still has chunks to finish."""
+        return self.started and not (self.exhausted and self.in_flight == 0)
+
+    def estimated_chunks(self) -> int:
+        """Estimate how many chunks are still to be dispatched."""
+        chunk_seconds = self.chunk_minutes * 60
+        return sum(
+            math.ceil((end - start).total_seconds() / chunk_seconds)
+            for start, end in self.remaining
+        )
+
+    def take_chunk(self) -> TimeRange:
+        """Carve the next chunk off the front of the remaining ranges."""
+        start, end = self.remaining[0]
+        chunk_end = min(start + timedelta(minutes=self.chunk_minutes), end)
+        if chunk_end >= end:
+            self.remaining.pop(0)
+        else:
+            self.remaining[0] = (chunk_end, end)
+        self.dispatched += 1
+        return start, chunk_end
+
+
+@dataclass
+class _CatchUpRun:
+    """Shared state of one execute_catchup_scans call."""
+
+    progress: List[_TaskProgress]
+    scan_callback: Callable[[CatchUpTask], Any]
+    progress_callback: Optional[Callable[[Dict[str, Any]], None]]
+    condition: asyncio.Condition = field(default_factory=asyncio.Condition)
+    completed_chunks: int = 0
+    failed_chunks: List[Dict[str, Any]] = field(default_factory=list)
+
+
 class CatchUpScanManager:
     """Manages catch-up scanning when the agent has been offline."""
 
@@ -69,6 +244,21 @@ class CatchUpScanManager:
         # Concurrent catch-up tasks limit
         self.max_concurrent_catchup = catchup_config.get("max_concurrent_catchup", 2)
 
+        # Global budget of chunk scans in flight across all tasks
+        self.max_concurrent_chunks = catchup_config.get(
+            "max_concurrent_chunks", self.max_concurrent_catchup
+        )
+
+        # Adaptive chunk sizing: aim for chunks taking target_chunk_seconds
+        self.target_chunk_seconds: Optional[float] = catchup_config.get(
+            "target_chunk_seconds"
+        )
+        self.min_chunk_minutes = catchup_config.get("min_chunk_minutes", 5)
+        self.max_chunk_minutes = catchup_config.get("max_chunk_minutes", 240)
+
+        # Durable checkpoint of completed chunks
+        self.checkpoint = CatchUpCheckpoint(catchup_config.get("checkpoint_path"))
+
         # Track active catch-up tasks
         self.active_tasks: Dict[str, CatchUpTask] = {}
         self.completed_tasks: List[CatchUpTask] = []
@@ -155,6 +345,11 @@ class CatchUpScanManager:
         """
         Execute scheduled catch-up scans.
 
+        Chunks are dispatched highest priority first to a pool of
+        ``max_concurrent_chunks`` workers, with at most
+        ``max_concurrent_catchup`` tasks in progress at once. Ranges already
+        recorded in the checkpoint are skipped.
+
         Args:
             scan_callback: Async function to call for each scan chunk
                           (log_type, start_time, end_time) -> bool
@@ -168,70 +363,41 @@ class CatchUpScanManager:
             return {"status": "no_tasks", "message": "No catch-up tasks to execute"}
 
         self.catchup_start_time = datetime.now(timezone.utc)
-        total_chunks = sum(len(task.get_chunks()) for task in self.pending_tasks)
-        completed_chunks = 0
-        failed_chunks = []
+        self.checkpoint.load()
+        self.checkpoint.prune(
+            min(task.start_time for task in self.pending_tasks)
+        )
+
+        progress = [
+            _TaskProgress(
+                task=task,
+                remaining=self.checkpoint.remaining(task),
+                chunk_minutes=task.chunk_size_minutes,
+            )
+            for task in self.pending_tasks
+        ]
+        resumed_seconds = sum(
+            (task.end_time - task.start_time).total_seconds()
+            - sum((end - start).total_seconds() for start, end in state.remaining)
+            for task, state in zip(self.pending_tasks, progress)
+        )
+        run = _CatchUpRun(progress, scan_callback, progress_callback)
         self.logger.info(
-            "Starting catch-up scan execution: %s tasks, %s total chunks",
-            len(self.pending_tasks), total_chunks
+            "Starting catch-up scan execution: %s tasks, %s total chunks "
+            "(%.0f seconds already completed)",
+            len(self.pending_tasks),
+            sum(state.estimated_chunks() for state in progress),
+            resumed_seconds
         )
 
-        # Process tasks with concurrency limit
-        semaphore = asyncio.Semaphore(self.max_concurrent_catchup)
-
-        async def process_task(task: CatchUpTask) -> None:
-            """Process a single catch-up task."""
-            async with semaphore:
-                self.active_tasks[task.log_type] = task
-                chunks = task.get_chunks()
-
-                for _, (start_time, end_time) in enumerate(chunks):
-                    try:
-                        # Execute scan for this chunk
-                        chunk_task = CatchUpTask(
-                            log_type=task.log_type,
-                            start_time=start_time,
-                            end_time=end_time,
-                            priority=task.priority,
-                            chunk_size_minutes=task.chunk_size_minutes
-                        )
-                        success = await scan_callback(chunk_task)
-
-                        if not success:
-                            failed_chunks.append({
-                                "log_type": task.log_type,
-                                "start_time": start_time,
-                                "end_time": end_time
-                            })
-                        else:
-                            nonlocal completed_chunks
-                            completed_chunks += 1
-
-                        # Report progress
-                        if progress_callback:
-                            progress_callback({
-                                "completed_chunks": completed_chunks,
-                                "total_chunks": total_chunks,
-                                "current_log_type": task.log_type
-                            })
-
-                    except (RuntimeError, ValueError, KeyError, asyncio.TimeoutError, OSError) as e:
-                        self.logger.error(
-                            "Error in catch-up scan for %s chunk %s to %s: %s",
-                            task.log_type, start_time, end_time, e
-                        )
-                        failed_chunks.append({
-                            "log_type": task.log_type,
-                            "start_time": start_time,
-                            "end_time": end_time,
-                            "error": str(e)
-                        })
-                # Mark task as completed
-                del self.active_tasks[task.log_type]
-                self.completed_tasks.append(task)
-
-        # Execute all tasks concurrently
-        await asyncio.gather(*[process_task(task) for task in self.pending_tasks])
+        # Tasks fully covered by the checkpoint complete immediately
+        for state in progress:
+            if state.exhausted:
+                self.completed_tasks.append(state.task)
+
+        await asyncio.gather(
+            *[self._catchup_worker(run) for _ in range(max(1, self.max_concurrent_chunks))]
+        )
 
         # Calculate duration
         self.total_catchup_duration = (
@@ -244,12 +410,177 @@ class CatchUpScanManager:
         return {
             "status": "completed",
             "total_tasks": len(self.completed_tasks),
-            "total_chunks": total_chunks,
-            "completed_chunks": completed_chunks,
-            "failed_chunks": len(failed_chunks),
+            "total_chunks": sum(state.dispatched for state in progress),
+            "completed_chunks": run.completed_chunks,
+            "failed_chunks": len(run.failed_chunks),
+            "resumed_seconds": resumed_seconds,
             "duration_seconds": self.total_catchup_duration,
-            "failures": failed_chunks
+            "failures": run.failed_chunks
+        }
+
+    def _next_chunk(self, run: _CatchUpRun) -> Optional[Tuple[_TaskProgress, TimeRange]]:
+        """Pick the next chunk from the highest priority dispatchable task."""
+        running = sum(1 for state in run.progress if state.running)
+        for state in run.progress:
+            if state.exhausted:
+                continue
+            if not state.started:
+                if running >= self.max_concurrent_catchup:
+                    continue
+                state.started = True
+                self.active_tasks[state.task.log_type] = state.task
+            state.in_flight += 1
+            return state, state.take_chunk()
+        return None
+
+    async def _catchup_worker(self, run: _CatchUpRun) -> None:
+        """Scan chunks until every task has been dispatched."""
+        while True:
+            async with run.condition:
+                while True:
+                    picked = self._next_chunk(run)
+                    if picked or all(state.exhausted for state in run.progress):
+                        break
+                    await run.condition.wait()
+            if picked is None:
+                return
+            state, (start_time, end_time) = picked
+            await self._run_chunk(run, state, start_time, end_time)
+
+    async def _run_chunk(
+        self,
+        run: _CatchUpRun,
+        state: _TaskProgress,
+        start_time: datetime,
+        end_time: datetime
+    ) -> None:
+        """Scan one chunk and record its outcome."""
+        task = state.task
+        chunk_task = CatchUpTask(
+            log_type=task.log_type,
+            start_time=start_time,
+            end_time=end_time,
+            priority=task.priority,
+            chunk_size_minutes=task.chunk_size_minutes
+        )
+        started = time.monotonic()
+        # Stays a failure if the scan is cancelled or raises unexpectedly
+        failure: Optional[Dict[str, Any]] = {
+            "log_type": task.log_type,
+            "start_time": start_time,
+            "end_time": end_time,
+            "error": "Scan did not finish"
+        }
+        try:
+            failure = await self._scan_chunk(chunk_task, run.scan_callback)
+        finally:
+            # Always release the chunk, or the task would never complete
+            async with run.condition:
+                state.in_flight -= 1
+                self._record_chunk(
+                    run, state, chunk_task, failure, time.monotonic() - started
+                )
+                run.condition.notify_all()
+
+    async def _scan_chunk(
+        self, chunk_task: CatchUpTask, scan_callback: Callable[[CatchUpTask], Any]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Scan one chunk.
+
+        Returns:
+            None if the scan succeeded, otherwise the failure to report
+        """
+        failure: Dict[str, Any] = {
+            "log_type": chunk_task.log_type,
+            "start_time": chunk_task.start_time,
+            "end_time": chunk_task.end_time
         }
+        try:
+            # Execute scan for this chunk
+            if await scan_callback(chunk_task):
+                return None
+        except (RuntimeError, ValueError, KeyError, asyncio.TimeoutError, OSError) as e:
+            self.logger.error(
+                "Error in catch-up scan for %s chunk %s to %s: %s",
+                chunk_task.log_type, chunk_task.start_time, chunk_task.end_time, e
+            )
+            failure["error"] = str(e)
+        return failure
+
+    def _record_chunk(
+        self,
+        run: _CatchUpRun,
+        state: _TaskProgress,
+        chunk_task: CatchUpTask,
+        failure: Optional[Dict[str, Any]],
+        elapsed_seconds: float
+    ) -> None:
+        """Record a finished chunk, completing its task after the last one."""
+        task = state.task
+        if failure:
+            run.failed_chunks.append(failure)
+            state.failures.append(failure)
+        else:
+            run.completed_chunks += 1
+            self._checkpoint_chunk(state, chunk_task, elapsed_seconds)
+
+        if state.exhausted and not state.in_flight:
+            # Mark task as completed
+            del self.active_tasks[task.log_type]
+            self.completed_tasks.append(task)
+
+        # Report progress
+        if run.progress_callback:
+            run.progress_callback({
+                "completed_chunks": run.completed_chunks,
+                "total_chunks": sum(
+                    s.dispatched + s.estimated_chunks() for s in run.progress
+                ),
+                "current_log_type": task.log_type
+            })
+
+    def _checkpoint_chunk(
+        self, state: _TaskProgress, chunk_task: CatchUpTask, elapsed_seconds: float
+    ) -> None:
+        """Save a completed chunk to the checkpoint and resize the next chunks."""
+        self.checkpoint.record(
+            chunk_task.log_type, chunk_task.start_time, chunk_task.end_time
+        )
+        try:
+            self.checkpoint.save()
+        except OSError as e:
+            self.logger.warning("Failed to save catch-up checkpoint: %s", e)
+        self._adapt_chunk_size(
+            state, chunk_task.start_time, chunk_task.end_time, elapsed_seconds
+        )
+
+    def _adapt_chunk_size(
+        self,
+        state: _TaskProgress,
+        start_time: datetime,
+        end_time: datetime,
+        elapsed_seconds: float
+    ) -> None:
+        """
+        Resize a task's next chunks toward the target chunk latency.
+
+        Args:
+            state: Dispatch state of the task
+            start_time: Start of the completed chunk
+            end_time: End of the completed chunk
+            elapsed_seconds: Observed scan latency of the chunk
+        """
+        if not self.target_chunk_seconds:
+            return
+
+        chunk_minutes = (end_time - start_time).total_seconds() / 60
+        ideal = chunk_minutes * self.target_chunk_seconds / max(elapsed_seconds, 1e-3)
+        # Smooth against single slow or fast chunks
+        adjusted = (state.chunk_minutes + ideal) / 2
+        state.chunk_minutes = min(
+            max(adjusted, self.min_chunk_minutes), self.max_chunk_minutes
+        )
 
     def get_catchup_status(self) -> Dict[str, Any]:
         """Get the current status of catch-up scanning."""
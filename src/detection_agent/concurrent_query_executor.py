@@ -0,0 +1,236 @@
+"""
+Concurrent BigQuery execution for the Detection Agent.
+
+This module runs independent detection queries in parallel without blocking
+the event loop. BigQuery client calls are synchronous, so job submission and
+result collection are moved to worker threads while the coroutine only awaits
+them. Each query gets its own timeout and is cancelled server-side when the
+timeout expires or the awaiting task is cancelled.
+"""
+
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.cloud import bigquery
+from google.cloud.exceptions import GoogleCloudError
+
+
+@dataclass
+class QueryExecutionResult:
+    """Outcome of a single query run by the concurrent executor."""
+
+    name: str
+    status: str  # success, timeout or error
+    rows: List[Any] = field(default_factory=list)
+    duration_seconds: float = 0.0
+    error: Optional[str] = None
+    bytes_processed: Optional[int] = None  # Billed bytes reported by the job
+
+    @property
+    def succeeded(self) -> bool:
+        """Whether the query completed and its rows are usable."""
+        return self.status == "success"
+
+
+class ConcurrentQueryExecutor:
+    """Runs BigQuery queries concurrently with per-query timeouts."""
+
+    def __init__(
+        self,
+        client: bigquery.Client,
+        max_concurrent_queries: int = 5,
+        query_timeout_seconds: float = 30.0,
+    ):
+        """
+        Initialize the concurrent query executor.
+
+        Args:
+            client: BigQuery client instance
+            max_concurrent_queries: Maximum number of queries in flight at once
+            query_timeout_seconds: Default timeout for each query in seconds
+        """
+        if max_concurrent_queries < 1:
+            raise ValueError("max_concurrent_queries must be at least 1")
+
+        self.client = client
+        self.max_concurrent_queries = max_concurrent_queries
+        self.query_timeout_seconds = query_timeout_seconds
+        self.logger = logging.getLogger(__name__)
+
+        # Semaphore is created lazily so it binds to the running event loop
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # Keyed by a per-call token so calls sharing a query name stay separate.
+        # A call holds None until its job is submitted; submission runs in a
+        # worker thread, so the lock keeps it from racing a cancellation.
+        self._active_jobs: Dict[int, Any] = {}
+        self._jobs_lock = threading.Lock()
+        self._call_ids = itertools.count()
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Get the concurrency semaphore, creating it on first use."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent_queries)
+        return self._semaphore
+
+    async def execute_query(
+        self,
+        name: str,
+        query: str,
+        job_config: Optional[bigquery.QueryJobConfig] = None,
+        timeout_seconds: Optional[float] = None,
+    ) -> QueryExecutionResult:
+        """
+        Execute a single query off the event loop.
+
+        Args:
+            name: Identifier for the query (used for tracking and logging)
+            query: SQL query to execute
+            job_config: Optional query job configuration
+            timeout_seconds: Optional override for the per-query timeout
+
+        Returns:
+            Result describing the rows returned or why the query failed
+        """
+        timeout = timeout_seconds or self.query_timeout_seconds
+        start = time.monotonic()
+        call_id = next(self._call_ids)
+
+        async with self._get_semaphore():
+            self._active_jobs[call_id] = None
+            try:
+                rows, bytes_processed = await asyncio.wait_for(
+                    self._run_query(call_id, query, job_config, timeout),
+                    timeout=timeout,
+                )
+                return QueryExecutionResult(
+                    name=name,
+                    status="success",
+                    rows=rows,
+                    duration_seconds=time.monotonic() - start,
+                    bytes_processed=bytes_processed,
+                )
+
+            except asyncio.TimeoutError:
+                self.logger.warning(
+                    "Query %s timed out after %.1f seconds", name, timeout
+                )
+                self._cancel_job(call_id, name)
+                return QueryExecutionResult(
+                    name=name,
+                    status="timeout",
+                    duration_seconds=time.monotonic() - start,
+                    error=f"Query timed out after {timeout} seconds",
+                )
+
+            except asyncio.CancelledError:
+                self._cancel_job(call_id, name)
+                raise
+
+            except (GoogleCloudError, ValueError, RuntimeError, KeyError) as e:
+                self.logger.error("Error executing %s query: %s", name, e)
+                return QueryExecutionResult(
+                    name=name,
+                    status="error",
+                    duration_seconds=time.monotonic() - start,
+                    error=str(e),
+                )
+
+            finally:
+                with self._jobs_lock:
+                    self._active_jobs.pop(call_id, None)
+
+    async def execute_all(
+        self,
+        queries: Dict[str, Tuple[str, Optional[bigquery.QueryJobConfig]]],
+        timeout_seconds: Optional[float] = None,
+    ) -> Dict[str, QueryExecutionResult]:
+        """
+        Execute several queries concurrently.
+
+        Wall-clock time is bounded by the slowest query (or the timeout)
+        rather than the sum of all query latencies.
+
+        Args:
+            queries: Mapping of query name to (query text, job config)
+            timeout_seconds: Optional override for the per-query timeout
+
+        Returns:
+            Mapping of query name to its execution result, in input order
+        """
+        names = list(queries.keys())
+        tasks = [
+            asyncio.create_task(
+                self.execute_query(name, query, job_config, timeout_seconds)
+            )
+            for name, (query, job_config) in queries.items()
+        ]
+
+        try:
+            results = await asyncio.gather(*tasks)
+        except asyncio.CancelledError:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        return dict(zip(names, results))
+
+    async def _run_query(
+        self,
+        call_id: int,
+        query: str,
+        job_config: Optional[bigquery.QueryJobConfig],
+        timeout: float,
+    ) -> Tuple[List[Any], Optional[int]]:
+        """Submit a query job and collect its rows and bytes processed."""
+        query_job = await asyncio.to_thread(
+            self._submit_job, call_id, query, job_config
+        )
+        rows = await asyncio.to_thread(self._collect_rows, query_job, timeout)
+        return rows, query_job.total_bytes_processed
+
+    def _submit_job(
+        self,
+        call_id: int,
+        query: str,
+        job_config: Optional[bigquery.QueryJobConfig],
+    ) -> Any:
+        """Submit a query job and track it, or cancel it if the call ended (blocking)."""
+        query_job = self.client.query(query, job_config=job_config)
+        with self._jobs_lock:
+            if call_id in self._active_jobs:
+                self._active_jobs[call_id] = query_job
+                return query_job
+
+        # The call timed out or was cancelled while the job was being submitted
+        try:
+            query_job.cancel()
+        except (GoogleCloudError, RuntimeError) as e:
+            self.logger.debug("Could not cancel query job %s: %s", call_id, e)
+        return query_job
+
+    def _collect_rows(self, query_job: Any, timeout: float) -> List[Any]:
+        """Wait for a query job and materialize its rows (blocking)."""
+        return list(query_job.result(timeout=timeout))
+
+    def _cancel_job(self, call_id: int, name: str = "") -> None:
+        """Request server-side cancellation of a running query job."""
+        with self._jobs_lock:
+            query_job = self._active_jobs.pop(call_id, None)
+        if query_job is None:
+            return
+
+        try:
+            loop = asyncio.get_running_loop()
+            loop.run_in_executor(None, query_job.cancel)
+        except (RuntimeError, AttributeError) as e:
+            self.logger.debug("Could not cancel query job %s: %s", name or call_id, e)
+
+    async def cleanup(self) -> None:
+        """Cancel any query jobs that are still running."""
+        for call_id in list(self._active_jobs.keys()):
+            self._cancel_job(call_id)
@@ -0,0 +1,175 @@
+"""
+Compact detection event representation for the Detection Agent.
+
+Scan events are held as slotted objects instead of dictionaries: repeated
+strings (actor, source IP, method, resource type, query type) are interned and
+timestamps are stored as integer epoch microseconds. ``to_dict()`` produces
+the dictionary form used by tool results and incidents.
+"""
+
+import sys
+from copy import copy
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import Any, Dict, Optional, Tuple
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Query-specific fields and their defaults, per detection query type
+QUERY_TYPE_FIELDS: Dict[str, Tuple[Tuple[str, Any], ...]] = {
+    "failed_authentication": (("status_code", 0), ("error_message", "")),
+    "privilege_escalation": (("resource_name", ""), ("bindings", [])),
+    "suspicious_api_activity": (("user_agent", ""), ("resource_name", "")),
+    "firewall_modifications": (
+        ("rule_name", ""),
+        ("source_ranges", []),
+        ("allowed_rules", []),
+    ),
+}
+
+
+def to_epoch_us(value: datetime) -> int:
+    """
+    Convert a datetime to integer epoch microseconds.
+
+    Naive datetimes are treated as UTC so naive and aware values order
+    consistently.
+
+    Args:
+        value: Datetime to convert
+
+    Returns:
+        Microseconds since the Unix epoch
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def from_epoch_us(epoch_us: int, tz: Optional[tzinfo] = None) -> datetime:
+    """
+    Convert integer epoch microseconds back to a datetime.
+
+    Args:
+        epoch_us: Microseconds since the Unix epoch
+        tz: Time zone of the result, or None for a naive datetime
+
+    Returns:
+        Datetime for the given instant
+    """
+    value = _EPOCH + timedelta(microseconds=epoch_us)
+    if tz is None:
+        return value.replace(tzinfo=None)
+    return value.astimezone(tz)
+
+
+def _intern(value: Any) -> Any:
+    """Intern string values so repeated actors, IPs and methods share storage."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+@dataclass(slots=True)
+class DetectionEvent:
+    """A security event found by a detection scan query."""
+
+    query_type: str
+    timestamp_us: int
+    actor: Any = "unknown"
+    source_ip: Any = "unknown"
+    method_name: Any = "unknown"
+    resource_type: Any = "unknown"
+    tz: Optional[tzinfo] = None
+    status_code: Any = None
+    error_message: Any = None
+    resource_name: Any = None
+    bindings: Any = None
+    user_agent: Any = None
+    rule_name: Any = None
+    source_ranges: Any = None
+    allowed_rules: Any = None
+    raw_data: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_row(
+        cls, query_type: str, row: Any, include_raw_data: bool = True
+    ) -> "DetectionEvent":
+        """
+        Build an event from a BigQuery result row.
+
+        Args:
+            query_type: Detection query type that produced the row
+            row: BigQuery result row
+            include_raw_data: Keep a copy of the full row in ``raw_data``
+
+        Returns:
+            Detection event
+        """
+        timestamp = getattr(row, "timestamp", None) or datetime.now()
+        event = cls(
+            query_type=_intern(query_type),
+            timestamp_us=to_epoch_us(timestamp),
+            actor=_intern(getattr(row, "actor", "unknown")),
+            source_ip=_intern(getattr(row, "source_ip", "unknown")),
+            method_name=_intern(getattr(row, "method_name", "unknown")),
+            resource_type=_intern(getattr(row, "resource_type", "unknown")),
+            tz=timestamp.tzinfo,
+            raw_data=dict(row) if include_raw_data else None,
+        )
+        for name, default in QUERY_TYPE_FIELDS.get(query_type, ()):
+            setattr(event, name, getattr(row, name, copy(default)))
+        return event
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DetectionEvent":
+        """
+        Build an event from its dictionary form.
+
+        Args:
+            data: Event dictionary with an ISO ``timestamp``
+
+        Returns:
+            Detection event
+        """
+        timestamp = datetime.fromisoformat(
+            data.get("timestamp") or datetime.now().isoformat()
+        )
+        event = cls(
+            query_type=_intern(data.get("query_type", "")),
+            timestamp_us=to_epoch_us(timestamp),
+            actor=_intern(data.get("actor", "unknown")),
+            source_ip=_intern(data.get("source_ip", "unknown")),
+            method_name=_intern(data.get("method_name", "unknown")),
+            resource_type=_intern(data.get("resource_type", "unknown")),
+            tz=timestamp.tzinfo,
+            raw_data=data.get("raw_data"),
+        )
+        for name, default in QUERY_TYPE_FIELDS.get(event.query_type, ()):
+            setattr(event, name, data.get(name, copy(default)))
+        return event
+
+    @property
+    def timestamp(self) -> str:
+        """Event time as an ISO 8601 string."""
+        return from_epoch_us(self.timestamp_us, self.tz).isoformat()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the event to its dictionary form.
+
+        Returns:
+            Event dictionary with the common fields, ``raw_data`` when
+            retained, and the fields specific to the event's query type
+        """
+        data: Dict[str, Any] = {
+            "query_type": self.query_type,
+            "timestamp": self.timestamp,
+            "actor": self.actor,
+            "source_ip": self.source_ip,
+            "method_name": self.method_name,
+            "resource_type": self.resource_type,
+        }
+        if self.raw_data is not None:
+            data["raw_data"] = self.raw_data
+        for name, _ in QUERY_TYPE_FIELDS.get(self.query_type, ()):
+            data[name] = getattr(self, name)
+        return data
@@ -0,0 +1,270 @@
+"""
+Indexed event grouping for the Detection Agent.
+
+This module groups scan events that share an actor or source IP within a time
+window. Timestamps are parsed once, events are indexed per actor and per
+source IP in time order, and each group is built by sweeping only the
+matching index ranges, giving O(n log n) grouping instead of a pairwise scan.
+
+For time-ordered event streams, StreamingEventGrouper produces the same groups
+while only buffering events that are still within the window of the newest
+event seen.
+"""
+
+from bisect import bisect_left
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from src.detection_agent.detection_event import DetectionEvent, to_epoch_us
+
+Event = Any  # DetectionEvent or event dictionary
+
+
+def _event_key(event: Event) -> Tuple[int, Any, Any]:
+    """Get the epoch-microsecond time, actor and source IP of an event."""
+    if isinstance(event, DetectionEvent):
+        return event.timestamp_us, event.actor, event.source_ip
+    timestamp = datetime.fromisoformat(
+        event.get("timestamp", datetime.now().isoformat())
+    )
+    return to_epoch_us(timestamp), event.get("actor", ""), event.get("source_ip", "")
+
+
+class _TimeIndex:
+    """Events for one actor or source IP, sorted by time.
+
+    Grouped events are unlinked lazily with a path-compressed "next live
+    entry" pointer, so each entry is skipped at most once per index.
+    """
+
+    def __init__(self, entries: List[Tuple[int, int]]):
+        entries.sort()
+        self.times = [entry_time for entry_time, _ in entries]
+        self.indexes = [event_index for _, event_index in entries]
+        self._next = list(range(len(entries) + 1))
+
+    def _find(self, position: int) -> int:
+        """Find the first position at or after ``position`` not yet unlinked."""
+        root = position
+        while self._next[root] != root:
+            root = self._next[root]
+        while self._next[position] != root:
+            self._next[position], position = root, self._next[position]
+        return root
+
+    def collect(
+        self,
+        start: int,
+        end: int,
+        grouped: List[bool],
+        members: List[int],
+    ) -> None:
+        """Claim every ungrouped event with a time in [start, end]."""
+        position = self._find(bisect_left(self.times, start))
+        while position < len(self.times) and self.times[position] <= end:
+            event_index = self.indexes[position]
+            if not grouped[event_index]:
+                grouped[event_index] = True
+                members.append(event_index)
+            self._next[position] = position + 1
+            position = self._find(position + 1)
+
+
+class IndexedEventGrouper:
+    """Groups related scan events by actor or source IP within a time window."""
+
+    def __init__(self, window_minutes: int = 10):
+        """
+        Initialize the event grouper.
+
+        Args:
+            window_minutes: Maximum time difference between a group's first
+                event and the events grouped with it
+        """
+        self.window = timedelta(minutes=window_minutes) // timedelta(microseconds=1)
+
+    def group_events(self, events: List[Event]) -> List[List[Event]]:
+        """
+        Group events by actor or source IP within the time window.
+
+        Events are considered in input order. Each event not yet grouped
+        starts a new group and claims every later ungrouped event with the
+        same actor or the same source IP whose timestamp is within the window
+        of its own. Groups keep input order.
+
+        Args:
+            events: DetectionEvents, or event dictionaries with ISO
+                ``timestamp``, ``actor`` and ``source_ip`` fields
+
+        Returns:
+            List of event groups
+        """
+        keys = [_event_key(event) for event in events]
+        times = [event_time for event_time, _, _ in keys]
+
+        actor_entries: Dict[Any, List[Tuple[int, int]]] = defaultdict(list)
+        ip_entries: Dict[Any, List[Tuple[int, int]]] = defaultdict(list)
+        for index, (_, actor, source_ip) in enumerate(keys):
+            if actor:
+                actor_entries[actor].append((times[index], index))
+            if source_ip:
+                ip_entries[source_ip].append((times[index], index))
+
+        actor_index = {key: _TimeIndex(entries) for key, entries in actor_entries.items()}
+        ip_index = {key: _TimeIndex(entries) for key, entries in ip_entries.items()}
+
+        grouped = [False] * len(events)
+        groups: List[List[Event]] = []
+
+        for index, event in enumerate(events):
+            if grouped[index]:
+                continue
+            grouped[index] = True
+
+            start = times[index] - self.window
+            end = times[index] + self.window
+            members: List[int] = []
+
+            _, actor, source_ip = keys[index]
+            if actor:
+                actor_index[actor].collect(start, end, grouped, members)
+            if source_ip:
+                ip_index[source_ip].collect(start, end, grouped, members)
+
+            members.sort()
+            groups.append([event] + [events[member] for member in members])
+
+        return groups
+
+
+class _PendingEvent:
+    """A buffered stream event awaiting grouping."""
+
+    __slots__ = ("sequence", "time", "actor", "source_ip", "event", "grouped")
+
+    def __init__(self, sequence: int, event: Event):
+        self.sequence = sequence
+        self.time, self.actor, self.source_ip = _event_key(event)
+        self.event = event
+        self.grouped = False
+
+
+class StreamingEventGrouper:
+    """Groups a time-ordered event stream incrementally with bounded memory.
+
+    Events must be added in non-decreasing timestamp order. A group is
+    emitted once an event newer than its seed's window has been seen, so the
+    buffer only holds events from the last window. Fed the same ordered
+    events, it emits exactly the groups of IndexedEventGrouper.
+    """
+
+    def __init__(self, window_minutes: int = 10):
+        """
+        Initialize the streaming event grouper.
+
+        Args:
+            window_minutes: Maximum time difference between a group's first
+                event and the events grouped with it
+        """
+        self.window = timedelta(minutes=window_minutes) // timedelta(microseconds=1)
+        self._pending: Deque[_PendingEvent] = deque()
+        self._by_actor: Dict[Any, Deque[_PendingEvent]] = {}
+        self._by_ip: Dict[Any, Deque[_PendingEvent]] = {}
+        self._watermark: Optional[int] = None
+        self._sequence = 0
+
+    @property
+    def pending_count(self) -> int:
+        """Number of buffered events, including already grouped ones."""
+        return len(self._pending)
+
+    def add(self, event: Event) -> List[List[Event]]:
+        """
+        Add the next event of the stream.
+
+        Args:
+            event: DetectionEvent, or event dictionary with ISO ``timestamp``,
+                ``actor`` and ``source_ip`` fields
+
+        Returns:
+            Groups completed by this event, in stream order
+        """
+        pending = _PendingEvent(self._sequence, event)
+        self._sequence += 1
+        self._pending.append(pending)
+
+        if pending.actor:
+            self._by_actor.setdefault(pending.actor, deque()).append(pending)
+        if pending.source_ip:
+            self._by_ip.setdefault(pending.source_ip, deque()).append(pending)
+
+        if self._watermark is None or pending.time > self._watermark:
+            self._watermark = pending.time
+        return self._emit(flush=False)
+
+    def flush(self) -> List[List[Event]]:
+        """
+        Emit every remaining group at the end of the stream.
+
+        Returns:
+            Remaining groups, in stream order
+        """
+        groups = self._emit(flush=True)
+        self._watermark = None
+        return groups
+
+    def _emit(self, flush: bool) -> List[List[Event]]:
+        """Emit groups whose seed window has closed (or all, when flushing)."""
+        groups: List[List[Event]] = []
+        while self._pending:
+            seed = self._pending[0]
+            if not flush and seed.time + self.window >= self._watermark:  # type: ignore[operator]
+                break
+            self._pending.popleft()
+            self._release(seed)
+            if seed.grouped:
+                continue
+            seed.grouped = True
+
+            end = seed.time + self.window
+            members: List[_PendingEvent] = []
+            if seed.actor:
+                self._claim(self._by_actor, seed.actor, end, members)
+            if seed.source_ip:
+                self._claim(self._by_ip, seed.source_ip, end, members)
+
+            members.sort(key=lambda member: member.sequence)
+            groups.append([seed.event] + [member.event for member in members])
+        return groups
+
+    def _release(self, pending: _PendingEvent) -> None:
+        """Drop a buffered event from the front of its actor and IP indexes."""
+        for index, key in (
+            (self._by_actor, pending.actor),
+            (self._by_ip, pending.source_ip),
+        ):
+            entries = index.get(key) if key else None
+            if entries and entries[0] is pending:
+                entries.popleft()
+                if not entries:
+                    del index[key]
+
+    @staticmethod
+    def _claim(
+        index: Dict[Any, Deque[_PendingEvent]],
+        key: Any,
+        end: int,
+        members: List[_PendingEvent],
+    ) -> None:
+        """Claim every ungrouped event for ``key`` up to ``end``."""
+        entries = index.get(key)
+        if entries is None:
+            return
+        while entries and entries[0].time <= end:
+            entry = entries.popleft()
+            if not entry.grouped:
+                entry.grouped = True
+                members.append(entry)
+        if not entries:
+            del index[key]
@@ -2,14 +2,23 @@
 Incident deduplication module for the Detection Agent.
 
 This module provides functionality to detect and merge duplicate incidents.
+Registered incidents are indexed by hash and by event type, actor, resource
+and tag tokens, so a new incident is only scored against incidents that share
+a token with it, and expire through a heap ordered by creation time.
 """
 
 import hashlib
+import heapq
 from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Optional
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
 
 from src.common.models import Incident, SecurityEvent
 
+# Event types, actors, affected resources and tags of an incident
+IncidentFeatures = Tuple[FrozenSet[str], FrozenSet[str], FrozenSet[str], FrozenSet[str]]
+
+_FEATURE_KINDS = ("type", "actor", "resource", "tag")
+
 
 class IncidentDeduplicator:
     """Handles incident deduplication and merging."""
@@ -30,45 +39,163 @@ class IncidentDeduplicator:
         self._recent_incidents: Dict[str, Incident] = {}
         self._incident_hashes: Dict[str, str] = {}
 
+        # Indexes over registered incidents
+        self._registration_order: Dict[str, int] = {}
+        self._next_registration = 0
+        self._hash_index: Dict[str, Set[str]] = {}
+        self._token_index: Dict[Tuple[str, str], Set[str]] = {}
+        self._incident_features: Dict[str, IncidentFeatures] = {}
+        self._expiry_heap: List[Tuple[datetime, int, str]] = []
+
+    def register_incident(self, incident: Incident) -> None:
+        """
+        Add an incident to the set of recent incidents checked for duplicates.
+
+        Args:
+            incident: Incident to index
+        """
+        incident_id = incident.incident_id
+        if incident_id in self._recent_incidents:
+            self._unindex(incident_id)
+        else:
+            self._registration_order[incident_id] = self._next_registration
+            heapq.heappush(
+                self._expiry_heap,
+                (incident.created_at, self._next_registration, incident_id),
+            )
+            self._next_registration += 1
+
+        self._recent_incidents[incident_id] = incident
+        self._incident_hashes.pop(incident_id, None)
+        self._hash_index.setdefault(self._get_incident_hash(incident), set()).add(
+            incident_id
+        )
+        features = self._extract_features(incident)
+        self._incident_features[incident_id] = features
+        for token in self._feature_tokens(features):
+            self._token_index.setdefault(token, set()).add(incident_id)
+
     def is_duplicate(
-        self, new_incident: Incident, existing_incidents: List[Incident]
+        self, new_incident: Incident, existing_incidents: Optional[List[Incident]] = None
     ) -> Optional[Incident]:
         """
         Check if a new incident is a duplicate of an existing one.
 
+        Existing incidents are checked in order: the first with the same hash
+        is returned, otherwise the first whose similarity reaches the
+        threshold. Only incidents sharing a token with the new incident are
+        scored when the threshold rules out all others.
+
         Args:
             new_incident: The new incident to check
-            existing_incidents: List of existing incidents to compare against
+            existing_incidents: List of existing incidents to compare against;
+                registered incidents are used when omitted
 
         Returns:
             The existing incident if duplicate found, None otherwise
         """
         # Filter incidents within time window
         cutoff_time = datetime.now(timezone.utc) - self.time_window
-        recent_incidents = [
-            inc for inc in existing_incidents
-            if inc.created_at > cutoff_time
-        ]
-        # Calculate hash for quick comparison
-        new_hash = self._calculate_incident_hash(new_incident)
+        order, scope = self._comparison_scope(existing_incidents, cutoff_time)
 
         # Check for exact hash match first
-        for incident in recent_incidents:
-            incident_hash = self._incident_hashes.get(
-                incident.incident_id,
-                self._calculate_incident_hash(incident)
-            )
-            if incident_hash == new_hash:
-                return incident
+        new_hash = self._get_incident_hash(new_incident)
+        match = self._first_recent(
+            self._hash_index.get(new_hash, ()), order, scope, cutoff_time
+        )
+        if match is not None:
+            return match
 
         # Check for similarity if no exact match
-        for incident in recent_incidents:
-            similarity_score = self._calculate_similarity(new_incident, incident)
+        return self._first_similar(new_incident, order, scope, cutoff_time)
+
+    def _comparison_scope(
+        self, existing_incidents: Optional[List[Incident]], cutoff_time: datetime
+    ) -> Tuple[Dict[str, int], Optional[Set[str]]]:
+        """
+        Get the incidents a new incident is compared against.
+
+        Given incidents inside the time window are registered if needed.
+
+        Returns:
+            Tuple of (position of each incident ID in check order, the IDs
+            to consider or None for every registered incident)
+        """
+        if existing_incidents is None:
+            self.cleanup_old_incidents()
+            return self._registration_order, None
+
+        order: Dict[str, int] = {}
+        for incident in existing_incidents:
+            if incident.created_at <= cutoff_time:
+                continue
+            if incident.incident_id in order:
+                continue
+            order[incident.incident_id] = len(order)
+            if self._recent_incidents.get(incident.incident_id) is not incident:
+                self.register_incident(incident)
+        return order, set(order)
+
+    def _first_similar(
+        self,
+        new_incident: Incident,
+        order: Dict[str, int],
+        scope: Optional[Set[str]],
+        cutoff_time: datetime,
+    ) -> Optional[Incident]:
+        """Get the earliest in-scope incident reaching the similarity threshold."""
+        new_features = self._extract_features(new_incident)
+        if self.similarity_threshold > self._unrelated_score_bound(new_features):
+            candidate_ids: Iterable[str] = {
+                incident_id
+                for token in self._feature_tokens(new_features)
+                for incident_id in self._token_index.get(token, ())
+            }
+        else:
+            candidate_ids = order
+
+        candidates = sorted(
+            (
+                incident_id
+                for incident_id in candidate_ids
+                if incident_id in order and (scope is None or incident_id in scope)
+            ),
+            key=order.__getitem__,
+        )
+        for incident_id in candidates:
+            incident = self._recent_incidents[incident_id]
+            if incident.created_at <= cutoff_time:
+                continue
+            similarity_score = self._feature_similarity(
+                new_incident,
+                new_features,
+                incident,
+                self._incident_features[incident_id],
+            )
             if similarity_score >= self.similarity_threshold:
                 return incident
 
         return None
 
+    def _first_recent(
+        self,
+        incident_ids: Iterable[str],
+        order: Dict[str, int],
+        scope: Optional[Set[str]],
+        cutoff_time: datetime,
+    ) -> Optional[Incident]:
+        """Get the earliest ordered, in-scope, unexpired incident of a set."""
+        best: Optional[Tuple[int, Incident]] = None
+        for incident_id in incident_ids:
+            if incident_id not in order or (scope is not None and incident_id not in scope):
+                continue
+            incident = self._recent_incidents[incident_id]
+            if incident.created_at <= cutoff_time:
+                continue
+            if best is None or order[incident_id] < best[0]:
+                best = (order[incident_id], incident)
+        return best[1] if best else None
+
     def merge_incidents(self, primary: Incident, duplicate: Incident) -> Incident:
         """
         Merge a duplicate incident into the primary incident.
@@ -120,6 +247,7 @@ class IncidentDeduplicator:
         primary.metadata["first_event_time"] = min(all_event_times).isoformat()
         primary.metadata["last_event_time"] = max(all_event_times).isoformat()
 
+        self._refresh_index(primary)
         return primary
 
     def _calculate_incident_hash(self, incident: Incident) -> str:
@@ -159,6 +287,66 @@ class IncidentDeduplicator:
 
         return hash_object.hexdigest()
 
+    def _get_incident_hash(self, incident: Incident) -> str:
+        """Get an incident's hash, computing it only if not cached."""
+        cached = self._incident_hashes.get(incident.incident_id)
+        if cached is not None:
+            return cached
+        return self._calculate_incident_hash(incident)
+
+    @staticmethod
+    def _extract_features(incident: Incident) -> IncidentFeatures:
+        """Collect the token sets used for similarity scoring."""
+        return (
+            frozenset(e.event_type for e in incident.events),
+            frozenset(e.actor for e in incident.events if e.actor),
+            frozenset(r for e in incident.events for r in e.affected_resources),
+            frozenset(incident.tags),
+        )
+
+    @staticmethod
+    def _feature_tokens(features: IncidentFeatures) -> Iterable[Tuple[str, str]]:
+        """Yield the index tokens of an incident's features."""
+        for kind, values in zip(_FEATURE_KINDS, features):
+            for value in values:
+                yield kind, value
+
+    @staticmethod
+    def _unrelated_score_bound(features: IncidentFeatures) -> float:
+        """
+        Get the highest similarity an incident sharing no token could reach.
+
+        Every feature set present on the new incident then contributes a zero
+        score, leaving only severity and time proximity (each at most 1.0).
+        """
+        return 2.0 / (2 + sum(1 for values in features if values))
+
+    def _unindex(self, incident_id: str) -> None:
+        """Remove an incident's hash and token index entries."""
+        incident_hash = self._incident_hashes.get(incident_id)
+        if incident_hash is not None:
+            ids = self._hash_index.get(incident_hash)
+            if ids is not None:
+                ids.discard(incident_id)
+                if not ids:
+                    del self._hash_index[incident_hash]
+
+        features = self._incident_features.pop(incident_id, None)
+        if features is not None:
+            for token in self._feature_tokens(features):
+                ids = self._token_index.get(token)
+                if ids is not None:
+                    ids.discard(incident_id)
+                    if not ids:
+                        del self._token_index[token]
+
+    def _refresh_index(self, incident: Incident) -> None:
+        """Re-index a registered incident after its events or tags changed."""
+        if incident.incident_id in self._recent_incidents:
+            self.register_incident(incident)
+        else:
+            self._incident_hashes.pop(incident.incident_id, None)
+
     def _calculate_similarity(self, incident1: Incident, incident2: Incident) -> float:
         """
         Calculate similarity score between two incidents.
@@ -170,25 +358,36 @@ class IncidentDeduplicator:
         Returns:
             Similarity score between 0.0 and 1.0
         """
+        return self._feature_similarity(
+            incident1,
+            self._extract_features(incident1),
+            incident2,
+            self._extract_features(incident2),
+        )
+
+    @staticmethod
+    def _feature_similarity(
+        incident1: Incident,
+        features1: IncidentFeatures,
+        incident2: Incident,
+        features2: IncidentFeatures,
+    ) -> float:
+        """Calculate similarity from precomputed feature sets."""
         scores = []
+        types1, actors1, resources1, tags1 = features1
+        types2, actors2, resources2, tags2 = features2
 
         # Compare event types
-        types1 = {e.event_type for e in incident1.events}
-        types2 = {e.event_type for e in incident2.events}
         if types1 or types2:
             type_similarity = len(types1 & types2) / len(types1 | types2)
             scores.append(type_similarity)
 
         # Compare actors
-        actors1 = {e.actor for e in incident1.events if e.actor}
-        actors2 = {e.actor for e in incident2.events if e.actor}
         if actors1 or actors2:
             actor_similarity = len(actors1 & actors2) / len(actors1 | actors2)
             scores.append(actor_similarity)
 
         # Compare affected resources
-        resources1 = {r for e in incident1.events for r in e.affected_resources}
-        resources2 = {r for e in incident2.events for r in e.affected_resources}
         if resources1 or resources2:
             resource_similarity = len(resources1 & resources2) / len(resources1 | resources2)
             scores.append(resource_similarity)
@@ -204,8 +403,6 @@ class IncidentDeduplicator:
         scores.append(time_similarity)
 
         # Compare tags
-        tags1 = set(incident1.tags)
-        tags2 = set(incident2.tags)
         if tags1 or tags2:
             tag_similarity = len(tags1 & tags2) / len(tags1 | tags2)
             scores.append(tag_similarity)
@@ -250,6 +447,7 @@ class IncidentDeduplicator:
                 f"\n[Updated with {events_added} new events at "
                 f"{datetime.now(timezone.utc).isoformat()}]"
             )
+            self._refresh_index(existing)
 
         return existing
 
@@ -261,20 +459,26 @@ class IncidentDeduplicator:
             Number of incidents removed
         """
         cutoff_time = datetime.now(timezone.utc) - self.time_window
-        incidents_to_remove = []
-
-        for incident_id, incident in self._recent_incidents.items():
-            if incident.created_at < cutoff_time:
-                incidents_to_remove.append(incident_id)
+        removed = 0
 
-        for incident_id in incidents_to_remove:
-            del self._recent_incidents[incident_id]
-            if incident_id in self._incident_hashes:
-                del self._incident_hashes[incident_id]
+        while self._expiry_heap and self._expiry_heap[0][0] < cutoff_time:
+            _, registration, incident_id = heapq.heappop(self._expiry_heap)
+            if self._registration_order.get(incident_id) != registration:
+                continue  # Stale entry for an incident already removed
+            self._unindex(incident_id)
+            del self._registration_order[incident_id]
+            self._recent_incidents.pop(incident_id, None)
+            self._incident_hashes.pop(incident_id, None)
+            removed += 1
 
-        return len(incidents_to_remove)
+        return removed
 
     def clear_cache(self) -> None:
         """Clear all deduplication caches and state."""
         self._recent_incidents.clear()
         self._incident_hashes.clear()
+        self._registration_order.clear()
+        self._hash_index.clear()
+        self._token_index.clear()
+        self._incident_features.clear()
+        self._expiry_heap.clear()
@@ -2,6 +2,8 @@
 Interim results storage for the Detection Agent.
 
 This module provides storage for intermediate query results used in complex detection scenarios.
+Results are evicted least recently used first once the store reaches its
+result count or byte limit.
 """
 
 import logging
@@ -11,6 +13,8 @@ from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+from .lru_ttl_store import LruTtlStore, estimate_size
+
 
 @dataclass
 class InterimResult:
@@ -46,10 +50,14 @@ class InterimResultsStorage:
         default_path = Path(tempfile.gettempdir()) / "sentinelops" / "interim"
         self.storage_path = Path(storage_config.get("storage_path", str(default_path)))
         self.max_results = storage_config.get("max_results", 10000)
+        self.max_bytes: Optional[int] = storage_config.get("max_bytes")
         self.default_ttl_hours = storage_config.get("default_ttl_hours", 24)
 
-        # In-memory storage (could be replaced with Redis or similar)
-        self._storage: Dict[str, InterimResult] = {}
+        # In-memory storage (could be replaced with Redis or similar),
+        # least recently used first
+        self._storage: LruTtlStore[InterimResult] = LruTtlStore(
+            lambda result: estimate_size(result.data) + estimate_size(result.metadata)
+        )
 
         # Create storage directory if needed
         if self.enabled:
@@ -78,14 +86,6 @@ class InterimResultsStorage:
         if not self.enabled:
             return
 
-        # Check storage size
-        if len(self._storage) >= self.max_results:
-            self._cleanup_expired()
-
-            # If still too many, remove oldest
-            if len(self._storage) >= self.max_results:
-                self._remove_oldest()
-
         # Create interim result
         ttl = ttl_hours or self.default_ttl_hours
         result = InterimResult(
@@ -99,6 +99,7 @@ class InterimResultsStorage:
         )
 
         self._storage[result_id] = result
+        self._enforce_limits()
         self.logger.debug("Stored interim result: %s (stage: %s)", result_id, stage)
 
     def retrieve(self, result_id: str, stage: Optional[str] = None) -> Optional[Any]:
@@ -133,6 +134,7 @@ class InterimResultsStorage:
             self.logger.debug("Stage mismatch for result: %s", result_id)
             return None
 
+        self._storage.touch(result_id)
         return result.data
 
     def retrieve_by_rule_type(
@@ -201,6 +203,8 @@ class InterimResultsStorage:
 
         result = self._storage[result_id]
         result.metadata.update(metadata_updates)
+        # Re-store so the metadata size is accounted for
+        self._storage[result_id] = result
         self.logger.debug("Updated metadata for result: %s", result_id)
 
         return True
@@ -229,30 +233,33 @@ class InterimResultsStorage:
         Returns:
             Number of results removed
         """
-        expired_keys = []
-        now = datetime.now()
-
-        for result_id, result in self._storage.items():
-            if now > result.expires_at:
-                expired_keys.append(result_id)
+        expired = self._storage.pop_expired(datetime.now())
 
-        for key in expired_keys:
-            del self._storage[key]
+        if expired:
+            self.logger.info("Cleaned up %s expired interim results", len(expired))
 
-        if expired_keys:
-            self.logger.info("Cleaned up %s expired interim results", len(expired_keys))
+        return len(expired)
 
-        return len(expired_keys)
+    def _over_limits(self) -> bool:
+        """Whether the store holds more results or bytes than allowed."""
+        if len(self._storage) > self.max_results:
+            return True
+        return self.max_bytes is not None and self._storage.total_bytes > self.max_bytes
 
-    def _remove_oldest(self) -> None:
-        """Remove the oldest interim result."""
-        if not self._storage:
+    def _enforce_limits(self) -> None:
+        """Remove expired results, then least recently used ones, until within limits."""
+        if not self._over_limits():
             return
 
-        oldest_id = min(self._storage.keys(), key=lambda k: self._storage[k].created_at)
+        self._cleanup_expired()
+        while self._storage and self._over_limits():
+            self._remove_oldest()
 
-        del self._storage[oldest_id]
-        self.logger.debug("Removed oldest interim result: %s", oldest_id)
+    def _remove_oldest(self) -> None:
+        """Remove the least recently used interim result."""
+        removed = self._storage.pop_lru()
+        if removed is not None:
+            self.logger.debug("Removed least recently used interim result: %s", removed[0])
 
     def clear(self, rule_type: Optional[str] = None) -> int:
         """
@@ -314,6 +321,8 @@ class InterimResultsStorage:
             "enabled": self.enabled,
             "total_results": len(self._storage),
             "max_results": self.max_results,
+            "size_bytes": self._storage.total_bytes,
+            "max_bytes": self.max_bytes,
             "by_rule_type": rule_type_counts,
             "by_stage": stage_counts,
             "storage_path": str(self.storage_path),
@@ -0,0 +1,212 @@
+"""
+LRU store with TTL expiry for the Detection Agent caches.
+
+Entries are kept in recency order so the least recently used entry is evicted
+in O(1), and their expiry times are kept in a heap so expired entries are
+found in O(log n) each instead of by scanning every entry. Each entry's size
+in bytes is estimated when it is stored, so stores can be capped by memory as
+well as by entry count.
+"""
+
+import heapq
+import sys
+from collections import OrderedDict
+from datetime import datetime
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    MutableMapping,
+    Optional,
+    Protocol,
+    Tuple,
+    TypeVar,
+)
+
+
+class Expiring(Protocol):
+    """A stored value with an expiry time."""
+
+    expires_at: datetime
+
+
+V = TypeVar("V", bound=Expiring)
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Estimate the memory used by a value, including the objects it references.
+
+    Containers, instance dictionaries and slots are followed; objects shared
+    between several places are only counted once.
+
+    Args:
+        value: Value to measure
+
+    Returns:
+        Approximate size in bytes
+    """
+    seen = set()
+    pending = [value]
+    total = 0
+
+    while pending:
+        item = pending.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+
+        if isinstance(item, (str, bytes, bytearray, int, float, bool, type(None))):
+            continue
+        if isinstance(item, dict):
+            pending.extend(item.keys())
+            pending.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            pending.extend(item)
+        else:
+            if hasattr(item, "__dict__"):
+                pending.append(vars(item))
+            for klass in type(item).__mro__:
+                for slot in getattr(klass, "__slots__", ()):
+                    if slot not in ("__dict__", "__weakref__") and hasattr(item, slot):
+                        pending.append(getattr(item, slot))
+
+    return total
+
+
+class LruTtlStore(MutableMapping[str, V]):
+    """Mapping in least-recently-used order with a TTL expiry heap.
+
+    Iteration runs from the least to the most recently used entry. Assigning
+    a key makes it the most recently used; reading it does not, call
+    ``touch`` on a cache hit. Extending a stored value's ``expires_at`` needs
+    no bookkeeping: the heap re-checks an entry's current expiry before
+    removing it.
+    """
+
+    def __init__(self, sizer: Callable[[V], int] = estimate_size):
+        """
+        Initialize the store.
+
+        Args:
+            sizer: Function estimating the size in bytes of a stored value
+        """
+        self._sizer = sizer
+        self._entries: "OrderedDict[str, V]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._sequences: Dict[str, int] = {}
+        self._expiry_heap: List[Tuple[datetime, int, str]] = []
+        self._next_sequence = 0
+        self._total_bytes = 0
+
+    def __getitem__(self, key: str) -> V:
+        return self._entries[key]
+
+    def __setitem__(self, key: str, value: V) -> None:
+        if key in self._entries:
+            self._total_bytes -= self._sizes[key]
+        size = self._sizer(value)
+
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        self._sizes[key] = size
+        self._total_bytes += size
+
+        sequence = self._next_sequence
+        self._next_sequence += 1
+        self._sequences[key] = sequence
+        heapq.heappush(self._expiry_heap, (value.expires_at, sequence, key))
+        self._compact_heap()
+
+    def __delitem__(self, key: str) -> None:
+        del self._entries[key]
+        self._total_bytes -= self._sizes.pop(key)
+        del self._sequences[key]
+        self._compact_heap()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
+
+    @property
+    def total_bytes(self) -> int:
+        """Estimated size in bytes of all stored values."""
+        return self._total_bytes
+
+    def size_of(self, key: str) -> int:
+        """Get the estimated size in bytes of a stored value."""
+        return self._sizes[key]
+
+    def touch(self, key: str) -> None:
+        """Mark an entry as the most recently used."""
+        self._entries.move_to_end(key)
+
+    def pop_lru(self) -> Optional[Tuple[str, V]]:
+        """
+        Remove the least recently used entry.
+
+        Returns:
+            The removed (key, value), or None when the store is empty
+        """
+        if not self._entries:
+            return None
+        key = next(iter(self._entries))
+        value = self._entries[key]
+        del self[key]
+        return key, value
+
+    def pop_expired(self, now: datetime) -> List[Tuple[str, V]]:
+        """
+        Remove every entry that expired before ``now``.
+
+        Args:
+            now: Current time
+
+        Returns:
+            Removed (key, value) pairs, earliest expiry first
+        """
+        removed = []
+        heap = self._expiry_heap
+        while heap and heap[0][0] < now:
+            _, sequence, key = heapq.heappop(heap)
+            if self._sequences.get(key) != sequence:
+                continue  # Entry was replaced or deleted since this push
+
+            value = self._entries[key]
+            if value.expires_at >= now:
+                # TTL was extended in place; track the new expiry
+                heapq.heappush(heap, (value.expires_at, sequence, key))
+                continue
+
+            del self._entries[key]
+            self._total_bytes -= self._sizes.pop(key)
+            del self._sequences[key]
+            removed.append((key, value))
+
+        return removed
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        self._entries.clear()
+        self._sizes.clear()
+        self._sequences.clear()
+        self._expiry_heap.clear()
+        self._total_bytes = 0
+
+    def _compact_heap(self) -> None:
+        """Drop stale heap entries once they outnumber the live ones."""
+        if len(self._expiry_heap) <= 2 * len(self._entries) + 64:
+            return
+        self._expiry_heap = [
+            item for item in self._expiry_heap
+            if self._sequences.get(item[2]) == item[1]
+        ]
+        heapq.heapify(self._expiry_heap)
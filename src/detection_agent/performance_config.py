@@ -16,7 +16,9 @@ class PerformanceTuningConfig:
     query_timeout_seconds: int = 30
     max_concurrent_queries: int = 5
     query_result_cache_ttl: int = 300  # 5 minutes
-    enable_query_cache: bool = True
+    # Scans only re-request time buckets when their windows overlap, which
+    # regular scans do not, so bucket caching of scans is opt-in
+    enable_query_cache: bool = False
 
     # Memory management
     max_events_in_memory: int = 50000
@@ -54,7 +56,7 @@ class PerformanceTuningConfig:
             query_timeout_seconds=perf_config.get("query_timeout_seconds", 30),
             max_concurrent_queries=perf_config.get("max_concurrent_queries", 5),
             query_result_cache_ttl=perf_config.get("query_result_cache_ttl", 300),
-            enable_query_cache=perf_config.get("enable_query_cache", True),
+            enable_query_cache=perf_config.get("enable_query_cache", False),
             max_events_in_memory=perf_config.get("max_events_in_memory", 50000),
             event_batch_size=perf_config.get("event_batch_size", 1000),
             max_processed_events_cache=perf_config.get("max_processed_events_cache", 100000),
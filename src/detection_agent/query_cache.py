@@ -2,13 +2,21 @@
 Query cache implementation for the Detection Agent.
 
 This module provides caching for frequently used queries to improve performance.
+Besides exact-window entries, results can be cached per fixed time bucket so
+that overlapping scan windows are served from cache and only the uncovered
+time slices need to be queried. Entries are evicted least recently used
+first, and the cache can be capped by the estimated size of cached results as
+well as by entry count.
 """
 
-from typing import Dict, Optional, Any
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 import hashlib
 import logging
-from dataclasses import dataclass
+import math
+from dataclasses import dataclass, field
+
+from .lru_ttl_store import LruTtlStore, estimate_size
 
 
 @dataclass
@@ -21,6 +29,23 @@ class CacheEntry:
     expires_at: datetime
     hit_count: int = 0
     rule_type: Optional[str] = None
+    bucket_start: Optional[datetime] = None
+    bytes_processed: int = 0
+
+
+@dataclass
+class WindowLookup:
+    """Result of looking up a scan window in the bucketed cache."""
+
+    rows: List[Any] = field(default_factory=list)
+    missing_ranges: List[Tuple[datetime, datetime]] = field(default_factory=list)
+    buckets_hit: int = 0
+    buckets_missed: int = 0
+
+    @property
+    def fully_cached(self) -> bool:
+        """Whether the whole window was served from cache."""
+        return not self.missing_ranges
 
 
 class QueryCache:
@@ -40,11 +65,20 @@ class QueryCache:
         cache_config = config.get("agents", {}).get("detection", {}).get("query_cache", {})
         self.enabled = cache_config.get("enabled", True)
         self.max_entries = cache_config.get("max_entries", 1000)
+        self.max_bytes: Optional[int] = cache_config.get("max_bytes")
         self.default_ttl_minutes = cache_config.get("default_ttl_minutes", 60)
         self.min_hit_count_for_extension = cache_config.get("min_hit_count_for_extension", 3)
 
-        # Cache storage
-        self._cache: Dict[str, CacheEntry] = {}
+        # Time-bucketed window caching. Buckets are cached only once late log
+        # entries have arrived; the settle time covers the slowest ingestion
+        # lag the scan overlaps allow for (5 minutes for VPC flow logs).
+        self.bucket_size_seconds = cache_config.get("bucket_size_seconds", 60)
+        self.bucket_settle_seconds = cache_config.get("bucket_settle_seconds", 300)
+
+        # Cache storage, least recently used first
+        self._cache: LruTtlStore[CacheEntry] = LruTtlStore(
+            lambda entry: estimate_size(entry.result)
+        )
 
         # Cache statistics
         self._stats = {
@@ -53,6 +87,11 @@ class QueryCache:
             "evictions": 0,
             "total_queries": 0
         }
+        self._bucket_stats = {
+            "bucket_hits": 0,
+            "bucket_misses": 0,
+            "bytes_avoided": 0
+        }
 
     def _generate_cache_key(
         self,
@@ -130,6 +169,7 @@ class QueryCache:
         # Update hit count and stats
         entry.hit_count += 1
         self._stats["hits"] += 1
+        self._cache.touch(cache_key)
 
         # Extend TTL for frequently accessed entries
         if entry.hit_count >= self.min_hit_count_for_extension:
@@ -162,10 +202,6 @@ class QueryCache:
         if not self.enabled:
             return
 
-        # Check cache size and evict if necessary
-        if len(self._cache) >= self.max_entries:
-            self._evict_oldest()
-
         # Generate cache key
         cache_key = self._generate_cache_key(query, start_time, end_time, rule_type)
 
@@ -182,21 +218,331 @@ class QueryCache:
         )
 
         self._cache[cache_key] = entry
+        self._enforce_limits()
         self.logger.debug("Cached query result: %s... (TTL: %s minutes)", cache_key[:8], ttl)
 
-    def _evict_oldest(self) -> None:
-        """Evict the oldest cache entry."""
-        if not self._cache:
-            return
+    def _generate_bucket_key(
+        self,
+        query: str,
+        bucket_index: int,
+        rule_type: Optional[str] = None
+    ) -> str:
+        """
+        Generate the cache key for one time bucket of a query.
+
+        Args:
+            query: SQL query
+            bucket_index: Index of the bucket since the epoch
+            rule_type: Optional rule type
+
+        Returns:
+            Cache key hash
+        """
+        key_parts = [
+            query.strip().lower(),
+            f"bucket:{self.bucket_size_seconds}:{bucket_index}",
+            rule_type or ""
+        ]
+        return hashlib.sha256("|".join(key_parts).encode()).hexdigest()
+
+    def _bucket_range(self, start_time: datetime, end_time: datetime) -> range:
+        """
+        Get the bucket indexes overlapping a (start_time, end_time] window.
+
+        Bucket ``i`` covers ``(i * size, (i + 1) * size]`` seconds since the
+        epoch, matching the ``timestamp > start AND timestamp <= end`` filters
+        used by the detection queries.
+        """
+        size = self.bucket_size_seconds
+        first = math.floor(start_time.timestamp() / size)
+        last = math.ceil(end_time.timestamp() / size) - 1
+        return range(first, max(first, last + 1))
+
+    def _bucket_bounds(self, bucket_index: int, like: datetime) -> Tuple[datetime, datetime]:
+        """Get the (start, end] bounds of a bucket in the timezone of ``like``."""
+        size = self.bucket_size_seconds
+        start = datetime.fromtimestamp(bucket_index * size, tz=like.tzinfo)
+        return start, start + timedelta(seconds=size)
+
+    @staticmethod
+    def _row_timestamp(row: Any, timestamp_field: str) -> Optional[datetime]:
+        """Extract a row timestamp from a dict, BigQuery row or object."""
+        if hasattr(row, "get"):
+            value = row.get(timestamp_field)
+        else:
+            value = getattr(row, timestamp_field, None)
+
+        if isinstance(value, str):
+            try:
+                return datetime.fromisoformat(value)
+            except ValueError:
+                return None
+        if isinstance(value, datetime):
+            return value
+        return None
+
+    def get_window(
+        self,
+        query: str,
+        start_time: datetime,
+        end_time: datetime,
+        rule_type: Optional[str] = None,
+        timestamp_field: str = "timestamp"
+    ) -> WindowLookup:
+        """
+        Serve a scan window from cached time buckets.
+
+        Args:
+            query: SQL query (without the time window applied)
+            start_time: Window start (exclusive)
+            end_time: Window end (inclusive)
+            rule_type: Optional rule type
+            timestamp_field: Row field holding the event timestamp
+
+        Returns:
+            Cached rows inside the window and the time ranges still to query
+        """
+        lookup = WindowLookup()
+        if end_time <= start_time:
+            return lookup
+        if not self.enabled:
+            lookup.missing_ranges.append((start_time, end_time))
+            return lookup
+
+        window_start = start_time.timestamp()
+        window_end = end_time.timestamp()
+        missing: List[int] = []
+
+        for bucket_index in self._bucket_range(start_time, end_time):
+            cache_key = self._generate_bucket_key(query, bucket_index, rule_type)
+            entry = self._cache.get(cache_key)
+
+            if entry is not None and datetime.now() > entry.expires_at:
+                del self._cache[cache_key]
+                entry = None
+
+            if entry is None:
+                missing.append(bucket_index)
+                self._bucket_stats["bucket_misses"] += 1
+                continue
+
+            entry.hit_count += 1
+            self._bucket_stats["bucket_hits"] += 1
+            lookup.buckets_hit += 1
+            self._cache.touch(cache_key)
+
+            bucket_start, bucket_end = self._bucket_bounds(bucket_index, start_time)
+            if bucket_start >= start_time and bucket_end <= end_time:
+                lookup.rows.extend(entry.result)
+                self._bucket_stats["bytes_avoided"] += entry.bytes_processed
+                continue
+
+            # Edge bucket: keep only rows inside the requested window
+            for row in entry.result:
+                row_time = self._row_timestamp(row, timestamp_field)
+                if row_time is not None and window_start < row_time.timestamp() <= window_end:
+                    lookup.rows.append(row)
+
+        lookup.buckets_missed = len(missing)
+        lookup.missing_ranges = self._merge_missing_buckets(missing, start_time, end_time)
+        return lookup
+
+    def _merge_missing_buckets(
+        self,
+        missing: List[int],
+        start_time: datetime,
+        end_time: datetime
+    ) -> List[Tuple[datetime, datetime]]:
+        """Merge contiguous missing buckets into clipped query ranges."""
+        ranges: List[Tuple[datetime, datetime]] = []
+
+        for bucket_index in missing:
+            bucket_start, bucket_end = self._bucket_bounds(bucket_index, start_time)
+            bucket_start = max(bucket_start, start_time)
+            bucket_end = min(bucket_end, end_time)
 
-        # Find oldest entry
-        oldest_key = min(
-            self._cache.keys(),
-            key=lambda k: self._cache[k].created_at
+            if ranges and ranges[-1][1] == bucket_start:
+                ranges[-1] = (ranges[-1][0], bucket_end)
+            else:
+                ranges.append((bucket_start, bucket_end))
+
+        return ranges
+
+    def put_window(
+        self,
+        query: str,
+        rows: List[Any],
+        start_time: datetime,
+        end_time: datetime,
+        rule_type: Optional[str] = None,
+        bytes_processed: Optional[int] = None,
+        timestamp_field: str = "timestamp",
+        ttl_minutes: Optional[int] = None,
+        row_limit: Optional[int] = None
+    ) -> int:
+        """
+        Store the complete result of a window query as time buckets.
+
+        Only buckets that lie entirely inside the queried window (and have
+        settled for ``bucket_settle_seconds``) are cached, since edge buckets
+        hold a partial result. Rows must be the full, unlimited result for the
+        window, so nothing is cached when the row count reaches ``row_limit``.
+
+        Args:
+            query: SQL query (without the time window applied)
+            rows: All rows returned for the window
+            start_time: Window start (exclusive)
+            end_time: Window end (inclusive)
+            rule_type: Optional rule type
+            bytes_processed: BigQuery bytes processed by the window query
+            timestamp_field: Row field holding the event timestamp
+            ttl_minutes: Optional custom TTL in minutes
+            row_limit: LIMIT of the query that produced the rows, if any
+
+        Returns:
+            Number of buckets cached
+        """
+        if not self.enabled or end_time <= start_time:
+            return 0
+        if row_limit is not None and len(rows) >= row_limit:
+            self.logger.debug(
+                "Window result hit the %s row limit, skipping bucket caching", row_limit
+            )
+            return 0
+
+        buckets = self._bucket_range(start_time, end_time)
+        complete = self._complete_buckets(buckets, start_time, end_time)
+        if not complete:
+            return 0
+        rows_by_bucket = self._split_rows(rows, complete, timestamp_field)
+        if rows_by_bucket is None:
+            return 0
+
+        bytes_per_bucket = 0
+        if bytes_processed:
+            bytes_per_bucket = bytes_processed // len(buckets)
+
+        ttl = ttl_minutes or self.default_ttl_minutes
+        created_at = datetime.now()
+        for bucket_index, bucket_rows in rows_by_bucket.items():
+            cache_key = self._generate_bucket_key(query, bucket_index, rule_type)
+            self._cache[cache_key] = CacheEntry(
+                query_hash=cache_key,
+                query_text=query[:500],
+                result=bucket_rows,
+                created_at=created_at,
+                expires_at=created_at + timedelta(minutes=ttl),
+                rule_type=rule_type,
+                bucket_start=self._bucket_bounds(bucket_index, start_time)[0],
+                bytes_processed=bytes_per_bucket
+            )
+            self._enforce_limits()
+
+        self.logger.debug("Cached %s time buckets for query", len(rows_by_bucket))
+        return len(rows_by_bucket)
+
+    def _complete_buckets(
+        self, buckets: range, start_time: datetime, end_time: datetime
+    ) -> List[int]:
+        """Get the buckets lying entirely inside a window that have settled."""
+        settled_before = (
+            datetime.now(tz=end_time.tzinfo)
+            - timedelta(seconds=self.bucket_settle_seconds)
         )
+        complete = []
+        for bucket_index in buckets:
+            bucket_start, bucket_end = self._bucket_bounds(bucket_index, start_time)
+            if bucket_start >= start_time and bucket_end <= min(end_time, settled_before):
+                complete.append(bucket_index)
+        return complete
+
+    def _split_rows(
+        self, rows: List[Any], buckets: List[int], timestamp_field: str
+    ) -> Optional[Dict[int, List[Any]]]:
+        """
+        Group rows by bucket, dropping rows outside the given buckets.
+
+        Returns:
+            Rows per bucket, or None if a row has no timestamp
+        """
+        rows_by_bucket: Dict[int, List[Any]] = {index: [] for index in buckets}
+        size = self.bucket_size_seconds
+        for row in rows:
+            row_time = self._row_timestamp(row, timestamp_field)
+            if row_time is None:
+                self.logger.debug("Row without %s, skipping bucket caching", timestamp_field)
+                return None
+            bucket_index = math.ceil(row_time.timestamp() / size) - 1
+            if bucket_index in rows_by_bucket:
+                rows_by_bucket[bucket_index].append(row)
+        return rows_by_bucket
+
+    async def get_or_fetch_window(
+        self,
+        query: str,
+        start_time: datetime,
+        end_time: datetime,
+        fetch: Callable[[datetime, datetime], Awaitable[Tuple[List[Any], Optional[int]]]],
+        rule_type: Optional[str] = None,
+        timestamp_field: str = "timestamp",
+        row_limit: Optional[int] = None
+    ) -> List[Any]:
+        """
+        Serve a window from cached buckets, querying only uncovered slices.
+
+        Args:
+            query: SQL query (without the time window applied)
+            start_time: Window start (exclusive)
+            end_time: Window end (inclusive)
+            fetch: Coroutine returning (rows, bytes processed) for a sub-range
+            rule_type: Optional rule type
+            timestamp_field: Row field holding the event timestamp
+            row_limit: LIMIT of the fetched query; truncated slices are not cached
+
+        Returns:
+            Rows for the whole window, cached buckets first
+        """
+        lookup = self.get_window(query, start_time, end_time, rule_type, timestamp_field)
+        rows = list(lookup.rows)
+
+        for range_start, range_end in lookup.missing_ranges:
+            fetched_rows, bytes_processed = await fetch(range_start, range_end)
+            rows.extend(fetched_rows)
+            self.put_window(
+                query,
+                fetched_rows,
+                range_start,
+                range_end,
+                rule_type=rule_type,
+                bytes_processed=bytes_processed,
+                timestamp_field=timestamp_field,
+                row_limit=row_limit
+            )
+
+        return rows
+
+    def _over_limits(self) -> bool:
+        """Whether the cache holds more entries or bytes than allowed."""
+        if len(self._cache) > self.max_entries:
+            return True
+        return self.max_bytes is not None and self._cache.total_bytes > self.max_bytes
+
+    def _enforce_limits(self) -> None:
+        """Drop expired entries, then least recently used ones, until within limits."""
+        if not self._over_limits():
+            return
+
+        self._cache.pop_expired(datetime.now())
+        while self._cache and self._over_limits():
+            self._evict_oldest()
+
+    def _evict_oldest(self) -> None:
+        """Evict the least recently used cache entry."""
+        evicted = self._cache.pop_lru()
+        if evicted is None:
+            return
 
-        self.logger.debug("Evicting oldest cache entry: %s...", oldest_key[:8])
-        del self._cache[oldest_key]
+        self.logger.debug("Evicting least recently used cache entry: %s...", evicted[0][:8])
         self._stats["evictions"] += 1
 
     def invalidate(
@@ -259,16 +605,29 @@ class QueryCache:
         if total_queries > 0:
             hit_rate = (self._stats["hits"] / total_queries) * 100
 
+        bucket_lookups = (
+            self._bucket_stats["bucket_hits"] + self._bucket_stats["bucket_misses"]
+        )
+        bucket_hit_ratio = 0.0
+        if bucket_lookups > 0:
+            bucket_hit_ratio = self._bucket_stats["bucket_hits"] / bucket_lookups
+
         return {
             "enabled": self.enabled,
             "size": len(self._cache),
             "max_size": self.max_entries,
+            "size_bytes": self._cache.total_bytes,
+            "max_bytes": self.max_bytes,
             "hits": self._stats["hits"],
             "misses": self._stats["misses"],
             "evictions": self._stats["evictions"],
             "total_queries": total_queries,
             "hit_rate": f"{hit_rate:.2f}%",
-            "default_ttl_minutes": self.default_ttl_minutes
+            "default_ttl_minutes": self.default_ttl_minutes,
+            "bucket_hits": self._bucket_stats["bucket_hits"],
+            "bucket_misses": self._bucket_stats["bucket_misses"],
+            "bucket_hit_ratio": round(bucket_hit_ratio, 4),
+            "bytes_avoided": self._bucket_stats["bytes_avoided"]
         }
 
     def get_cache_info(self) -> Dict[str, Any]:
@@ -530,6 +530,9 @@ class QueryOptimizer:
         """
         Estimate bytes that will be processed by query.
 
+        Partial days count pro rata, so windows shorter than a day (such as a
+        five minute scan) get a non-zero estimate.
+
         Args:
             query: SQL query
             start_time: Query start time
@@ -539,10 +542,10 @@ class QueryOptimizer:
             Estimated bytes to be processed (None if unable to estimate)
         """
         # Simple estimation based on time range and sampling
-        time_range_days = (end_time - start_time).days
+        time_range_days = (end_time - start_time).total_seconds() / 86400
 
         # Base estimate: 1GB per day of logs
-        base_bytes = time_range_days * 1_000_000_000
+        base_bytes = int(time_range_days * 1_000_000_000)
 
         # Apply sampling reduction
         if self.enable_sampling and self._should_sample(start_time, end_time):
@@ -553,3 +556,35 @@ class QueryOptimizer:
             base_bytes = int(base_bytes * 0.7)
 
         return base_bytes
+
+    def estimate_fusion_savings(
+        self,
+        separate_queries: List[str],
+        fused_query: str,
+        start_time: datetime,
+        end_time: datetime
+    ) -> Dict[str, int]:
+        """
+        Estimate bytes saved by serving several queries with one fused scan.
+
+        Args:
+            separate_queries: Queries that would each scan the table
+            fused_query: Single query replacing them
+            start_time: Query start time
+            end_time: Query end time
+
+        Returns:
+            Dictionary with separate, fused and saved byte estimates
+        """
+        separate_bytes = sum(
+            self.estimate_bytes_processed(query, start_time, end_time) or 0
+            for query in separate_queries
+        )
+        fused_bytes = self.estimate_bytes_processed(fused_query, start_time, end_time) or 0
+
+        return {
+            "separate_bytes": separate_bytes,
+            "fused_bytes": fused_bytes,
+            "bytes_saved": max(0, separate_bytes - fused_bytes),
+            "scans_avoided": max(0, len(separate_queries) - 1),
+        }
@@ -4,6 +4,7 @@ BigQuery pagination support for the Detection Agent.
 This module provides utilities for handling paginated query results from BigQuery.
 """
 
+import asyncio
 from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional, cast
 
 from google.cloud import bigquery
@@ -38,6 +39,7 @@ class PaginatedQueryExecutor:
         self.page_size = page_size
         self.max_results = max_results
         self.timeout_ms = timeout_ms
+        self._active_jobs: List[Any] = []
 
     async def execute_query(
         self, query: str, job_config: Optional[bigquery.QueryJobConfig] = None
@@ -57,24 +59,25 @@ class PaginatedQueryExecutor:
 
         # Set query configuration
         job_config.use_query_cache = False
-        job_config.timeout_ms = self.timeout_ms
+        job_config.job_timeout_ms = self.timeout_ms
 
         try:
-            # Execute the query
-            query_job = self.client.query(query, job_config=job_config)
+            # Submit the query and wait for it off the event loop
+            query_job = await asyncio.to_thread(
+                self.client.query, query, job_config=job_config
+            )
+            self._active_jobs.append(query_job)
+            row_iterator = await asyncio.to_thread(
+                query_job.result, page_size=self.page_size
+            )
 
-            # Get paginated results
+            # Fetch one page at a time so only the current page is held
+            pages = iter(row_iterator.pages)
             results_processed = 0
 
             while True:
-                # Get a page of results
-                rows = list(
-                    query_job.result(
-                        page_size=self.page_size, start_index=results_processed
-                    )
-                )
-
-                if not rows:
+                rows = await asyncio.to_thread(next, pages, None)
+                if rows is None:
                     break
 
                 # Convert rows to dictionaries
@@ -88,11 +91,10 @@ class PaginatedQueryExecutor:
                         yield page_results
                         return
 
-                yield page_results
+                if page_results:
+                    yield page_results
 
-                # Check if there are more pages
-                if len(rows) < self.page_size:
-                    break
+            self._active_jobs.remove(query_job)
 
         except (ValueError, RuntimeError, AttributeError) as e:
             raise RuntimeError(f"Unexpected error during query pagination: {e}") from e
@@ -114,7 +116,7 @@ class PaginatedQueryExecutor:
             job_config = bigquery.QueryJobConfig()
 
         job_config.use_query_cache = False
-        job_config.timeout_ms = self.timeout_ms
+        job_config.job_timeout_ms = self.timeout_ms
 
         try:
             # Execute the query
@@ -207,7 +209,7 @@ class PaginatedQueryExecutor:
             )
 
             job_config = bigquery.QueryJobConfig(
-                use_query_cache=True, timeout_ms=10000  # 10 second timeout for count
+                use_query_cache=True, job_timeout_ms=10000  # 10 second timeout for count
             )
 
             query_job = self.client.query(count_query, job_config=job_config)
@@ -224,11 +226,10 @@ class PaginatedQueryExecutor:
 
     async def cleanup(self) -> None:
         """Clean up resources used by the paginated query executor."""
-        # Cancel any running jobs if we had references to them
-        if hasattr(self, "_active_jobs"):
-            for job in self._active_jobs:
-                try:
-                    job.cancel()
-                except (ValueError, AttributeError):
-                    pass  # Ignore cancellation errors
-            self._active_jobs.clear()
+        # Cancel any jobs whose results were not fully consumed
+        for job in self._active_jobs:
+            try:
+                job.cancel()
+            except (ValueError, AttributeError):
+                pass  # Ignore cancellation errors
+        self._active_jobs.clear()
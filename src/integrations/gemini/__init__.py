@@ -13,8 +13,10 @@ from .rate_limiter import RateLimitConfig, QuotaUsage, RateLimiter
 from .api_key_manager import GeminiAPIKeyManager
 from .quota_monitor import QuotaMonitor
 from .project_config import GeminiProjectConfig
-from .connection_pool import ConnectionPool
-from .response_cache import ResponseCache
+from .connection_pool import ConnectionPool, PoolTimeoutError
+from .response_cache import ResponseCache, mask_volatile_fields, normalize_whitespace
+from .embedding_service import EmbeddingCache, EmbeddingService
+from .streaming_parser import IncrementalJSONParser, StreamedField
 from .token_optimizer import TokenOptimizer
 from .cost_tracker import CostTracker
 from .integration import GeminiIntegration
@@ -41,7 +43,14 @@ __all__ = [
     "QuotaMonitor",
     "GeminiProjectConfig",
     "ConnectionPool",
+    "PoolTimeoutError",
     "ResponseCache",
+    "mask_volatile_fields",
+    "normalize_whitespace",
+    "EmbeddingCache",
+    "EmbeddingService",
+    "IncrementalJSONParser",
+    "StreamedField",
     "TokenOptimizer",
     "CostTracker",
     "GeminiIntegration",
@@ -2,70 +2,135 @@
 Connection pool management for Gemini models
 """
 
-import threading
-from typing import Any, Dict, List, Optional
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
 
 from .common import logger, genai
 
 
+class PoolTimeoutError(RuntimeError):
+    """Raised when no model instance becomes free within the acquire timeout"""
+
+
 class ConnectionPool:
-    """Manages a pool of Gemini model instances for concurrent requests"""
+    """Manages a pool of Gemini model instances for concurrent requests
+
+    The pool size is the model's concurrency limit. Callers waiting for an
+    instance are suspended on the event loop instead of blocking it, and are
+    served in arrival order.
+    """
 
     def __init__(
         self,
         model_name: str,
         pool_size: int = 5,
         safety_settings: Optional[Dict[str, Any]] = None,
+        acquire_timeout: Optional[float] = 30.0,
     ):
         self.model_name = model_name
         self.pool_size = pool_size
         self.safety_settings = safety_settings
-        self.pool: List[Any] = []
-        self.available = threading.Semaphore(pool_size)
-        self.lock = threading.Lock()
+        self.acquire_timeout = acquire_timeout
+        # Last in, first out so recently used instances stay warm
+        self.pool: asyncio.LifoQueue[Any] = asyncio.LifoQueue()
+        self._retiring = 0  # In-use instances to drop on release after a shrink
+        self._waiting = 0
+        self._acquired = 0
+        self._timeouts = 0
+        self._total_wait = 0.0
         self._initialize_pool()
 
+    def _create_model(self) -> Any:
+        """Create a model instance"""
+        return genai.GenerativeModel(self.model_name, safety_settings=self.safety_settings)
+
     def _initialize_pool(self) -> None:
         """Initialize the connection pool with model instances"""
         for _ in range(self.pool_size):
-            model = genai.GenerativeModel(
-                self.model_name, safety_settings=self.safety_settings
-            )
-            self.pool.append(model)
+            self.pool.put_nowait(self._create_model())
         logger.info(
             "Initialized connection pool with %s model instances", self.pool_size
         )
 
-    def acquire(self) -> Any:
-        """Acquire a model instance from the pool"""
-        self.available.acquire()
-        with self.lock:
-            return self.pool.pop()
+    async def acquire(self, timeout: Optional[float] = None) -> Any:
+        """Acquire a model instance from the pool
+
+        Args:
+            timeout: Seconds to wait for a free instance, defaulting to the
+                pool's acquire timeout (None waits indefinitely)
+
+        Raises:
+            PoolTimeoutError: If no instance became free in time
+        """
+        timeout = self.acquire_timeout if timeout is None else timeout
+        start = time.monotonic()
+        self._waiting += 1
+        try:
+            model = await asyncio.wait_for(self.pool.get(), timeout)
+        except asyncio.TimeoutError as e:
+            self._timeouts += 1
+            raise PoolTimeoutError(
+                f"No {self.model_name} instance free after {timeout}s"
+            ) from e
+        finally:
+            self._waiting -= 1
+
+        self._acquired += 1
+        self._total_wait += time.monotonic() - start
+        return model
 
     def release(self, model: Any) -> None:
         """Release a model instance back to the pool"""
-        with self.lock:
-            self.pool.append(model)
-        self.available.release()
+        if self._retiring:
+            self._retiring -= 1
+            return
+        self.pool.put_nowait(model)
+
+    @asynccontextmanager
+    async def connection(self, timeout: Optional[float] = None) -> AsyncIterator[Any]:
+        """Hold a model instance for the duration of the block"""
+        model = await self.acquire(timeout)
+        try:
+            yield model
+        finally:
+            self.release(model)
 
     def resize(self, new_size: int) -> None:
-        """Resize the connection pool"""
-        with self.lock:
-            current_size = len(self.pool)
-            if new_size > current_size:
-                # Add more connections
-                for _ in range(new_size - current_size):
-                    model = genai.GenerativeModel(
-                        self.model_name, safety_settings=self.safety_settings
-                    )
-                    self.pool.append(model)
-                    self.available.release()
-            elif new_size < current_size:
-                # Remove connections
-                for _ in range(current_size - new_size):
-                    if self.pool:
-                        self.pool.pop()
-                        self.available.acquire()
-
-            self.pool_size = new_size
-            logger.info("Resized connection pool to %s instances", new_size)
+        """Resize the connection pool
+
+        Growing adds instances immediately. Shrinking drops idle instances
+        and retires in-use ones as they are released.
+        """
+        if new_size > self.pool_size:
+            # Add more connections
+            for _ in range(new_size - self.pool_size):
+                if self._retiring:
+                    self._retiring -= 1
+                else:
+                    self.pool.put_nowait(self._create_model())
+        elif new_size < self.pool_size:
+            # Remove connections
+            for _ in range(self.pool_size - new_size):
+                if self.pool.empty():
+                    self._retiring += 1
+                else:
+                    self.pool.get_nowait()
+
+        self.pool_size = new_size
+        logger.info("Resized connection pool to %s instances", new_size)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool utilization statistics"""
+        idle = self.pool.qsize()
+        return {
+            "model": self.model_name,
+            "pool_size": self.pool_size,
+            "idle": idle,
+            "in_use": self.pool_size + self._retiring - idle,
+            "waiting": self._waiting,
+            "acquired": self._acquired,
+            "timeouts": self._timeouts,
+            "average_wait": self._total_wait / self._acquired if self._acquired else 0.0,
+        }
@@ -0,0 +1,370 @@
+"""
+Batched embedding generation with a bounded vector cache
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    cast,
+)
+
+import numpy as np
+from google.generativeai.embedding import embed_content_async
+
+from .common import logger
+
+DEFAULT_EMBEDDING_MODEL = "models/text-embedding-004"
+# Largest number of texts the API embeds in one request
+MAX_EMBED_BATCH = 100
+
+
+class EmbeddingCache:
+    """Bounded cache of float32 embedding vectors
+
+    Vectors live in rows of one preallocated matrix, 4 bytes per dimension
+    instead of a Python float object per dimension, and are evicted least
+    recently used first once capacity is reached. Entries are keyed by a
+    hash of the model and text. With a path the matrix is a memory-mapped
+    file and the row index is saved next to it by flush(), so the cache
+    survives restarts without being held in memory.
+    """
+
+    def __init__(self, capacity: int = 10000, path: Optional[str] = None):
+        self.capacity = capacity
+        self.path = path
+        self._rows: OrderedDict[str, int] = OrderedDict()  # Least recent first
+        self._labels: Dict[str, str] = {}
+        self._free_rows: List[int] = []
+        self._next_row = 0
+        self._vectors: Optional[np.ndarray] = None
+        self._norms = np.zeros(capacity, dtype=np.float32)
+        self._active = np.zeros(capacity, dtype=bool)
+        self.evictions = 0
+        if path and os.path.exists(self._index_path):
+            self._load()
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        """Content hash identifying the embedding of a text"""
+        return hashlib.sha256(f"{model}\0{text}".encode()).hexdigest()
+
+    @property
+    def dimension(self) -> int:
+        """Vector dimension, 0 until the first vector is stored"""
+        return 0 if self._vectors is None else int(self._vectors.shape[1])
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Get a copy of a cached vector"""
+        row = self._rows.get(key)
+        if row is None:
+            return None
+        self._rows.move_to_end(key)
+        assert self._vectors is not None
+        return np.array(self._vectors[row])
+
+    def put(
+        self, key: str, vector: Union[Sequence[float], np.ndarray], label: Optional[str] = None
+    ) -> None:
+        """Store a vector, evicting the least recently used one if full
+
+        Args:
+            key: Content hash from make_key
+            vector: The embedding
+            label: Name returned by search instead of the key
+        """
+        array = np.asarray(vector, dtype=np.float32)
+        if self._vectors is None:
+            self._vectors = self._allocate(len(array))
+        if len(array) != self.dimension:
+            raise ValueError(
+                f"Embedding dimension {len(array)} does not match cache dimension "
+                f"{self.dimension}"
+            )
+
+        row = self._rows.get(key)
+        if row is None:
+            row = self._take_row()
+            self._rows[key] = row
+        else:
+            self._rows.move_to_end(key)
+        self._vectors[row] = array
+        self._norms[row] = np.linalg.norm(array)
+        self._active[row] = True
+        if label is not None:
+            self._labels[key] = label
+
+    def search(
+        self, query: Union[Sequence[float], np.ndarray], k: int = 10
+    ) -> List[Tuple[str, float]]:
+        """
+        Find the cached vectors most similar to a query
+
+        Args:
+            query: Query embedding
+            k: Number of results
+
+        Returns:
+            (label or key, cosine similarity) pairs, most similar first
+        """
+        if self._vectors is None or not self._rows or k <= 0:
+            return []
+        vector = np.asarray(query, dtype=np.float32)
+        query_norm = np.linalg.norm(vector)
+        if len(vector) != self.dimension or query_norm == 0:
+            return []
+
+        used = self._next_row
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = (self._vectors[:used] @ vector) / (self._norms[:used] * query_norm)
+        scores = np.where(self._active[:used], np.nan_to_num(scores, nan=-1.0), -np.inf)
+
+        k = min(k, len(self._rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        keys_by_row = {row: key for key, row in self._rows.items()}
+        return [
+            (self._labels.get(keys_by_row[row], keys_by_row[row]), float(scores[row]))
+            for row in top
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        vector_bytes = 0 if self._vectors is None else self._vectors.nbytes
+        return {
+            "entries": len(self._rows),
+            "capacity": self.capacity,
+            "dimension": self.dimension,
+            "evictions": self.evictions,
+            "memory_mb": (vector_bytes + self._norms.nbytes + self._active.nbytes)
+            / (1024 * 1024),
+            "memory_mapped": self.path is not None,
+        }
+
+    def _allocate(self, dimension: int) -> np.ndarray:
+        """Create the vector matrix"""
+        if self.path:
+            return np.lib.format.open_memmap(
+                self.path, mode="w+", dtype=np.float32, shape=(self.capacity, dimension)
+            )
+        return np.zeros((self.capacity, dimension), dtype=np.float32)
+
+    def _take_row(self) -> int:
+        """Get a free row, evicting the least recently used entry if needed"""
+        if self._free_rows:
+            return self._free_rows.pop()
+        if self._next_row < self.capacity:
+            self._next_row += 1
+            return self._next_row - 1
+        key, row = self._rows.popitem(last=False)
+        self._labels.pop(key, None)
+        self._active[row] = False
+        self.evictions += 1
+        return row
+
+    @property
+    def _index_path(self) -> str:
+        return f"{self.path}.index.json"
+
+    def flush(self) -> None:
+        """Write the vectors and row index of a memory-mapped cache to disk"""
+        if not self.path or self._vectors is None:
+            return
+        assert isinstance(self._vectors, np.memmap)
+        self._vectors.flush()
+        index = {
+            "dimension": self.dimension,
+            "next_row": self._next_row,
+            "rows": list(self._rows.items()),
+            "labels": self._labels,
+        }
+        tmp_path = f"{self._index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self._index_path)
+
+    def _load(self) -> None:
+        """Open a memory-mapped cache saved by flush()"""
+        assert self.path is not None
+        try:
+            with open(self._index_path, encoding="utf-8") as f:
+                index = json.load(f)
+            vectors = np.load(self.path, mmap_mode="r+")
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable embedding cache %s: %s", self.path, e)
+            return
+        if vectors.shape != (self.capacity, index["dimension"]):
+            logger.warning(
+                "Ignoring embedding cache %s with shape %s", self.path, vectors.shape
+            )
+            return
+
+        self._vectors = vectors
+        self._next_row = index["next_row"]
+        self._rows = OrderedDict((key, row) for key, row in index["rows"])
+        self._labels = index["labels"]
+        rows = np.fromiter(self._rows.values(), dtype=np.int64, count=len(self._rows))
+        self._active[rows] = True
+        self._norms[rows] = np.linalg.norm(vectors[rows], axis=1)
+        used = set(self._rows.values())
+        self._free_rows = [row for row in range(self._next_row) if row not in used]
+
+
+class EmbeddingService:
+    """Embeds texts with batched API calls and a vector cache
+
+    Requests arriving within batch_delay of each other are sent as one
+    batch, up to max_batch_size texts. Concurrent requests for the same
+    text share one embedding.
+    """
+
+    def __init__(
+        self,
+        model: str = DEFAULT_EMBEDDING_MODEL,
+        cache: Optional[EmbeddingCache] = None,
+        max_batch_size: int = MAX_EMBED_BATCH,
+        batch_delay: float = 0.01,
+        embed_batch: Optional[Callable[[List[str]], Awaitable[List[List[float]]]]] = None,
+    ):
+        """
+        Args:
+            model: Embedding model name
+            cache: Vector cache, a 10,000 entry in-memory cache by default
+            max_batch_size: Most texts sent in one API call
+            batch_delay: Seconds to wait for more texts before sending a batch
+            embed_batch: Async function embedding a list of texts, calling
+                the Gemini API by default
+        """
+        self.model = model
+        self.cache = cache if cache is not None else EmbeddingCache()
+        self.max_batch_size = min(max_batch_size, MAX_EMBED_BATCH)
+        self.batch_delay = batch_delay
+        self._embed_batch = embed_batch or self._embed_with_gemini
+        self._pending: Dict[str, Tuple[str, asyncio.Future[np.ndarray]]] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task[None]] = set()
+        self.requests = 0
+        self.cache_hits = 0
+        self.batches = 0
+        self.texts_embedded = 0
+
+    async def embed(self, text: str, label: Optional[str] = None) -> np.ndarray:
+        """
+        Get the embedding of a text
+
+        Args:
+            text: Text to embed
+            label: Name for the text in search results
+
+        Returns:
+            float32 embedding vector
+        """
+        self.requests += 1
+        key = EmbeddingCache.make_key(self.model, text)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.cache_hits += 1
+            if label is not None:
+                self.cache.put(key, cached, label)
+            return cached
+
+        pending = self._pending.get(key)
+        if pending is None:
+            future: asyncio.Future[np.ndarray] = asyncio.get_running_loop().create_future()
+            self._pending[key] = (text, future)
+            self._schedule_flush()
+        else:
+            future = pending[1]
+
+        vector = await asyncio.shield(future)
+        if label is not None:
+            self.cache.put(key, vector, label)
+        return np.array(vector)
+
+    async def embed_many(self, texts: Sequence[str]) -> List[np.ndarray]:
+        """Get the embeddings of several texts, batching the uncached ones"""
+        return list(await asyncio.gather(*(self.embed(text) for text in texts)))
+
+    async def most_similar(self, text: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Find the cached embeddings most similar to a text's embedding"""
+        return self.cache.search(await self.embed(text), k)
+
+    def _schedule_flush(self) -> None:
+        """Send the pending batch when full, or after batch_delay"""
+        if len(self._pending) >= self.max_batch_size:
+            self._start_batch()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(
+                self.batch_delay, self._start_batch
+            )
+
+    def _start_batch(self) -> None:
+        """Take the pending texts and embed them in the background"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        task = asyncio.get_running_loop().create_task(self._run_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: Dict[str, Tuple[str, asyncio.Future[np.ndarray]]]) -> None:
+        """Embed a batch and resolve its requests"""
+        self.batches += 1
+        self.texts_embedded += len(batch)
+        texts = [text for text, _ in batch.values()]
+        try:
+            vectors = await self._embed_batch(texts)
+            if len(vectors) != len(texts):
+                raise ValueError(f"Got {len(vectors)} embeddings for {len(texts)} texts")
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.error("Embedding batch of %d texts failed: %s", len(texts), e)
+            for _, future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+                    # Waiters that were cancelled never retrieve the error
+                    future.exception()
+            return
+
+        for (key, (_, future)), vector in zip(batch.items(), vectors):
+            array = np.asarray(vector, dtype=np.float32)
+            try:
+                self.cache.put(key, array)
+            except ValueError as e:
+                logger.warning("Not caching embedding: %s", e)
+            if not future.done():
+                future.set_result(array)
+
+    async def _embed_with_gemini(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts with one Gemini API call"""
+        result = await embed_content_async(model=self.model, content=texts)
+        # A list of texts gets a list of vectors back
+        return cast(List[List[float]], result["embedding"])
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get service statistics"""
+        return {
+            "model": self.model,
+            "requests": self.requests,
+            "cache_hits": self.cache_hits,
+            "batches": self.batches,
+            "texts_embedded": self.texts_embedded,
+            "average_batch_size": self.texts_embedded / self.batches if self.batches else 0.0,
+            "cache": self.cache.get_stats(),
+        }
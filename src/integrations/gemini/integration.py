@@ -21,7 +21,9 @@ from .api_key_manager import GeminiAPIKeyManager
 from .quota_monitor import QuotaMonitor
 from .project_config import GeminiProjectConfig
 from .connection_pool import ConnectionPool
+from .embedding_service import DEFAULT_EMBEDDING_MODEL, EmbeddingService
 from .response_cache import ResponseCache
+from .streaming_parser import IncrementalJSONParser, StreamedField
 from .token_optimizer import TokenOptimizer
 from .cost_tracker import CostTracker
 
@@ -57,6 +59,8 @@ class GeminiIntegration:
         connection_pool_size: int = 5,
         max_workers: int = 10,
         model_profiles: Optional[Dict[str, ModelProfile]] = None,
+        model_concurrency: Optional[Dict[str, int]] = None,
+        pool_acquire_timeout: Optional[float] = 30.0,
     ):
 
         self.key_manager = api_key_manager or GeminiAPIKeyManager()
@@ -74,8 +78,10 @@ class GeminiIntegration:
         # Prompt engineering
         self.prompt_library = PromptLibrary()
 
-        # Connection pooling
+        # Connection pooling; a pool's size is its model's concurrency limit
         self.connection_pool_size = connection_pool_size
+        self.model_concurrency = model_concurrency or {}
+        self.pool_acquire_timeout = pool_acquire_timeout
         self.connection_pools: Dict[str, ConnectionPool] = {}  # Pool per model
 
         # Thread pool for concurrent requests
@@ -114,6 +120,8 @@ class GeminiIntegration:
         self._rate_limit_hits = 0
         self._metrics_lock = threading.Lock()
         self._quality_history: List[Dict[str, Any]] = []  # Track response quality
+        # Seconds until a streamed analysis produced its first actionable field
+        self._time_to_first_actionable: deque[float] = deque(maxlen=1000)
         # Quality monitoring callback
         self._monitoring_callback: Optional[Callable[..., Any]] = None
 
@@ -122,9 +130,8 @@ class GeminiIntegration:
         self._conversation_states: Dict[str, Dict[str, Any]] = {}
         self._conversation_lock = threading.Lock()
 
-        # Embedding cache for future use
-        self._embedding_cache: Dict[str, List[float]] = {}
-        self._embedding_cache_lock = threading.Lock()
+        # Batched embedding with a bounded vector cache, one service per model
+        self.embedding_services: Dict[str, EmbeddingService] = {}
 
         # Initialize Gemini
         self._initialize_client()
@@ -143,16 +150,29 @@ class GeminiIntegration:
 
         # Create pools
         for model_name in unique_models:
-            self.connection_pools[model_name] = ConnectionPool(
-                model_name,
-                self.connection_pool_size,
-                self.project_config.safety_settings,
-            )
+            self.connection_pools[model_name] = self._create_pool(model_name)
 
         logger.info(
             "Initialized Gemini integration with %s model pools", len(unique_models)
         )
 
+    def _create_pool(self, model_name: str) -> ConnectionPool:
+        """Create the connection pool for a model"""
+        return ConnectionPool(
+            model_name,
+            self.model_concurrency.get(model_name, self.connection_pool_size),
+            self.project_config.safety_settings,
+            acquire_timeout=self.pool_acquire_timeout,
+        )
+
+    def _get_pool(self, model_name: str) -> ConnectionPool:
+        """Get the connection pool for a model, creating it on first use"""
+        pool = self.connection_pools.get(model_name)
+        if not pool:
+            pool = self._create_pool(model_name)
+            self.connection_pools[model_name] = pool
+        return pool
+
     def set_profile(self, profile_name: str) -> None:
         """Set the active model profile"""
         if profile_name not in self.model_profiles:
@@ -264,29 +284,22 @@ class GeminiIntegration:
         estimated_tokens: int,
         prompt: str
     ) -> Optional[str]:
-        """Execute the actual generation request"""
-        pool = self.connection_pools.get(selected_model)
-        if not pool:
-            pool = ConnectionPool(
-                selected_model,
-                self.connection_pool_size,
-                self.project_config.safety_settings,
-            )
-            self.connection_pools[selected_model] = pool
+        """Execute the actual generation request
 
-        model = pool.acquire()
-        try:
+        The request waits on the event loop for a free model instance and for
+        the API response, so other coroutines keep running meanwhile.
+        """
+        async with self._get_pool(selected_model).connection() as model:
             start_time = time.time()
             self._total_requests += 1
 
-            response = model.generate_content(optimized_prompt, **config)
+            response = await model.generate_content_async(optimized_prompt, **config)
 
             response_time = time.time() - start_time
             self._response_times.append(response_time)
 
             result_text = response.text if hasattr(response, 'text') else str(response)
 
-            self.rate_limiter.record_request(estimated_tokens)
             self.quota_monitor.record_usage(estimated_tokens)
 
             if self.cache_enabled:
@@ -299,8 +312,6 @@ class GeminiIntegration:
             )
 
             return result_text
-        finally:
-            pool.release(model)
 
     async def generate_content(
         self,
@@ -336,10 +347,9 @@ class GeminiIntegration:
 
         for attempt in range(retry_count):
             try:
-                can_proceed, wait_time = self.rate_limiter.can_make_request(estimated_tokens)
-                if not can_proceed and wait_time:
-                    await asyncio.sleep(wait_time)
-                    continue
+                # Waits in line until the request fits and records it
+                if await self.rate_limiter.acquire(estimated_tokens):
+                    self._rate_limit_hits += 1
 
                 return await self._execute_generation(
                     selected_model, optimized_prompt, config, estimated_tokens, prompt
@@ -394,10 +404,19 @@ class GeminiIntegration:
                 "error_rate": self._error_count / max(self._total_requests, 1),
                 "average_response_time": avg_response_time,
                 "rate_limit_hits": self._rate_limit_hits,
+                "average_time_to_first_actionable_field": (
+                    sum(self._time_to_first_actionable) / len(self._time_to_first_actionable)
+                    if self._time_to_first_actionable
+                    else 0
+                ),
+                "streamed_analyses": len(self._time_to_first_actionable),
                 "cache_stats": self.response_cache.get_stats(),
                 "quota_usage": self.quota_monitor.get_usage_summary(),
                 "cost_summary": self.cost_tracker.get_usage_summary(),
                 "rate_limiter_stats": self.rate_limiter.get_usage_stats(),
+                "connection_pools": {
+                    name: pool.get_stats() for name, pool in self.connection_pools.items()
+                },
             }
 
     def cleanup(self) -> None:
@@ -452,12 +471,8 @@ class GeminiIntegration:
             # Warm up specific models
             for model_name in models:
                 if model_name in self.connection_pools:
-                    pool = self.connection_pools[model_name]
-                    model = pool.acquire()
-                    try:
-                        model.generate_content(test_prompt)
-                    finally:
-                        pool.release(model)
+                    async with self.connection_pools[model_name].connection() as model:
+                        await model.generate_content_async(test_prompt)
         else:
             # Default warm up behavior
             tasks = []
@@ -869,34 +884,19 @@ Provide:
             "success": response is not None
         }
 
-    async def get_embedding(self, text: str, model_name: Optional[str] = None) -> List[float]:
-        """Get embedding for text with caching"""
-        # Check cache first
-        cache_key = f"{model_name or 'default'}:{text}"
-        with self._embedding_cache_lock:
-            if cache_key in self._embedding_cache:
-                return self._embedding_cache[cache_key]
-
-        # Generate embedding
-        model_name = model_name or "models/text-embedding-004"
-        model = genai.GenerativeModel(model_name)
-
-        # pylint: disable=no-member
-        result = await model.embed_content_async(text)
-        embedding_raw = result.get("embedding", [])
-
-        # Ensure embedding is a list of floats
-        embedding: List[float]
-        if not isinstance(embedding_raw, list):
-            embedding = []
-        else:
-            embedding = [float(x) for x in embedding_raw]
-
-        # Cache the result
-        with self._embedding_cache_lock:
-            self._embedding_cache[cache_key] = embedding
+    def get_embedding_service(self, model_name: Optional[str] = None) -> EmbeddingService:
+        """Get the embedding service for a model, creating it on first use"""
+        model_name = model_name or DEFAULT_EMBEDDING_MODEL
+        service = self.embedding_services.get(model_name)
+        if service is None:
+            service = EmbeddingService(model_name)
+            self.embedding_services[model_name] = service
+        return service
 
-        return embedding
+    async def get_embedding(self, text: str, model_name: Optional[str] = None) -> List[float]:
+        """Get embedding for text, batched with concurrent requests and cached"""
+        embedding = await self.get_embedding_service(model_name).embed(text)
+        return [float(x) for x in embedding]
 
     def get_cost_analysis(self) -> Dict[str, Any]:
         """Get cost analysis for current usage"""
@@ -979,17 +979,17 @@ Provide:
         }
 
     def get_embedding_cache_stats(self) -> Dict[str, Any]:
-        """Get statistics about the embedding cache"""
-        with self._embedding_cache_lock:
-            num_entries = len(self._embedding_cache)
-            # Estimate memory usage (rough calculation)
-            # Assuming each float is 4 bytes and typical embedding size is 1536
-            memory_estimate_mb = (num_entries * 1536 * 4) / (1024 * 1024)
-
-            return {
-                "entries": num_entries,
-                "memory_estimate_mb": memory_estimate_mb
-            }
+        """Get statistics about the embedding caches"""
+        by_model = {
+            model: service.get_stats() for model, service in self.embedding_services.items()
+        }
+        return {
+            "entries": sum(stats["cache"]["entries"] for stats in by_model.values()),
+            "memory_estimate_mb": sum(
+                stats["cache"]["memory_mb"] for stats in by_model.values()
+            ),
+            "by_model": by_model,
+        }
 
     def _get_generation_config(
         self,
@@ -1146,17 +1146,111 @@ Provide:
 
         return sanitized.strip()
 
-    async def stream_analysis(self, _prompt: str) -> AsyncGenerator[str, None]:
+    async def _stream_generation(
+        self,
+        prompt: str,
+        profile_name: Optional[str] = None,
+        model_name: Optional[str] = None,
+        generation_config: Optional[Dict[str, Any]] = None,
+    ) -> AsyncGenerator[str, None]:
+        """Stream response text, holding a pooled model instance until it ends
+
+        A cached response is yielded as a single chunk.
+        """
+        profile, selected_model = self._determine_model_and_profile(profile_name, model_name)
+        config = self._prepare_generation_config(profile, generation_config)
+        optimized_prompt, estimated_tokens = self._prepare_prompt(prompt, profile)
+
+        if self.cache_enabled:
+            cached = self.response_cache.get(prompt, selected_model, config)
+            if cached:
+                yield cached
+                return
+
+        if await self.rate_limiter.acquire(estimated_tokens):
+            self._rate_limit_hits += 1
+
+        async with self._get_pool(selected_model).connection() as model:
+            start_time = time.time()
+            self._total_requests += 1
+            chunks: List[str] = []
+
+            response = await model.generate_content_async(
+                optimized_prompt, stream=True, **config
+            )
+            async for chunk in response:
+                if hasattr(chunk, 'text'):
+                    chunks.append(chunk.text)
+                    yield chunk.text
+
+            self._response_times.append(time.time() - start_time)
+            result_text = "".join(chunks)
+            self.quota_monitor.record_usage(estimated_tokens)
+            if self.cache_enabled:
+                self.response_cache.put(prompt, selected_model, config, result_text)
+            self.cost_tracker.record_usage(
+                selected_model,
+                estimated_tokens,
+                len(result_text) // 4,
+            )
+
+    async def stream_analysis(
+        self, _prompt: str, model_name: Optional[str] = None
+    ) -> AsyncGenerator[str, None]:
         """Stream analysis results"""
-        # Get or create model
-        model = genai.GenerativeModel(self.default_model.value)
+        async for text in self._stream_generation(
+            _prompt, model_name=model_name or self.default_model.value
+        ):
+            yield text
+
+    async def stream_structured_analysis(
+        self,
+        prompt: str,
+        profile_name: Optional[str] = "security_analysis",
+        model_name: Optional[str] = None,
+        generation_config: Optional[Dict[str, Any]] = None,
+    ) -> AsyncGenerator[StreamedField, None]:
+        """
+        Stream a JSON analysis, yielding each field as soon as it is complete
+
+        Fields such as severity, iocs and recommendations arrive while the
+        rest of the response is still being generated, so callers can start
+        prioritization and remediation planning early. The complete analysis
+        is yielded last with an empty path. If the response is not a single
+        JSON object it is parsed once it ends, as generate_content results
+        are.
 
-        # Generate streaming response
-        response = await model.generate_content_async(_prompt, stream=True)
+        Args:
+            prompt: The analysis prompt
+            profile_name: Name of the profile to use
+            model_name: Specific model to use
+            generation_config: Optional generation configuration
 
-        async for chunk in response:
-            if hasattr(chunk, 'text'):
-                yield chunk.text
+        Yields:
+            Completed fields, then the complete analysis
+        """
+        parser = IncrementalJSONParser()
+        start_time = time.monotonic()
+        first_actionable_seen = False
+
+        def record(streamed: StreamedField) -> StreamedField:
+            nonlocal first_actionable_seen
+            if streamed.actionable and not first_actionable_seen:
+                first_actionable_seen = True
+                with self._metrics_lock:
+                    self._time_to_first_actionable.append(time.monotonic() - start_time)
+            return streamed
+
+        async for text in self._stream_generation(
+            prompt, profile_name, model_name, generation_config
+        ):
+            for streamed in parser.feed(text):
+                yield record(streamed)
+
+        if parser.result is None:
+            parsed = self._parse_structured_response(parser.text)
+            if parsed:
+                yield record(StreamedField((), parsed, True))
 
     async def analyze_with_fallback(self, incident_data: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze with fallback to alternative models on failure"""
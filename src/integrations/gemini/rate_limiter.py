@@ -2,11 +2,13 @@
 Rate limiting functionality for Gemini API calls
 """
 
+import asyncio
 import threading
+import time
 from collections import deque
 from dataclasses import dataclass
-from datetime import datetime, timedelta
-from typing import Any, Dict, Optional, Tuple
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
 
 
 @dataclass
@@ -32,15 +34,113 @@ class QuotaUsage:
             self.last_reset = datetime.now()
 
 
+MINUTE_SECONDS = 60
+HOUR_SECONDS = 3600
+
+
 class RateLimiter:
-    """Implements rate limiting for API calls"""
+    """Implements rate limiting for API calls
+
+    Usage is counted in a ring of per-second buckets covering the last hour,
+    with running sums for the minute and hour windows, so checking and
+    recording a request is O(1) amortized. Callers that must wait queue up
+    and are admitted in arrival order at the moment capacity frees up.
+    """
 
     def __init__(self, config: RateLimitConfig):
         self.config = config
-        self.request_times: deque[datetime] = deque()
-        self.token_usage: deque[Tuple[datetime, int]] = deque()
+        self._bucket_requests = [0] * HOUR_SECONDS
+        self._bucket_tokens = [0] * HOUR_SECONDS
+        self._second = int(time.monotonic())
+        self._minute_requests = 0
+        self._minute_tokens = 0
+        self._hour_requests = 0
+        self._hour_tokens = 0
+        self._waiters: deque[asyncio.Future[None]] = deque()
         self.lock = threading.Lock()
 
+    def _advance(self, now: float) -> None:
+        """Move the windows forward to now, dropping buckets that left them"""
+        second = int(now)
+        steps = second - self._second
+        if steps <= 0:
+            return
+        if steps >= HOUR_SECONDS:
+            self._bucket_requests = [0] * HOUR_SECONDS
+            self._bucket_tokens = [0] * HOUR_SECONDS
+            self._minute_requests = self._minute_tokens = 0
+            self._hour_requests = self._hour_tokens = 0
+        else:
+            for current in range(self._second + 1, second + 1):
+                leaving_minute = (current - MINUTE_SECONDS) % HOUR_SECONDS
+                self._minute_requests -= self._bucket_requests[leaving_minute]
+                self._minute_tokens -= self._bucket_tokens[leaving_minute]
+                # The slot for this second last held the second leaving the hour
+                slot = current % HOUR_SECONDS
+                self._hour_requests -= self._bucket_requests[slot]
+                self._hour_tokens -= self._bucket_tokens[slot]
+                self._bucket_requests[slot] = 0
+                self._bucket_tokens[slot] = 0
+        self._second = second
+
+    def _expiry_wait(
+        self, buckets: List[int], window: int, excess: int, now: float
+    ) -> float:
+        """Seconds until at least excess units have left the window"""
+        expired = 0
+        for second in range(self._second - window + 1, self._second + 1):
+            expired += buckets[second % HOUR_SECONDS]
+            if expired >= excess:
+                return max(0.0, second + window - now)
+        return float(window)
+
+    def _check(self, estimated_tokens: int, now: float) -> Tuple[bool, Optional[float]]:
+        """Check the limits at now; the lock must be held"""
+        self._advance(now)
+        config = self.config
+        waits = []
+
+        if self._minute_requests >= config.requests_per_minute:
+            excess = self._minute_requests - config.requests_per_minute + 1
+            waits.append(
+                self._expiry_wait(self._bucket_requests, MINUTE_SECONDS, excess, now)
+            )
+        if self._hour_requests >= config.requests_per_hour:
+            excess = self._hour_requests - config.requests_per_hour + 1
+            waits.append(
+                self._expiry_wait(self._bucket_requests, HOUR_SECONDS, excess, now)
+            )
+        # A request larger than a whole window's budget proceeds once it is empty
+        if self._minute_tokens and (
+            self._minute_tokens + estimated_tokens > config.tokens_per_minute
+        ):
+            excess = self._minute_tokens + estimated_tokens - config.tokens_per_minute
+            waits.append(
+                self._expiry_wait(self._bucket_tokens, MINUTE_SECONDS, excess, now)
+            )
+        if self._hour_tokens and (
+            self._hour_tokens + estimated_tokens > config.tokens_per_hour
+        ):
+            excess = self._hour_tokens + estimated_tokens - config.tokens_per_hour
+            waits.append(
+                self._expiry_wait(self._bucket_tokens, HOUR_SECONDS, excess, now)
+            )
+
+        if waits:
+            return False, max(waits)
+        return True, None
+
+    def _record(self, tokens_used: int, now: float) -> None:
+        """Count a request at now; the lock must be held"""
+        self._advance(now)
+        slot = self._second % HOUR_SECONDS
+        self._bucket_requests[slot] += 1
+        self._bucket_tokens[slot] += tokens_used
+        self._minute_requests += 1
+        self._minute_tokens += tokens_used
+        self._hour_requests += 1
+        self._hour_tokens += tokens_used
+
     def can_make_request(
         self, estimated_tokens: int = 0
     ) -> Tuple[bool, Optional[float]]:
@@ -51,89 +151,77 @@ class RateLimiter:
             Tuple of (can_proceed, wait_time_seconds)
         """
         with self.lock:
-            now = datetime.now()
-
-            # Clean old entries
-            minute_ago = now - timedelta(minutes=1)
-            hour_ago = now - timedelta(hours=1)
-
-            self.request_times = deque(t for t in self.request_times if t > hour_ago)
-            self.token_usage = deque(
-                (t, tokens) for t, tokens in self.token_usage if t > hour_ago
-            )
+            return self._check(estimated_tokens, time.monotonic())
 
-            # Check request limits
-            requests_last_minute = sum(1 for t in self.request_times if t > minute_ago)
-            requests_last_hour = len(self.request_times)
+    def record_request(self, tokens_used: int) -> None:
+        """Record a completed request"""
+        with self.lock:
+            self._record(tokens_used, time.monotonic())
 
-            if requests_last_minute >= self.config.requests_per_minute:
-                wait_time = (self.request_times[0] - minute_ago).total_seconds()
-                return False, wait_time
+    def _try_reserve(self, estimated_tokens: int) -> Optional[float]:
+        """Record the request if it fits, else return the seconds to wait"""
+        with self.lock:
+            now = time.monotonic()
+            can_proceed, wait_time = self._check(estimated_tokens, now)
+            if can_proceed:
+                self._record(estimated_tokens, now)
+                return None
+            return wait_time
+
+    async def acquire(self, estimated_tokens: int = 0) -> float:
+        """
+        Wait until a request fits within the limits and record it
 
-            if requests_last_hour >= self.config.requests_per_hour:
-                wait_time = (self.request_times[0] - hour_ago).total_seconds()
-                return False, wait_time
+        Waiting callers are admitted in arrival order; the caller at the head
+        of the queue sleeps exactly until enough usage leaves the windows.
 
-            # Check token limits
-            tokens_last_minute = sum(
-                tokens for t, tokens in self.token_usage if t > minute_ago
-            )
-            tokens_last_hour = sum(tokens for _, tokens in self.token_usage)
-
-            if (
-                tokens_last_minute + estimated_tokens
-                > self.config.tokens_per_minute
-            ):
-                # Find when we can proceed
-                for t, tokens in self.token_usage:
-                    if t > minute_ago:
-                        wait_time = (t - minute_ago).total_seconds()
-                        return False, wait_time
-
-            if tokens_last_hour + estimated_tokens > self.config.tokens_per_hour:
-                # Find when we can proceed
-                for t, tokens in self.token_usage:
-                    if t > hour_ago:
-                        wait_time = (t - hour_ago).total_seconds()
-                        return False, wait_time
-
-            return True, None
+        Returns:
+            Seconds spent waiting
+        """
+        with self.lock:
+            queued = bool(self._waiters)
+        if not queued and self._try_reserve(estimated_tokens) is None:
+            return 0.0
 
-    def record_request(self, tokens_used: int) -> None:
-        """Record a completed request"""
+        start = time.monotonic()
+        turn: asyncio.Future[None] = asyncio.get_running_loop().create_future()
         with self.lock:
-            now = datetime.now()
-            self.request_times.append(now)
-            self.token_usage.append((now, tokens_used))
+            self._waiters.append(turn)
+            if len(self._waiters) == 1:
+                turn.set_result(None)
+        try:
+            await turn
+            while True:
+                wait_time = self._try_reserve(estimated_tokens)
+                if wait_time is None:
+                    return time.monotonic() - start
+                await asyncio.sleep(wait_time)
+        finally:
+            with self.lock:
+                was_head = self._waiters[0] is turn
+                self._waiters.remove(turn)
+                if was_head and self._waiters:
+                    head = self._waiters[0]
+                    head.get_loop().call_soon_threadsafe(_start_turn, head)
 
     def get_usage_stats(self) -> Dict[str, Any]:
         """Get current usage statistics"""
         with self.lock:
-            now = datetime.now()
-            minute_ago = now - timedelta(minutes=1)
-            hour_ago = now - timedelta(hours=1)
-
-            requests_last_minute = sum(
-                1 for t in self.request_times if t > minute_ago
-            )
-            requests_last_hour = len(
-                [t for t in self.request_times if t > hour_ago]
-            )
-
-            tokens_last_minute = sum(
-                tokens for t, tokens in self.token_usage if t > minute_ago
-            )
-            tokens_last_hour = sum(
-                tokens for t, tokens in self.token_usage if t > hour_ago
-            )
-
+            self._advance(time.monotonic())
             return {
-                "requests_last_minute": requests_last_minute,
-                "requests_last_hour": requests_last_hour,
-                "tokens_last_minute": tokens_last_minute,
-                "tokens_last_hour": tokens_last_hour,
+                "requests_last_minute": self._minute_requests,
+                "requests_last_hour": self._hour_requests,
+                "tokens_last_minute": self._minute_tokens,
+                "tokens_last_hour": self._hour_tokens,
                 "requests_per_minute_limit": self.config.requests_per_minute,
                 "requests_per_hour_limit": self.config.requests_per_hour,
                 "tokens_per_minute_limit": self.config.tokens_per_minute,
                 "tokens_per_hour_limit": self.config.tokens_per_hour,
+                "waiting": len(self._waiters),
             }
+
+
+def _start_turn(turn: "asyncio.Future[None]") -> None:
+    """Let the waiter at the head of the queue check the limits"""
+    if not turn.done():
+        turn.set_result(None)
@@ -4,33 +4,108 @@ Response caching for Gemini API
 
 import hashlib
 import json
+import os
+import re
 import threading
+import time
+import zlib
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Callable, Dict, NamedTuple, Optional
 
 from .common import logger
 
+# Bookkeeping bytes counted per entry on top of the stored response
+ENTRY_OVERHEAD_BYTES = 200
+
+_WHITESPACE = re.compile(r"\s+")
+VOLATILE_PATTERNS = (
+    (
+        re.compile(
+            r"\b\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?"
+        ),
+        "<timestamp>",
+    ),
+    (
+        re.compile(
+            r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"
+        ),
+        "<uuid>",
+    ),
+    (re.compile(r"\b1\d{9}(?:\.\d+)?\b"), "<epoch>"),
+)
+
+
+def normalize_whitespace(prompt: str) -> str:
+    """Collapse runs of whitespace so formatting changes share a cache entry"""
+    return _WHITESPACE.sub(" ", prompt).strip()
+
+
+def mask_volatile_fields(prompt: str) -> str:
+    """Mask timestamps, UUIDs and epoch times, then collapse whitespace
+
+    Use as a ResponseCache normalizer when these values do not change the
+    answer, such as prompts that embed request IDs or the current time.
+    """
+    for pattern, placeholder in VOLATILE_PATTERNS:
+        prompt = pattern.sub(placeholder, prompt)
+    return normalize_whitespace(prompt)
+
+
+class _CacheEntry(NamedTuple):
+    """A stored response"""
+
+    created_at: datetime
+    data: bytes
+    compressed: bool
+
 
 class ResponseCache:
-    """Thread-safe response cache with TTL"""
+    """Thread-safe response cache with TTL
 
-    def __init__(self, ttl: timedelta = timedelta(minutes=15)):
-        self.cache: Dict[str, Tuple[datetime, str]] = {}
+    Entries are evicted least recently used first once their total size
+    exceeds max_bytes. Responses of at least compress_min_bytes are stored
+    zlib-compressed. Prompts pass through the normalizer before hashing, so
+    prompts that differ only in ways it removes share an entry. With a
+    disk_dir every response is also written to disk, and memory misses are
+    served from there, so a warm cache survives restarts.
+    """
+
+    def __init__(
+        self,
+        ttl: timedelta = timedelta(minutes=15),
+        max_bytes: int = 64 * 1024 * 1024,
+        compress_min_bytes: Optional[int] = 1024,
+        normalizer: Optional[Callable[[str], str]] = normalize_whitespace,
+        disk_dir: Optional[str] = None,
+    ):
+        self.cache: OrderedDict[str, _CacheEntry] = OrderedDict()
         self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.compress_min_bytes = compress_min_bytes
+        self.normalizer = normalizer
+        self.disk_dir = disk_dir
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
         self.lock = threading.Lock()
         self.hits = 0
         self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._compressed_entries = 0
+        self._puts = 0
 
     def _generate_key(
         self, prompt: str, model: str, generation_config: Dict[str, Any]
     ) -> str:
         """Generate a cache key from request parameters"""
         cache_data = {
-            "prompt": prompt,
+            "prompt": self.normalizer(prompt) if self.normalizer else prompt,
             "model": model,
             "config": generation_config,
         }
-        cache_str = json.dumps(cache_data, sort_keys=True)
+        cache_str = json.dumps(cache_data, sort_keys=True, default=str)
         return hashlib.sha256(cache_str.encode()).hexdigest()
 
     def get(
@@ -40,15 +115,23 @@ class ResponseCache:
         key = self._generate_key(prompt, model, generation_config)
 
         with self.lock:
-            if key in self.cache:
-                timestamp, response = self.cache[key]
-                if datetime.now() - timestamp < self.ttl:
-                    self.hits += 1
-                    logger.debug("Cache hit for key %s", key[:8])
-                    return response
-                else:
-                    # Expired entry
-                    del self.cache[key]
+            entry = self.cache.get(key)
+            if entry is not None and not self._is_expired(entry):
+                self.cache.move_to_end(key)
+                self.hits += 1
+                logger.debug("Cache hit for key %s", key[:8])
+                return self._decode(entry)
+            if entry is not None:
+                # Expired entry
+                self._remove(key)
+
+            entry = self._read_disk(key)
+            if entry is not None:
+                self._store(key, entry)
+                self.hits += 1
+                self.disk_hits += 1
+                logger.debug("Disk cache hit for key %s", key[:8])
+                return self._decode(entry)
 
             self.misses += 1
             return None
@@ -58,26 +141,125 @@ class ResponseCache:
     ) -> None:
         """Store a response in the cache"""
         key = self._generate_key(prompt, model, generation_config)
+        entry = self._encode(response)
 
         with self.lock:
-            self.cache[key] = (datetime.now(), response)
+            self._store(key, entry)
+            self._write_disk(key, entry)
             logger.debug("Cached response for key %s", key[:8])
 
-            # Clean old entries periodically
-            if len(self.cache) % 100 == 0:
+            # Sweep expired entries, mainly from the disk tier, periodically
+            self._puts += 1
+            if self._puts % 100 == 0:
                 self._clean_expired()
 
-    def _clean_expired(self) -> None:
-        """Remove expired entries from the cache"""
-        now = datetime.now()
-        expired_keys = [
-            key
-            for key, (timestamp, _) in self.cache.items()
-            if now - timestamp > self.ttl
-        ]
+    def _is_expired(self, entry: _CacheEntry) -> bool:
+        return datetime.now() - entry.created_at >= self.ttl
+
+    def _encode(self, response: str) -> _CacheEntry:
+        """Encode a response, compressing it when large enough to pay off"""
+        data = response.encode()
+        if self.compress_min_bytes is not None and len(data) >= self.compress_min_bytes:
+            compressed = zlib.compress(data)
+            if len(compressed) < len(data):
+                return _CacheEntry(datetime.now(), compressed, True)
+        return _CacheEntry(datetime.now(), data, False)
+
+    @staticmethod
+    def _decode(entry: _CacheEntry) -> str:
+        data = zlib.decompress(entry.data) if entry.compressed else entry.data
+        return data.decode()
 
+    @staticmethod
+    def _entry_bytes(key: str, entry: _CacheEntry) -> int:
+        return len(key) + len(entry.data) + ENTRY_OVERHEAD_BYTES
+
+    def _store(self, key: str, entry: _CacheEntry) -> None:
+        """Store an entry in memory and evict down to max_bytes"""
+        if key in self.cache:
+            self._remove(key)
+        size = self._entry_bytes(key, entry)
+        if size > self.max_bytes:
+            return
+        self.cache[key] = entry
+        self._bytes += size
+        self._compressed_entries += entry.compressed
+
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self.cache))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        entry = self.cache.pop(key)
+        self._bytes -= self._entry_bytes(key, entry)
+        self._compressed_entries -= entry.compressed
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir or "", f"{key}.entry")
+
+    def _read_disk(self, key: str) -> Optional[_CacheEntry]:
+        """Read an unexpired entry from the disk tier"""
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                header_line, _, data = f.read().partition(b"\n")
+            header = json.loads(header_line)
+            entry = _CacheEntry(
+                datetime.fromisoformat(header["created_at"]), data, header["compressed"]
+            )
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Unreadable response cache file %s: %s", path, e)
+            return None
+
+        if self._is_expired(entry):
+            self._remove_disk_file(path)
+            return None
+        return entry
+
+    def _write_disk(self, key: str, entry: _CacheEntry) -> None:
+        """Write an entry to the disk tier"""
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        header = json.dumps(
+            {"created_at": entry.created_at.isoformat(), "compressed": entry.compressed}
+        )
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(header.encode() + b"\n" + entry.data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Failed to write response cache file %s: %s", path, e)
+
+    @staticmethod
+    def _remove_disk_file(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _clean_expired(self) -> None:
+        """Remove expired entries from memory and the disk tier"""
+        expired_keys = [key for key, entry in self.cache.items() if self._is_expired(entry)]
         for key in expired_keys:
-            del self.cache[key]
+            self._remove(key)
+
+        if self.disk_dir:
+            # Files are written when their entry is created
+            cutoff = time.time() - self.ttl.total_seconds()
+            for name in os.listdir(self.disk_dir):
+                path = os.path.join(self.disk_dir, name)
+                try:
+                    if name.endswith(".entry") and os.path.getmtime(path) < cutoff:
+                        self._remove_disk_file(path)
+                except FileNotFoundError:
+                    pass
 
         if expired_keys:
             logger.debug("Removed %s expired cache entries", len(expired_keys))
@@ -94,12 +276,23 @@ class ResponseCache:
                 "hit_rate": hit_rate,
                 "size": len(self.cache),
                 "ttl_minutes": self.ttl.total_seconds() / 60,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+                "compressed_entries": self._compressed_entries,
+                "disk_hits": self.disk_hits,
             }
 
     def clear(self) -> None:
-        """Clear the entire cache"""
+        """Clear the entire cache, including the disk tier"""
         with self.lock:
             self.cache.clear()
+            self._bytes = 0
+            self._compressed_entries = 0
+            if self.disk_dir:
+                for name in os.listdir(self.disk_dir):
+                    if name.endswith(".entry"):
+                        self._remove_disk_file(os.path.join(self.disk_dir, name))
             logger.info("Cache cleared")
 
     # Backward compatibility method
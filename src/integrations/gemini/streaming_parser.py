@@ -0,0 +1,235 @@
+"""
+Incremental parsing of streamed JSON analyses
+"""
+
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple, Union
+
+from .common import logger
+
+PathElement = Union[str, int]
+
+# Keys whose values let callers start prioritizing or remediating
+ACTIONABLE_FIELDS: FrozenSet[str] = frozenset(
+    {
+        "severity",
+        "threat_level",
+        "threat_assessment",
+        "threats_detected",
+        "iocs",
+        "recommendations",
+    }
+)
+
+_SCALAR_END = re.compile(r"[\s,\]}]")
+
+
+@dataclass(frozen=True)
+class StreamedField:
+    """A value that finished parsing while the response was streaming
+
+    Attributes:
+        path: Keys and array indexes leading to the value, e.g.
+            ("recommendations", 0); empty for the complete analysis
+        value: The parsed JSON value
+        actionable: Whether the path contains an actionable field
+    """
+
+    path: Tuple[PathElement, ...]
+    value: Any
+    actionable: bool = False
+
+    @property
+    def name(self) -> str:
+        """Dotted name of the path, with indexes in brackets"""
+        name = ""
+        for element in self.path:
+            if isinstance(element, int):
+                name += f"[{element}]"
+            else:
+                name += f".{element}" if name else element
+        return name
+
+    @property
+    def is_complete(self) -> bool:
+        """Whether this is the whole analysis rather than one field"""
+        return not self.path
+
+
+@dataclass
+class _Frame:
+    """An object or array whose closing bracket has not arrived yet"""
+
+    is_object: bool
+    path: Tuple[PathElement, ...]
+    key: Optional[str] = None
+    index: int = 0
+    expect_key: bool = True
+    value_start: Optional[int] = None
+    in_scalar: bool = False
+
+
+class IncrementalJSONParser:
+    """Parses a JSON object from text that arrives in chunks
+
+    Text before the first "{", such as a markdown fence, is skipped. Each
+    value nested at most max_depth levels deep is reported as soon as it is
+    complete, so a response's severity or first recommendation is available
+    long before the closing brace. The whole object is reported last, with
+    an empty path.
+    """
+
+    def __init__(
+        self,
+        max_depth: int = 2,
+        actionable_fields: FrozenSet[str] = ACTIONABLE_FIELDS,
+    ):
+        self.max_depth = max_depth
+        self.actionable_fields = actionable_fields
+        self._text = ""
+        self._pos = 0
+        self._stack: List[_Frame] = []
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._root_start = 0
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        """All text fed so far"""
+        return self._text
+
+    @property
+    def done(self) -> bool:
+        """Whether the object is complete or parsing failed"""
+        return self.result is not None or self.error is not None
+
+    def feed(self, chunk: str) -> List[StreamedField]:
+        """
+        Add streamed text and return the values it completed
+
+        Args:
+            chunk: Next piece of the response
+
+        Returns:
+            Values completed by this chunk, in document order
+        """
+        self._text += chunk
+        fields: List[StreamedField] = []
+        if self.done:
+            return fields
+
+        text = self._text
+        i = self._pos
+        while i < len(text) and not self.done:
+            char = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._end_string(i + 1, fields)
+            elif not self._started:
+                if char == "{":
+                    self._started = True
+                    self._root_start = i
+                    self._stack.append(_Frame(is_object=True, path=()))
+            else:
+                self._scan(char, i, fields)
+            i += 1
+        self._pos = i
+        return fields
+
+    def _scan(self, char: str, i: int, fields: List[StreamedField]) -> None:
+        """Advance the structure by one character outside a string"""
+        frame = self._stack[-1]
+        if frame.in_scalar and _SCALAR_END.match(char):
+            self._end_value(i, fields)
+
+        if char == '"':
+            self._in_string = True
+            self._string_start = i
+            if not (frame.is_object and frame.expect_key):
+                frame.value_start = i
+        elif char in "{[":
+            frame.value_start = i
+            self._stack.append(
+                _Frame(is_object=char == "{", path=self._child_path(frame))
+            )
+        elif char in "}]":
+            self._close_container(i + 1, fields)
+        elif char in ":,":
+            self._separator(char, frame)
+        elif not char.isspace() and frame.value_start is None:
+            frame.value_start = i
+            frame.in_scalar = True
+
+    def _close_container(self, end: int, fields: List[StreamedField]) -> None:
+        """Handle a closing brace or bracket, ending a value or the object"""
+        self._stack.pop()
+        if self._stack:
+            self._end_value(end, fields)
+        else:
+            self._finish(end, fields)
+
+    @staticmethod
+    def _separator(char: str, frame: _Frame) -> None:
+        """Move past a ":" to the value or a "," to the next key or item"""
+        if char == ":":
+            frame.expect_key = False
+        elif frame.is_object:
+            frame.expect_key = True
+        else:
+            frame.index += 1
+
+    def _end_string(self, end: int, fields: List[StreamedField]) -> None:
+        """Handle a closing quote as either an object key or a value"""
+        frame = self._stack[-1]
+        if frame.is_object and frame.expect_key:
+            frame.key = json.loads(self._text[self._string_start:end])
+        else:
+            self._end_value(end, fields)
+
+    @staticmethod
+    def _child_path(frame: _Frame) -> Tuple[PathElement, ...]:
+        child: PathElement = (frame.key or "") if frame.is_object else frame.index
+        return frame.path + (child,)
+
+    def _end_value(self, end: int, fields: List[StreamedField]) -> None:
+        """Report the value that just ended in the innermost container"""
+        frame = self._stack[-1]
+        start = frame.value_start
+        frame.value_start = None
+        frame.in_scalar = False
+        if start is None:
+            return
+        path = self._child_path(frame)
+        if len(path) > self.max_depth:
+            return
+        try:
+            value = json.loads(self._text[start:end])
+        except json.JSONDecodeError as e:
+            self.error = f"Invalid JSON value at {StreamedField(path, None).name}: {e}"
+            logger.debug("Streaming parse stopped: %s", self.error)
+            return
+        fields.append(StreamedField(path, value, self._is_actionable(path)))
+
+    def _finish(self, end: int, fields: List[StreamedField]) -> None:
+        """Report the complete object"""
+        try:
+            value = json.loads(self._text[self._root_start:end])
+        except json.JSONDecodeError as e:
+            self.error = f"Invalid JSON object: {e}"
+            return
+        self.result = value
+        fields.append(StreamedField((), value, True))
+
+    def _is_actionable(self, path: Tuple[PathElement, ...]) -> bool:
+        return any(element in self.actionable_fields for element in path)
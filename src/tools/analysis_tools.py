@@ -5,9 +5,10 @@ business logic components, allowing them to be used within the ADK framework.
 """
 
 import logging
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from src.common.adk_import_fix import BaseTool, ToolContext
+from src.common.models import Incident, SecurityEvent
 
 # Import existing business logic components
 from src.analysis_agent.recommendation_engine import RecommendationEngine
@@ -120,6 +121,9 @@ class CorrelationTool(BaseTool):
             correlation_window = config.get("correlation_window", 3600) if config else 3600
             self.correlator = EventCorrelator(logger, correlation_window)
 
+        # Events converted from incident dictionaries, by incident ID
+        self._incident_events: Dict[str, List[SecurityEvent]] = {}
+
     async def execute(self, context: ToolContext, **kwargs: Any) -> Dict[str, Any]:
         """Perform advanced event correlation.
 
@@ -127,6 +131,10 @@ class CorrelationTool(BaseTool):
             context: ADK tool context
             **kwargs: Should contain:
                 - events: List of security events
+                - incident: Incident, or incident dictionary with an "id" or
+                  "incident_id", to correlate instead of events; its
+                  correlation state is kept under the incident ID, so later
+                  calls only process newly added events
                 - patterns: Known attack patterns to match
                 - time_window: Analysis time window
 
@@ -137,16 +145,27 @@ class CorrelationTool(BaseTool):
         _ = context
 
         try:
-            events = kwargs.get("events", [])
+            incident = kwargs.get("incident")
+            if isinstance(incident, dict):
+                incident = self._incident_from_dict(incident)
 
             # Use the existing correlator
-            correlation_results = self.correlator.correlate_events(events)
+            if isinstance(incident, Incident):
+                correlation_results = self.correlator.correlate_incident(incident)
+            else:
+                events = kwargs.get("events", [])
+                correlation_results = self.correlator.correlate_events(events)
             return {
                 "status": "success",
                 "attack_patterns": correlation_results.get("patterns_detected", []),
                 "attack_chain": correlation_results.get("attack_chain", []),
                 "confidence_scores": correlation_results.get("confidence_scores", {}),
-                "related_iocs": correlation_results.get("iocs", [])
+                "related_iocs": correlation_results.get("iocs", []),
+                "correlation_scores": correlation_results.get("correlation_scores", {}),
+                "primary_events": correlation_results.get("primary_events", []),
+                "correlation_summary": correlation_results.get(
+                    "correlation_summary", ""
+                ),
             }
 
         except (ValueError, KeyError, AttributeError, TypeError) as e:
@@ -157,6 +176,56 @@ class CorrelationTool(BaseTool):
                 "attack_patterns": []
             }
 
+    def _incident_from_dict(self, data: Dict[str, Any]) -> Optional[Incident]:
+        """Build the incident to correlate from an incident dictionary.
+
+        Events converted by earlier calls are kept under the incident ID and
+        reused while the dictionary's events still start with the same event
+        IDs, so only events added since are converted. Returns None when the
+        dictionary has no incident ID, as its correlation state could not be
+        found again.
+        """
+        incident_id = data.get("incident_id") or data.get("id")
+        if not incident_id:
+            return None
+        incident_id = str(incident_id)
+
+        events = data.get("events", [])
+        converted = self._incident_events.pop(incident_id, [])
+        if len(events) < len(converted) or any(
+            self._event_id(event) != known.event_id
+            for event, known in zip(events, converted)
+        ):
+            converted = []
+        converted.extend(self._to_security_events(incident_id, events[len(converted):]))
+
+        self._incident_events[incident_id] = converted
+        while len(self._incident_events) > self.correlator.max_tracked_incidents:
+            del self._incident_events[next(iter(self._incident_events))]
+        return Incident(incident_id=incident_id, events=converted)
+
+    @staticmethod
+    def _event_id(event: Any) -> Any:
+        """Get the ID of an event or event dictionary."""
+        if isinstance(event, SecurityEvent):
+            return event.event_id
+        return event.get("event_id")
+
+    @staticmethod
+    def _to_security_events(incident_id: str, events: List[Any]) -> List[SecurityEvent]:
+        """Convert event dictionaries to SecurityEvents, keeping event objects."""
+        pending = [dict(event) for event in events if not isinstance(event, SecurityEvent)]
+        if not pending:
+            return list(events)
+
+        converted = iter(
+            Incident.from_dict({"incident_id": incident_id, "events": pending}).events
+        )
+        return [
+            event if isinstance(event, SecurityEvent) else next(converted)
+            for event in events
+        ]
+
 
 class ContextTool(BaseTool):
     """ADK tool wrapper for retrieving additional context."""
@@ -258,14 +258,15 @@ class DeduplicatorTool(BaseTool):
             _context: ADK tool context (unused)
             **kwargs: Should contain:
                 - incident: New incident to check
-                - existing_incidents: List of existing incidents
+                - existing_incidents: List of existing incidents; incidents
+                  registered by earlier calls are used when omitted
 
         Returns:
             Dictionary with deduplication results
         """
         try:
             incident = kwargs.get("incident")
-            existing_incidents = kwargs.get("existing_incidents", [])
+            existing_incidents = kwargs.get("existing_incidents")
 
             if not incident:
                 return {
@@ -278,6 +279,8 @@ class DeduplicatorTool(BaseTool):
             duplicate_incident = self.deduplicator.is_duplicate(
                 incident, existing_incidents
             )
+            if duplicate_incident is None:
+                self.deduplicator.register_incident(incident)
 
             return {
                 "status": "success",
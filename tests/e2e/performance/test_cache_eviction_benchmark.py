@@ -0,0 +1,77 @@
+"""
+Cache eviction benchmarks.
+
+Fills QueryCache and InterimResultsStorage past their entry limits and
+compares insert cost against the original ``min()`` scan over every entry on
+each eviction.
+"""
+
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict
+
+import pytest
+
+from src.detection_agent.interim_results_storage import InterimResultsStorage
+from src.detection_agent.query_cache import QueryCache
+
+
+def _scan_evict(store: Dict[str, Any]) -> None:
+    """Original eviction: find the oldest entry by scanning all of them."""
+    oldest = min(store.keys(), key=lambda k: store[k].created_at)
+    del store[oldest]
+
+
+@pytest.mark.performance
+class TestCacheEvictionBenchmark:
+    """Benchmark cache eviction when full."""
+
+    def test_interim_storage_inserts_when_full(self) -> None:
+        """Inserting into a full 10k store no longer scans every result."""
+        config = {"agents": {"detection": {"interim_storage": {"max_results": 10_000}}}}
+        storage = InterimResultsStorage(config)
+        for i in range(10_000):
+            storage.store(f"fill-{i}", "test", "test", i)
+
+        start = time.perf_counter()
+        for i in range(2_000):
+            storage.store(f"new-{i}", "test", "test", i)
+        indexed_seconds = time.perf_counter() - start
+
+        reference = dict(storage._storage.items())
+        start = time.perf_counter()
+        for _ in range(2_000):
+            _scan_evict(reference)
+        scan_seconds = time.perf_counter() - start
+
+        print(
+            f"\n2k inserts into full 10k store: scan eviction {scan_seconds:.3f}s, "
+            f"LRU store {indexed_seconds:.3f}s"
+        )
+        assert len(storage._storage) == 10_000
+        assert storage.retrieve("fill-1999") is None
+        assert storage.retrieve("fill-2000") == 2000
+        assert indexed_seconds < scan_seconds
+
+    def test_query_cache_inserts_when_full(self) -> None:
+        """Inserting into a full cache stays flat as the cache grows."""
+        timings = {}
+        for max_entries in (1_000, 10_000):
+            cache = QueryCache(
+                {"agents": {"detection": {"query_cache": {"max_entries": max_entries}}}}
+            )
+            now = datetime.now()
+            for i in range(max_entries):
+                cache.put(f"SELECT {i}", [i], now, now + timedelta(minutes=1))
+
+            start = time.perf_counter()
+            for i in range(2_000):
+                cache.put(f"SELECT new {i}", [i], now, now + timedelta(minutes=1))
+            timings[max_entries] = time.perf_counter() - start
+            assert cache.get_stats()["evictions"] == 2_000
+
+        print(
+            f"\n2k inserts into full cache: 1k entries {timings[1_000]:.3f}s, "
+            f"10k entries {timings[10_000]:.3f}s"
+        )
+        assert timings[10_000] < timings[1_000] * 3
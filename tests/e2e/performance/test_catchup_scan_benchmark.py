@@ -0,0 +1,66 @@
+"""
+Catch-up scan benchmarks.
+
+Drains a 24 hour backlog for two log types with a fixed per-chunk scan
+latency and compares sequential chunk scanning against chunk-level
+parallelism under the global concurrency budget.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.detection_agent.catchup_scan_manager import CatchUpScanManager, CatchUpTask
+
+CHUNK_LATENCY_SECONDS = 0.02
+CURRENT_TIME = datetime(2024, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+
+
+async def _drain_backlog(max_concurrent_chunks: int) -> float:
+    """Drain the backlog and return the wall-clock seconds taken."""
+    manager = CatchUpScanManager(
+        {
+            "agents": {
+                "detection": {
+                    "catch_up_scan": {"max_concurrent_chunks": max_concurrent_chunks}
+                }
+            }
+        }
+    )
+    manager.pending_tasks = [
+        CatchUpTask(
+            log_type=log_type,
+            start_time=CURRENT_TIME - timedelta(hours=24),
+            end_time=CURRENT_TIME,
+            priority=priority,
+        )
+        for log_type, priority in [("audit", 10), ("vpc_flow", 4)]
+    ]
+
+    async def scan_callback(_chunk_task: CatchUpTask) -> bool:
+        await asyncio.sleep(CHUNK_LATENCY_SECONDS)
+        return True
+
+    start = time.perf_counter()
+    result = await manager.execute_catchup_scans(scan_callback)
+    assert result["completed_chunks"] == 48
+    return time.perf_counter() - start
+
+
+@pytest.mark.performance
+class TestCatchUpScanBenchmark:
+    """Benchmark catch-up backlog drain time."""
+
+    @pytest.mark.asyncio
+    async def test_parallel_chunks_drain_backlog_faster(self) -> None:
+        """Eight concurrent chunks drain the backlog several times faster."""
+        sequential = await _drain_backlog(1)
+        parallel = await _drain_backlog(8)
+
+        print(
+            f"\n48 chunks: sequential {sequential:.3f}s, "
+            f"8 concurrent chunks {parallel:.3f}s"
+        )
+        assert parallel < sequential / 4
@@ -0,0 +1,140 @@
+"""
+Detection event representation benchmarks.
+
+Compares per-event memory (via tracemalloc) and anomaly check time for the
+compact DetectionEvent against the dictionary events it replaces, and the
+single-pass rule evaluator against the original per-pattern checks on mixed
+event groups.
+"""
+
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Any, Callable, List
+
+import pytest
+
+from src.detection_agent.anomaly_rules import DEFAULT_ANOMALY_RULES, AnomalyRuleEvaluator
+from src.detection_agent.detection_event import DetectionEvent
+from tests.fixtures.fake_bigquery import make_row
+from tests.unit.detection_agent.test_anomaly_rules import make_group, reference_checks
+
+EVENT_COUNT = 50_000
+GROUP_SIZE = 20
+BASE_TIME = datetime(2024, 1, 1)
+
+
+def _rows() -> List[Any]:
+    """Build failed authentication rows with repeating actors and IPs."""
+    return [
+        make_row(
+            {
+                "timestamp": BASE_TIME + timedelta(seconds=index),
+                "actor": f"user{index % 100}@example.com",
+                "source_ip": f"10.0.{index % 3}.{index % 200}",
+                "method_name": "google.iam.admin.v1.CreateServiceAccountKey",
+                "status_code": 403,
+                "error_message": "Permission denied",
+                "resource_type": "service_account",
+            }
+        )
+        for index in range(EVENT_COUNT)
+    ]
+
+
+def _dict_event(row: Any) -> Any:
+    """Build the dictionary event the log monitoring tool used to produce."""
+    return DetectionEvent.from_row("failed_authentication", row, False).to_dict()
+
+
+def _compact_event(row: Any) -> Any:
+    """Build a compact event."""
+    return DetectionEvent.from_row("failed_authentication", row, False)
+
+
+def _measure_bytes(rows: List[Any], build: Callable[[Any], Any]) -> Any:
+    """Build one event per row and return (events, traced bytes retained)."""
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    events = [build(row) for row in rows]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return events, after - before
+
+
+def compact_checks(evaluator: AnomalyRuleEvaluator, events: List[Any]) -> List[bool]:
+    """Evaluate every default rule on a compact group."""
+    features = evaluator.extract_features(events)
+    return [rule.matches(features) for rule in DEFAULT_ANOMALY_RULES]
+
+
+def _groups(events: List[Any]) -> List[List[Any]]:
+    """Split events into fixed-size groups."""
+    return [events[start:start + GROUP_SIZE] for start in range(0, len(events), GROUP_SIZE)]
+
+
+@pytest.mark.performance
+class TestDetectionEventBenchmark:
+    """Benchmark compact detection events against dictionary events."""
+
+    def test_compact_events_use_less_memory(self) -> None:
+        """Compact events retain far fewer bytes per event than dicts."""
+        rows = _rows()
+
+        dict_events, dict_bytes = _measure_bytes(rows, _dict_event)
+        del dict_events
+        compact_events, compact_bytes = _measure_bytes(rows, _compact_event)
+
+        print(
+            f"\nper event: dict {dict_bytes / EVENT_COUNT:.0f} B, "
+            f"compact {compact_bytes / EVENT_COUNT:.0f} B"
+        )
+        assert len(compact_events) == EVENT_COUNT
+        assert compact_bytes < dict_bytes * 0.7
+
+    def test_anomaly_checks_faster_on_compact_events(self) -> None:
+        """Anomaly checks agree on both forms and run faster on compact events."""
+        rows = _rows()
+        evaluator = AnomalyRuleEvaluator()
+        compact_groups = _groups([_compact_event(row) for row in rows])
+        dict_groups = _groups([_dict_event(row) for row in rows])
+
+        start = time.perf_counter()
+        dict_results = [reference_checks(group) for group in dict_groups]
+        dict_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        compact_results = [compact_checks(evaluator, group) for group in compact_groups]
+        compact_seconds = time.perf_counter() - start
+
+        print(
+            f"\n{EVENT_COUNT} events in groups of {GROUP_SIZE}: "
+            f"dict checks {dict_seconds:.3f}s, compact checks {compact_seconds:.3f}s"
+        )
+        assert compact_results == dict_results
+        assert compact_seconds < dict_seconds
+
+    def test_single_pass_rules_faster_on_mixed_groups(self) -> None:
+        """One pass per group beats four filtered passes on mixed groups."""
+        rng = random.Random(11)
+        dict_groups = [make_group(GROUP_SIZE, rng) for _ in range(5_000)]
+        compact_groups = [
+            [DetectionEvent.from_dict(event) for event in group] for group in dict_groups
+        ]
+        evaluator = AnomalyRuleEvaluator()
+
+        start = time.perf_counter()
+        expected = [reference_checks(group) for group in dict_groups]
+        reference_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = [compact_checks(evaluator, group) for group in compact_groups]
+        single_pass_seconds = time.perf_counter() - start
+
+        print(
+            f"\n5000 mixed groups: per-pattern {reference_seconds:.3f}s, "
+            f"single pass {single_pass_seconds:.3f}s"
+        )
+        assert actual == expected
+        assert single_pass_seconds < reference_seconds
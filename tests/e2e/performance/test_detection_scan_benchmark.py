@@ -0,0 +1,106 @@
+"""
+Detection scan benchmarks.
+
+Runs LogMonitoringTool against an in-memory BigQuery client with injected
+latency to show that scan wall-clock time is bounded by the slowest query
+rather than the sum of all detection query latencies.
+"""
+
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.detection_agent.adk_agent import LogMonitoringTool
+from src.detection_agent.concurrent_query_executor import ConcurrentQueryExecutor
+from tests.fixtures.fake_bigquery import FakeBigQueryClient, make_row
+
+QUERY_LATENCY_SECONDS = 0.25
+SLOWEST_QUERY_LATENCY_SECONDS = 0.4
+
+
+def _audit_rows(count: int):  # type: ignore[no-untyped-def]
+    """Build audit log rows for the fake client."""
+    now = datetime.now()
+    return [
+        make_row(
+            {
+                "timestamp": now - timedelta(seconds=i),
+                "actor": f"user{i % 5}@example.com",
+                "source_ip": f"10.0.0.{i % 10}",
+                "method_name": "SetIamPolicy",
+                "resource_type": "project",
+            }
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.mark.performance
+class TestDetectionScanBenchmark:
+    """Benchmark concurrent execution of the detection queries."""
+
+    @pytest.mark.asyncio
+    async def test_scan_time_bounded_by_slowest_query(self) -> None:
+        """Four queries complete in roughly the time of the slowest one."""
+        client = FakeBigQueryClient(
+            routes=[("401, 403", _audit_rows(50)), ("SetIamPolicy", _audit_rows(20))],
+            latency_seconds=QUERY_LATENCY_SECONDS,
+            latency_by_match={"gce_firewall_rule": SLOWEST_QUERY_LATENCY_SECONDS},
+        )
+        tool = LogMonitoringTool(
+            client,  # type: ignore[arg-type]
+            "security_logs",
+            "events",
+            "bench-project",
+            query_executor=ConcurrentQueryExecutor(client),  # type: ignore[arg-type]
+        )
+
+        start = time.monotonic()
+        result = await tool.execute(None)  # type: ignore[arg-type]
+        elapsed = time.monotonic() - start
+
+        sequential_time = 3 * QUERY_LATENCY_SECONDS + SLOWEST_QUERY_LATENCY_SECONDS
+        print(
+            f"\nConcurrent scan: {elapsed:.3f}s "
+            f"(sequential lower bound {sequential_time:.3f}s)"
+        )
+
+        assert result["status"] == "success"
+        assert result["queries_executed"] == 4
+        assert len(result["events"]) == 70
+        assert set(result["query_latencies"]) == {
+            "failed_authentication",
+            "privilege_escalation",
+            "suspicious_api_activity",
+            "firewall_modifications",
+        }
+        assert elapsed >= SLOWEST_QUERY_LATENCY_SECONDS
+        assert elapsed < SLOWEST_QUERY_LATENCY_SECONDS + QUERY_LATENCY_SECONDS
+
+    @pytest.mark.asyncio
+    async def test_slow_query_times_out_without_failing_scan(self) -> None:
+        """A hung query is cut off at its timeout and the scan still succeeds."""
+        client = FakeBigQueryClient(
+            routes=[("401, 403", _audit_rows(10))],
+            latency_seconds=0.05,
+            latency_by_match={"gce_firewall_rule": 30.0},
+        )
+        tool = LogMonitoringTool(
+            client,  # type: ignore[arg-type]
+            "security_logs",
+            "events",
+            "bench-project",
+            query_executor=ConcurrentQueryExecutor(
+                client, query_timeout_seconds=0.3  # type: ignore[arg-type]
+            ),
+        )
+
+        start = time.monotonic()
+        result = await tool.execute(None)  # type: ignore[arg-type]
+        elapsed = time.monotonic() - start
+
+        assert result["status"] == "success"
+        assert result["queries_executed"] == 3
+        assert len(result["events"]) == 10
+        assert elapsed < 1.0
@@ -0,0 +1,92 @@
+"""
+Event correlation benchmarks.
+
+Shows the EventCorrelator scaling from 100 to 50,000 events per incident,
+compares actor collaboration against the original forward scan, which keeps
+scanning past the window while events share an actor, and compares
+reanalysing a growing incident incrementally against correlating it afresh.
+"""
+
+import logging
+import time
+
+import pytest
+
+from src.analysis_agent.event_correlation import EventCorrelator
+from src.common.models import Incident
+from tests.unit.analysis_agent.test_event_correlation import (
+    make_events,
+    reference_actor_collaboration,
+)
+
+
+@pytest.mark.performance
+class TestEventCorrelationBenchmark:
+    """Benchmark indexed event correlation."""
+
+    @pytest.mark.parametrize("count", [100, 1_000, 10_000, 50_000])
+    def test_correlation_scaling(self, count: int) -> None:
+        """Correlation stays near-linear in the number of events."""
+        events = make_events(
+            count, seed=7, span_seconds=count * 3, actors=50, resources=200
+        )
+        correlator = EventCorrelator(logging.getLogger(__name__))
+
+        start = time.perf_counter()
+        result = correlator.correlate_events(events)
+        seconds = time.perf_counter() - start
+
+        print(f"\n{count} events: {seconds:.3f}s")
+        assert result["total_events"] == count
+        # About 50us per event, with headroom for slow CI machines
+        assert seconds < count / 5_000 + 1
+
+    def test_collaboration_beats_forward_scan(self) -> None:
+        """Few actors make the forward scan quadratic; the index does not."""
+        events = make_events(5_000, seed=11, span_seconds=15_000, actors=3, resources=5)
+        correlator = EventCorrelator(logging.getLogger(__name__))
+
+        start = time.perf_counter()
+        expected = reference_actor_collaboration(events)
+        scan_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = correlator.correlate_events(events)
+        indexed_seconds = time.perf_counter() - start
+
+        print(
+            f"\n5k events, 3 actors: forward scan {scan_seconds:.3f}s, "
+            f"full indexed correlation {indexed_seconds:.3f}s"
+        )
+        assert result["actor_patterns"]["actor_collaboration"] == expected
+        assert indexed_seconds < scan_seconds
+
+    def test_incremental_reanalysis_of_growing_incident(self) -> None:
+        """Adding events to a large incident costs far less than correlating it again."""
+        events = sorted(
+            make_events(20_000, seed=13, span_seconds=60_000, actors=50, resources=200),
+            key=lambda e: e.timestamp,
+        )
+        correlator = EventCorrelator(logging.getLogger(__name__))
+        incident = Incident(events=events[:19_000])
+        correlator.correlate_incident(incident)
+
+        incremental_seconds = 0.0
+        for start in range(19_000, 20_000, 100):
+            incident.events.extend(events[start:start + 100])
+            begin = time.perf_counter()
+            result = correlator.correlate_incident(incident)
+            incremental_seconds += time.perf_counter() - begin
+
+        begin = time.perf_counter()
+        expected = EventCorrelator(logging.getLogger(__name__)).correlate_events(
+            incident.events
+        )
+        full_seconds = time.perf_counter() - begin
+
+        print(
+            f"\n20k events, 10 updates of 100: incremental {incremental_seconds:.3f}s "
+            f"total, one full correlation {full_seconds:.3f}s"
+        )
+        assert repr(result) == repr(expected)
+        assert incremental_seconds / 10 < full_seconds / 2
@@ -0,0 +1,57 @@
+"""
+Event grouping benchmarks.
+
+Compares the indexed event grouper against the original pairwise grouping at
+1k events and shows how the indexed grouper scales to 10k and 100k events.
+"""
+
+import time
+
+import pytest
+
+from src.detection_agent.event_grouping import IndexedEventGrouper
+from tests.unit.detection_agent.test_event_grouping import (
+    group_ids,
+    make_events,
+    reference_correlate,
+)
+
+
+def _timed(func, *args):  # type: ignore[no-untyped-def]
+    """Run a function and return (result, seconds)."""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+@pytest.mark.performance
+class TestEventGroupingBenchmark:
+    """Benchmark indexed event grouping."""
+
+    def test_indexed_matches_and_beats_pairwise_at_1k(self) -> None:
+        """At 1k events the indexed grouper is identical and faster."""
+        events = make_events(1_000, seed=42, actors=200, ips=250)
+        grouper = IndexedEventGrouper()
+
+        expected, pairwise_seconds = _timed(reference_correlate, events)
+        actual, indexed_seconds = _timed(grouper.group_events, events)
+
+        print(
+            f"\n1k events: pairwise {pairwise_seconds:.3f}s, "
+            f"indexed {indexed_seconds:.3f}s"
+        )
+        assert group_ids(actual) == group_ids(expected)
+        assert indexed_seconds < pairwise_seconds
+
+    @pytest.mark.parametrize("count", [1_000, 10_000, 100_000])
+    def test_indexed_scaling(self, count: int) -> None:
+        """Indexed grouping stays near-linear as the event count grows."""
+        events = make_events(count, seed=7, actors=count // 5, ips=count // 4)
+        grouper = IndexedEventGrouper()
+
+        groups, seconds = _timed(grouper.group_events, events)
+
+        print(f"\n{count} events: indexed {seconds:.3f}s, {len(groups)} groups")
+        assert sum(len(group) for group in groups) == count
+        # 100k events comfortably within the scan interval
+        assert seconds < count / 10_000 + 1
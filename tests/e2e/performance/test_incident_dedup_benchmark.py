@@ -0,0 +1,47 @@
+"""
+Incident deduplication benchmarks.
+
+Compares indexed duplicate lookup against the original linear scan over
+registered incidents at growing incident counts.
+"""
+
+import time
+
+import pytest
+
+from src.detection_agent.incident_deduplicator import IncidentDeduplicator
+from tests.unit.detection_agent.test_incident_deduplicator import (
+    make_incidents,
+    reference_is_duplicate,
+)
+
+
+@pytest.mark.performance
+class TestIncidentDedupBenchmark:
+    """Benchmark indexed incident deduplication."""
+
+    @pytest.mark.parametrize("count", [500, 2_000])
+    def test_indexed_matches_and_beats_linear(self, count: int) -> None:
+        """Indexed lookup returns the same duplicates and is faster."""
+        incidents = make_incidents(count + 200, seed=11, vocabulary=count // 4)
+        existing, new = incidents[:count], incidents[count:]
+        deduplicator = IncidentDeduplicator(similarity_threshold=0.8)
+        for incident in existing:
+            deduplicator.register_incident(incident)
+
+        start = time.perf_counter()
+        expected = [
+            reference_is_duplicate(deduplicator, incident, existing) for incident in new
+        ]
+        linear_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = [deduplicator.is_duplicate(incident) for incident in new]
+        indexed_seconds = time.perf_counter() - start
+
+        print(
+            f"\n{count} incidents: linear {linear_seconds:.3f}s, "
+            f"indexed {indexed_seconds:.3f}s"
+        )
+        assert all(a is e for a, e in zip(actual, expected))
+        assert indexed_seconds < linear_seconds
@@ -0,0 +1,57 @@
+"""
+IOC index benchmarks.
+
+Shows threat intelligence enrichment of a 1,000-event incident against
+100,000 indexed indicators, which previously meant a Firestore read per
+indicator.
+"""
+
+import random
+import time
+
+import pytest
+
+from src.analysis_agent.ioc_index import IocIndex, extract_indicators
+
+
+@pytest.mark.performance
+class TestIocIndexBenchmark:
+    """Benchmark IOC index lookups."""
+
+    def test_enrich_1000_event_incident(self) -> None:
+        """One pass over a large incident takes tens of milliseconds."""
+        rng = random.Random(16)
+        index = IocIndex()
+        for i in range(90_000):
+            index.add("ip", f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}", {"id": i})
+        for i in range(5_000):
+            index.add("domain", f"bad{i}.example", {"id": i})
+        for i in range(5_000):
+            index.add("network", f"172.{16 + i % 16}.{i % 256}.0/24", {"id": i})
+
+        events = [
+            {
+                "actor": f"user{rng.randint(0, 500)}@example.com",
+                "raw_data": {
+                    "ip_address": f"10.{rng.randint(0, 2)}.{rng.randint(0, 255)}"
+                    f".{rng.randint(0, 255)}",
+                    "domain": f"host.bad{rng.randint(0, 9_999)}.example",
+                },
+                "indicators": {"source_ip": f"172.{rng.randint(16, 40)}.1.1"},
+            }
+            for _ in range(1_000)
+        ]
+
+        start = time.perf_counter()
+        indicators = extract_indicators({"events": events})
+        matches = index.match_all(indicators)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        per_lookup_us = elapsed_ms * 1000 / len(indicators)
+        print(
+            f"\n{len(indicators)} indicators, {len(matches)} matches in "
+            f"{elapsed_ms:.1f}ms ({per_lookup_us:.1f}us per indicator)"
+        )
+        assert matches
+        # About 45ms, with headroom for slow CI machines
+        assert elapsed_ms < 200
@@ -0,0 +1,54 @@
+"""
+Similar-incident index benchmarks.
+
+Shows top-k similar-incident queries over 100,000 resolved incidents, which
+previously meant streaming candidates from Firestore for every analysis and
+scoring at most 50 of them.
+"""
+
+import time
+from datetime import timedelta
+
+import pytest
+
+from src.analysis_agent.similarity_index import IncidentSimilarityIndex
+from tests.unit.analysis_agent.test_similarity_index import (
+    NOW,
+    exhaustive_top_k,
+    make_incidents,
+)
+
+
+@pytest.mark.performance
+class TestSimilarityIndexBenchmark:
+    """Benchmark the MinHash similar-incident index."""
+
+    def test_query_latency_over_100k_incidents(self) -> None:
+        """Queries take milliseconds and match an exhaustive scan."""
+        incidents = make_incidents(100_000, seed=21)
+        index = IncidentSimilarityIndex()
+
+        start = time.perf_counter()
+        index.rebuild((incident, None) for incident in incidents)
+        build_seconds = time.perf_counter() - start
+
+        cutoff = NOW - timedelta(days=90)
+        queries = make_incidents(50, seed=22, prefix="query")
+        start = time.perf_counter()
+        results = [index.query(query, created_after=cutoff) for query in queries]
+        query_ms = (time.perf_counter() - start) / len(queries) * 1000
+
+        start = time.perf_counter()
+        expected = [exhaustive_top_k(query, incidents, cutoff) for query in queries[:5]]
+        scan_ms = (time.perf_counter() - start) / 5 * 1000
+
+        print(
+            f"\n100k incidents: build {build_seconds:.2f}s, "
+            f"query {query_ms:.1f}ms, exhaustive scan {scan_ms:.1f}ms"
+        )
+        for matches, scores in zip(results, expected):
+            assert [round(m.similarity_score, 9) for m in matches] == [
+                round(score, 9) for score in scores
+            ]
+        # About 15ms per query, with headroom for slow CI machines
+        assert query_ms < 100
@@ -0,0 +1,83 @@
+"""
+Streaming detection scan memory benchmark.
+
+Streams fused audit log rows through LogMonitoringTool.stream_events, the
+streaming event grouper and the anomaly detection tool, and shows that peak
+traced memory stays flat as the scan window grows tenfold.
+"""
+
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.detection_agent.adk_agent import AnomalyDetectionTool, LogMonitoringTool
+from src.detection_agent.event_grouping import StreamingEventGrouper
+from tests.fixtures.fake_bigquery import FakeBigQueryClient, LazyRows, make_row
+
+BASE_TIME = datetime(2024, 1, 1)
+
+
+def _fused_row(index: int):  # type: ignore[no-untyped-def]
+    """Build a fused row; each audit event, one per second, matches two types."""
+    index, label = divmod(index, 2)
+    values = {
+        "timestamp": BASE_TIME + timedelta(seconds=index),
+        "actor": f"user{index % 50}@example.com",
+        "source_ip": f"10.0.{index % 7}.{index % 250}",
+        "method_name": "SetIamPolicy",
+        "status_code": 403,
+        "error_message": "Permission denied",
+        "resource_type": "project",
+        "project": "test-project",
+        "resource_name": f"projects/test-project/resource{index}",
+        "bindings": [],
+        "query_type": ("failed_authentication", "privilege_escalation")[label],
+    }
+    return make_row(values)
+
+
+async def _streamed_scan_peak(count: int) -> int:
+    """Run a streaming scan over ``count`` rows and return peak traced bytes."""
+    client = FakeBigQueryClient(routes=[("timestamp ASC", LazyRows(count * 2, _fused_row))])
+    log_tool = LogMonitoringTool(
+        client, "security_logs", "events", "test-project"  # type: ignore[arg-type]
+    )
+    anomaly_tool = AnomalyDetectionTool({})
+    grouper = StreamingEventGrouper()
+
+    events_seen = 0
+    tracemalloc.start()
+    try:
+        async for events in log_tool.stream_events(
+            BASE_TIME - timedelta(seconds=1), BASE_TIME + timedelta(seconds=count)
+        ):
+            events_seen += len(events)
+            groups = []
+            for event in events:
+                groups.extend(grouper.add(event))
+            await anomaly_tool.execute(None, events=groups)  # type: ignore[arg-type]
+        await anomaly_tool.execute(None, events=grouper.flush())  # type: ignore[arg-type]
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert events_seen == count * 2
+    return peak
+
+
+@pytest.mark.performance
+class TestStreamingScanMemory:
+    """Benchmark memory use of the streaming detection scan."""
+
+    @pytest.mark.asyncio
+    async def test_peak_memory_flat_across_window_sizes(self) -> None:
+        """A 10x larger scan window does not grow peak memory."""
+        small_peak = await _streamed_scan_peak(5_000)
+        large_peak = await _streamed_scan_peak(50_000)
+
+        print(
+            f"\npeak traced memory: 5k rows {small_peak / 1e6:.1f} MB, "
+            f"50k rows {large_peak / 1e6:.1f} MB"
+        )
+        assert large_peak < small_peak * 1.5
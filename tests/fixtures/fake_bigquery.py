@@ -0,0 +1,121 @@
+"""In-memory BigQuery client with injectable latency for performance tests."""
+
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from google.cloud import bigquery
+
+
+def make_row(values: Dict[str, Any]) -> bigquery.Row:
+    """Build a real BigQuery Row from a column/value mapping."""
+    field_to_index = {name: index for index, name in enumerate(values)}
+    return bigquery.Row(tuple(values.values()), field_to_index)
+
+
+class LazyRows(Sequence):  # type: ignore[type-arg]
+    """Row sequence that builds rows on access instead of holding them."""
+
+    def __init__(self, count: int, factory: Callable[[int], bigquery.Row]):
+        self.count = count
+        self.factory = factory
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index):  # type: ignore[no-untyped-def]
+        if isinstance(index, slice):
+            return [self.factory(i) for i in range(*index.indices(self.count))]
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        return self.factory(index)
+
+
+class FakeRowIterator:
+    """Row iterator exposing rows directly and page by page."""
+
+    def __init__(self, rows: Sequence[bigquery.Row], page_size: Optional[int]):
+        self.rows = rows
+        self.page_size = page_size or max(len(rows), 1)
+        self.total_rows = len(rows)
+
+    def __iter__(self) -> Iterator[bigquery.Row]:
+        for page in self.pages:
+            yield from page
+
+    @property
+    def pages(self) -> Iterator[List[bigquery.Row]]:
+        """Yield pages of rows, building each page only when requested."""
+        for start in range(0, len(self.rows), self.page_size):
+            yield self.rows[start:start + self.page_size]
+
+
+class FakeQueryJob:
+    """Query job that waits for a fixed latency before returning rows."""
+
+    def __init__(self, query: str, rows: Sequence[bigquery.Row], latency_seconds: float):
+        self.query = query
+        self.rows = rows
+        self.latency_seconds = latency_seconds
+        self.cancelled = threading.Event()
+        self.total_bytes_processed = 0
+
+    def result(
+        self,
+        timeout: Optional[float] = None,
+        page_size: Optional[int] = None,
+        start_index: Optional[int] = None,
+    ) -> FakeRowIterator:
+        """Block for the injected latency and return the rows."""
+        wait = self.latency_seconds
+        if timeout is not None:
+            wait = min(wait, timeout)
+
+        if self.cancelled.wait(wait):
+            raise RuntimeError("Query job was cancelled")
+        if timeout is not None and self.latency_seconds > timeout:
+            raise TimeoutError("Query job did not finish before timeout")
+
+        rows = self.rows[start_index:] if start_index else self.rows
+        return FakeRowIterator(rows, page_size)
+
+    def cancel(self) -> bool:
+        """Cancel the job, releasing any thread blocked in result()."""
+        self.cancelled.set()
+        return True
+
+
+class FakeBigQueryClient:
+    """BigQuery client that routes queries to canned rows by substring match."""
+
+    def __init__(
+        self,
+        routes: Optional[Sequence[Tuple[str, Sequence[bigquery.Row]]]] = None,
+        latency_seconds: float = 0.0,
+        latency_by_match: Optional[Dict[str, float]] = None,
+    ):
+        self.routes = list(routes or [])
+        self.latency_seconds = latency_seconds
+        self.latency_by_match = latency_by_match or {}
+        self.jobs: List[FakeQueryJob] = []
+        self._lock = threading.Lock()
+
+    def query(self, query: str, job_config: Any = None) -> FakeQueryJob:
+        """Create a fake job for the query."""
+        rows: Sequence[bigquery.Row] = []
+        for match, route_rows in self.routes:
+            if match in query:
+                rows = route_rows
+                break
+
+        latency = self.latency_seconds
+        for match, match_latency in self.latency_by_match.items():
+            if match in query:
+                latency = match_latency
+                break
+
+        job = FakeQueryJob(query, rows, latency)
+        with self._lock:
+            self.jobs.append(job)
+        return job
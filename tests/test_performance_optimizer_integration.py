@@ -25,6 +25,7 @@ from src.analysis_agent.performance_optimizer import (
     RateLimiter,
     RequestBatcher,
 )
+from src.analysis_agent.rate_limit_backends import take_slot
 
 
 class TestAnalysisCacheProduction:
@@ -330,12 +331,12 @@ class TestRateLimiterProduction:
 
         # Verify stats
         stats = limiter.get_stats()
-        assert stats["minute_window_size"] == 5
-        assert stats["hour_window_size"] == 5
+        assert stats["requests_this_minute"] == 5
+        assert stats["requests_this_hour"] == 5
 
     @pytest.mark.asyncio
-    async def test_rate_limit_window_cleaning_production(self) -> None:
-        """Test rate limit window cleaning with real time progression."""
+    async def test_rate_limit_bucket_refill_production(self) -> None:
+        """Test rate limit bucket refill with simulated time progression."""
         limiter = RateLimiter(max_per_minute=3, max_per_hour=100)
 
         # Fill the minute window with security requests
@@ -345,18 +346,16 @@ class TestRateLimiterProduction:
 
         # Verify windows have entries
         stats = limiter.get_stats()
-        assert stats["minute_window_size"] == 3
+        assert stats["requests_this_minute"] == 3
 
-        # Simulate time progression and window cleaning
-        current_time = time.time()
-        future_time = current_time + 61  # 61 seconds later
+        # A fourth request waits for the first to leave the minute window
+        wait, _ = take_slot(limiter._specs, [0.0, 1.0, 2.0], 2.0)
+        assert wait == 58.0
 
-        # Manually trigger window cleaning
-        limiter._clean_windows(future_time)
-
-        # Windows should be cleaned
-        assert len(limiter._minute_window) == 0
-        assert len(limiter._hour_window) == 0
+        # A minute later the window has room again
+        wait, times = take_slot(limiter._specs, [0.0, 1.0, 2.0], 61.0)
+        assert wait == 0
+        assert times == [0.0, 1.0, 2.0, 61.0]
 
     @pytest.mark.asyncio
     async def test_rate_limit_stats_production(self) -> None:
@@ -370,8 +369,8 @@ class TestRateLimiterProduction:
             await asyncio.sleep(0.01)
 
         stats = limiter.get_stats()
-        assert stats["minute_window_size"] == 7
-        assert stats["hour_window_size"] == 7
+        assert stats["requests_this_minute"] == 7
+        assert stats["requests_this_hour"] == 7
         assert stats["max_per_minute"] == 10
         assert stats["max_per_hour"] == 200
 
@@ -531,7 +530,7 @@ class TestPerformanceOptimizerProduction:
         assert cached is None
 
         # Cache the analysis result
-        optimizer.cache_analysis(incident_id, incident_data, analysis_result)
+        await optimizer.cache_analysis(incident_id, incident_data, analysis_result)
 
         # Should retrieve from cache
         cached = await optimizer.get_cached_analysis(incident_id, incident_data)
@@ -300,6 +300,9 @@ class TestAnalysisAgent:
         assert any(isinstance(tool, IncidentAnalysisTool) for tool in agent.tools)
         assert any(isinstance(tool, ThreatIntelligenceTool) for tool in agent.tools)
 
+        # Context source latencies are reported to the agent's collector
+        assert agent.context_retriever.metrics is agent.metrics_collector
+
     @pytest.mark.asyncio
     async def test_analyze_incident_end_to_end(self, agent: AnalysisAgent) -> None:
         """Test full incident analysis flow with real services."""
@@ -0,0 +1,258 @@
+"""
+Tests for the two-tier analysis cache using REAL production code.
+
+Features tested:
+- Least recently used eviction in memory
+- Disk shared tier: round trips, expiry, prefix invalidation
+- Cached analyses surviving a restart through the shared tier
+- Single-flight computation for concurrent requests
+- Content-addressed keys from canonicalized incidents
+
+CRITICAL: Uses 100% production code - NO MOCKING ALLOWED
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import pytest
+
+from src.analysis_agent.cache_backends import DiskCacheBackend
+from src.analysis_agent.performance_optimizer import AnalysisCache, PerformanceOptimizer
+
+
+class UnreachableBackend:
+    """Shared tier whose server is down."""
+
+    async def get(self, key: str) -> Optional[bytes]:
+        raise ConnectionError(f"cannot read {key}")
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        raise ConnectionError(f"cannot write {key}")
+
+    async def delete_prefix(self, prefix: str) -> int:
+        raise ConnectionError(f"cannot delete {prefix}")
+
+
+class TestAnalysisCacheTiers:
+    """Test AnalysisCache memory and shared tiers - NO MOCKING."""
+
+    def test_least_recently_used_is_evicted(self) -> None:
+        """Test reading an entry protects it from eviction."""
+        cache = AnalysisCache(max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1
+
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    @pytest.mark.asyncio
+    async def test_disk_backend_round_trip_and_expiry(self, tmp_path: Path) -> None:
+        """Test values are stored per key and expire after their TTL."""
+        backend = DiskCacheBackend(str(tmp_path))
+        await backend.set("analysis:INC-1:abc", b'{"ok":true}', ttl=60)
+        await backend.set("analysis:INC-2:def", b"2", ttl=-1)
+
+        assert await backend.get("analysis:INC-1:abc") == b'{"ok":true}'
+        assert await backend.get("analysis:INC-2:def") is None
+        assert await backend.get("analysis:missing") is None
+        assert len(list(tmp_path.glob("*.entry"))) == 1
+
+        await backend.set("analysis:INC-10:ghi", b"3", ttl=60)
+        assert await backend.delete_prefix("analysis:INC-1:") == 1
+        assert await backend.get("analysis:INC-10:ghi") == b"3"
+
+    @pytest.mark.asyncio
+    async def test_shared_tier_survives_restart(self, tmp_path: Path) -> None:
+        """Test a new process finds analyses cached by an earlier one."""
+        result = {"status": "success", "analysis": {"threat_level": "high"}}
+        first = AnalysisCache(backend=DiskCacheBackend(str(tmp_path)))
+        await first.aset("analysis:INC-1:abc", result)
+
+        restarted = AnalysisCache(backend=DiskCacheBackend(str(tmp_path)))
+        assert restarted.get("analysis:INC-1:abc") is None  # Memory only
+        assert await restarted.aget("analysis:INC-1:abc") == result
+        assert restarted.get("analysis:INC-1:abc") == result  # Promoted
+
+        stats = restarted.get_stats()
+        assert stats["shared_hits"] == 1
+        assert stats["shared_backend"] == "DiskCacheBackend"
+
+        assert await restarted.ainvalidate("analysis:INC-1") == 1
+        assert await AnalysisCache(backend=first._backend).aget("analysis:INC-1:abc") is None
+
+    @pytest.mark.asyncio
+    async def test_shared_tier_failures_do_not_fail_lookups(self) -> None:
+        """Test an unreachable shared tier degrades to the memory cache."""
+        cache = AnalysisCache(backend=UnreachableBackend())
+
+        await cache.aset("key", {"status": "success"})
+        assert await cache.aget("key") == {"status": "success"}
+        assert await cache.aget("other") is None
+        assert await cache.ainvalidate() == 1
+        assert cache.get_stats()["shared_errors"] == 3
+
+
+class TestSingleFlight:
+    """Test single-flight analysis - NO MOCKING."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_one_computation(self) -> None:
+        """Test ten concurrent requests for one key run one analysis."""
+        cache = AnalysisCache()
+        calls = 0
+
+        async def analyze() -> Dict[str, Any]:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return {"status": "success", "call": calls}
+
+        results = await asyncio.gather(
+            *(cache.get_or_compute("analysis:INC-1:abc", analyze) for _ in range(10))
+        )
+
+        assert calls == 1
+        assert all(result == {"status": "success", "call": 1} for result in results)
+        assert cache.get_stats()["single_flight_joins"] == 9
+        assert await cache.get_or_compute("analysis:INC-1:abc", analyze) == results[0]
+        assert calls == 1
+
+    @pytest.mark.asyncio
+    async def test_failures_reach_every_waiter_and_are_not_cached(self) -> None:
+        """Test a failed analysis is raised to all callers and retried later."""
+        cache = AnalysisCache()
+        calls = 0
+
+        async def analyze() -> Dict[str, Any]:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            raise RuntimeError("Gemini unavailable")
+
+        results = await asyncio.gather(
+            *(cache.get_or_compute("key", analyze) for _ in range(3)),
+            return_exceptions=True,
+        )
+
+        assert calls == 1
+        assert all(isinstance(result, RuntimeError) for result in results)
+        with pytest.raises(RuntimeError):
+            await cache.get_or_compute("key", analyze)
+        assert calls == 2
+        assert cache.get_stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_computation_is_taken_over_by_a_waiter(self) -> None:
+        """Test cancelling the computing caller does not cancel the waiters."""
+        cache = AnalysisCache()
+        calls = 0
+
+        async def analyze() -> Dict[str, Any]:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return {"status": "success", "call": calls}
+
+        leader = asyncio.create_task(cache.get_or_compute("key", analyze))
+        await asyncio.sleep(0)
+        waiters = [
+            asyncio.create_task(cache.get_or_compute("key", analyze)) for _ in range(3)
+        ]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+
+        results = await asyncio.gather(*waiters)
+
+        assert leader.cancelled()
+        assert calls == 2
+        assert all(result == {"status": "success", "call": 2} for result in results)
+        assert cache.get_stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_leaves_computation_running(self) -> None:
+        """Test cancelling a waiting caller does not affect the others."""
+        cache = AnalysisCache()
+
+        async def analyze() -> Dict[str, Any]:
+            await asyncio.sleep(0.05)
+            return {"status": "success"}
+
+        leader = asyncio.create_task(cache.get_or_compute("key", analyze))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get_or_compute("key", analyze))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+
+        assert await leader == {"status": "success"}
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+    @pytest.mark.asyncio
+    async def test_unsuccessful_analyses_are_not_cached(self) -> None:
+        """Test analyze_once only caches successful analyses."""
+        optimizer = PerformanceOptimizer({}, logging.getLogger("test.cache"))
+        incident = {"id": "INC-1", "severity": "high"}
+        calls = 0
+
+        async def analyze() -> Dict[str, Any]:
+            nonlocal calls
+            calls += 1
+            return {"status": "error" if calls == 1 else "success"}
+
+        assert (await optimizer.analyze_once("INC-1", incident, analyze))["status"] == "error"
+        assert (await optimizer.analyze_once("INC-1", incident, analyze))["status"] == "success"
+        assert (await optimizer.analyze_once("INC-1", incident, analyze))["status"] == "success"
+        assert calls == 2
+
+
+class TestContentAddressedKeys:
+    """Test canonical incident hashing - NO MOCKING."""
+
+    def test_hash_ignores_event_order_and_volatile_fields(self) -> None:
+        """Test the same incident content gets the same key."""
+        optimizer = PerformanceOptimizer({}, logging.getLogger("test.cache"))
+        events = [
+            {"event_id": "e2", "timestamp": "2025-06-01T12:05:00Z", "event_type": "b"},
+            {"event_id": "e1", "timestamp": "2025-06-01T12:00:00Z", "event_type": "a"},
+        ]
+        incident = {"id": "INC-1", "severity": "high", "events": events}
+        reordered = {
+            "events": list(reversed(events)),
+            "severity": "high",
+            "id": "INC-1",
+            "updated_at": time.time(),
+        }
+
+        digest = optimizer.compute_data_hash(incident)
+
+        assert digest == optimizer.compute_data_hash(reordered)
+        assert len(digest) == 32
+        assert digest != optimizer.compute_data_hash({**incident, "severity": "low"})
+
+    def test_hash_accepts_non_json_values(self) -> None:
+        """Test datetimes and other values are hashed through their text."""
+        optimizer = PerformanceOptimizer({}, logging.getLogger("test.cache"))
+        created = datetime(2025, 6, 1, tzinfo=timezone.utc)
+        assert optimizer.compute_data_hash({"created_at": created}) == (
+            optimizer.compute_data_hash({"created_at": created})
+        )
+
+    def test_disk_backend_from_config(self, tmp_path: Path) -> None:
+        """Test the shared tier is created from the performance config."""
+        optimizer = PerformanceOptimizer(
+            {"cache_backend": "disk", "cache_dir": str(tmp_path / "cache")},
+            logging.getLogger("test.cache"),
+        )
+
+        assert isinstance(optimizer.cache._backend, DiskCacheBackend)
+        assert (tmp_path / "cache").is_dir()
+        with pytest.raises(ValueError):
+            PerformanceOptimizer({"cache_backend": "memcached"}, logging.getLogger("t"))
@@ -9,6 +9,7 @@ No mocks - all tests use real GCP services and production code behavior.
 
 import asyncio
 import logging
+import time
 import uuid
 from datetime import datetime, timedelta, timezone
 from typing import Any
@@ -17,6 +18,8 @@ import pytest
 from google.cloud import firestore_v1 as firestore
 
 from src.analysis_agent.context_retrieval import ContextRetriever
+from src.analysis_agent.monitoring import MetricsCollector
+from src.analysis_agent.similarity_index import IncidentSimilarityIndex, IndexedIncident
 from src.common.models import (
     EventSource,
     Incident,
@@ -135,6 +138,75 @@ def test_data_cleanup(db: firestore.Client) -> Any:
             pass
 
 
+class DelayedSourcesRetriever(ContextRetriever):
+    """ContextRetriever whose sources take a fixed time, one of them failing."""
+
+    def __init__(self, *args: Any, delay: float, failing: str = "", **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.delay = delay
+        self.failing = failing
+
+    async def _source(self, name: str, value: Any) -> Any:
+        await asyncio.sleep(self.delay)
+        if name == self.failing:
+            raise RuntimeError(f"{name} backend unavailable")
+        return value
+
+    async def _fetch_related_incidents(self, incident: Any, correlation_results: Any) -> Any:
+        return await self._source("related_incidents", [{"incident_id": "related-1"}])
+
+    async def _retrieve_historical_patterns(
+        self, incident: Any, correlation_results: Any
+    ) -> Any:
+        return await self._source("historical_patterns", [])
+
+    async def _query_knowledge_base(self, incident: Any, correlation_results: Any) -> Any:
+        return await self._source("knowledge_base_entries", [])
+
+    async def _find_similar_incidents(self, incident: Any) -> Any:
+        return await self._source("similar_incidents", [])
+
+    async def _get_threat_intelligence(self, incident: Any, correlation_results: Any) -> Any:
+        return await self._source("threat_intelligence", {"ttps": ["T1078"]})
+
+
+class NoHistoryRetriever(ContextRetriever):
+    """ContextRetriever whose Firestore queries find nothing, counting them."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.streams = 0
+
+    async def _stream(self, query: Any) -> list[Any]:
+        self.streams += 1
+        return []
+
+
+class StoredEmbeddingRetriever(ContextRetriever):
+    """ContextRetriever keeping incident documents in memory."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.documents: dict[str, dict[str, Any]] = {}
+
+    async def _stream(self, query: Any) -> list[Any]:
+        return [
+            firestore.DocumentSnapshot(
+                self.incidents_collection.document(doc_id),
+                data,
+                exists=True,
+                read_time=None,
+                create_time=None,
+                update_time=None,
+            )
+            for doc_id, data in self.documents.items()
+            if data.get("status") == IncidentStatus.RESOLVED.value
+        ]
+
+    async def _store_embedding(self, incident_id: str, embedding: list[float]) -> None:
+        self.documents[incident_id]["embedding"] = embedding
+
+
 class TestContextRetriever:
     """Test suite for ContextRetriever class."""
 
@@ -291,6 +363,123 @@ class TestContextRetriever:
             assert isinstance(incident["similarity_score"], float)
             assert 0.0 <= incident["similarity_score"] <= 1.0
 
+    @pytest.mark.asyncio
+    async def test_similarity_index_updated_on_resolution(
+        self,
+        context_retriever: ContextRetriever,
+        sample_incident: Incident,
+    ) -> None:
+        """Test resolved incidents become similar-incident matches at once."""
+        await context_retriever.rebuild_similarity_index()
+
+        resolved_incident = Incident(
+            incident_id=str(uuid.uuid4()),
+            created_at=datetime.now(timezone.utc) - timedelta(days=2),
+            title="Resolved Unauthorized Access",
+            severity=sample_incident.severity,
+            status=IncidentStatus.RESOLVED,
+            events=list(sample_incident.events),
+            metadata={"resolution_notes": "Revoked the compromised credentials"},
+        )
+        await context_retriever.update_similarity_index(resolved_incident)
+
+        similar = await context_retriever._find_similar_incidents(sample_incident)
+        match = next(
+            s for s in similar if s["incident_id"] == resolved_incident.incident_id
+        )
+        assert match["similarity_score"] == pytest.approx(1.0)
+        assert match["resolution_notes"] == "Revoked the compromised credentials"
+
+        # Reopening the incident removes it from the index
+        resolved_incident.status = IncidentStatus.ANALYZING
+        await context_retriever.update_similarity_index(resolved_incident)
+
+        similar = await context_retriever._find_similar_incidents(sample_incident)
+        assert resolved_incident.incident_id not in [s["incident_id"] for s in similar]
+
+    @pytest.mark.asyncio
+    async def test_loaded_similarity_index_is_refreshed(
+        self,
+        db: firestore.Client,
+        logger: logging.Logger,
+        sample_incident: Incident,
+        tmp_path: Any,
+    ) -> None:
+        """Test a persisted index answers at once and is rebuilt in the background."""
+        path = str(tmp_path / "similarity_index.jsonl")
+        resolved_incident = Incident(
+            incident_id="resolved-before-restart",
+            created_at=datetime.now(timezone.utc) - timedelta(days=2),
+            severity=sample_incident.severity,
+            status=IncidentStatus.RESOLVED,
+            events=list(sample_incident.events),
+        )
+        IncidentSimilarityIndex(path).add(
+            IndexedIncident.from_incident(resolved_incident)
+        )
+        retriever = NoHistoryRetriever(
+            db=db,
+            logger=logger,
+            similarity_index_path=path,
+            similarity_index_refresh_interval=0.2,
+        )
+
+        similar = await retriever._find_similar_incidents(sample_incident)
+        assert [s["incident_id"] for s in similar] == ["resolved-before-restart"]
+        await asyncio.sleep(0.05)
+        assert retriever.streams == 1
+
+        # The rebuilt index reflects Firestore, where the incident was reopened
+        assert await retriever._find_similar_incidents(sample_incident) == []
+        assert retriever.streams == 1
+
+        await asyncio.sleep(0.2)
+        await retriever._find_similar_incidents(sample_incident)
+        await asyncio.sleep(0.05)
+        assert retriever.streams == 2
+
+    @pytest.mark.asyncio
+    async def test_embedding_stored_at_analysis_is_indexed_after_resolution(
+        self,
+        db: firestore.Client,
+        logger: logging.Logger,
+        sample_incident: Incident,
+        tmp_path: Any,
+    ) -> None:
+        """Test an analyzed incident's embedding is indexed once it is resolved."""
+
+        async def embedder(text: str) -> list[float]:
+            return [0.6, 0.8] if "Unauthorized" in text else [0.8, 0.6]
+
+        path = str(tmp_path / "similarity_index.jsonl")
+        retriever = StoredEmbeddingRetriever(
+            db=db, logger=logger, similarity_index_path=path, embedder=embedder
+        )
+        earlier = Incident(
+            incident_id="analyzed-earlier",
+            created_at=datetime.now(timezone.utc) - timedelta(days=2),
+            title="Unauthorized Access",
+            severity=sample_incident.severity,
+            status=IncidentStatus.ANALYZING,
+            events=list(sample_incident.events),
+        )
+        retriever.documents[earlier.incident_id] = earlier.to_dict()
+
+        assert await retriever._find_similar_incidents(earlier) == []
+        assert retriever.documents[earlier.incident_id]["embedding"] == [0.6, 0.8]
+
+        # Another agent resolves the incident; the next rebuild indexes it
+        retriever.documents[earlier.incident_id]["status"] = "resolved"
+        index = retriever.similarity_index
+        assert await retriever.rebuild_similarity_index() == 1
+        assert retriever.similarity_index is not index
+        assert len(IncidentSimilarityIndex(path)) == 1
+
+        retriever.documents[sample_incident.incident_id] = sample_incident.to_dict()
+        similar = await retriever._find_similar_incidents(sample_incident)
+        assert [s["incident_id"] for s in similar] == ["analyzed-earlier"]
+        assert similar[0]["semantic_similarity"] == pytest.approx(0.96)
+
     @pytest.mark.asyncio
     async def test_get_threat_intelligence(
         self,
@@ -415,6 +604,80 @@ class TestContextRetriever:
         result = context_retriever._calculate_composite_risk(factors)
         assert result == 10.0
 
+    @pytest.mark.asyncio
+    async def test_gather_queries_sources_concurrently(
+        self,
+        db: firestore.Client,
+        logger: logging.Logger,
+        sample_incident: Incident,
+    ) -> None:
+        """Test the sources overlap instead of running one after another."""
+        concurrent = DelayedSourcesRetriever(db=db, logger=logger, delay=0.2)
+        sequential = DelayedSourcesRetriever(
+            db=db, logger=logger, delay=0.2, concurrent_gather=False
+        )
+
+        start = time.perf_counter()
+        context = await concurrent.gather_additional_context(sample_incident, {})
+        concurrent_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        await sequential.gather_additional_context(sample_incident, {})
+        sequential_seconds = time.perf_counter() - start
+
+        assert context["related_incidents"] == [{"incident_id": "related-1"}]
+        assert context["threat_intelligence"] == {"ttps": ["T1078"]}
+        assert context["unavailable_sources"] == {}
+        assert concurrent_seconds < 0.6
+        assert sequential_seconds >= 1.0
+
+    @pytest.mark.asyncio
+    async def test_slow_and_failing_sources_degrade_context(
+        self,
+        db: firestore.Client,
+        logger: logging.Logger,
+        sample_incident: Incident,
+    ) -> None:
+        """Test partial context is returned when sources time out or fail."""
+        metrics = MetricsCollector("your-gcp-project-id", logger)
+        metrics.cloud_monitoring_enabled = False
+        retriever = DelayedSourcesRetriever(
+            db=db,
+            logger=logger,
+            delay=0.1,
+            failing="similar_incidents",
+            metrics=metrics,
+            source_timeouts={"knowledge_base_entries": 0.01},
+        )
+
+        start = time.perf_counter()
+        context = await retriever.gather_additional_context(sample_incident, {})
+        elapsed = time.perf_counter() - start
+
+        assert elapsed < 0.5
+        assert context["unavailable_sources"] == {
+            "knowledge_base_entries": "timeout",
+            "similar_incidents": "error",
+        }
+        assert context["knowledge_base_entries"] == []
+        assert context["similar_incidents"] == []
+        assert context["related_incidents"] == [{"incident_id": "related-1"}]
+        assert "knowledge_base_entries, similar_incidents unavailable" in (
+            context["context_summary"]
+        )
+
+        sources = metrics.get_current_metrics()["context_sources"]
+        assert set(sources) == {
+            "related_incidents",
+            "historical_patterns",
+            "knowledge_base_entries",
+            "similar_incidents",
+            "threat_intelligence",
+        }
+        assert sources["knowledge_base_entries"]["timeouts"] == 1
+        assert sources["similar_incidents"]["errors"] == 1
+        assert sources["related_incidents"]["avg_latency"] >= 0.1
+
     @pytest.mark.asyncio
     async def test_get_additional_context_alias(
         self,
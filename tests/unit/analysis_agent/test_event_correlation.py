@@ -1,14 +1,18 @@
 """REAL tests for analysis_agent/event_correlation.py - Tests actual correlation logic."""
 
+import dataclasses
 import logging
+import random
 import time
+from collections import defaultdict
 from datetime import datetime, timedelta, timezone
 from typing import List, Optional, Any
 import pytest
 
 # Import the actual production code
 from src.analysis_agent.event_correlation import EventCorrelator
-from src.common.models import SecurityEvent, SeverityLevel, EventSource
+from src.common.models import Incident, SecurityEvent, SeverityLevel, EventSource
+from src.tools.analysis_tools import CorrelationTool
 
 
 class TestEventCorrelatorRealLogic:
@@ -1868,3 +1872,381 @@ class TestEventCorrelatorRealLogic:
         spatial_patterns = result["spatial_patterns"]
         if "lateral_movement_detected" in spatial_patterns:
             assert spatial_patterns["lateral_movement_detected"] is True
+
+
+EVENT_TYPES = [
+    "failed_login",
+    "account_locked",
+    "privilege_escalation",
+    "role_binding_attempt",
+    "permission_change",
+    "unauthorized_access",
+    "database_query",
+    "network_traffic",
+    "file_download",
+    "remote_login",
+    "ssh_connection",
+    "successful_login",
+    "configuration_change",
+    "service_disruption",
+    "port_scan",
+]
+
+RAW_DATA_CHOICES: list[Optional[dict[str, Any]]] = [
+    None,
+    {"rows_returned": 20000},
+    {"bytes_sent": 200000000},
+    {"source_machine": "vm-1", "target_machine": "vm-2"},
+    {"role": "roles/owner"},
+]
+
+
+def make_events(
+    count: int, seed: int, span_seconds: int = 7200, actors: int = 5, resources: int = 8
+) -> List[SecurityEvent]:
+    """Generate random incident events over a time span."""
+    rng = random.Random(seed)
+    base_time = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    events = []
+    for index in range(count):
+        events.append(
+            SecurityEvent(
+                event_id=f"evt-{index}",
+                timestamp=base_time + timedelta(seconds=rng.randrange(span_seconds)),
+                event_type=rng.choice(EVENT_TYPES),
+                source=EventSource(
+                    source_type="gcp",
+                    source_name="cloud-logging",
+                    source_id="logs",
+                    resource_type="gce_instance",
+                    resource_name=rng.choice([None, f"host-{rng.randrange(3)}"]),
+                ),
+                severity=rng.choice(list(SeverityLevel)),
+                actor=rng.choice([None] + [f"user{k}@example.com" for k in range(actors)]),
+                affected_resources=[
+                    f"resource-{rng.randrange(resources)}"
+                    for _ in range(rng.randrange(4))
+                ],
+                raw_data=rng.choice(RAW_DATA_CHOICES),
+            )
+        )
+    return events
+
+
+def reference_actor_collaboration(events: List[SecurityEvent]) -> list[dict[str, Any]]:
+    """Original forward scan for actor collaboration, kept as the reference."""
+    events = sorted(events, key=lambda e: e.timestamp)
+    actor_pairs: defaultdict[tuple[str, str], int] = defaultdict(int)
+    for i, event_i in enumerate(events):
+        if not event_i.actor:
+            continue
+        for j in range(i + 1, len(events)):
+            if not events[j].actor or events[j].actor == event_i.actor:
+                continue
+            if events[j].timestamp - event_i.timestamp > timedelta(minutes=5):
+                break
+            if set(event_i.affected_resources) & set(events[j].affected_resources):
+                actor1, actor2 = sorted([event_i.actor, events[j].actor])
+                actor_pairs[(actor1, actor2)] += 1
+    return [
+        {"actors": list(pair), "interaction_count": count}
+        for pair, count in actor_pairs.items()
+        if count > 1
+    ]
+
+
+def reference_first_exfiltration(events: List[SecurityEvent]) -> Optional[dict[str, Any]]:
+    """Original query x transfer scan for data exfiltration, kept as the reference."""
+    events = sorted(events, key=lambda e: e.timestamp)
+    queries = [
+        e for e in events
+        if "database_query" in e.event_type
+        and e.raw_data
+        and int(e.raw_data.get("rows_returned", 0)) > 10000
+    ]
+    transfers = [
+        e for e in events
+        if e.event_type in ("network_traffic", "file_download")
+        and e.raw_data
+        and int(e.raw_data.get("bytes_sent", 0)) > 100000000
+    ]
+    for query in queries:
+        for transfer in transfers:
+            time_diff = (transfer.timestamp - query.timestamp).total_seconds()
+            if 0 <= time_diff <= 1800:
+                return {
+                    "query_event": query.event_id,
+                    "transfer_event": transfer.event_id,
+                    "time_gap_seconds": time_diff,
+                }
+    return None
+
+
+class TestIndexedCorrelation:
+    """Indexed correlation matches the original pairwise scans."""
+
+    @pytest.fixture
+    def correlator(self) -> EventCorrelator:
+        """Create EventCorrelator instance."""
+        return EventCorrelator(logging.getLogger("test_indexed_correlation"))
+
+    @pytest.mark.parametrize("seed", range(8))
+    def test_actor_collaboration_matches_reference(
+        self, correlator: EventCorrelator, seed: int
+    ) -> None:
+        """Collaboration pairs and their order match the forward scan."""
+        events = make_events(300, seed, span_seconds=1800, actors=4, resources=5)
+
+        result = correlator.correlate_events(events)
+
+        expected = reference_actor_collaboration(events)
+        assert result["actor_patterns"]["actor_collaboration"] == expected
+
+    @pytest.mark.parametrize("seed", range(8))
+    def test_exfiltration_matches_reference(
+        self, correlator: EventCorrelator, seed: int
+    ) -> None:
+        """The first query/transfer pair found matches the nested scan."""
+        events = make_events(200, seed, span_seconds=14400)
+
+        causal = correlator.correlate_events(events)["causal_patterns"]
+
+        expected = reference_first_exfiltration(events)
+        assert causal.get("exfiltration_details") == expected
+        assert causal.get("data_exfiltration_suspected", False) is (expected is not None)
+
+    def test_login_counts_toward_escalation_only_if_followed(
+        self, correlator: EventCorrelator
+    ) -> None:
+        """Logins join the escalation path only when a privilege event follows within an hour."""
+        base_time = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        source = EventSource("gcp", "cloud-logging", "logs")
+        events = [
+            SecurityEvent(
+                event_id=event_id,
+                timestamp=base_time + timedelta(minutes=minutes),
+                event_type=event_type,
+                source=source,
+                severity=SeverityLevel.LOW,
+            )
+            for event_id, minutes, event_type in [
+                ("early-login", 0, "successful_login"),
+                ("late-login", 100, "successful_login"),
+                ("role-change", 120, "role_binding_attempt"),
+                ("after-login", 130, "successful_login"),
+            ]
+        ]
+
+        causal = correlator.correlate_events(events)["causal_patterns"]
+
+        assert causal["escalation_details"]["events"] == ["late-login", "role-change"]
+
+    def test_repeated_calls_are_identical(self, correlator: EventCorrelator) -> None:
+        """Cached event type profiles do not change later results."""
+        events = make_events(500, seed=3)
+
+        first = correlator.correlate_events(events)
+        second = correlator.correlate_events(events)
+
+        assert repr(first) == repr(second)
+
+
+class CountingCorrelator(EventCorrelator):
+    """EventCorrelator that counts the events it folds into correlation state."""
+
+    def __init__(self, logger: logging.Logger, **kwargs: Any) -> None:
+        super().__init__(logger, **kwargs)
+        self.folded = 0
+
+    def _fold_event(self, state: Any, event: SecurityEvent) -> None:
+        self.folded += 1
+        super()._fold_event(state, event)
+
+
+class TestIncrementalCorrelation:
+    """Incident correlation state is reused as events are added."""
+
+    @pytest.fixture
+    def correlator(self) -> CountingCorrelator:
+        """Create a correlator that counts folded events."""
+        return CountingCorrelator(logging.getLogger("test_incremental_correlation"))
+
+    @pytest.mark.parametrize("seed", range(6))
+    def test_appended_events_match_full_correlation(
+        self, correlator: CountingCorrelator, seed: int
+    ) -> None:
+        """Each incremental result equals correlating all events from scratch."""
+        rng = random.Random(seed)
+        events = sorted(
+            make_events(400, seed, span_seconds=rng.choice([120, 3600, 14400])),
+            key=lambda e: e.timestamp,
+        )
+        incident = Incident()
+
+        position = 0
+        while position < len(events):
+            step = rng.randint(1, 60)
+            incident.events.extend(events[position:position + step])
+            position += step
+
+            incremental = correlator.correlate_incident(incident)
+            full = EventCorrelator(logging.getLogger("full")).correlate_events(
+                incident.events
+            )
+            assert repr(incremental) == repr(full)
+
+        assert correlator.folded == len(events)
+
+    def test_events_sharing_a_timestamp_match_full_correlation(
+        self, correlator: CountingCorrelator
+    ) -> None:
+        """Events added one by one at the same instant order like a batch sort."""
+        base_time = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        source = EventSource("gcp", "cloud-logging", "logs")
+        incident = Incident()
+        for index, (event_type, raw_data) in enumerate(
+            [
+                ("data_transfer", {"bytes_sent": 200000000}),
+                ("database_query", {"rows_returned": 20000}),
+                ("role_binding_attempt", None),
+                ("successful_login", None),
+                ("port_scan", None),
+                ("remote_login", {"source_machine": "vm-1", "target_machine": "vm-2"}),
+                ("firewall_rule_change", None),
+            ]
+        ):
+            incident.add_event(
+                SecurityEvent(
+                    event_id=f"tie-{index}",
+                    timestamp=base_time,
+                    event_type=event_type,
+                    source=source,
+                    severity=SeverityLevel.MEDIUM,
+                    description=f"{event_type} event",
+                    raw_data=raw_data,
+                )
+            )
+            incremental = correlator.correlate_incident(incident)
+
+        full = EventCorrelator(logging.getLogger("full")).correlate_events(
+            incident.events
+        )
+        assert repr(incremental) == repr(full)
+        assert incremental["causal_patterns"]["exfiltration_details"] == {
+            "query_event": "tie-1",
+            "transfer_event": "tie-0",
+            "time_gap_seconds": 0.0,
+        }
+
+    def test_only_new_events_are_folded(self, correlator: CountingCorrelator) -> None:
+        """Reanalysis processes the added events, not the whole incident."""
+        events = sorted(make_events(500, seed=2), key=lambda e: e.timestamp)
+        incident = Incident(events=events[:450])
+
+        correlator.correlate_incident(incident)
+        incident.events.extend(events[450:])
+        result = correlator.correlate_incident(incident)
+
+        assert correlator.folded == 500
+        assert result["total_events"] == 500
+
+        correlator.correlate_incident(incident)
+        assert correlator.folded == 500
+
+    def test_older_event_rebuilds_state(self, correlator: CountingCorrelator) -> None:
+        """An event older than those already folded triggers a full rebuild."""
+        events = sorted(make_events(300, seed=4), key=lambda e: e.timestamp)
+        incident = Incident(events=events[1:])
+
+        correlator.correlate_incident(incident)
+        incident.events.append(events[0])
+        result = correlator.correlate_incident(incident)
+
+        assert correlator.folded == 299 + 300
+        expected = EventCorrelator(logging.getLogger("full")).correlate_events(events)
+        assert repr(result) == repr(expected)
+
+    def test_replaced_events_rebuild_state(self, correlator: CountingCorrelator) -> None:
+        """Replacing earlier events invalidates the saved state."""
+        events = sorted(make_events(200, seed=5), key=lambda e: e.timestamp)
+        incident = Incident(events=list(events))
+        correlator.correlate_incident(incident)
+
+        incident.events = events[:100]
+        result = correlator.correlate_incident(incident)
+
+        assert correlator.folded == 300
+        expected = EventCorrelator(logging.getLogger("full")).correlate_events(
+            events[:100]
+        )
+        assert repr(result) == repr(expected)
+
+    def test_replaced_middle_event_rebuilds_state(
+        self, correlator: CountingCorrelator
+    ) -> None:
+        """A replaced event before the last folded one is detected."""
+        events = sorted(make_events(200, seed=7), key=lambda e: e.timestamp)
+        incident = Incident(events=events[:150])
+        correlator.correlate_incident(incident)
+
+        replacement = dataclasses.replace(events[40], event_id="replacement")
+        incident.events = events[:40] + [replacement] + events[41:]
+        result = correlator.correlate_incident(incident)
+
+        assert correlator.folded == 150 + 200
+        expected = EventCorrelator(logging.getLogger("full")).correlate_events(
+            incident.events
+        )
+        assert repr(result) == repr(expected)
+
+    def test_tracked_incidents_are_bounded(self) -> None:
+        """The least recently correlated incident's state is dropped first."""
+        correlator = CountingCorrelator(
+            logging.getLogger("test_incremental_correlation"), max_tracked_incidents=2
+        )
+        incidents = [
+            Incident(incident_id=f"inc-{index}", events=make_events(10, seed=index))
+            for index in range(3)
+        ]
+
+        for incident in incidents:
+            correlator.correlate_incident(incident)
+        correlator.correlate_incident(incidents[1])
+        assert correlator.folded == 30
+
+        correlator.correlate_incident(incidents[0])
+        assert correlator.folded == 40
+
+        correlator.forget_incident("inc-1")
+        correlator.correlate_incident(incidents[1])
+        assert correlator.folded == 50
+
+    @pytest.mark.asyncio
+    async def test_tool_reuses_state_for_incident_dicts(
+        self, correlator: CountingCorrelator
+    ) -> None:
+        """Incident dictionaries from the agent are correlated incrementally by ID."""
+        events = sorted(make_events(300, seed=6), key=lambda e: e.timestamp)
+        tool = CorrelationTool(correlator)
+        incident = {"id": "inc-dict", "events": [e.to_dict() for e in events[:250]]}
+
+        await tool.execute(None, incident=incident)
+        converted = list(tool._incident_events["inc-dict"])
+        incident["events"].extend(e.to_dict() for e in events[250:])
+        result = await tool.execute(None, incident=incident)
+
+        assert result["status"] == "success"
+        assert correlator.folded == 300
+        # Events converted by the first call are reused, not rebuilt
+        reused = tool._incident_events["inc-dict"][:250]
+        assert all(old is new for old, new in zip(converted, reused, strict=True))
+        full = EventCorrelator(logging.getLogger("full")).correlate_events(events)
+        assert result["correlation_scores"] == full["correlation_scores"]
+        assert result["primary_events"] == full["primary_events"]
+
+    def test_empty_incident(self, correlator: CountingCorrelator) -> None:
+        """An incident without events gives the empty result."""
+        result = correlator.correlate_incident(Incident())
+
+        assert result["total_events"] == 0
+        assert result["correlation_summary"] == "No events to correlate"
@@ -0,0 +1,244 @@
+"""
+Tests for the threat intelligence IOC index using REAL production code.
+
+Features tested:
+- Exact, network range and parent domain matching
+- Indicator extraction from incident metadata and events
+- Applying and removing Firestore threat intelligence documents
+- ThreatIntelligenceTool full and delta syncs
+
+CRITICAL: Uses 100% production code - NO MOCKING ALLOWED
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytest
+
+from src.analysis_agent.adk_agent import ThreatIntelligenceTool
+from src.analysis_agent.ioc_index import (
+    IocIndex,
+    classify_indicator,
+    extract_indicators,
+)
+
+NOW = datetime(2025, 6, 1, tzinfo=timezone.utc)
+
+
+class StaticSourceTool(ThreatIntelligenceTool):
+    """ThreatIntelligenceTool reading threat intelligence from a list."""
+
+    def __init__(self, documents: List[Tuple[str, str, Dict[str, Any]]]) -> None:
+        super().__init__(None, refresh_interval=0.0)
+        self.documents = documents
+        self.pulls: List[Optional[datetime]] = []
+
+    def _pull_updates(
+        self, since: Optional[datetime]
+    ) -> List[Tuple[str, str, Dict[str, Any]]]:
+        self.pulls.append(since)
+        return [
+            doc
+            for doc in self.documents
+            if since is None or doc[2].get("updated_at", NOW) > since
+        ]
+
+
+class TestIocIndex:
+    """Test IocIndex lookups - NO MOCKING."""
+
+    def test_exact_indicators(self) -> None:
+        """Test exact values match after normalization."""
+        index = IocIndex()
+        index.add("ip", "203.0.113.7", {"reputation_score": 90})
+        index.add("hash", "D41D8CD98F00B204E9800998ECF8427E", {"family": "test"})
+        index.add("email", "Attacker@Example.com", {"risk": "high"})
+
+        assert index.lookup("ip", " 203.0.113.7 ").record == {"reputation_score": 90}
+        assert index.lookup("hash", "d41d8cd98f00b204e9800998ecf8427e") is not None
+        assert index.lookup("email", "attacker@example.com").record == {"risk": "high"}
+        assert index.lookup("ip", "203.0.113.8") is None
+        assert index.lookup("ip", "not-an-ip") is None
+        assert len(index) == 3
+
+    def test_longest_prefix_network_match(self) -> None:
+        """Test addresses match the most specific listed range."""
+        index = IocIndex()
+        index.add("network", "10.0.0.0/8", {"name": "wide"})
+        index.add("network", "10.1.0.0/16", {"name": "narrow"})
+        index.add("network", "2001:db8::/32", {"name": "v6"})
+
+        match = index.lookup("ip", "10.1.2.3")
+        assert match.record == {"name": "narrow"}
+        assert match.matched == "10.1.0.0/16"
+        assert index.lookup("ip", "10.2.0.1").matched == "10.0.0.0/8"
+        assert index.lookup("ip", "2001:db8::1").record == {"name": "v6"}
+        assert index.lookup("ip", "11.0.0.1") is None
+        assert index.lookup("network", "10.1.2.0/24").matched == "10.1.0.0/16"
+        assert index.lookup("network", "10.0.0.0/7") is None
+
+        assert index.remove("network", "10.1.0.0/16")
+        assert not index.remove("network", "10.1.0.0/16")
+        assert index.lookup("ip", "10.1.2.3").matched == "10.0.0.0/8"
+
+    def test_exact_ip_wins_over_range(self) -> None:
+        """Test an address listed on its own keeps its own reputation."""
+        index = IocIndex()
+        index.add("network", "192.0.2.0/24", {"source": "range"})
+        index.add("ip", "192.0.2.10", {"source": "exact"})
+
+        assert index.lookup("ip", "192.0.2.10").record == {"source": "exact"}
+        assert index.lookup("ip", "192.0.2.11").record == {"source": "range"}
+
+    def test_parent_domain_match(self) -> None:
+        """Test subdomains match a listed parent domain."""
+        index = IocIndex()
+        index.add("domain", "Evil.example.", {"category": "c2"})
+
+        assert index.lookup("domain", "evil.example").matched == "evil.example"
+        match = index.lookup("domain", "cdn.EVIL.example")
+        assert match.value == "cdn.evil.example"
+        assert match.matched == "evil.example"
+        assert index.lookup("domain", "notevil.example") is None
+
+    def test_apply_document(self) -> None:
+        """Test Firestore documents add, replace and remove indicators."""
+        index = IocIndex()
+        assert index.apply_document("ip", "198.51.100.4", {"score": 1})
+        assert index.apply_document("network", "doc1", {"cidr": "198.51.100.0/24"})
+        assert index.apply_document("email", "acct1", {"email": "a@b.com"})
+        assert not index.apply_document("email", "acct2", {"name": "no email"})
+        assert not index.apply_document("ip", "bogus", {})
+
+        index.apply_document("ip", "198.51.100.4", {"score": 2})
+        assert index.lookup("ip", "198.51.100.4").record == {"score": 2}
+
+        index.apply_document("ip", "198.51.100.4", {"deleted": True})
+        index.apply_document("email", "acct1", {"email": "a@b.com", "active": False})
+        assert index.lookup("ip", "198.51.100.4").matched == "198.51.100.0/24"
+        assert index.lookup("email", "a@b.com") is None
+
+
+class TestExtractIndicators:
+    """Test indicator extraction from incidents - NO MOCKING."""
+
+    def test_extract_from_metadata_events_and_analysis(self) -> None:
+        """Test indicators are collected once each, metadata first."""
+        incident = {
+            "metadata": {"source_ip": "203.0.113.7", "actor": "unknown"},
+            "events": [
+                {
+                    "actor": "user@example.com",
+                    "indicators": {
+                        "ip_addresses": ["203.0.113.7", "198.51.100.1"],
+                        "domains": ["bad.example"],
+                    },
+                    "raw_data": {"sha256": "A" * 64, "ip_address": "not an ip"},
+                },
+                {"actor": "user@example.com", "raw_data": {"domain": "bad.example"}},
+            ],
+        }
+        analysis_indicators = [
+            {"type": "unknown", "value": "192.0.2.0/24"},
+            {"type": "unknown", "value": "custom_signature"},
+            {"type": "unknown", "value": "other.example"},
+        ]
+
+        assert extract_indicators(incident, analysis_indicators) == [
+            ("ip", "203.0.113.7"),
+            ("email", "user@example.com"),
+            ("ip", "198.51.100.1"),
+            ("domain", "bad.example"),
+            ("hash", "a" * 64),
+            ("network", "192.0.2.0/24"),
+            ("domain", "other.example"),
+        ]
+
+    @pytest.mark.parametrize(
+        "value,expected",
+        [
+            ("10.0.0.1", "ip"),
+            ("::1", "ip"),
+            ("10.0.0.0/8", "network"),
+            ("someone@example.com", "email"),
+            ("d41d8cd98f00b204e9800998ecf8427e", "hash"),
+            ("sub.example.org", "domain"),
+            ("known_pattern", None),
+        ],
+    )
+    def test_classify_indicator(self, value: str, expected: Optional[str]) -> None:
+        """Test untyped indicators are classified by shape."""
+        assert classify_indicator(value) == expected
+
+
+class TestThreatIntelligenceIndexSync:
+    """Test ThreatIntelligenceTool IOC index syncing - NO MOCKING."""
+
+    @pytest.mark.asyncio
+    async def test_enrichment_uses_synced_index(self) -> None:
+        """Test one full sync answers every indicator in the incident."""
+        tool = StaticSourceTool(
+            [
+                ("ip", "203.0.113.7", {"reputation_score": 90}),
+                ("network", "r1", {"cidr": "198.51.100.0/24", "owner": "bulletproof"}),
+                ("email", "a1", {"email": "victim@example.com", "breach": "2024"}),
+            ]
+        )
+        incident = {
+            "metadata": {"source_ip": "203.0.113.7", "actor": "victim@example.com"},
+            "events": [
+                {"actor": "victim@example.com", "raw_data": {"ip_address": f"198.51.100.{i}"}}
+                for i in range(1, 101)
+            ],
+        }
+
+        result = await tool.execute(None, incident=incident)
+
+        assert result["status"] == "success"
+        known_iocs = result["threat_intelligence"]["known_iocs"]
+        assert known_iocs[0] == {
+            "type": "ip",
+            "value": "203.0.113.7",
+            "reputation": {"reputation_score": 90},
+        }
+        assert len(known_iocs) == 101
+        assert known_iocs[1]["matched"] == "198.51.100.0/24"
+        assert result["threat_intelligence"]["threat_actors"] == [
+            {"email": "victim@example.com", "breach": "2024"}
+        ]
+        assert tool.pulls == [None]
+
+    @pytest.mark.asyncio
+    async def test_delta_sync_applies_updates_and_deletions(self) -> None:
+        """Test later syncs only pull documents past the watermark."""
+        tool = StaticSourceTool(
+            [("ip", "203.0.113.7", {"updated_at": NOW, "score": 1})]
+        )
+        assert await tool.refresh_index() == 1
+
+        later = NOW + timedelta(minutes=5)
+        tool.documents.extend(
+            [
+                ("ip", "203.0.113.8", {"updated_at": later, "score": 2}),
+                ("ip", "203.0.113.7", {"updated_at": later, "deleted": True}),
+            ]
+        )
+        assert await tool.refresh_index() == 2
+
+        assert tool.pulls == [None, NOW]
+        assert tool.ioc_index.lookup("ip", "203.0.113.7") is None
+        assert tool.ioc_index.lookup("ip", "203.0.113.8").record["score"] == 2
+
+    @pytest.mark.asyncio
+    async def test_refresh_failure_keeps_cached_index(self) -> None:
+        """Test a failed refresh falls back to the last synced index."""
+        tool = StaticSourceTool([("ip", "203.0.113.7", {"score": 1})])
+        await tool.refresh_index()
+        tool.documents = None  # type: ignore[assignment]
+
+        result = await tool.execute(
+            None, incident={"metadata": {"source_ip": "203.0.113.7"}}
+        )
+
+        assert result["status"] == "success"
+        assert len(result["threat_intelligence"]["known_iocs"]) == 1
@@ -349,6 +349,30 @@ class TestMetricsCollector:
             == initial_time_series + 1
         )
 
+    def test_record_context_source(self, metrics_collector: MetricsCollector) -> None:
+        """Test per-source context latency and outcome metrics."""
+        for latency in (0.1, 0.2, 0.3):
+            metrics_collector.record_context_source("related_incidents", latency, "ok")
+        metrics_collector.record_context_source("knowledge_base_entries", 5.0, "timeout")
+
+        sources = metrics_collector.get_current_metrics()["context_sources"]
+
+        related = sources["related_incidents"]
+        assert related["calls"] == 3
+        assert related["timeouts"] == 0
+        assert related["avg_latency"] == pytest.approx(0.2)
+        assert related["max_latency"] == pytest.approx(0.3)
+
+        knowledge_base = sources["knowledge_base_entries"]
+        assert knowledge_base["calls"] == 1
+        assert knowledge_base["timeouts"] == 1
+        assert knowledge_base["p95_latency"] == pytest.approx(5.0)
+
+        series = metrics_collector.get_time_series_data(
+            "context_related_incidents_latency"
+        )
+        assert sum(point["count"] for point in series) == 3
+
     def test_get_current_metrics_empty_state(
         self, project_id: str, logger: logging.Logger
     ) -> None:
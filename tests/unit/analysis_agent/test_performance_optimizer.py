@@ -13,6 +13,7 @@ CRITICAL: Uses 100% production code - NO MOCKING ALLOWED
 import asyncio
 import logging
 import time
+from collections import deque
 from typing import Any, Dict, List
 from datetime import datetime, timezone
 
@@ -25,6 +26,7 @@ from src.analysis_agent.performance_optimizer import (
     RateLimiter,
     RequestBatcher,
 )
+from src.analysis_agent.rate_limit_backends import take_slot
 
 
 class TestAnalysisCacheProduction:
@@ -373,6 +375,118 @@ class TestRequestBatcherProduction:
             assert "threat_score" in result
             assert result["threat_score"] in [30, 60]  # Based on severity_level
 
+    @pytest.mark.asyncio
+    async def test_requests_during_processing_start_next_batch(
+        self, production_batcher: RequestBatcher
+    ) -> None:
+        """Test requests arriving while a batch runs are not lost."""
+        processed_batches: List[List[str]] = []
+        release = asyncio.Event()
+
+        async def slow_processor(alerts: List[str]) -> List[str]:
+            processed_batches.append(list(alerts))
+            await release.wait()
+            return [f"done:{alert}" for alert in alerts]
+
+        first = [
+            asyncio.create_task(
+                production_batcher.add_request("ids", f"alert_{i}", slow_processor)
+            )
+            for i in range(3)
+        ]
+        await asyncio.sleep(0)  # Let the full batch start processing
+
+        late = asyncio.create_task(
+            production_batcher.add_request("ids", "alert_late", slow_processor)
+        )
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await asyncio.gather(*first) == [
+            "done:alert_0",
+            "done:alert_1",
+            "done:alert_2",
+        ]
+        assert await late == "done:alert_late"
+        assert processed_batches == [
+            ["alert_0", "alert_1", "alert_2"],
+            ["alert_late"],
+        ]
+
+    @pytest.mark.asyncio
+    async def test_unexpected_error_releases_all_waiters(
+        self, production_batcher: RequestBatcher
+    ) -> None:
+        """Test every caller gets the error, whatever its type."""
+
+        async def crashing_processor(alerts: List[str]) -> List[str]:
+            raise RuntimeError("Gemini connection reset")
+
+        tasks = [
+            asyncio.create_task(
+                production_batcher.add_request("ids", f"alert_{i}", crashing_processor)
+            )
+            for i in range(3)
+        ]
+        results = await asyncio.wait_for(
+            asyncio.gather(*tasks, return_exceptions=True), timeout=1.0
+        )
+
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+    @pytest.mark.asyncio
+    async def test_short_result_list_fails_missing_requests(
+        self, production_batcher: RequestBatcher
+    ) -> None:
+        """Test requests without a result get an error instead of hanging."""
+
+        async def partial_processor(alerts: List[str]) -> List[str]:
+            return ["only_first"]
+
+        tasks = [
+            asyncio.create_task(
+                production_batcher.add_request("ids", f"alert_{i}", partial_processor)
+            )
+            for i in range(3)
+        ]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        assert results[0] == "only_first"
+        assert all(isinstance(result, Exception) for result in results[1:])
+
+    @pytest.mark.asyncio
+    async def test_batch_stats_histograms(
+        self, production_batcher: RequestBatcher
+    ) -> None:
+        """Test flush reasons, batch sizes and wait times are reported."""
+
+        async def echo_processor(alerts: List[str]) -> List[str]:
+            return alerts
+
+        # One full batch flushed on size, one partial batch flushed on deadline
+        await asyncio.gather(
+            *[
+                production_batcher.add_request("ids", f"alert_{i}", echo_processor)
+                for i in range(5)
+            ]
+        )
+
+        stats = production_batcher.get_stats()
+        assert stats["pending_requests"] == 0
+        assert stats["flushes_on_size"] == 1
+        assert stats["flushes_on_deadline"] == 1
+
+        sizes = stats["batch_size_histogram"]
+        assert sizes["count"] == 2
+        assert sizes["sum"] == 5
+        assert sizes["buckets"]["le_2"] == 1
+        assert sizes["buckets"]["le_5"] == 1
+
+        waits = stats["wait_time_histogram"]
+        assert waits["count"] == 5
+        assert 0.1 <= waits["max"] < 0.5  # Deadline batch waited for the timeout
+        assert sum(waits["buckets"].values()) == 5
+
 
 class TestRateLimiterProduction:
     """Test RateLimiter with real timing and production scenarios."""
@@ -405,49 +519,67 @@ class TestRateLimiterProduction:
 
         # Verify statistics
         stats = production_rate_limiter.get_stats()
-        assert stats["minute_window_size"] == 8
-        assert stats["hour_window_size"] == 8
+        assert stats["requests_this_minute"] == 8
+        assert stats["requests_this_hour"] == 8
 
     @pytest.mark.asyncio
-    async def test_rate_limit_window_cleaning_production(
+    async def test_rate_limit_bucket_refill_production(
         self, strict_rate_limiter: RateLimiter
     ) -> None:
-        """Test rate limit window cleaning with real time progression."""
+        """Test rate limit bucket refill with simulated time progression."""
         # Fill the minute window
         for _ in range(3):  # Fill to limit
             await strict_rate_limiter.acquire()
 
         # Verify windows have entries
         stats = strict_rate_limiter.get_stats()
-        assert stats["minute_window_size"] == 3
-
-        # Test window cleaning by simulating time progression
-        current_time = time.time()
-        future_time = current_time + 61  # 61 seconds later
+        assert stats["requests_this_minute"] == 3
 
-        # Manually trigger window cleaning
-        strict_rate_limiter._clean_windows(future_time)
+        # A fourth request waits for the first to leave the minute window
+        wait, _ = take_slot(strict_rate_limiter._specs, [0.0, 1.0, 2.0], 2.0)
+        assert wait == 58.0
 
-        # Windows should be cleaned
-        assert len(strict_rate_limiter._minute_window) == 0
-        assert len(strict_rate_limiter._hour_window) == 0
+        # A minute later the window has room again
+        wait, times = take_slot(strict_rate_limiter._specs, [0.0, 1.0, 2.0], 61.0)
+        assert wait == 0
+        assert times == [0.0, 1.0, 2.0, 61.0]
 
     @pytest.mark.asyncio
-    async def test_rate_limit_statistics_production(
-        self, production_rate_limiter: RateLimiter
-    ) -> None:
+    async def test_rate_limit_statistics_production(self) -> None:
         """Test rate limiter statistics with realistic security workload."""
-        # Simulate realistic security analysis request pattern
+        # A burst of 12 lets all 12 requests through at once
+        rate_limiter = RateLimiter(max_per_minute=20, max_per_hour=200, burst=12)
+        start_time = time.time()
         for _ in range(12):
-            await production_rate_limiter.acquire()
+            await rate_limiter.acquire()
             # Simulate variable processing time
             await asyncio.sleep(0.005)
 
-        stats = production_rate_limiter.get_stats()
-        assert stats["minute_window_size"] == 12
-        assert stats["hour_window_size"] == 12
-        assert stats["max_per_minute"] == 10
+        assert time.time() - start_time < 0.5
+        stats = rate_limiter.get_stats()
+        assert stats["acquired"] == 12
+        assert stats["requests_this_minute"] == 12
+        assert stats["requests_this_hour"] == 12
+        assert stats["max_per_minute"] == 20
         assert stats["max_per_hour"] == 200
+        assert stats["burst"] == 12
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_statistics_count_requests_per_window(
+        self, production_rate_limiter: RateLimiter
+    ) -> None:
+        """Test the window counts are requests made, not tokens still in use."""
+        for _ in range(3):
+            await production_rate_limiter.acquire()
+        # Requests from two minutes ago only count toward the hour
+        production_rate_limiter._recent = deque(
+            timestamp - 120 for timestamp in production_rate_limiter._recent
+        )
+        await production_rate_limiter.acquire()
+
+        stats = production_rate_limiter.get_stats()
+        assert stats["requests_this_minute"] == 1
+        assert stats["requests_this_hour"] == 4
 
 
 class TestPerformanceOptimizerProduction:
@@ -629,7 +761,7 @@ class TestPerformanceOptimizerProduction:
         assert cached is None
 
         # Cache the analysis result
-        optimizer.cache_analysis(incident_id, incident_data, analysis_result)
+        await optimizer.cache_analysis(incident_id, incident_data, analysis_result)
 
         # Should retrieve from cache
         cached = await optimizer.get_cached_analysis(incident_id, incident_data)
@@ -687,6 +819,8 @@ class TestPerformanceOptimizerProduction:
         assert "rate_limiter_stats" in metrics
         assert "timestamp" in metrics
 
+        assert metrics["batch_stats"]["pending_requests"] == 0
+
         # Verify cache metrics
         assert metrics["cache_stats"]["hits"] == 2
         assert metrics["cache_stats"]["misses"] == 2
@@ -865,6 +999,57 @@ class TestPerformanceOptimizerProduction:
         key3 = optimizer._get_batch_key(incident3)
         assert key1 != key3
 
+    @pytest.mark.asyncio
+    async def test_batch_similar_requests_demultiplexes_results(
+        self,
+        security_optimizer_config: dict[str, Any],
+        production_logger: logging.Logger,
+    ) -> None:
+        """Test each batched incident gets its own analysis back."""
+        config = dict(security_optimizer_config, batch_enabled=True, batch_timeout=0.05)
+        optimizer = PerformanceOptimizer(config, production_logger)
+        batches: List[List[str]] = []
+
+        async def analyze_batch(
+            requests: List[tuple[str, dict[str, Any]]],
+        ) -> List[dict[str, Any]]:
+            batches.append([incident_id for incident_id, _ in requests])
+            return [{"incident_id": incident_id} for incident_id, _ in requests]
+
+        incidents = [
+            (f"inc_{i}", {"severity": "critical", "events": [{"event_type": "iam_change"}]})
+            for i in range(7)
+        ]
+        results = await asyncio.gather(
+            *[
+                optimizer.batch_similar_requests(incident_id, data, analyze_batch)
+                for incident_id, data in incidents
+            ]
+        )
+
+        assert [result["incident_id"] for result in results] == [
+            incident_id for incident_id, _ in incidents
+        ]
+        assert [len(batch) for batch in batches] == [5, 2]
+        assert optimizer.get_performance_metrics()["batch_stats"]["flushes_on_size"] == 1
+
+    @pytest.mark.asyncio
+    async def test_batch_similar_requests_disabled(
+        self,
+        optimizer: PerformanceOptimizer,
+    ) -> None:
+        """Test requests are not batched unless batching is enabled."""
+
+        async def analyze_batch(requests: List[Any]) -> List[Any]:
+            return requests
+
+        result = await optimizer.batch_similar_requests(
+            "inc_001", {"severity": "low"}, analyze_batch
+        )
+
+        assert result is None
+        assert optimizer.batcher.get_stats()["pending_requests"] == 0
+
     def test_optimizer_initialization(
         self,
         security_optimizer_config: dict[str, Any],
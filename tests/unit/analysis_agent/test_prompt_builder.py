@@ -0,0 +1,190 @@
+"""
+Tests for the token-budgeted prompt builder using REAL production code.
+
+Features tested:
+- Compact serialization of incidents, events and nested results
+- Event ranking and folding of repeated events
+- Hard token budgets per model and omitted-item accounting
+- Token savings reported through PerformanceOptimizer
+
+CRITICAL: Uses 100% production code - NO MOCKING ALLOWED
+"""
+
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+from src.analysis_agent.performance_optimizer import PerformanceOptimizer
+from src.analysis_agent.prompt_builder import (
+    PromptBuilder,
+    compact_json,
+    estimate_tokens,
+    get_model_characteristics,
+)
+from src.common.models import (
+    EventSource,
+    Incident,
+    SecurityEvent,
+    SeverityLevel,
+)
+
+START = datetime(2025, 6, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def make_events(repeats: int) -> List[Dict[str, Any]]:
+    """Build a burst of identical login failures and one critical event."""
+    events = [
+        {
+            "event_id": f"evt_{i}",
+            "timestamp": (START + timedelta(seconds=i)).isoformat(),
+            "event_type": "login_failure",
+            "severity": "medium",
+            "actor": "attacker@example.com",
+            "raw_data": {"source_ip": "203.0.113.7", "user_agent": None},
+        }
+        for i in range(repeats)
+    ]
+    events.append(
+        {
+            "event_id": "evt_escalation",
+            "timestamp": (START + timedelta(hours=1)).isoformat(),
+            "event_type": "privilege_escalation",
+            "severity": "critical",
+            "actor": "attacker@example.com",
+        }
+    )
+    return events
+
+
+class TestPromptBuilder:
+    """Test PromptBuilder with real incident data - NO MOCKING."""
+
+    def test_compact_json_drops_noise(self) -> None:
+        """Test empty values are dropped and long lists capped."""
+        data = {
+            "name": "x",
+            "empty": "",
+            "none": None,
+            "nested": {"items": list(range(25)), "blank": {}},
+            "severity": SeverityLevel.HIGH,
+        }
+
+        assert json.loads(compact_json(data)) == {
+            "name": "x",
+            "nested": {"items": list(range(20)) + ["(+5 more)"]},
+            "severity": "high",
+        }
+
+    def test_primary_events_first_and_repeats_folded(self) -> None:
+        """Test the critical event leads and repeated failures fold to one line."""
+        builder = PromptBuilder()
+        incident = {"id": "INC-1", "title": "Brute force", "events": make_events(200)}
+
+        prompt = builder.build_incident_prompt(incident, {"severity": "high"}, {})
+
+        lines = prompt.text.split("\n")
+        events_start = lines.index("Events:")
+        first, second = (json.loads(line) for line in lines[events_start + 1:events_start + 3])
+        assert first["event_type"] == "privilege_escalation"
+        assert second["event_type"] == "login_failure"
+        assert second["repeats"] == 200
+        assert second["timestamp"] == START.isoformat()
+        assert second["last_seen"] == (START + timedelta(seconds=199)).isoformat()
+        assert "user_agent" not in prompt.text
+        assert prompt.tokens_saved > prompt.estimated_tokens * 10
+
+    def test_original_tokens_come_from_serialized_sections(self) -> None:
+        """Test only folded repeats and trimmed items count as saved."""
+        builder = PromptBuilder()
+        incident = {"id": "INC-5", "title": "Brute force", "events": make_events(1)}
+
+        prompt = builder.build_incident_prompt(incident, {"severity": "high"}, {})
+
+        assert prompt.omitted_items == {}
+        assert prompt.tokens_saved <= prompt.estimated_tokens // 10
+
+    def test_budget_is_a_hard_limit(self) -> None:
+        """Test low-priority items are omitted to stay within the budget."""
+        builder = PromptBuilder(max_input_tokens=300)
+        incident = {
+            "id": "INC-2",
+            "title": "Data exfiltration",
+            "events": [
+                {"event_id": f"e{i}", "event_type": f"type_{i}", "severity": "low",
+                 "description": "x" * 200}
+                for i in range(20)
+            ],
+        }
+        context = {f"key_{i}": "y" * 100 for i in range(10)}
+
+        prompt = builder.build_incident_prompt(incident, {}, {"chain": ["a", "b"]}, context)
+
+        assert prompt.estimated_tokens <= 300
+        assert "INC-2" in prompt.text
+        assert '"event_id":"e0"' in prompt.text
+        assert prompt.omitted_items["Events"] > 0
+        assert prompt.omitted_items["Additional Context"] > 0
+        assert "more omitted)" in prompt.text
+
+    def test_required_section_is_clipped_not_dropped(self) -> None:
+        """Test an oversized incident summary is clipped to the budget."""
+        builder = PromptBuilder(max_input_tokens=50)
+
+        prompt = builder.build_incident_prompt(
+            {"id": "INC-3", "description": "z" * 1000}, {"severity": "low"}
+        )
+
+        assert prompt.text.startswith("Incident:\nid: \"INC-3\"")
+        assert prompt.estimated_tokens <= 50
+        assert prompt.omitted_items == {"Metadata": 1}
+
+    def test_model_budgets(self) -> None:
+        """Test budgets come from the model's context window and output size."""
+        assert PromptBuilder("gemini-pro").token_budget == 32768 - 8192
+        assert PromptBuilder("gemini-1.5-pro-002").token_budget == 1048576 - 8192
+        assert get_model_characteristics("gemini-1.5-flash-latest").name == (
+            "gemini-1.5-flash-latest"
+        )
+        assert get_model_characteristics("unknown-model").name == "gemini-pro-vision"
+
+    def test_incident_objects(self) -> None:
+        """Test model objects serialize through their dictionaries."""
+        event = SecurityEvent(
+            event_type="suspicious_api_call",
+            source=EventSource("cloud_logging", "audit", "projects/p"),
+            severity=SeverityLevel.HIGH,
+            description="Service account key created",
+            actor="svc@example.iam.gserviceaccount.com",
+        )
+        incident = Incident(
+            title="Key creation", description="Unexpected key", events=[event]
+        )
+
+        prompt = PromptBuilder().build_incident_prompt(incident, {"source": "audit"}, {})
+
+        assert incident.incident_id in prompt.text
+        assert "Service account key created" in prompt.text
+        assert "SeverityLevel" not in prompt.text
+        assert estimate_tokens(prompt.text) == prompt.estimated_tokens
+
+
+class TestPromptTokenStats:
+    """Test prompt statistics in PerformanceOptimizer - NO MOCKING."""
+
+    def test_tokens_saved_are_reported(self) -> None:
+        """Test per-request and cumulative input token savings."""
+        optimizer = PerformanceOptimizer(
+            {"prompt_model": "gemini-pro", "prompt_token_budget": 4000},
+            logging.getLogger("test.prompts"),
+        )
+        incident = {"id": "INC-4", "events": make_events(50)}
+
+        _, stats = optimizer.optimize_prompt_tokens(incident, {"severity": "high"}, {})
+        optimizer.prepare_batch_prompts([(incident, {"severity": "high"})])
+
+        assert stats["tokens_saved"] == stats["original_tokens"] - stats["estimated_tokens"]
+        assert stats["token_budget"] == 4000
+        metrics = optimizer.get_performance_metrics()["prompt_stats"]
+        assert metrics["prompts"] == 2
+        assert metrics["tokens_saved"] >= 2 * stats["tokens_saved"] - 10
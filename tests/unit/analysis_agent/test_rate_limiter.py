@@ -0,0 +1,188 @@
+"""
+Tests for the sliding window rate limiter using REAL production code.
+
+Features tested:
+- Window accounting and waits
+- Quotas holding over every simulated minute and hour
+- Bursts followed by pacing
+- First in, first out service of waiting coroutines
+- Buckets shared between limiters through a locked state file
+- Fallback to local limiting when the shared backend fails
+
+CRITICAL: Uses 100% production code - NO MOCKING ALLOWED
+"""
+
+import asyncio
+import logging
+import time
+from pathlib import Path
+from typing import List, Sequence
+
+import pytest
+
+from src.analysis_agent.performance_optimizer import PerformanceOptimizer, RateLimiter
+from src.analysis_agent.rate_limit_backends import (
+    FileBucketBackend,
+    WindowSpec,
+    take_slot,
+)
+
+
+class UnreachableBucketBackend:
+    """Shared window storage whose server is down."""
+
+    async def take(self, specs: Sequence[WindowSpec]) -> tuple[float, List[float]]:
+        raise ConnectionError("cannot reach rate limit state")
+
+
+class TestTakeSlot:
+    """Test the sliding window step - NO MOCKING."""
+
+    def test_full_window_waits_and_records_nothing(self) -> None:
+        """Test a request waits until the oldest admission leaves the window."""
+        specs = (WindowSpec(2, 1.0), WindowSpec(10, 100.0))
+
+        assert take_slot(specs, None, 0.0) == (0.0, [0.0])
+        assert take_slot(specs, [0.0], 0.25) == (0.0, [0.0, 0.25])
+        wait, times = take_slot(specs, [0.0, 0.25], 0.5)
+        assert wait == pytest.approx(0.5)
+        assert times == [0.0, 0.25]  # Nothing recorded while waiting
+        assert take_slot(specs, [0.0, 0.25], 1.0) == (0.0, [0.0, 0.25, 1.0])
+        # Times older than the longest window are dropped
+        assert take_slot(specs, [0.0, 0.25], 200.0) == (0.0, [200.0])
+
+    def test_slowest_window_sets_the_wait(self) -> None:
+        """Test the hourly window holds requests when it is full."""
+        specs = (WindowSpec(5, 1.0), WindowSpec(5, 100.0))
+
+        wait, _ = take_slot(specs, [10.0, 20.0, 30.0, 40.0, 50.0], 60.0)
+
+        assert wait == pytest.approx(50.0)
+
+    def test_quota_holds_over_every_minute_and_hour(self) -> None:
+        """Test a saturating client gets at most the quota in any window."""
+        limiter = RateLimiter(max_per_minute=30, max_per_hour=500)
+        admitted: List[float] = []
+        times = None
+        now = 0.0
+        while now < 7200:
+            wait, times = take_slot(limiter._specs, times, now)
+            if wait == 0:
+                admitted.append(now)
+            now += wait
+
+        assert sum(1 for t in admitted if t < 3600) == 500
+        for window, limit in ((60, 30), (3600, 500)):
+            busiest = max(
+                sum(1 for t in admitted if start <= t < start + window)
+                for start in admitted
+            )
+            assert busiest == limit
+
+    def test_burst_spreads_the_minute_quota(self) -> None:
+        """Test a burst below the minute limit never lets the minute overflow."""
+        limiter = RateLimiter(max_per_minute=30, max_per_hour=500, burst=5)
+        admitted: List[float] = []
+        times = None
+        now = 0.0
+        while now < 600:
+            wait, times = take_slot(limiter._specs, times, now)
+            if wait == 0:
+                admitted.append(now)
+            now += wait
+
+        assert admitted[:5] == [0.0] * 5
+        assert admitted[5] == pytest.approx(10.0)  # 5 per 10 seconds
+        for start in admitted:
+            assert sum(1 for t in admitted if start <= t < start + 60) <= 30
+
+
+class TestRateLimiter:
+    """Test RateLimiter with real timing - NO MOCKING."""
+
+    @pytest.mark.asyncio
+    async def test_burst_then_paced(self) -> None:
+        """Test requests beyond the burst are paced at the minute rate."""
+        limiter = RateLimiter(max_per_minute=1200, max_per_hour=10000, burst=3)
+
+        start = time.monotonic()
+        for _ in range(3):
+            await limiter.acquire()
+        burst_elapsed = time.monotonic() - start
+        for _ in range(2):
+            await limiter.acquire()
+        paced_elapsed = time.monotonic() - start
+
+        assert burst_elapsed < 0.02
+        assert 0.09 <= paced_elapsed < 0.3  # Three per 0.15 seconds
+        stats = limiter.get_stats()
+        assert stats["acquired"] == 5
+        assert stats["requests_this_hour"] == 5
+        assert stats["waiting"] == 0
+
+    @pytest.mark.asyncio
+    async def test_waiters_are_served_in_arrival_order(self) -> None:
+        """Test coroutines waiting for a slot are served first in, first out."""
+        limiter = RateLimiter(max_per_minute=3000, max_per_hour=10000, burst=1)
+        served: List[int] = []
+
+        async def worker(number: int) -> None:
+            await limiter.acquire()
+            served.append(number)
+
+        tasks = []
+        for number in range(8):
+            tasks.append(asyncio.create_task(worker(number)))
+            await asyncio.sleep(0)  # Arrive in order
+        await asyncio.sleep(0.005)
+        assert limiter.get_stats()["waiting"] > 0
+        await asyncio.gather(*tasks)
+
+        assert served == list(range(8))
+
+    @pytest.mark.asyncio
+    async def test_file_backend_shares_windows(self, tmp_path: Path) -> None:
+        """Test limiters in different workers draw from the same windows."""
+        path = str(tmp_path / "limits" / "analysis.json")
+        first = RateLimiter(600, 10000, burst=4, backend=FileBucketBackend(path))
+        second = RateLimiter(600, 10000, burst=4, backend=FileBucketBackend(path))
+
+        start = time.monotonic()
+        await asyncio.gather(*(limiter.acquire() for limiter in (first, second) * 2))
+        shared_burst = time.monotonic() - start
+        await second.acquire()  # Fifth waits for the first to leave its 0.4s window
+        paced = time.monotonic() - start
+
+        assert shared_burst < 0.05
+        assert paced >= 0.08
+        assert second.get_stats()["backend"] == "FileBucketBackend"
+
+    @pytest.mark.asyncio
+    async def test_backend_failure_limits_locally(self) -> None:
+        """Test an unreachable shared backend degrades to local windows."""
+        limiter = RateLimiter(60, 1000, burst=2, backend=UnreachableBucketBackend())
+
+        await limiter.acquire()
+        await limiter.acquire()
+
+        stats = limiter.get_stats()
+        assert stats["backend_errors"] == 2
+        assert stats["requests_this_minute"] == 2
+
+    def test_backend_from_config(self, tmp_path: Path) -> None:
+        """Test the shared windows are created from the performance config."""
+        path = tmp_path / "state" / "limits.json"
+        optimizer = PerformanceOptimizer(
+            {"rate_limit": {"backend": "file", "state_path": str(path), "burst": 5}},
+            logging.getLogger("test.rate_limit"),
+        )
+
+        assert optimizer.rate_limiter is not None
+        stats = optimizer.rate_limiter.get_stats()
+        assert stats["backend"] == "FileBucketBackend"
+        assert stats["burst"] == 5
+        assert path.parent.is_dir()
+        with pytest.raises(ValueError):
+            PerformanceOptimizer(
+                {"rate_limit": {"backend": "memcached"}}, logging.getLogger("t")
+            )
@@ -0,0 +1,194 @@
+"""
+Tests for the similar-incident index using REAL production code.
+
+Features tested:
+- Top-k results match an exhaustive exact scoring
+- Severity, lookback and self-match filtering
+- Incremental add, replace and remove
+- Persistence through the append-only log
+- Optional embedding similarity
+
+CRITICAL: Uses 100% production code - NO MOCKING ALLOWED
+"""
+
+import json
+import random
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from src.analysis_agent.similarity_index import (
+    IncidentSimilarityIndex,
+    IndexedIncident,
+    similarity_score,
+)
+
+EVENT_TYPES = [f"event_type_{i}" for i in range(30)]
+RESOURCE_TYPES = [f"resource_type_{i}" for i in range(10)]
+NOW = datetime(2025, 6, 1, tzinfo=timezone.utc)
+
+
+def make_incidents(count: int, seed: int, prefix: str = "inc") -> List[IndexedIncident]:
+    """Build random resolved incidents over the last 120 days."""
+    rng = random.Random(seed)
+    return [
+        IndexedIncident(
+            incident_id=f"{prefix}_{i}",
+            severity=rng.choice(["high", "medium"]),
+            event_types=frozenset(rng.sample(EVENT_TYPES, rng.randint(0, 5))),
+            resource_types=frozenset(rng.sample(RESOURCE_TYPES, rng.randint(0, 3))),
+            event_count=rng.randint(0, 20),
+            created_at=NOW - timedelta(days=rng.randint(0, 120)),
+            title=f"Incident {i}",
+        )
+        for i in range(count)
+    ]
+
+
+def exhaustive_top_k(
+    query: IndexedIncident,
+    incidents: List[IndexedIncident],
+    created_after: datetime,
+    top_k: int = 5,
+) -> List[float]:
+    """Score every incident exactly, as the Firestore scan did."""
+    scores = sorted(
+        (
+            similarity_score(query, incident)
+            for incident in incidents
+            if incident.severity == query.severity
+            and incident.created_at >= created_after
+            and incident.incident_id != query.incident_id
+        ),
+        reverse=True,
+    )
+    return [score for score in scores if score >= 0.4][:top_k]
+
+
+class TestIncidentSimilarityIndex:
+    """Test IncidentSimilarityIndex with real incidents - NO MOCKING."""
+
+    @pytest.mark.parametrize("seed", [1, 2, 3])
+    def test_query_matches_exhaustive_scoring(self, seed: int) -> None:
+        """Test MinHash candidates lose none of the exact top-k matches."""
+        incidents = make_incidents(2_000, seed)
+        index = IncidentSimilarityIndex()
+        index.rebuild((incident, None) for incident in incidents)
+        cutoff = NOW - timedelta(days=90)
+
+        for query in make_incidents(30, seed + 100, prefix="query"):
+            matches = index.query(query, created_after=cutoff)
+            assert [round(m.similarity_score, 9) for m in matches] == [
+                round(score, 9) for score in exhaustive_top_k(query, incidents, cutoff)
+            ]
+
+    def test_query_filters_severity_lookback_and_self(self) -> None:
+        """Test only older resolved incidents of the same severity match."""
+        features = {
+            "event_types": frozenset({"unauthorized_access", "privilege_escalation"}),
+            "resource_types": frozenset({"gce_instance"}),
+            "event_count": 3,
+        }
+        index = IncidentSimilarityIndex()
+        index.add(IndexedIncident("recent", "high", created_at=NOW, **features))
+        index.add(IndexedIncident("low", "low", created_at=NOW, **features))
+        index.add(
+            IndexedIncident(
+                "stale", "high", created_at=NOW - timedelta(days=200), **features
+            )
+        )
+        query = IndexedIncident("current", "high", created_at=NOW, **features)
+        index.add(query)
+
+        matches = index.query(query, created_after=NOW - timedelta(days=90))
+
+        assert [m.incident.incident_id for m in matches] == ["recent"]
+        assert matches[0].similarity_score == pytest.approx(1.0)
+        assert matches[0].semantic_similarity is None
+
+    def test_add_replace_and_remove(self) -> None:
+        """Test incremental updates reuse rows and keep queries current."""
+        index = IncidentSimilarityIndex()
+        incidents = make_incidents(100, seed=5)
+        for incident in incidents:
+            index.add(incident)
+
+        replaced = IndexedIncident(
+            "inc_0", incidents[0].severity, frozenset({"new_type"}),
+            frozenset(), 50, created_at=NOW,
+        )
+        index.add(replaced)
+        assert len(index) == 100
+        assert index.get("inc_0") == replaced
+
+        assert index.remove("inc_1")
+        assert not index.remove("inc_1")
+        assert "inc_1" not in index
+
+        index.add(IndexedIncident("inc_new", "high", frozenset(), frozenset(), 0))
+        assert len(index) == 100
+
+        query = IndexedIncident(
+            "query", replaced.severity, frozenset({"new_type"}), frozenset(), 50
+        )
+        matches = index.query(query, min_score=0.6)
+        assert [m.incident.incident_id for m in matches] == ["inc_0"]
+
+    def test_log_persists_updates(self, tmp_path: Path) -> None:
+        """Test updates are appended to the log and replayed on load."""
+        path = str(tmp_path / "index" / "similar_incidents.jsonl")
+        incidents = make_incidents(50, seed=9)
+
+        index = IncidentSimilarityIndex(path)
+        index.rebuild((incident, None) for incident in incidents[:40])
+        for incident in incidents[40:]:
+            index.add(incident, embedding=[1.0, 0.0, 0.0])
+        index.remove("inc_0")
+
+        with open(path, encoding="utf-8") as f:
+            assert len(f.readlines()) == 40 + 10 + 1
+
+        reloaded = IncidentSimilarityIndex(path)
+        assert len(reloaded) == 49
+        assert "inc_0" not in reloaded
+        assert reloaded.get("inc_45") == incidents[45]
+
+        query = incidents[10]
+        assert reloaded.query(query) == index.query(query)
+
+        # Saving compacts the log to the current entries
+        reloaded.save()
+        with open(path, encoding="utf-8") as f:
+            assert len(f.readlines()) == 49
+
+    def test_unreadable_log_lines_are_skipped(self, tmp_path: Path) -> None:
+        """Test a torn final line does not lose the rest of the index."""
+        path = tmp_path / "similar_incidents.jsonl"
+        entry = {"op": "add", "incident": make_incidents(1, seed=3)[0].to_dict()}
+        path.write_text(json.dumps(entry) + "\n" + '{"op": "add", "incid', encoding="utf-8")
+
+        index = IncidentSimilarityIndex(str(path))
+
+        assert len(index) == 1
+
+    def test_embedding_similarity_breaks_ties(self) -> None:
+        """Test embeddings are reported and order equally scored matches."""
+        features = {
+            "severity": "high",
+            "event_types": frozenset({"data_exfiltration"}),
+            "resource_types": frozenset({"gcs_bucket"}),
+            "event_count": 4,
+        }
+        index = IncidentSimilarityIndex()
+        index.add(IndexedIncident("far", **features), embedding=[-1.0, 0.0])
+        index.add(IndexedIncident("close", **features), embedding=[2.0, 0.1])
+        index.add(IndexedIncident("unknown", **features))
+
+        matches = index.query(IndexedIncident("query", **features), embedding=[1.0, 0.0])
+
+        assert [m.incident.incident_id for m in matches] == ["close", "unknown", "far"]
+        assert matches[0].semantic_similarity == pytest.approx(0.9988, abs=1e-3)
+        assert matches[1].semantic_similarity is None
+        assert matches[2].semantic_similarity == pytest.approx(-1.0)
@@ -677,6 +677,33 @@ class TestDetectionAgentProduction:
         assert result["anomalies_detected"] == 0
         assert len(result["incidents_created"]) == 0
 
+    @pytest.mark.asyncio
+    async def test_streaming_scan_error_handling_production(
+        self, agent_config: Dict[str, Any]
+    ) -> None:
+        """Test a failed streaming scan is reported and its window scanned again."""
+        bad_config = dict(agent_config, streaming_scan={"enabled": True})
+        bad_config["bigquery_dataset"] = "nonexistent_dataset_xyz"
+
+        agent = DetectionAgent(bad_config)
+        last_scan_time = agent._stored_config["last_scan_time"]
+
+        # Create real invocation context
+        class TestInvocationContext:
+            def __init__(self) -> None:
+                self.data = {"project_id": PROJECT_ID}
+
+        context = TestInvocationContext()
+
+        # The missing dataset fails the query like in a batch scan
+        result = await agent._perform_detection_scan(context, None)  # type: ignore[arg-type]
+
+        assert result["status"] == "success"
+        assert result["errors"][0].startswith("Log monitoring failed")
+        assert result["events_processed"] == 0
+        assert len(result["incidents_created"]) == 0
+        assert agent._stored_config["last_scan_time"] == last_scan_time
+
     @pytest.mark.asyncio
     async def test_transfer_handling_production(self, agent_config: Dict[str, Any]) -> None:
         """Test production transfer handling from other agents."""
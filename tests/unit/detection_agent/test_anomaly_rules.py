@@ -0,0 +1,154 @@
+"""
+Tests for the declarative anomaly rules.
+
+The single-pass evaluator must match the original per-pattern checks of
+AnomalyDetectionTool, reproduced below as the reference.
+"""
+
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+import pytest
+
+from src.detection_agent.adk_agent import AnomalyDetectionTool
+from src.detection_agent.anomaly_rules import (
+    DEFAULT_ANOMALY_RULES,
+    AnomalyRule,
+    AnomalyRuleEvaluator,
+)
+from src.detection_agent.detection_event import DetectionEvent
+
+BASE_TIME = datetime(2024, 1, 1, 12, 0, 0)
+
+QUERY_TYPES = [
+    "failed_authentication",
+    "privilege_escalation",
+    "suspicious_api_activity",
+    "firewall_modifications",
+]
+
+
+def reference_checks(events: List[Dict[str, Any]]) -> List[bool]:
+    """Original dictionary-based pattern checks, in default rule order."""
+    failed_auth = [e for e in events if e.get("query_type") == "failed_authentication"]
+    brute_force = len(failed_auth) >= 5 and sum(
+        1 for e in failed_auth if e.get("source_ip") == failed_auth[0].get("source_ip")
+    ) >= 5
+
+    priv_esc = [e for e in events if e.get("query_type") == "privilege_escalation"]
+    escalation = len(events) >= 2 and bool(priv_esc) and any(
+        e.get("actor") == priv_esc[0].get("actor")
+        and e.get("query_type") in ["suspicious_api_activity", "firewall_modifications"]
+        and e.get("timestamp", "") > priv_esc[0].get("timestamp", "")
+        for e in events
+    )
+
+    destructive = len([
+        e for e in events
+        if e.get("query_type") == "suspicious_api_activity"
+        and any(k in e.get("method_name", "").lower() for k in ["delete", "destroy", "remove"])
+    ]) >= 10
+
+    firewall = any(
+        "0.0.0.0/0" in e.get("source_ranges", []) or "::/0" in e.get("source_ranges", [])
+        for e in events if e.get("query_type") == "firewall_modifications"
+    )
+    return [brute_force, escalation, destructive, firewall]
+
+
+def make_group(size: int, rng: random.Random) -> List[Dict[str, Any]]:
+    """Generate a random group of event dictionaries."""
+    group = []
+    for _ in range(size):
+        query_type = rng.choice(QUERY_TYPES)
+        event = {
+            "query_type": query_type,
+            "timestamp": (BASE_TIME + timedelta(seconds=rng.randint(0, 600))).isoformat(),
+            "actor": rng.choice(["a@example.com", "b@example.com"]),
+            "source_ip": rng.choice(["10.0.0.1", "10.0.0.2"]),
+            "method_name": rng.choice(["DeleteInstance", "v1.RemoveRole", "Get", "List"]),
+            "resource_type": "project",
+        }
+        if query_type == "firewall_modifications":
+            event["source_ranges"] = rng.choice([["10.0.0.0/8"], ["0.0.0.0/0"], ["::/0"], []])
+        group.append(event)
+    return group
+
+
+class TestAnomalyRuleEvaluator:
+    """Test AnomalyRuleEvaluator functionality."""
+
+    @pytest.mark.parametrize("seed", range(20))
+    def test_matches_reference_checks(self, seed: int) -> None:
+        """Random groups match the original per-pattern checks."""
+        rng = random.Random(seed)
+        evaluator = AnomalyRuleEvaluator()
+
+        for _ in range(50):
+            group = make_group(rng.randint(1, 40), rng)
+            features = evaluator.extract_features(
+                [DetectionEvent.from_dict(event) for event in group]
+            )
+
+            actual = [rule.matches(features) for rule in DEFAULT_ANOMALY_RULES]
+            assert actual == reference_checks(group)
+
+    def test_empty_group_matches_nothing(self) -> None:
+        """An empty group matches no rule."""
+        assert AnomalyRuleEvaluator().evaluate([]) == []
+
+    def test_escalation_follow_up_must_be_later(self) -> None:
+        """Suspicious activity before the escalation does not count."""
+        escalation = {
+            "query_type": "privilege_escalation",
+            "timestamp": BASE_TIME.isoformat(),
+            "actor": "a",
+        }
+        before = {
+            "query_type": "suspicious_api_activity",
+            "timestamp": (BASE_TIME - timedelta(minutes=1)).isoformat(),
+            "actor": "a",
+        }
+        after = dict(before, timestamp=(BASE_TIME + timedelta(minutes=1)).isoformat())
+        evaluator = AnomalyRuleEvaluator()
+
+        def matched(group: List[Dict[str, Any]]) -> List[str]:
+            events = [DetectionEvent.from_dict(event) for event in group]
+            return [rule.anomaly_type for rule in evaluator.evaluate(events)]
+
+        assert matched([escalation, before]) == []
+        assert matched([before, escalation, after]) == ["privilege_escalation_abuse"]
+
+
+class TestCustomAnomalyRules:
+    """Test AnomalyDetectionTool with additional declarative rules."""
+
+    @pytest.mark.asyncio
+    async def test_custom_rule_reported(self) -> None:
+        """A new rule over existing features is reported like the built-ins."""
+        rule = AnomalyRule(
+            anomaly_type="firewall_churn",
+            severity="medium",
+            confidence=0.6,
+            description="Repeated firewall changes by {actor}",
+            matches=lambda f: f.type_counts.get("firewall_modifications", 0) >= 3,
+        )
+        tool = AnomalyDetectionTool({}, anomaly_rules=DEFAULT_ANOMALY_RULES + (rule,))
+        group = [
+            {
+                "query_type": "firewall_modifications",
+                "timestamp": BASE_TIME.isoformat(),
+                "actor": "ops@example.com",
+                "source_ranges": ["10.0.0.0/8"],
+            }
+            for _ in range(3)
+        ]
+
+        result = await tool.execute(None, events=[group])  # type: ignore[arg-type]
+
+        assert [a["type"] for a in result["anomalies"]] == ["firewall_churn"]
+        assert result["anomalies"][0]["description"] == (
+            "Repeated firewall changes by ops@example.com"
+        )
+        assert result["anomalies"][0]["event"] is group[0]
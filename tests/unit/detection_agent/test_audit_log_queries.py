@@ -0,0 +1,376 @@
+"""
+Tests for AuditLogQueries, including the fused single-scan query mode.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Tuple
+
+import pytest
+
+from src.common.secure_query_builder import SecureQueryBuilder
+from src.detection_agent.adk_agent import LogMonitoringTool
+from src.detection_agent.audit_log_queries import (
+    DETECTION_QUERY_SPECS,
+    FUSED_QUERY_NAME,
+    AuditLogQueries,
+)
+from src.detection_agent.concurrent_query_executor import ConcurrentQueryExecutor
+from src.detection_agent.detection_event import DetectionEvent
+from src.detection_agent.query_cache import QueryCache
+from tests.fixtures.fake_bigquery import FakeBigQueryClient, make_row
+
+TABLE = AuditLogQueries.table_identifier("test-project", "security_logs")
+BASE_TIME = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def _audit_record(index: int, **overrides: Any) -> Dict[str, Any]:
+    """Build a full audit record with every projected column."""
+    record = {
+        "timestamp": BASE_TIME - timedelta(seconds=index),
+        "actor": f"user{index}@example.com",
+        "source_ip": f"10.0.0.{index}",
+        "method_name": "SetIamPolicy",
+        "status_code": 0,
+        "error_message": "",
+        "resource_type": "project",
+        "project": "test-project",
+        "resource_name": f"projects/test-project/resource{index}",
+        "bindings": [],
+        "user_agent": "gcloud",
+        "rule_name": "",
+        "source_ranges": [],
+        "allowed_rules": [],
+    }
+    record.update(overrides)
+    return record
+
+
+def _type_row(query_type: str, record: Dict[str, Any]) -> Any:
+    """Project a record onto the columns of one standalone detection query."""
+    columns = [
+        field.split(" as ")[1] if " as " in field else field
+        for field in DETECTION_QUERY_SPECS[query_type]["fields"]
+    ]
+    return make_row({column: record[column] for column in columns})
+
+
+class WindowedClient(FakeBigQueryClient):
+    """Fake client that applies the scan window parameters to routed rows."""
+
+    def __init__(self, routes: List[Tuple[str, List[Any]]]):
+        super().__init__(routes=routes)
+        self.windows: List[Tuple[str, datetime, datetime]] = []
+
+    def query(self, query: str, job_config: Any = None) -> Any:
+        params = {
+            param.name: datetime.fromisoformat(param.value)
+            for param in job_config.query_parameters
+        }
+        start, end = params["last_scan_time"], params["current_time"]
+        job = super().query(query, job_config)
+        job.rows = [row for row in job.rows if start < row["timestamp"] <= end]
+        job.total_bytes_processed = 10_000
+        self.windows.append((query, start, end))
+        return job
+
+
+def _fused_rows(record: Dict[str, Any], matches: List[str]) -> List[Any]:
+    """Build the fused query rows of a record, one per matching detection type."""
+    return [make_row({**record, "query_type": query_type}) for query_type in matches]
+
+
+class TestFusedSelectQuery:
+    """Test SecureQueryBuilder.build_fused_select_query."""
+
+    def test_fused_query_structure(self) -> None:
+        """The fused query scans the table once, labelling a row per match."""
+        query = AuditLogQueries.build_fused_query(TABLE)
+
+        assert query.count("FROM `") == 1
+        for query_type in DETECTION_QUERY_SPECS:
+            assert f"['{query_type}'], [])" in query
+        assert ")) AS query_type" in query
+        # Rows are labelled before QUALIFY ranks them within each type
+        assert query.index("UNNEST(ARRAY_CONCAT(") < query.index("QUALIFY")
+        assert "QUALIFY ROW_NUMBER() OVER (PARTITION BY query_type" in query
+        assert query.rstrip().endswith("LIMIT 3500")
+
+    def test_fused_query_projects_union_of_columns(self) -> None:
+        """Every column from every per-type query appears exactly once."""
+        query = AuditLogQueries.build_fused_query(TABLE)
+
+        for spec in DETECTION_QUERY_SPECS.values():
+            for field in spec["fields"]:
+                assert f"    {field},\n" in query
+        assert "    query_type\nFROM" in query
+        assert query.count("protoPayload.methodName as method_name") == 1
+
+    def test_streaming_query_is_unbounded_and_ascending(self) -> None:
+        """The streaming scan drops row limits and reads oldest rows first."""
+        query = AuditLogQueries.build_fused_query(TABLE, streaming=True)
+
+        assert "QUALIFY" not in query
+        assert "LIMIT" not in query
+        assert query.rstrip().endswith("ORDER BY timestamp ASC")
+
+    def test_invalid_branch_name_rejected(self) -> None:
+        """Branch names must be plain identifiers."""
+        with pytest.raises(ValueError):
+            SecureQueryBuilder.build_fused_select_query(
+                TABLE, ["timestamp"], [], {"bad name": "TRUE"}
+            )
+
+    def test_empty_branches_rejected(self) -> None:
+        """At least one branch is required."""
+        with pytest.raises(ValueError):
+            SecureQueryBuilder.build_fused_select_query(TABLE, ["timestamp"], [], {})
+
+    def test_invalid_table_rejected(self) -> None:
+        """Table identifiers are validated."""
+        with pytest.raises(ValueError):
+            AuditLogQueries.build_fused_query("p.bad_dataset.bad_table")
+
+
+class TestDemultiplexRows:
+    """Test AuditLogQueries.demultiplex_rows."""
+
+    def test_rows_split_by_label(self) -> None:
+        """Rows are routed to the detection type in their label."""
+        rows = _fused_rows(_audit_record(1), ["privilege_escalation"]) + _fused_rows(
+            _audit_record(2, status_code=403),
+            ["failed_authentication", "privilege_escalation"],
+        )
+
+        result = AuditLogQueries.demultiplex_rows(rows)
+
+        assert len(result["failed_authentication"]) == 1
+        assert len(result["privilege_escalation"]) == 2
+        assert result["suspicious_api_activity"] == []
+        assert result["firewall_modifications"] == []
+
+    def test_rows_only_carry_type_columns(self) -> None:
+        """Demultiplexed rows match the standalone query's projection."""
+        record = _audit_record(1, status_code=401)
+        rows = AuditLogQueries.demultiplex_rows(
+            _fused_rows(record, ["failed_authentication"])
+        )
+
+        row = rows["failed_authentication"][0]
+        assert dict(row) == dict(_type_row("failed_authentication", record))
+        assert "bindings" not in dict(row)
+
+    def test_per_type_limit_enforced(self) -> None:
+        """Each detection type keeps at most its own row limit."""
+        limit = DETECTION_QUERY_SPECS["firewall_modifications"]["limit"]
+        rows = [
+            row
+            for i in range(limit + 10)
+            for row in _fused_rows(_audit_record(i), ["firewall_modifications"])
+        ]
+
+        result = AuditLogQueries.demultiplex_rows(rows)
+
+        assert len(result["firewall_modifications"]) == limit
+
+    def test_demultiplex_single_row(self) -> None:
+        """A single fused row (or column mapping) becomes its type's row."""
+        record = _audit_record(2, status_code=403)
+        row = _fused_rows(record, ["failed_authentication"])[0]
+
+        result = AuditLogQueries.demultiplex_row(dict(row.items()))
+
+        assert [query_type for query_type, _ in result] == ["failed_authentication"]
+        assert dict(result[0][1]) == dict(_type_row("failed_authentication", record))
+        assert AuditLogQueries.demultiplex_row({**record, "query_type": None}) == []
+
+
+class TestFusedLogMonitoring:
+    """Test LogMonitoringTool in fused mode against separate mode."""
+
+    @pytest.mark.asyncio
+    async def test_fused_scan_matches_separate_scan(self) -> None:
+        """Fused and separate scans produce identical events."""
+        auth = _audit_record(1, status_code=403, method_name="SetIamPolicy")
+        delete = _audit_record(2, method_name="DeleteInstance")
+        firewall = _audit_record(
+            3,
+            method_name="v1.compute.firewalls.insert",
+            resource_type="gce_firewall_rule",
+            source_ranges=["0.0.0.0/0"],
+        )
+
+        separate_client = FakeBigQueryClient(
+            routes=[
+                ("401, 403", [_type_row("failed_authentication", auth)]),
+                ("'SetIamPolicy'", [_type_row("privilege_escalation", auth)]),
+                ("%Delete%", [_type_row("suspicious_api_activity", delete)]),
+                ("gce_firewall_rule", [_type_row("firewall_modifications", firewall)]),
+            ]
+        )
+        fused_client = FakeBigQueryClient(
+            routes=[
+                (
+                    "QUALIFY",
+                    _fused_rows(auth, ["failed_authentication", "privilege_escalation"])
+                    + _fused_rows(delete, ["suspicious_api_activity"])
+                    + _fused_rows(firewall, ["firewall_modifications"]),
+                )
+            ]
+        )
+
+        separate_tool = LogMonitoringTool(
+            separate_client,  # type: ignore[arg-type]
+            "security_logs",
+            "events",
+            "test-project",
+            query_executor=ConcurrentQueryExecutor(separate_client),  # type: ignore[arg-type]
+        )
+        fused_tool = LogMonitoringTool(
+            fused_client,  # type: ignore[arg-type]
+            "security_logs",
+            "events",
+            "test-project",
+            query_executor=ConcurrentQueryExecutor(fused_client),  # type: ignore[arg-type]
+            fuse_queries=True,
+        )
+
+        scan_start = datetime.now() - timedelta(days=1)
+        separate = await separate_tool.execute(None, last_scan_time=scan_start)  # type: ignore[arg-type]
+        fused = await fused_tool.execute(None, last_scan_time=scan_start)  # type: ignore[arg-type]
+
+        assert len(separate_client.jobs) == 4
+        assert len(fused_client.jobs) == 1
+        assert fused["events"] == separate["events"]
+        assert fused["queries_executed"] == separate["queries_executed"] == 4
+        assert list(fused["query_latencies"]) == [FUSED_QUERY_NAME]
+        assert fused["estimated_bytes_saved"] > 0
+        assert separate["estimated_bytes_saved"] == 0
+        assert fused["estimated_bytes_processed"] < separate["estimated_bytes_processed"]
+
+    @pytest.mark.asyncio
+    async def test_stream_events_yields_compact_events_per_page(self) -> None:
+        """Streaming yields the fused events page by page without raw_data."""
+        records = [_audit_record(i, status_code=403) for i in range(5)]
+        client = FakeBigQueryClient(
+            routes=[
+                (
+                    "timestamp ASC",
+                    [
+                        row
+                        for record in records
+                        for row in _fused_rows(record, ["failed_authentication"])
+                    ],
+                )
+            ]
+        )
+        tool = LogMonitoringTool(
+            client,  # type: ignore[arg-type]
+            "security_logs",
+            "events",
+            "test-project",
+            stream_page_size=2,
+        )
+
+        pages = [
+            page
+            async for page in tool.stream_events(
+                BASE_TIME - timedelta(days=1), BASE_TIME
+            )
+        ]
+
+        assert [len(page) for page in pages] == [2, 2, 1]
+        events = [event for page in pages for event in page]
+        expected = [
+            tool._row_to_event(
+                "failed_authentication",
+                _type_row("failed_authentication", record),
+                include_raw_data=False,
+            )
+            for record in records
+        ]
+        assert events == expected
+        assert all(event.raw_data is None for event in events)
+        assert client.jobs[0].query.count("FROM `") == 1
+
+    @pytest.mark.asyncio
+    async def test_execute_returns_event_dicts(self) -> None:
+        """The tool result carries dicts while scan keeps compact events."""
+        record = _audit_record(1, status_code=403)
+        client = FakeBigQueryClient(
+            routes=[("401, 403", [_type_row("failed_authentication", record)])]
+        )
+        tool = LogMonitoringTool(
+            client,  # type: ignore[arg-type]
+            "security_logs",
+            "events",
+            "test-project",
+            query_executor=ConcurrentQueryExecutor(client),  # type: ignore[arg-type]
+        )
+        scan_start = datetime.now() - timedelta(days=1)
+
+        scanned = await tool.scan(scan_start)
+        result = await tool.execute(None, last_scan_time=scan_start)  # type: ignore[arg-type]
+
+        assert [type(event) for event in scanned["events"]] == [DetectionEvent]
+        assert result["events"] == [event.to_dict() for event in scanned["events"]]
+        assert isinstance(result["events"][0]["timestamp"], str)
+
+
+class TestCachedLogMonitoring:
+    """Test LogMonitoringTool serving overlapping scans from the query cache."""
+
+    @staticmethod
+    def _tool(client: WindowedClient) -> LogMonitoringTool:
+        return LogMonitoringTool(
+            client,  # type: ignore[arg-type]
+            "security_logs",
+            "events",
+            "test-project",
+            query_executor=ConcurrentQueryExecutor(client),  # type: ignore[arg-type]
+            query_cache=QueryCache({}),
+        )
+
+    @pytest.mark.asyncio
+    async def test_rescan_queries_only_uncached_range(self) -> None:
+        """A second scan over the same start only queries unsettled time."""
+        start = (datetime.now() - timedelta(minutes=10)).replace(second=0, microsecond=0)
+        record = _audit_record(
+            0, timestamp=start + timedelta(minutes=2, seconds=30), status_code=403
+        )
+        client = WindowedClient(
+            routes=[("401, 403", [_type_row("failed_authentication", record)])]
+        )
+        tool = self._tool(client)
+
+        first = await tool.execute(None, last_scan_time=start)  # type: ignore[arg-type]
+        second = await tool.execute(None, last_scan_time=start)  # type: ignore[arg-type]
+
+        assert len(first["events"]) == 1
+        assert second["events"] == first["events"]
+        assert len(client.windows) == 8
+        assert all(window[1] == start for window in client.windows[:4])
+        # Buckets newer than the five minute settle time are queried again
+        assert all(window[1] >= start + timedelta(minutes=5) for window in client.windows[4:])
+        assert tool.query_cache is not None
+        assert tool.query_cache.get_stats()["bytes_avoided"] > 0
+
+    @pytest.mark.asyncio
+    async def test_results_at_row_limit_are_not_cached(self) -> None:
+        """A result that may have been truncated by LIMIT is queried again."""
+        start = (datetime.now() - timedelta(minutes=10)).replace(second=0, microsecond=0)
+        limit = DETECTION_QUERY_SPECS["firewall_modifications"]["limit"]
+        rows = [
+            _type_row(
+                "firewall_modifications",
+                _audit_record(i, timestamp=start + timedelta(minutes=1, milliseconds=i)),
+            )
+            for i in range(limit)
+        ]
+        client = WindowedClient(routes=[("gce_firewall_rule", rows)])
+        tool = self._tool(client)
+
+        await tool.execute(None, last_scan_time=start)  # type: ignore[arg-type]
+        await tool.execute(None, last_scan_time=start)  # type: ignore[arg-type]
+
+        firewall_windows = [w for w in client.windows if "gce_firewall_rule" in w[0]]
+        assert [window[1] for window in firewall_windows] == [start, start]
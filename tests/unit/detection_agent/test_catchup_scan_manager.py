@@ -19,7 +19,18 @@ from typing import Any
 import pytest
 
 # REAL IMPORTS - NO MOCKING
-from src.detection_agent.catchup_scan_manager import CatchUpTask, CatchUpScanManager
+from src.detection_agent.catchup_scan_manager import (
+    CatchUpCheckpoint,
+    CatchUpTask,
+    CatchUpScanManager,
+)
+
+CURRENT_TIME = datetime(2024, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+
+
+def _catchup_config(**settings: Any) -> dict[str, Any]:
+    """Build a manager config with catch-up scan settings."""
+    return {"agents": {"detection": {"catch_up_scan": settings}}}
 
 
 class TestCatchUpTask:
@@ -787,3 +798,235 @@ class TestCatchUpScanManager:
         # Step 5: Check if should pause regular scans
         should_pause = manager.should_pause_regular_scans()
         assert should_pause is False  # No active tasks yet
+
+
+class TestCatchUpCheckpoint:
+    """Test CatchUpCheckpoint functionality."""
+
+    def test_record_merges_touching_ranges(self) -> None:
+        """Adjacent and overlapping ranges collapse into one."""
+        checkpoint = CatchUpCheckpoint(None)
+        hour = timedelta(hours=1)
+
+        checkpoint.record("audit", CURRENT_TIME, CURRENT_TIME + hour)
+        checkpoint.record("audit", CURRENT_TIME + 2 * hour, CURRENT_TIME + 3 * hour)
+        checkpoint.record("audit", CURRENT_TIME + hour, CURRENT_TIME + 2 * hour)
+
+        assert checkpoint.completed["audit"] == [
+            (CURRENT_TIME, CURRENT_TIME + 3 * hour)
+        ]
+
+    def test_remaining_excludes_completed_ranges(self) -> None:
+        """Only uncovered parts of a task remain."""
+        checkpoint = CatchUpCheckpoint(None)
+        task = CatchUpTask(
+            log_type="audit",
+            start_time=CURRENT_TIME - timedelta(hours=4),
+            end_time=CURRENT_TIME,
+        )
+        checkpoint.record(
+            "audit", CURRENT_TIME - timedelta(hours=3), CURRENT_TIME - timedelta(hours=2)
+        )
+
+        assert checkpoint.remaining(task) == [
+            (CURRENT_TIME - timedelta(hours=4), CURRENT_TIME - timedelta(hours=3)),
+            (CURRENT_TIME - timedelta(hours=2), CURRENT_TIME),
+        ]
+
+    def test_save_and_load_round_trip(self, tmp_path: Any) -> None:
+        """Completed ranges survive a save and reload."""
+        path = str(tmp_path / "state" / "catchup.json")
+        checkpoint = CatchUpCheckpoint(path)
+        checkpoint.record("vpc_flow", CURRENT_TIME - timedelta(hours=1), CURRENT_TIME)
+        checkpoint.save()
+
+        reloaded = CatchUpCheckpoint(path)
+        reloaded.load()
+
+        assert reloaded.completed == checkpoint.completed
+
+    def test_unreadable_checkpoint_ignored(self, tmp_path: Any) -> None:
+        """A corrupt checkpoint file is treated as empty."""
+        path = tmp_path / "catchup.json"
+        path.write_text("{not json")
+        checkpoint = CatchUpCheckpoint(str(path))
+
+        checkpoint.load()
+
+        assert not checkpoint.completed
+
+
+class TestParallelCatchUpScans:
+    """Test chunk-level parallelism, resume and adaptive chunk sizing."""
+
+    @pytest.mark.asyncio
+    async def test_chunks_of_one_task_run_in_parallel(self) -> None:
+        """Chunks within a single task share the global concurrency budget."""
+        manager = CatchUpScanManager(_catchup_config(max_concurrent_chunks=4))
+        manager.pending_tasks = [
+            CatchUpTask(
+                log_type="audit",
+                start_time=CURRENT_TIME - timedelta(hours=8),
+                end_time=CURRENT_TIME,
+                priority=10,
+            )
+        ]
+        in_flight = 0
+        peak = 0
+
+        async def scan_callback(_chunk_task: CatchUpTask) -> bool:
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return True
+
+        result = await manager.execute_catchup_scans(scan_callback)
+
+        assert result["completed_chunks"] == 8
+        assert peak == 4
+        assert not manager.active_tasks
+
+    @pytest.mark.asyncio
+    async def test_global_budget_shared_across_tasks(self) -> None:
+        """The budget caps chunks in flight across all tasks."""
+        manager = CatchUpScanManager(
+            _catchup_config(max_concurrent_catchup=2, max_concurrent_chunks=3)
+        )
+        manager.pending_tasks = [
+            CatchUpTask(
+                log_type=log_type,
+                start_time=CURRENT_TIME - timedelta(hours=4),
+                end_time=CURRENT_TIME,
+                priority=priority,
+            )
+            for log_type, priority in [("audit", 10), ("vpc_flow", 4), ("firewall", 5)]
+        ]
+        in_flight: dict[str, int] = {}
+        peak_total = 0
+        peak_tasks = 0
+
+        async def scan_callback(chunk_task: CatchUpTask) -> bool:
+            nonlocal peak_total, peak_tasks
+            in_flight[chunk_task.log_type] = in_flight.get(chunk_task.log_type, 0) + 1
+            peak_total = max(peak_total, sum(in_flight.values()))
+            peak_tasks = max(peak_tasks, sum(1 for n in in_flight.values() if n))
+            await asyncio.sleep(0.005)
+            in_flight[chunk_task.log_type] -= 1
+            return True
+
+        result = await manager.execute_catchup_scans(scan_callback)
+
+        assert result["completed_chunks"] == 12
+        assert result["total_tasks"] == 3
+        assert peak_total == 3
+        assert peak_tasks <= 2
+
+    @pytest.mark.asyncio
+    async def test_resume_skips_checkpointed_chunks(self, tmp_path: Any) -> None:
+        """A restarted manager only rescans chunks that did not complete."""
+        config = _catchup_config(
+            checkpoint_path=str(tmp_path / "catchup.json"), max_concurrent_chunks=2
+        )
+
+        def make_task() -> CatchUpTask:
+            return CatchUpTask(
+                log_type="audit",
+                start_time=CURRENT_TIME - timedelta(hours=4),
+                end_time=CURRENT_TIME,
+            )
+
+        failing_start = CURRENT_TIME - timedelta(hours=2)
+
+        async def crashing_scan(chunk_task: CatchUpTask) -> bool:
+            return chunk_task.start_time != failing_start
+
+        first = CatchUpScanManager(config)
+        first.pending_tasks = [make_task()]
+        first_result = await first.execute_catchup_scans(crashing_scan)
+        assert first_result["failed_chunks"] == 1
+
+        rescanned = []
+
+        async def scan_callback(chunk_task: CatchUpTask) -> bool:
+            rescanned.append((chunk_task.start_time, chunk_task.end_time))
+            return True
+
+        restarted = CatchUpScanManager(config)
+        restarted.pending_tasks = [make_task()]
+        result = await restarted.execute_catchup_scans(scan_callback)
+
+        assert rescanned == [(failing_start, failing_start + timedelta(hours=1))]
+        assert result["resumed_seconds"] == 3 * 3600
+        assert result["completed_chunks"] == 1
+
+        # A third run has nothing left to scan
+        finished = CatchUpScanManager(config)
+        finished.pending_tasks = [make_task()]
+        final = await finished.execute_catchup_scans(scan_callback)
+        assert final["total_chunks"] == 0
+        assert final["total_tasks"] == 1
+
+    @pytest.mark.asyncio
+    async def test_adaptive_chunk_size_grows_for_fast_scans(self) -> None:
+        """Chunks grow toward the target latency when scans are fast."""
+        manager = CatchUpScanManager(
+            _catchup_config(
+                max_concurrent_chunks=1,
+                target_chunk_seconds=10.0,
+                min_chunk_minutes=15,
+                max_chunk_minutes=180,
+            )
+        )
+        manager.pending_tasks = [
+            CatchUpTask(
+                log_type="audit",
+                start_time=CURRENT_TIME - timedelta(hours=12),
+                end_time=CURRENT_TIME,
+                chunk_size_minutes=30,
+            )
+        ]
+        chunk_minutes = []
+
+        async def scan_callback(chunk_task: CatchUpTask) -> bool:
+            chunk_minutes.append(
+                (chunk_task.end_time - chunk_task.start_time).total_seconds() / 60
+            )
+            return True
+
+        result = await manager.execute_catchup_scans(scan_callback)
+
+        assert chunk_minutes[0] == 30
+        assert chunk_minutes[1] > chunk_minutes[0]
+        assert max(chunk_minutes) == 180
+        assert sum(chunk_minutes) == 12 * 60
+        assert result["total_chunks"] == len(chunk_minutes) < 24
+
+    @pytest.mark.asyncio
+    async def test_cancelled_scan_releases_its_chunks(self) -> None:
+        """Chunks interrupted by cancellation still finish their task."""
+        manager = CatchUpScanManager(_catchup_config(max_concurrent_chunks=2))
+        manager.pending_tasks = [
+            CatchUpTask(
+                log_type="audit",
+                start_time=CURRENT_TIME - timedelta(hours=2),
+                end_time=CURRENT_TIME,
+            )
+        ]
+        started = asyncio.Event()
+
+        async def scan_callback(_chunk_task: CatchUpTask) -> bool:
+            started.set()
+            await asyncio.sleep(10)
+            return True
+
+        execution = asyncio.create_task(manager.execute_catchup_scans(scan_callback))
+        await started.wait()
+        await asyncio.sleep(0)
+        execution.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await execution
+
+        assert not manager.get_catchup_status()["is_running"]
+        assert [task.log_type for task in manager.completed_tasks] == ["audit"]
@@ -0,0 +1,191 @@
+"""
+Tests for ConcurrentQueryExecutor.
+
+Uses an in-memory BigQuery client with injected latency so concurrency,
+timeouts and cancellation can be verified deterministically.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from src.detection_agent.concurrent_query_executor import (
+    ConcurrentQueryExecutor,
+    QueryExecutionResult,
+)
+from tests.fixtures.fake_bigquery import FakeBigQueryClient, make_row
+
+
+class TestQueryExecutionResult:
+    """Test QueryExecutionResult dataclass."""
+
+    def test_succeeded(self) -> None:
+        """Only successful results are usable."""
+        assert QueryExecutionResult(name="q", status="success").succeeded
+        assert not QueryExecutionResult(name="q", status="timeout").succeeded
+        assert not QueryExecutionResult(name="q", status="error").succeeded
+
+
+class TestConcurrentQueryExecutor:
+    """Test ConcurrentQueryExecutor functionality."""
+
+    def test_invalid_concurrency(self) -> None:
+        """Concurrency limit must be positive."""
+        with pytest.raises(ValueError):
+            ConcurrentQueryExecutor(FakeBigQueryClient(), max_concurrent_queries=0)
+
+    @pytest.mark.asyncio
+    async def test_execute_query_returns_rows(self) -> None:
+        """A single query returns its rows."""
+        rows = [make_row({"actor": "a@example.com"}), make_row({"actor": "b"})]
+        client = FakeBigQueryClient(routes=[("auth", rows)])
+        executor = ConcurrentQueryExecutor(client)
+
+        result = await executor.execute_query("auth", "SELECT auth")
+
+        assert result.succeeded
+        assert [row.actor for row in result.rows] == ["a@example.com", "b"]
+        assert result.error is None
+        assert result.bytes_processed == 0
+
+    @pytest.mark.asyncio
+    async def test_execute_all_runs_in_parallel(self) -> None:
+        """Wall-clock time is bounded by the slowest query, not the sum."""
+        client = FakeBigQueryClient(latency_seconds=0.2)
+        executor = ConcurrentQueryExecutor(client, max_concurrent_queries=4)
+
+        start = time.monotonic()
+        results = await executor.execute_all(
+            {f"q{i}": (f"SELECT {i}", None) for i in range(4)}
+        )
+        elapsed = time.monotonic() - start
+
+        assert list(results) == ["q0", "q1", "q2", "q3"]
+        assert all(result.succeeded for result in results.values())
+        assert elapsed < 0.6
+
+    @pytest.mark.asyncio
+    async def test_concurrency_limit_is_respected(self) -> None:
+        """Queries beyond the concurrency limit wait for a free slot."""
+        client = FakeBigQueryClient(latency_seconds=0.1)
+        executor = ConcurrentQueryExecutor(client, max_concurrent_queries=1)
+
+        start = time.monotonic()
+        await executor.execute_all({f"q{i}": (f"SELECT {i}", None) for i in range(3)})
+
+        assert time.monotonic() - start >= 0.3
+
+    @pytest.mark.asyncio
+    async def test_timeout_cancels_job(self) -> None:
+        """A slow query times out and its job is cancelled."""
+        client = FakeBigQueryClient(
+            latency_seconds=0.01, latency_by_match={"slow": 5.0}
+        )
+        executor = ConcurrentQueryExecutor(client, query_timeout_seconds=0.2)
+
+        results = await executor.execute_all(
+            {"fast": ("SELECT fast", None), "slow": ("SELECT slow", None)}
+        )
+
+        assert results["fast"].succeeded
+        assert results["slow"].status == "timeout"
+        assert "timed out" in (results["slow"].error or "")
+
+        await asyncio.sleep(0.05)
+        slow_job = next(job for job in client.jobs if "slow" in job.query)
+        assert slow_job.cancelled.is_set()
+
+    @pytest.mark.asyncio
+    async def test_error_is_isolated(self) -> None:
+        """A failing query does not affect the others."""
+
+        class FailingClient(FakeBigQueryClient):
+            def query(self, query, job_config=None):  # type: ignore[no-untyped-def]
+                if "bad" in query:
+                    raise RuntimeError("boom")
+                return super().query(query, job_config)
+
+        executor = ConcurrentQueryExecutor(FailingClient())
+        results = await executor.execute_all(
+            {"good": ("SELECT good", None), "bad": ("SELECT bad", None)}
+        )
+
+        assert results["good"].succeeded
+        assert results["bad"].status == "error"
+        assert results["bad"].error == "boom"
+
+    @pytest.mark.asyncio
+    async def test_task_cancellation_cancels_jobs(self) -> None:
+        """Cancelling the awaiting task cancels in-flight BigQuery jobs."""
+        client = FakeBigQueryClient(latency_seconds=5.0)
+        executor = ConcurrentQueryExecutor(client, query_timeout_seconds=10)
+
+        task = asyncio.create_task(
+            executor.execute_all({"q1": ("SELECT 1", None), "q2": ("SELECT 2", None)})
+        )
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        await asyncio.sleep(0.05)
+        assert len(client.jobs) == 2
+        assert all(job.cancelled.is_set() for job in client.jobs)
+
+    @pytest.mark.asyncio
+    async def test_event_loop_not_blocked(self) -> None:
+        """Other coroutines keep running while queries are in flight."""
+        client = FakeBigQueryClient(latency_seconds=0.3)
+        executor = ConcurrentQueryExecutor(client)
+        ticks = 0
+
+        async def ticker() -> None:
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticker_task = asyncio.create_task(ticker())
+        await executor.execute_query("q", "SELECT 1")
+        ticker_task.cancel()
+
+        assert ticks >= 10
+
+    @pytest.mark.asyncio
+    async def test_same_name_calls_track_their_own_jobs(self) -> None:
+        """A timeout for one call does not cancel another call with the same name."""
+        client = FakeBigQueryClient(latency_by_match={"slow": 5.0, "steady": 0.3})
+        executor = ConcurrentQueryExecutor(client)
+
+        slow, steady = await asyncio.gather(
+            executor.execute_query("auth", "SELECT slow", timeout_seconds=0.1),
+            executor.execute_query("auth", "SELECT steady", timeout_seconds=2),
+        )
+        await asyncio.sleep(0.05)
+
+        assert slow.status == "timeout"
+        assert steady.succeeded
+        jobs = {job.query: job for job in client.jobs}
+        assert jobs["SELECT slow"].cancelled.is_set()
+        assert not jobs["SELECT steady"].cancelled.is_set()
+
+    @pytest.mark.asyncio
+    async def test_timeout_during_submission_cancels_job(self) -> None:
+        """A job submitted after its call timed out is cancelled once it exists."""
+
+        class SlowSubmitClient(FakeBigQueryClient):
+            def query(self, query, job_config=None):  # type: ignore[no-untyped-def]
+                time.sleep(0.3)
+                return super().query(query, job_config)
+
+        client = SlowSubmitClient(latency_seconds=5.0)
+        executor = ConcurrentQueryExecutor(client, query_timeout_seconds=0.1)
+
+        result = await executor.execute_query("q", "SELECT 1")
+        assert result.status == "timeout"
+
+        await asyncio.sleep(0.4)
+        assert len(client.jobs) == 1
+        assert client.jobs[0].cancelled.is_set()
+        assert not executor._active_jobs
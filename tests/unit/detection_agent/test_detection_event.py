@@ -0,0 +1,134 @@
+"""
+Tests for the compact DetectionEvent representation.
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from src.detection_agent.adk_agent import AnomalyDetectionTool
+from src.detection_agent.detection_event import (
+    DetectionEvent,
+    from_epoch_us,
+    to_epoch_us,
+)
+from tests.fixtures.fake_bigquery import make_row
+
+BASE_TIME = datetime(2024, 1, 1, 12, 0, 0, 123456, tzinfo=timezone.utc)
+
+
+def _row(**overrides):  # type: ignore[no-untyped-def]
+    """Build a failed authentication result row."""
+    values = {
+        "timestamp": BASE_TIME,
+        "actor": "user@example.com",
+        "source_ip": "10.0.0.1",
+        "method_name": "SetIamPolicy",
+        "status_code": 403,
+        "error_message": "Permission denied",
+        "resource_type": "project",
+        "project": "test-project",
+    }
+    values.update(overrides)
+    return make_row(values)
+
+
+class TestEpochConversion:
+    """Test epoch microsecond conversion."""
+
+    def test_round_trip_aware(self) -> None:
+        """Aware datetimes survive conversion with their time zone."""
+        assert from_epoch_us(to_epoch_us(BASE_TIME), timezone.utc) == BASE_TIME
+
+    def test_round_trip_naive(self) -> None:
+        """Naive datetimes are treated as UTC and come back naive."""
+        naive = BASE_TIME.replace(tzinfo=None)
+        assert to_epoch_us(naive) == to_epoch_us(BASE_TIME)
+        assert from_epoch_us(to_epoch_us(naive)) == naive
+
+
+class TestDetectionEvent:
+    """Test DetectionEvent functionality."""
+
+    def test_to_dict_matches_row_conversion(self) -> None:
+        """to_dict gives the same dictionary the tool produced for a row."""
+        row = _row()
+        event = DetectionEvent.from_row("failed_authentication", row)
+
+        assert event.to_dict() == {
+            "query_type": "failed_authentication",
+            "timestamp": BASE_TIME.isoformat(),
+            "actor": "user@example.com",
+            "source_ip": "10.0.0.1",
+            "method_name": "SetIamPolicy",
+            "resource_type": "project",
+            "raw_data": dict(row),
+            "status_code": 403,
+            "error_message": "Permission denied",
+        }
+
+    def test_raw_data_optional(self) -> None:
+        """raw_data is only kept on request."""
+        event = DetectionEvent.from_row(
+            "failed_authentication", _row(), include_raw_data=False
+        )
+
+        assert event.raw_data is None
+        assert "raw_data" not in event.to_dict()
+
+    def test_query_specific_defaults(self) -> None:
+        """Missing query-specific columns get fresh defaults."""
+        first = DetectionEvent.from_row("firewall_modifications", _row())
+        second = DetectionEvent.from_row("firewall_modifications", _row())
+
+        assert first.to_dict()["source_ranges"] == []
+        assert first.source_ranges is not second.source_ranges
+        assert "status_code" not in first.to_dict()
+
+    def test_from_dict_round_trip(self) -> None:
+        """An event rebuilt from its dictionary form is equal."""
+        event = DetectionEvent.from_row("failed_authentication", _row())
+
+        assert DetectionEvent.from_dict(event.to_dict()) == event
+
+    def test_strings_are_interned(self) -> None:
+        """Repeated actors share one string object."""
+        first = DetectionEvent.from_row(
+            "failed_authentication", _row(actor="".join(["shared@", "example.com"]))
+        )
+        second = DetectionEvent.from_row(
+            "failed_authentication", _row(actor="".join(["shared", "@example.com"]))
+        )
+
+        assert first.actor is second.actor
+
+    def test_no_instance_dict(self) -> None:
+        """Events are slotted."""
+        event = DetectionEvent.from_row("failed_authentication", _row())
+
+        assert not hasattr(event, "__dict__")
+
+
+class TestAnomalyDetectionWithCompactEvents:
+    """Test AnomalyDetectionTool with compact and dictionary events."""
+
+    @pytest.mark.asyncio
+    async def test_compact_and_dict_groups_detect_the_same(self) -> None:
+        """Compact groups give the same anomalies as their dictionary form."""
+        group = [
+            DetectionEvent.from_row("failed_authentication", _row(), False)
+            for _ in range(5)
+        ]
+        tool = AnomalyDetectionTool({})
+
+        compact = await tool.execute(None, events=[group])  # type: ignore[arg-type]
+        dicts = await tool.execute(
+            None, events=[[event.to_dict() for event in group]]  # type: ignore[arg-type]
+        )
+
+        assert [a["type"] for a in compact["anomalies"]] == ["brute_force_attempt"]
+        assert [a["type"] for a in dicts["anomalies"]] == ["brute_force_attempt"]
+        assert compact["anomalies"][0]["event"] == group[0].to_dict()
+        assert compact["anomalies"][0]["related_events"] == dicts["anomalies"][0][
+            "related_events"
+        ]
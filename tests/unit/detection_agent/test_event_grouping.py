@@ -0,0 +1,223 @@
+"""
+Tests for IndexedEventGrouper and StreamingEventGrouper.
+
+The groupers must produce exactly the groups of the original pairwise
+DetectionAgent._correlate_events implementation, reproduced below as the
+reference.
+"""
+
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+import pytest
+
+from src.detection_agent.event_grouping import (
+    IndexedEventGrouper,
+    StreamingEventGrouper,
+)
+
+BASE_TIME = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def reference_correlate(events: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """Original nested-loop grouping kept as the behavioural reference."""
+    correlated = []
+    processed = set()
+
+    for i, event in enumerate(events):
+        if i in processed:
+            continue
+
+        group = [event]
+        processed.add(i)
+
+        actor = event.get("actor", "")
+        source_ip = event.get("source_ip", "")
+        event_time = datetime.fromisoformat(event["timestamp"])
+
+        for j, other in enumerate(events[i + 1:], start=i + 1):
+            if j in processed:
+                continue
+
+            other_time = datetime.fromisoformat(other["timestamp"])
+            if abs(event_time - other_time) <= timedelta(minutes=10):
+                if (actor and actor == other.get("actor")) or (
+                    source_ip and source_ip == other.get("source_ip")
+                ):
+                    group.append(other)
+                    processed.add(j)
+
+        correlated.append(group)
+
+    return correlated
+
+
+def make_events(count: int, seed: int, actors: int = 20, ips: int = 30) -> List[Dict[str, Any]]:
+    """Generate random scan events over a two hour span."""
+    rng = random.Random(seed)
+    events = []
+    for index in range(count):
+        events.append(
+            {
+                "id": index,
+                "query_type": rng.choice(["failed_authentication", "privilege_escalation"]),
+                "timestamp": (
+                    BASE_TIME + timedelta(seconds=rng.randint(0, 7200))
+                ).isoformat(),
+                "actor": rng.choice([f"user{rng.randint(0, actors)}@example.com", "", None]),
+                "source_ip": rng.choice([f"10.0.0.{rng.randint(0, ips)}", ""]),
+            }
+        )
+    return events
+
+
+def group_ids(groups: List[List[Dict[str, Any]]]) -> List[List[int]]:
+    """Reduce groups to event ids for comparison."""
+    return [[event["id"] for event in group] for group in groups]
+
+
+class TestIndexedEventGrouper:
+    """Test IndexedEventGrouper functionality."""
+
+    def test_empty_events(self) -> None:
+        """No events yields no groups."""
+        assert IndexedEventGrouper().group_events([]) == []
+
+    def test_groups_by_actor_within_window(self) -> None:
+        """Events by the same actor inside the window are grouped."""
+        events = [
+            {"id": 0, "timestamp": BASE_TIME.isoformat(), "actor": "a", "source_ip": "1"},
+            {
+                "id": 1,
+                "timestamp": (BASE_TIME + timedelta(minutes=5)).isoformat(),
+                "actor": "a",
+                "source_ip": "2",
+            },
+            {
+                "id": 2,
+                "timestamp": (BASE_TIME + timedelta(minutes=11)).isoformat(),
+                "actor": "a",
+                "source_ip": "3",
+            },
+        ]
+
+        assert group_ids(IndexedEventGrouper().group_events(events)) == [[0, 1], [2]]
+
+    def test_groups_by_source_ip(self) -> None:
+        """Events from the same IP are grouped even with different actors."""
+        events = [
+            {"id": 0, "timestamp": BASE_TIME.isoformat(), "actor": "a", "source_ip": "1"},
+            {"id": 1, "timestamp": BASE_TIME.isoformat(), "actor": "b", "source_ip": "1"},
+            {"id": 2, "timestamp": BASE_TIME.isoformat(), "actor": "c", "source_ip": "2"},
+        ]
+
+        assert group_ids(IndexedEventGrouper().group_events(events)) == [[0, 1], [2]]
+
+    def test_window_boundary_is_inclusive(self) -> None:
+        """An event exactly at the window edge is grouped."""
+        events = [
+            {"id": 0, "timestamp": BASE_TIME.isoformat(), "actor": "a"},
+            {"id": 1, "timestamp": (BASE_TIME + timedelta(minutes=10)).isoformat(), "actor": "a"},
+            {"id": 2, "timestamp": (BASE_TIME - timedelta(minutes=10)).isoformat(), "actor": "a"},
+        ]
+
+        assert group_ids(IndexedEventGrouper().group_events(events)) == [[0, 1, 2]]
+
+    def test_grouping_is_not_transitive(self) -> None:
+        """Membership is relative to the seed event, not to other members."""
+        events = [
+            {"id": 0, "timestamp": BASE_TIME.isoformat(), "actor": "a", "source_ip": "1"},
+            {"id": 1, "timestamp": BASE_TIME.isoformat(), "actor": "b", "source_ip": "1"},
+            {"id": 2, "timestamp": BASE_TIME.isoformat(), "actor": "b", "source_ip": "2"},
+        ]
+
+        assert group_ids(IndexedEventGrouper().group_events(events)) == [[0, 1], [2]]
+
+    def test_events_without_actor_or_ip_stand_alone(self) -> None:
+        """Events with no actor or IP only form singleton groups."""
+        events = [
+            {"id": 0, "timestamp": BASE_TIME.isoformat(), "actor": "", "source_ip": ""},
+            {"id": 1, "timestamp": BASE_TIME.isoformat(), "actor": None, "source_ip": ""},
+        ]
+
+        assert group_ids(IndexedEventGrouper().group_events(events)) == [[0], [1]]
+
+    @pytest.mark.parametrize("seed", range(10))
+    def test_matches_reference_implementation(self, seed: int) -> None:
+        """Random inputs produce the same groups as the pairwise reference."""
+        events = make_events(400, seed, actors=8, ips=6)
+
+        expected = reference_correlate(events)
+        actual = IndexedEventGrouper().group_events(events)
+
+        assert group_ids(actual) == group_ids(expected)
+        assert all(a is e for ga, ge in zip(actual, expected) for a, e in zip(ga, ge))
+
+
+def stream_groups(
+    grouper: StreamingEventGrouper, events: List[Dict[str, Any]]
+) -> List[List[Dict[str, Any]]]:
+    """Feed events through a streaming grouper and collect every group."""
+    groups = []
+    for event in events:
+        groups.extend(grouper.add(event))
+    groups.extend(grouper.flush())
+    return groups
+
+
+class TestStreamingEventGrouper:
+    """Test StreamingEventGrouper functionality."""
+
+    def test_group_emitted_once_window_closes(self) -> None:
+        """A group is emitted when an event past its window arrives."""
+        grouper = StreamingEventGrouper()
+        first = {"id": 0, "timestamp": BASE_TIME.isoformat(), "actor": "a"}
+        second = {
+            "id": 1,
+            "timestamp": (BASE_TIME + timedelta(minutes=10)).isoformat(),
+            "actor": "a",
+        }
+        later = {
+            "id": 2,
+            "timestamp": (BASE_TIME + timedelta(minutes=10, seconds=1)).isoformat(),
+            "actor": "b",
+        }
+
+        assert grouper.add(first) == []
+        assert grouper.add(second) == []
+        assert group_ids(grouper.add(later)) == [[0, 1]]
+        assert group_ids(grouper.flush()) == [[2]]
+
+    @pytest.mark.parametrize("seed", range(10))
+    def test_matches_indexed_grouper_on_ordered_stream(self, seed: int) -> None:
+        """Time-ordered streams produce the same groups as batch grouping."""
+        events = sorted(
+            make_events(400, seed, actors=8, ips=6), key=lambda e: e["timestamp"]
+        )
+
+        expected = IndexedEventGrouper().group_events(events)
+        actual = stream_groups(StreamingEventGrouper(), events)
+
+        assert group_ids(actual) == group_ids(expected)
+
+    def test_buffer_bounded_by_window(self) -> None:
+        """Only events within the window of the newest event are buffered."""
+        grouper = StreamingEventGrouper(window_minutes=1)
+        peak = 0
+        for index in range(2_000):
+            grouper.add(
+                {
+                    "id": index,
+                    "timestamp": (BASE_TIME + timedelta(seconds=index)).isoformat(),
+                    "actor": f"user{index % 7}",
+                    "source_ip": f"10.0.0.{index % 11}",
+                }
+            )
+            peak = max(peak, grouper.pending_count)
+
+        assert peak <= 62
+        assert len(grouper._by_actor) <= 7
+        grouper.flush()
+        assert grouper.pending_count == 0
+        assert not grouper._by_actor and not grouper._by_ip
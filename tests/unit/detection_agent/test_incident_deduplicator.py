@@ -8,7 +8,9 @@ merging, hashing, and cache management for real security operations.
 Coverage target: ≥90% statement coverage of src/detection_agent/incident_deduplicator.py
 """
 
+import random
 from datetime import datetime, timedelta, timezone
+from typing import List, Optional
 
 import pytest
 
@@ -689,7 +691,6 @@ class TestIncidentDeduplicator:
         """Test cleanup of old incidents from cache."""
         now = datetime.now(timezone.utc)
 
-        # Add incidents to cache manually
         old_incident1 = Incident(
             incident_id="old-1",
             created_at=now - timedelta(hours=25),
@@ -708,13 +709,9 @@ class TestIncidentDeduplicator:
             title="Recent Incident",
         )
 
-        # Manually add to cache
-        deduplicator._recent_incidents["old-1"] = old_incident1
-        deduplicator._recent_incidents["old-2"] = old_incident2
-        deduplicator._recent_incidents["recent-1"] = recent_incident
-        deduplicator._incident_hashes["old-1"] = "hash1"
-        deduplicator._incident_hashes["old-2"] = "hash2"
-        deduplicator._incident_hashes["recent-1"] = "hash3"
+        deduplicator.register_incident(old_incident1)
+        deduplicator.register_incident(old_incident2)
+        deduplicator.register_incident(recent_incident)
 
         removed_count = deduplicator.cleanup_old_incidents()
 
@@ -939,3 +936,119 @@ class TestIncidentDeduplicator:
 
 if __name__ == "__main__":
     pytest.main([__file__])
+
+
+def reference_is_duplicate(
+    deduplicator: IncidentDeduplicator,
+    new_incident: Incident,
+    existing_incidents: List[Incident],
+) -> Optional[Incident]:
+    """Original linear scan over every existing incident, kept as the reference."""
+    cutoff_time = datetime.now(timezone.utc) - deduplicator.time_window
+    recent_incidents = [
+        inc for inc in existing_incidents if inc.created_at > cutoff_time
+    ]
+    new_hash = deduplicator._calculate_incident_hash(new_incident)
+    for incident in recent_incidents:
+        if deduplicator._calculate_incident_hash(incident) == new_hash:
+            return incident
+    for incident in recent_incidents:
+        score = deduplicator._calculate_similarity(new_incident, incident)
+        if score >= deduplicator.similarity_threshold:
+            return incident
+    return None
+
+
+def make_incidents(count: int, seed: int, vocabulary: int = 6) -> List[Incident]:
+    """Generate random incidents drawing tokens from a small vocabulary."""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    severities = [SeverityLevel.HIGH, SeverityLevel.MEDIUM, SeverityLevel.LOW]
+    incidents = []
+    for index in range(count):
+        events = [
+            SecurityEvent(
+                event_id=f"event-{index}-{position}",
+                event_type=f"type-{rng.randrange(vocabulary)}",
+                source=EventSource("gcp", "cloud-logging", f"log-{index}"),
+                actor=rng.choice([None, f"user-{rng.randrange(vocabulary)}"]),
+                affected_resources=[
+                    f"resource-{rng.randrange(vocabulary)}"
+                    for _ in range(rng.randrange(3))
+                ],
+            )
+            for position in range(rng.randrange(4))
+        ]
+        incidents.append(
+            Incident(
+                incident_id=f"incident-{index}",
+                created_at=now - timedelta(hours=rng.uniform(0, 30)),
+                severity=rng.choice(severities),
+                events=events,
+                tags=[f"tag-{rng.randrange(vocabulary)}" for _ in range(rng.randrange(3))],
+            )
+        )
+    return incidents
+
+
+class TestIncidentIndex:
+    """Test the indexed duplicate lookup against the linear reference."""
+
+    @pytest.mark.parametrize("seed", range(5))
+    @pytest.mark.parametrize("threshold", [0.3, 0.6, 0.8, 0.95])
+    def test_registered_lookup_matches_reference(self, seed: int, threshold: float) -> None:
+        """Checks against registered incidents agree with a linear scan."""
+        incidents = make_incidents(120, seed)
+        existing, new = incidents[:80], incidents[80:]
+        deduplicator = IncidentDeduplicator(similarity_threshold=threshold)
+        for incident in existing:
+            deduplicator.register_incident(incident)
+
+        for incident in new:
+            expected = reference_is_duplicate(deduplicator, incident, existing)
+            assert deduplicator.is_duplicate(incident) is expected
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_list_lookup_matches_reference(self, seed: int) -> None:
+        """An explicit list is checked in list order, ignoring other incidents."""
+        incidents = make_incidents(120, seed)
+        deduplicator = IncidentDeduplicator(similarity_threshold=0.6)
+        for incident in incidents[:40]:
+            deduplicator.register_incident(incident)
+        existing = list(reversed(incidents[20:80]))
+
+        for incident in incidents[80:]:
+            expected = reference_is_duplicate(deduplicator, incident, existing)
+            assert deduplicator.is_duplicate(incident, existing) is expected
+
+    def test_reindexes_after_update(self) -> None:
+        """Events added to a registered incident are found by later lookups."""
+        deduplicator = IncidentDeduplicator(similarity_threshold=0.8)
+        source = EventSource("gcp", "cloud-logging", "log-1")
+        registered = Incident(incident_id="registered")
+        deduplicator.register_incident(registered)
+        event = SecurityEvent(
+            event_id="event-1", event_type="login", source=source, actor="alice"
+        )
+        new = Incident(incident_id="new", events=[event])
+
+        assert deduplicator.is_duplicate(new) is None
+
+        deduplicator.update_existing_incident(registered, [event])
+
+        assert deduplicator.is_duplicate(new) is registered
+
+    def test_cleanup_releases_index_entries(self) -> None:
+        """Expired incidents leave no hash or token index entries behind."""
+        deduplicator = IncidentDeduplicator()
+        for incident in make_incidents(50, seed=3):
+            deduplicator.register_incident(incident)
+
+        deduplicator.time_window = timedelta(0)
+        removed = deduplicator.cleanup_old_incidents()
+
+        assert removed == 50
+        assert not deduplicator._recent_incidents
+        assert not deduplicator._hash_index
+        assert not deduplicator._token_index
+        assert not deduplicator._expiry_heap
@@ -970,5 +970,46 @@ class TestInterimResultsStorage:
         # Implementation would go here if needed
 
 
+class TestInterimResultsStorageLimits:
+    """Test least-recently-used eviction and byte limits."""
+
+    def test_evicts_least_recently_used(self) -> None:
+        """A recently retrieved result survives eviction of older ones."""
+        config = {"agents": {"detection": {"interim_storage": {"max_results": 3}}}}
+        storage = InterimResultsStorage(config)
+        for i in range(3):
+            storage.store(f"lru-{i}", "test", "test", {"i": i})
+
+        assert storage.retrieve("lru-0") == {"i": 0}
+        storage.store("lru-3", "test", "test", {"i": 3})
+
+        assert storage.retrieve("lru-0") == {"i": 0}
+        assert storage.retrieve("lru-1") is None
+        assert len(storage._storage) == 3
+
+    def test_overwrite_does_not_evict(self) -> None:
+        """Replacing an existing result keeps the other results."""
+        config = {"agents": {"detection": {"interim_storage": {"max_results": 2}}}}
+        storage = InterimResultsStorage(config)
+        storage.store("a", "test", "test", 1)
+        storage.store("b", "test", "test", 2)
+        storage.store("a", "test", "test", 3)
+
+        assert storage.retrieve("a") == 3
+        assert storage.retrieve("b") == 2
+
+    def test_max_bytes_limit(self) -> None:
+        """Results are evicted once stored data exceeds max_bytes."""
+        config = {"agents": {"detection": {"interim_storage": {"max_bytes": 20_000}}}}
+        storage = InterimResultsStorage(config)
+        for i in range(10):
+            storage.store(f"big-{i}", "test", "test", ["x" * 5_000])
+
+        stats = storage.get_stats()
+        assert 0 < stats["size_bytes"] <= 20_000
+        assert stats["total_results"] < 10
+        assert storage.retrieve("big-9") is not None
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,138 @@
+"""Tests for LruTtlStore and estimate_size."""
+
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any
+
+from src.detection_agent.lru_ttl_store import LruTtlStore, estimate_size
+
+NOW = datetime(2024, 1, 1, 12, 0, 0)
+
+
+@dataclass
+class Entry:
+    """Minimal stored value."""
+
+    value: Any
+    expires_at: datetime
+
+
+def make_store() -> LruTtlStore:
+    """Create a store sized by the entry payload."""
+    return LruTtlStore(lambda entry: estimate_size(entry.value))
+
+
+class TestLruTtlStore:
+    """Test LruTtlStore functionality."""
+
+    def test_pop_lru_follows_recency(self) -> None:
+        """Touched and reassigned keys move to the most recently used end."""
+        store = make_store()
+        for key in "abcd":
+            store[key] = Entry(key, NOW)
+
+        store.touch("a")
+        store["b"] = Entry("b2", NOW)
+
+        assert list(store) == ["c", "d", "a", "b"]
+        assert store.pop_lru()[0] == "c"
+        assert len(store) == 3
+
+    def test_pop_lru_empty(self) -> None:
+        """An empty store has nothing to evict."""
+        assert make_store().pop_lru() is None
+
+    def test_pop_expired_in_expiry_order(self) -> None:
+        """Only entries expired before now are removed, earliest first."""
+        store = make_store()
+        store["late"] = Entry(1, NOW - timedelta(minutes=1))
+        store["early"] = Entry(2, NOW - timedelta(minutes=5))
+        store["live"] = Entry(3, NOW + timedelta(minutes=5))
+
+        removed = store.pop_expired(NOW)
+
+        assert [key for key, _ in removed] == ["early", "late"]
+        assert list(store) == ["live"]
+
+    def test_extended_expiry_is_respected(self) -> None:
+        """Extending expires_at in place keeps the entry alive."""
+        store = make_store()
+        store["a"] = Entry(1, NOW - timedelta(minutes=1))
+        store["a"].expires_at = NOW + timedelta(minutes=10)
+
+        assert store.pop_expired(NOW) == []
+        assert store.pop_expired(NOW + timedelta(minutes=11))[0][0] == "a"
+
+    def test_replaced_and_deleted_entries_do_not_expire_twice(self) -> None:
+        """Stale heap entries of replaced or deleted keys are skipped."""
+        store = make_store()
+        store["a"] = Entry(1, NOW - timedelta(minutes=1))
+        store["a"] = Entry(2, NOW + timedelta(minutes=1))
+        store["b"] = Entry(3, NOW - timedelta(minutes=1))
+        del store["b"]
+
+        assert store.pop_expired(NOW) == []
+        assert store["a"].value == 2
+
+    def test_byte_accounting(self) -> None:
+        """Total bytes track assignment, replacement and removal."""
+        store = make_store()
+        store["a"] = Entry("x" * 1000, NOW)
+        store["b"] = Entry("y" * 10, NOW)
+        assert store.total_bytes == store.size_of("a") + store.size_of("b")
+
+        store["a"] = Entry("z", NOW)
+        del store["b"]
+        store.pop_expired(NOW + timedelta(seconds=1))
+
+        assert store.total_bytes == 0
+        store["c"] = Entry([1, 2], NOW)
+        store.clear()
+        assert store.total_bytes == 0 and len(store) == 0
+
+    def test_heap_compacts_under_churn(self) -> None:
+        """Repeated replacement does not grow the expiry heap without bound."""
+        store = make_store()
+        for index in range(10_000):
+            store[f"key{index % 10}"] = Entry(index, NOW)
+
+        assert len(store._expiry_heap) <= 2 * len(store) + 65
+
+    def test_matches_reference_lru(self) -> None:
+        """Random operations evict the same keys as a list-based reference."""
+        rng = random.Random(5)
+        store = make_store()
+        reference: list = []
+        for _ in range(2_000):
+            key = f"k{rng.randrange(50)}"
+            if rng.random() < 0.5:
+                store[key] = Entry(key, NOW)
+                if key in reference:
+                    reference.remove(key)
+                reference.append(key)
+            elif key in store:
+                store.touch(key)
+                reference.remove(key)
+                reference.append(key)
+            if len(store) > 20:
+                assert store.pop_lru()[0] == reference.pop(0)
+
+        assert list(store) == reference
+
+
+class TestEstimateSize:
+    """Test estimate_size."""
+
+    def test_counts_nested_containers(self) -> None:
+        """Nested values add to the size of their container."""
+        assert estimate_size({"a": ["x" * 1000]}) > estimate_size({"a": []}) + 1000
+
+    def test_shared_objects_counted_once(self) -> None:
+        """An object referenced twice is only counted once."""
+        payload = "x" * 1000
+        assert estimate_size([payload, payload]) < estimate_size([payload, "y" * 1000])
+
+    def test_follows_slots_and_instance_attributes(self) -> None:
+        """Slotted and regular objects include their attribute values."""
+        assert estimate_size(Entry("x" * 1000, NOW)) > 1000
@@ -11,10 +11,12 @@ REQUIREMENTS:
 
 from datetime import datetime, timedelta
 import time
-from dataclasses import asdict
+from dataclasses import asdict, replace
 from typing import Dict, Any
 
-from detection_agent.query_cache import CacheEntry, QueryCache
+import pytest
+
+from detection_agent.query_cache import CacheEntry, QueryCache, WindowLookup
 
 
 class TestCacheEntry:
@@ -531,12 +533,18 @@ class TestQueryCache:
             "enabled": True,
             "size": 0,
             "max_size": 1000,
+            "size_bytes": 0,
+            "max_bytes": None,
             "hits": 0,
             "misses": 0,
             "evictions": 0,
             "total_queries": 0,
             "hit_rate": "0.00%",
             "default_ttl_minutes": 60,
+            "bucket_hits": 0,
+            "bucket_misses": 0,
+            "bucket_hit_ratio": 0.0,
+            "bytes_avoided": 0,
         }
 
         assert stats == expected_stats
@@ -765,3 +773,233 @@ class TestQueryCache:
         cache.put(query + "_nested", nested_result, start_time, end_time)
         cached_nested = cache.get(query + "_nested", start_time, end_time)
         assert cached_nested == nested_result
+
+
+class TestBucketedWindowCache:
+    """Test time-bucketed window caching."""
+
+    QUERY = "SELECT * FROM audit WHERE method_name = 'SetIamPolicy'"
+    BASE = datetime(2024, 1, 1, 12, 0, 0)
+
+    def _rows(self, start: datetime, minutes: int, per_minute: int = 2) -> list:
+        """Build event rows spread over whole minutes after start."""
+        return [
+            {
+                "timestamp": (
+                    start + timedelta(minutes=minute, seconds=10 + 20 * i)
+                ).isoformat(),
+                "actor": f"user{minute}",
+            }
+            for minute in range(minutes)
+            for i in range(per_minute)
+        ]
+
+    def test_window_lookup_defaults(self) -> None:
+        """Test an empty WindowLookup is fully cached."""
+        lookup = WindowLookup()
+        assert lookup.fully_cached
+        assert lookup.rows == []
+
+    def test_put_window_caches_complete_buckets(self) -> None:
+        """Test only buckets fully inside the window are cached."""
+        cache = QueryCache({})
+        start = self.BASE + timedelta(seconds=30)
+        end = self.BASE + timedelta(minutes=5, seconds=30)
+
+        cached = cache.put_window(self.QUERY, self._rows(self.BASE, 6), start, end)
+
+        # Buckets 12:01-12:05 are complete, the two edge buckets are partial
+        assert cached == 4
+        assert all(entry.bucket_start is not None for entry in cache._cache.values())
+
+    def test_overlapping_window_queries_only_uncovered_slice(self) -> None:
+        """Test a shifted window reuses cached buckets."""
+        cache = QueryCache({})
+        first_end = self.BASE + timedelta(minutes=5)
+        rows = self._rows(self.BASE, 5)
+        cache.put_window(self.QUERY, rows, self.BASE, first_end, bytes_processed=5000)
+
+        second_start = self.BASE + timedelta(minutes=4)
+        second_end = self.BASE + timedelta(minutes=6)
+        lookup = cache.get_window(self.QUERY, second_start, second_end)
+
+        assert lookup.buckets_hit == 1
+        assert lookup.buckets_missed == 1
+        assert lookup.missing_ranges == [(first_end, second_end)]
+        assert len(lookup.rows) == 2
+
+        stats = cache.get_stats()
+        assert stats["bucket_hits"] == 1
+        assert stats["bucket_misses"] == 1
+        assert stats["bucket_hit_ratio"] == 0.5
+        assert stats["bytes_avoided"] == 1000
+
+    def test_edge_bucket_rows_filtered_to_window(self) -> None:
+        """Test rows outside a partially covered bucket are dropped."""
+        cache = QueryCache({})
+        cache.put_window(
+            self.QUERY, self._rows(self.BASE, 2), self.BASE, self.BASE + timedelta(minutes=2)
+        )
+
+        lookup = cache.get_window(
+            self.QUERY,
+            self.BASE + timedelta(seconds=20),
+            self.BASE + timedelta(minutes=2),
+        )
+
+        # Only the row at 12:00:30 of the first bucket is after 12:00:20
+        assert lookup.fully_cached
+        assert len(lookup.rows) == 3
+
+    def test_contiguous_missing_buckets_merged(self) -> None:
+        """Test missing buckets collapse into one query range."""
+        cache = QueryCache({})
+        start = self.BASE + timedelta(seconds=15)
+        end = self.BASE + timedelta(minutes=3, seconds=45)
+
+        lookup = cache.get_window(self.QUERY, start, end)
+
+        assert lookup.buckets_missed == 4
+        assert lookup.missing_ranges == [(start, end)]
+
+    def test_rule_type_isolates_buckets(self) -> None:
+        """Test buckets are keyed per rule type."""
+        cache = QueryCache({})
+        end = self.BASE + timedelta(minutes=2)
+        cache.put_window(self.QUERY, self._rows(self.BASE, 2), self.BASE, end, rule_type="a")
+
+        assert cache.get_window(self.QUERY, self.BASE, end, rule_type="a").fully_cached
+        assert not cache.get_window(self.QUERY, self.BASE, end, rule_type="b").fully_cached
+
+    def test_settle_time_skips_recent_buckets(self) -> None:
+        """Test buckets newer than the settle time are not cached."""
+        config = {"agents": {"detection": {"query_cache": {"bucket_settle_seconds": 600}}}}
+        cache = QueryCache(config)
+        end = datetime.now().replace(second=0, microsecond=0)
+        start = end - timedelta(minutes=20)
+
+        cached = cache.put_window(self.QUERY, self._rows(start, 20), start, end)
+
+        assert cached == 10
+
+    def test_rows_without_timestamp_not_cached(self) -> None:
+        """Test rows that cannot be bucketed disable caching for the window."""
+        cache = QueryCache({})
+        end = self.BASE + timedelta(minutes=2)
+
+        assert cache.put_window(self.QUERY, [{"actor": "x"}], self.BASE, end) == 0
+        assert len(cache._cache) == 0
+
+    def test_results_at_row_limit_not_cached(self) -> None:
+        """Test a window result that reached its LIMIT is treated as truncated."""
+        cache = QueryCache({})
+        end = self.BASE + timedelta(minutes=3)
+        rows = self._rows(self.BASE, 3)
+
+        assert cache.put_window(self.QUERY, rows, self.BASE, end, row_limit=len(rows)) == 0
+        assert cache.put_window(self.QUERY, rows, self.BASE, end, row_limit=len(rows) + 1) == 3
+
+    def test_disabled_cache_returns_whole_window(self) -> None:
+        """Test a disabled cache reports the full window as missing."""
+        cache = QueryCache({"agents": {"detection": {"query_cache": {"enabled": False}}}})
+        end = self.BASE + timedelta(minutes=2)
+
+        assert cache.put_window(self.QUERY, self._rows(self.BASE, 2), self.BASE, end) == 0
+        assert cache.get_window(self.QUERY, self.BASE, end).missing_ranges == [
+            (self.BASE, end)
+        ]
+
+    def test_invalidate_removes_buckets(self) -> None:
+        """Test rule-type invalidation also applies to bucket entries."""
+        cache = QueryCache({})
+        end = self.BASE + timedelta(minutes=3)
+        cache.put_window(self.QUERY, self._rows(self.BASE, 3), self.BASE, end, rule_type="r")
+
+        assert cache.invalidate(rule_type="r") == 3
+        assert not cache.get_window(self.QUERY, self.BASE, end, rule_type="r").fully_cached
+
+    @pytest.mark.asyncio
+    async def test_get_or_fetch_window_fetches_only_gaps(self) -> None:
+        """Test the fetch callback is only called for uncovered slices."""
+        cache = QueryCache({})
+        all_rows = self._rows(self.BASE, 10)
+        fetched_ranges = []
+
+        async def fetch(range_start: datetime, range_end: datetime):  # type: ignore[no-untyped-def]
+            fetched_ranges.append((range_start, range_end))
+            rows = [
+                row for row in all_rows
+                if range_start < datetime.fromisoformat(row["timestamp"]) <= range_end
+            ]
+            return rows, 1000 * len(rows)
+
+        first = await cache.get_or_fetch_window(
+            self.QUERY, self.BASE, self.BASE + timedelta(minutes=5), fetch
+        )
+        second = await cache.get_or_fetch_window(
+            self.QUERY,
+            self.BASE + timedelta(minutes=4),
+            self.BASE + timedelta(minutes=10),
+            fetch,
+        )
+
+        assert len(first) == 10
+        assert len(second) == 12
+        assert fetched_ranges == [
+            (self.BASE, self.BASE + timedelta(minutes=5)),
+            (self.BASE + timedelta(minutes=5), self.BASE + timedelta(minutes=10)),
+        ]
+        assert cache.get_stats()["bytes_avoided"] > 0
+
+
+class TestQueryCacheLimits:
+    """Test least-recently-used eviction and byte limits."""
+
+    BASE = datetime(2024, 1, 1, 12, 0, 0)
+
+    def _put(self, cache: QueryCache, index: int, payload: str = "") -> None:
+        cache.put(f"SELECT {index}", {"data": payload}, self.BASE, self.BASE)
+
+    def _get(self, cache: QueryCache, index: int) -> Any:
+        return cache.get(f"SELECT {index}", self.BASE, self.BASE)
+
+    def test_evicts_least_recently_used(self) -> None:
+        """A recently read entry survives eviction of older unread ones."""
+        cache = QueryCache({"agents": {"detection": {"query_cache": {"max_entries": 3}}}})
+        for index in range(3):
+            self._put(cache, index)
+
+        assert self._get(cache, 0) is not None
+        self._put(cache, 3)
+
+        assert self._get(cache, 0) is not None
+        assert self._get(cache, 1) is None
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_max_bytes_limit(self) -> None:
+        """Entries are evicted once cached results exceed max_bytes."""
+        cache = QueryCache(
+            {"agents": {"detection": {"query_cache": {"max_bytes": 5_000}}}}
+        )
+        for index in range(10):
+            self._put(cache, index, "x" * 1_000)
+
+        stats = cache.get_stats()
+        assert 0 < stats["size_bytes"] <= 5_000
+        assert stats["size"] < 10
+        assert self._get(cache, 9) is not None
+        assert self._get(cache, 0) is None
+
+    def test_expired_entries_removed_before_live_ones(self) -> None:
+        """Making room drops expired entries without counting evictions."""
+        cache = QueryCache({"agents": {"detection": {"query_cache": {"max_entries": 2}}}})
+        self._put(cache, 0)
+        self._put(cache, 1)
+        expired_at = datetime.now() - timedelta(minutes=1)
+        for key in list(cache._cache):
+            cache._cache[key] = replace(cache._cache[key], expires_at=expired_at)
+
+        self._put(cache, 2)
+
+        assert len(cache._cache) == 1
+        assert cache.get_stats()["evictions"] == 0
@@ -222,6 +222,34 @@ class TestQueryOptimizerRealLogic:
         # 4 days = 4GB, with 10% sampling = 400MB
         assert bytes_est == 400_000_000
 
+    def test_real_bytes_estimation_sub_day_window(
+        self, optimizer: QueryOptimizer
+    ) -> None:
+        """Test REAL bytes estimation for a short scan window."""
+        query = "SELECT timestamp, actor FROM logs"
+        start_time = datetime(2024, 1, 1, 0, 0)
+        end_time = datetime(2024, 1, 1, 6, 0)  # 6 hours
+
+        bytes_est = optimizer.estimate_bytes_processed(query, start_time, end_time)
+
+        # 0.25 days = 250MB, with column pruning = 175MB
+        assert bytes_est == 175_000_000
+
+    def test_real_fusion_savings_estimate(self, optimizer: QueryOptimizer) -> None:
+        """Test REAL bytes saved estimate for fusing several scans."""
+        start_time = datetime(2024, 1, 1, 0, 0)
+        end_time = datetime(2024, 1, 1, 6, 0)
+        queries = [f"SELECT timestamp, actor FROM logs WHERE n = {i}" for i in range(4)]
+
+        savings = optimizer.estimate_fusion_savings(
+            queries, "SELECT timestamp, actor FROM logs", start_time, end_time
+        )
+
+        assert savings["separate_bytes"] == 4 * 175_000_000
+        assert savings["fused_bytes"] == 175_000_000
+        assert savings["bytes_saved"] == 3 * 175_000_000
+        assert savings["scans_avoided"] == 3
+
     def test_real_comprehensive_query_optimization(
         self, optimizer: QueryOptimizer
     ) -> None:
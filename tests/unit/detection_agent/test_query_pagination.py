@@ -0,0 +1,66 @@
+"""
+Tests for PaginatedQueryExecutor.
+"""
+
+import pytest
+
+from src.detection_agent.query_pagination import PaginatedQueryExecutor
+from tests.fixtures.fake_bigquery import FakeBigQueryClient, LazyRows, make_row
+
+
+def _rows(count: int) -> LazyRows:
+    """Build rows lazily and record which were built."""
+    built = []
+
+    def factory(index: int):  # type: ignore[no-untyped-def]
+        built.append(index)
+        return make_row({"id": index})
+
+    rows = LazyRows(count, factory)
+    rows.built = built  # type: ignore[attr-defined]
+    return rows
+
+
+class TestPaginatedQueryExecutor:
+    """Test PaginatedQueryExecutor functionality."""
+
+    @pytest.mark.asyncio
+    async def test_pages_fetched_on_demand(self) -> None:
+        """Each page is only fetched when the consumer asks for it."""
+        rows = _rows(25)
+        client = FakeBigQueryClient(routes=[("SELECT", rows)])
+        executor = PaginatedQueryExecutor(client, page_size=10)  # type: ignore[arg-type]
+
+        pages = executor.execute_query("SELECT id FROM t")
+        first = await pages.__anext__()
+
+        assert first == [{"id": i} for i in range(10)]
+        assert len(rows.built) == 10  # type: ignore[attr-defined]
+        remaining = [page async for page in pages]
+        assert [len(page) for page in remaining] == [10, 5]
+
+    @pytest.mark.asyncio
+    async def test_max_results_stops_early(self) -> None:
+        """Iteration stops once max_results rows have been yielded."""
+        rows = _rows(100)
+        client = FakeBigQueryClient(routes=[("SELECT", rows)])
+        executor = PaginatedQueryExecutor(
+            client, page_size=10, max_results=15  # type: ignore[arg-type]
+        )
+
+        pages = [page async for page in executor.execute_query("SELECT id FROM t")]
+
+        assert [len(page) for page in pages] == [10, 5]
+        assert len(rows.built) == 20  # type: ignore[attr-defined]
+
+    @pytest.mark.asyncio
+    async def test_job_timeout_applied(self) -> None:
+        """The timeout is set on a real QueryJobConfig without error."""
+        client = FakeBigQueryClient(routes=[("SELECT", [make_row({"id": 1})])])
+        executor = PaginatedQueryExecutor(client, timeout_ms=5000)  # type: ignore[arg-type]
+
+        pages = [page async for page in executor.execute_query("SELECT id FROM t")]
+        await executor.cleanup()
+
+        assert pages == [[{"id": 1}]]
+        assert executor.execute_query_sync("SELECT id FROM t") == [{"id": 1}]
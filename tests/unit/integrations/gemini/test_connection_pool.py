@@ -0,0 +1,97 @@
+"""
+Tests for the Gemini connection pool - real implementation, no mocks.
+"""
+
+import asyncio
+import time
+from typing import List
+
+import pytest
+
+from src.integrations.gemini.connection_pool import ConnectionPool, PoolTimeoutError
+
+
+class TestConnectionPool:
+    """Test the asyncio ConnectionPool with real model instances."""
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_limited_without_blocking_the_loop(self) -> None:
+        """Test at most pool_size requests run while the loop stays responsive."""
+        pool = ConnectionPool("gemini-pro", pool_size=3)
+        active = 0
+        peak = 0
+        ticks: List[float] = []
+
+        async def request() -> None:
+            nonlocal active, peak
+            async with pool.connection():
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.05)
+                active -= 1
+
+        async def heartbeat() -> None:
+            for _ in range(10):
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.01)
+
+        start = time.monotonic()
+        await asyncio.gather(heartbeat(), *(request() for _ in range(9)))
+        elapsed = time.monotonic() - start
+
+        assert peak == 3
+        assert 0.15 <= elapsed < 0.3  # Three waves of three
+        assert max(b - a for a, b in zip(ticks, ticks[1:])) < 0.04
+        stats = pool.get_stats()
+        assert stats["acquired"] == 9
+        assert stats["idle"] == 3
+        assert stats["average_wait"] > 0
+
+    @pytest.mark.asyncio
+    async def test_acquire_timeout(self) -> None:
+        """Test waiting past the timeout raises and leaves the pool usable."""
+        pool = ConnectionPool("gemini-pro", pool_size=1, acquire_timeout=0.05)
+        model = await pool.acquire()
+
+        with pytest.raises(PoolTimeoutError):
+            await pool.acquire()
+        assert pool.get_stats()["timeouts"] == 1
+
+        pool.release(model)
+        assert await pool.acquire(timeout=0.01) is model
+
+    @pytest.mark.asyncio
+    async def test_waiters_served_in_arrival_order(self) -> None:
+        """Test a released instance goes to the longest waiting caller."""
+        pool = ConnectionPool("gemini-pro", pool_size=1)
+        served: List[int] = []
+        model = await pool.acquire()
+
+        async def request(number: int) -> None:
+            async with pool.connection():
+                served.append(number)
+
+        tasks = [asyncio.create_task(request(n)) for n in range(4)]
+        await asyncio.sleep(0)
+        assert pool.get_stats()["waiting"] == 4
+        pool.release(model)
+        await asyncio.gather(*tasks)
+
+        assert served == [0, 1, 2, 3]
+
+    @pytest.mark.asyncio
+    async def test_resize_retires_busy_instances_on_release(self) -> None:
+        """Test shrinking below the busy count takes effect as instances return."""
+        pool = ConnectionPool("gemini-pro", pool_size=3)
+        models = [await pool.acquire() for _ in range(3)]
+
+        pool.resize(1)
+        assert pool.get_stats()["in_use"] == 3
+        for model in models:
+            pool.release(model)
+
+        stats = pool.get_stats()
+        assert stats == {**stats, "pool_size": 1, "idle": 1, "in_use": 0}
+
+        pool.resize(2)
+        assert pool.get_stats()["idle"] == 2
@@ -0,0 +1,201 @@
+"""
+Tests for the Gemini embedding service - real implementation, no mocks.
+"""
+
+import asyncio
+import gc
+import logging
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+import pytest
+
+from src.integrations.gemini.embedding_service import EmbeddingCache, EmbeddingService
+
+
+class CountingEmbedder:
+    """Embeds texts deterministically and records every batch it receives."""
+
+    def __init__(self, dimension: int = 8, delay: float = 0.0):
+        self.dimension = dimension
+        self.delay = delay
+        self.batches: List[List[str]] = []
+
+    async def __call__(self, texts: List[str]) -> List[List[float]]:
+        self.batches.append(list(texts))
+        await asyncio.sleep(self.delay)
+        return [self.vector(text).tolist() for text in texts]
+
+    def vector(self, text: str) -> np.ndarray:
+        seed = sum(text.encode())
+        return np.random.default_rng(seed).standard_normal(self.dimension)
+
+
+class TestEmbeddingCache:
+    """Test the bounded float32 vector cache."""
+
+    def test_lru_eviction_and_float32_storage(self) -> None:
+        """Test the least recently used vector is evicted and rows stay float32."""
+        cache = EmbeddingCache(capacity=2)
+        cache.put("a", [1.0, 0.0])
+        cache.put("b", [0.0, 1.0])
+        assert cache.get("a") is not None  # "b" is now least recently used
+        cache.put("c", [1.0, 1.0])
+
+        assert cache.get("b") is None
+        vector = cache.get("c")
+        assert vector is not None and vector.dtype == np.float32
+        stats = cache.get_stats()
+        assert (stats["entries"], stats["evictions"], stats["dimension"]) == (2, 1, 2)
+
+    def test_memory_per_vector_is_far_below_python_floats(self) -> None:
+        """Test a cached vector costs about 4 bytes per dimension."""
+        dimension = 768
+        cache = EmbeddingCache(capacity=100)
+        cache.put("x", [0.5] * dimension)
+
+        per_vector = cache.get_stats()["memory_mb"] * 1024 * 1024 / cache.capacity
+        as_list = sys.getsizeof([0.5] * dimension) + dimension * sys.getsizeof(0.5)
+        assert per_vector < dimension * 4 + 16
+        assert as_list / per_vector > 4
+
+    def test_search_ranks_by_cosine_similarity(self) -> None:
+        """Test top-k search orders labels by cosine similarity and skips evicted rows."""
+        cache = EmbeddingCache(capacity=3)
+        cache.put("k1", [1.0, 0.0, 0.0], label="east")
+        cache.put("k2", [0.7, 0.7, 0.0], label="north-east")
+        cache.put("k3", [0.0, 0.0, 5.0], label="up")
+
+        results = cache.search([2.0, 0.1, 0.0], k=2)
+        assert [label for label, _ in results] == ["east", "north-east"]
+        assert results[0][1] == pytest.approx(0.9988, abs=1e-3)
+
+        cache.put("k4", [-1.0, 0.0, 0.0], label="west")  # Evicts "east"
+        labels = [label for label, _ in cache.search([1.0, 0.0, 0.0], k=10)]
+        assert labels == ["north-east", "up", "west"]
+
+    def test_dimension_mismatch_is_rejected(self) -> None:
+        """Test vectors must match the dimension of the first one stored."""
+        cache = EmbeddingCache(capacity=2)
+        cache.put("a", [1.0, 2.0])
+
+        with pytest.raises(ValueError):
+            cache.put("b", [1.0, 2.0, 3.0])
+        assert cache.search([1.0, 2.0, 3.0]) == []
+
+    def test_memory_mapped_cache_survives_reopen(self, tmp_path: Path) -> None:
+        """Test a flushed memory-mapped cache is reloaded from disk."""
+        path = str(tmp_path / "embeddings.npy")
+        cache = EmbeddingCache(capacity=4, path=path)
+        cache.put("a", [1.0, 0.0], label="first")
+        cache.put("b", [0.0, 1.0])
+        cache.flush()
+
+        reopened = EmbeddingCache(capacity=4, path=path)
+        assert isinstance(reopened._vectors, np.memmap)
+        assert len(reopened) == 2
+        assert reopened.search([1.0, 0.1], k=1)[0][0] == "first"
+        np.testing.assert_array_equal(reopened.get("b"), np.array([0.0, 1.0], np.float32))
+
+
+class TestEmbeddingService:
+    """Test request coalescing with a real async embedder."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_one_batch(self) -> None:
+        """Test concurrent texts are sent together and duplicates embedded once."""
+        embedder = CountingEmbedder(delay=0.01)
+        service = EmbeddingService("test-model", embed_batch=embedder)
+
+        texts = ["disk full", "cpu spike", "disk full", "oom kill"]
+        vectors = await asyncio.gather(*(service.embed(text) for text in texts))
+
+        assert embedder.batches == [["disk full", "cpu spike", "oom kill"]]
+        np.testing.assert_allclose(vectors[0], embedder.vector("disk full"), rtol=1e-6)
+        np.testing.assert_array_equal(vectors[0], vectors[2])
+
+        again = await service.embed("cpu spike")
+        assert len(embedder.batches) == 1
+        np.testing.assert_array_equal(again, vectors[1])
+        stats = service.get_stats()
+        assert (stats["requests"], stats["cache_hits"], stats["batches"]) == (5, 1, 1)
+
+    @pytest.mark.asyncio
+    async def test_full_batches_are_sent_without_waiting(self) -> None:
+        """Test max_batch_size splits large bursts into several calls."""
+        embedder = CountingEmbedder()
+        service = EmbeddingService(
+            "test-model", max_batch_size=3, batch_delay=10.0, embed_batch=embedder
+        )
+
+        await asyncio.wait_for(service.embed_many([f"t{i}" for i in range(6)]), timeout=1)
+
+        assert [len(batch) for batch in embedder.batches] == [3, 3]
+        assert service.get_stats()["average_batch_size"] == 3.0
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_raises_and_is_not_cached(self) -> None:
+        """Test an embedder error reaches every caller and the texts are retried."""
+        calls = 0
+
+        async def flaky(texts: List[str]) -> List[List[float]]:
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                raise RuntimeError("quota exceeded")
+            return [[1.0, 0.0] for _ in texts]
+
+        service = EmbeddingService("test-model", embed_batch=flaky)
+        results = await asyncio.gather(
+            service.embed("a"), service.embed("b"), return_exceptions=True
+        )
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+        assert (await service.embed("a")).tolist() == [1.0, 0.0]
+        assert calls == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_with_cancelled_caller_is_not_reported(self) -> None:
+        """Test an error nobody awaits is not logged as never retrieved."""
+
+        async def failing(texts: List[str]) -> List[List[float]]:
+            raise RuntimeError("quota exceeded")
+
+        loop = asyncio.get_running_loop()
+        unhandled: List[Dict[str, Any]] = []
+        loop.set_exception_handler(lambda _, context: unhandled.append(context))
+        # Log records would keep the error, and so the request, alive
+        logging.disable(logging.ERROR)
+        try:
+            service = EmbeddingService("test-model", batch_delay=0.01, embed_batch=failing)
+            request = asyncio.ensure_future(service.embed("a"))
+            await asyncio.sleep(0)
+            request.cancel()
+            await asyncio.sleep(0.05)
+            # Drop the last references to the failed request, reporting it if
+            # its error was never retrieved
+            del request
+            gc.collect()
+        finally:
+            logging.disable(logging.NOTSET)
+            loop.set_exception_handler(None)
+
+        assert unhandled == []
+
+    @pytest.mark.asyncio
+    async def test_most_similar_uses_labels(self) -> None:
+        """Test similarity search over labelled, previously embedded texts."""
+        embedder = CountingEmbedder(dimension=16)
+        service = EmbeddingService("test-model", embed_batch=embedder)
+        await asyncio.gather(
+            service.embed("disk full on /var", label="INC-1"),
+            service.embed("cpu throttling", label="INC-2"),
+        )
+
+        results = await service.most_similar("disk full on /var", k=2)
+
+        assert results[0][0] == "INC-1"
+        assert results[0][1] == pytest.approx(1.0, abs=1e-5)
+        assert results[1][0] == "INC-2"
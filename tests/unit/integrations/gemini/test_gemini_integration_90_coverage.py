@@ -20,6 +20,7 @@ from typing import Dict, Any
 from collections import deque
 
 # Production imports - NO MOCKING
+from src.integrations.gemini.embedding_service import EmbeddingCache
 from src.integrations.gemini.integration import GeminiIntegration, LogAnalysisResult
 from src.integrations.gemini.models import GeminiModel, ModelProfile
 from src.integrations.gemini.rate_limiter import RateLimitConfig
@@ -76,13 +77,12 @@ class TestGeminiIntegrationSurgical90Coverage:
         assert gemini_integration._response_times.maxlen == 1000
         assert isinstance(gemini_integration._quality_history, list)
         assert isinstance(gemini_integration._conversation_states, dict)
-        assert isinstance(gemini_integration._embedding_cache, dict)
+        assert isinstance(gemini_integration.embedding_services, dict)
         assert isinstance(gemini_integration.connection_pools, dict)
 
         # Verify threading components
         assert isinstance(gemini_integration._metrics_lock, threading.Lock)
         assert isinstance(gemini_integration._conversation_lock, threading.Lock)
-        assert isinstance(gemini_integration._embedding_cache_lock, threading.Lock)
 
         # Verify human review triggers
         assert isinstance(gemini_integration.human_review_triggers, dict)
@@ -368,8 +368,8 @@ class TestGeminiIntegrationSurgical90Coverage:
         # Cache stats
         cache_stats = gemini_integration.get_embedding_cache_stats()
         assert isinstance(cache_stats, dict)
-        assert "total_entries" in cache_stats
-        assert "cache_size_mb" in cache_stats
+        assert "entries" in cache_stats
+        assert "memory_estimate_mb" in cache_stats
 
         # Add cache entries
         test_embeddings = {
@@ -378,32 +378,21 @@ class TestGeminiIntegrationSurgical90Coverage:
             "text_3": [7.0, 8.0, 9.0],
         }
 
-        with gemini_integration._embedding_cache_lock:
-            for key, embedding in test_embeddings.items():
-                gemini_integration._embedding_cache[key] = embedding
+        service = gemini_integration.get_embedding_service()
+        for text, embedding in test_embeddings.items():
+            service.cache.put(EmbeddingCache.make_key(service.model, text), embedding)
 
         # Updated stats
         updated_stats = gemini_integration.get_embedding_cache_stats()
-        assert updated_stats["total_entries"] >= 3
-        assert updated_stats["cache_size_mb"] > 0
-
-        # Thread safety
-        def concurrent_cache_update() -> None:
-            for i in range(10):
-                with gemini_integration._embedding_cache_lock:
-                    gemini_integration._embedding_cache[f"concurrent_text_{i}"] = [
-                        float(j) for j in range(5)
-                    ]
-
-        threads = [threading.Thread(target=concurrent_cache_update) for _ in range(3)]
-        for thread in threads:
-            thread.start()
-        for thread in threads:
-            thread.join()
+        assert updated_stats["entries"] == 3
+        assert updated_stats["memory_estimate_mb"] > 0
+        assert updated_stats["by_model"][service.model]["cache"]["dimension"] == 3
 
+        # Cached texts are embedded without an API call
+        embedding = asyncio.run(gemini_integration.get_embedding("text_2"))
+        assert embedding == [4.0, 5.0, 6.0]
         final_stats = gemini_integration.get_embedding_cache_stats()
-        assert isinstance(final_stats, dict)
-        assert final_stats["total_entries"] >= 3
+        assert final_stats["by_model"][service.model]["cache_hits"] == 1
 
     def test_utility_methods(self, gemini_integration: GeminiIntegration) -> None:
         """Test utility methods - covers utility paths."""
@@ -536,7 +525,9 @@ class TestGeminiIntegrationSurgical90Coverage:
         # Add state
         gemini_integration._response_times.extend([1.0, 2.0, 3.0])
         gemini_integration._conversation_states["test_user"] = {"test": "data"}
-        gemini_integration._embedding_cache["test_text"] = [1.0, 2.0, 3.0]
+        gemini_integration.get_embedding_service().cache.put(
+            "test_text", [1.0, 2.0, 3.0]
+        )
 
         # Cleanup
         gemini_integration.cleanup()
@@ -21,6 +21,7 @@ from typing import Dict, Any
 from collections import deque
 
 # Import production classes - NO MOCKING of core functionality
+from src.integrations.gemini.embedding_service import EmbeddingCache
 from src.integrations.gemini.integration import GeminiIntegration, LogAnalysisResult
 from src.integrations.gemini.models import GeminiModel
 from src.integrations.gemini.rate_limiter import RateLimitConfig
@@ -89,12 +90,11 @@ class TestGeminiIntegrationProductionCoverage:
         assert integration._response_times.maxlen == 1000
         assert isinstance(integration._quality_history, list)
         assert isinstance(integration._conversation_states, dict)
-        assert isinstance(integration._embedding_cache, dict)
+        assert isinstance(integration.embedding_services, dict)
 
         # Verify thread safety components
         assert isinstance(integration._metrics_lock, threading.Lock)
         assert isinstance(integration._conversation_lock, threading.Lock)
-        assert isinstance(integration._embedding_cache_lock, threading.Lock)
 
         # Verify human review configuration
         assert isinstance(integration.human_review_triggers, dict)
@@ -448,44 +448,31 @@ class TestGeminiIntegrationProductionCoverage:
         # Test cache stats - covers get_embedding_cache_stats path
         cache_stats = integration.get_embedding_cache_stats()
         assert isinstance(cache_stats, dict)
-        assert "total_entries" in cache_stats
-        assert "cache_size_mb" in cache_stats
+        assert "entries" in cache_stats
+        assert "memory_estimate_mb" in cache_stats
 
-        # Test cache operations - covers cache update paths
+        # Add cache entries
         test_embeddings = {
             "text_1": [1.0, 2.0, 3.0],
             "text_2": [4.0, 5.0, 6.0],
             "text_3": [7.0, 8.0, 9.0],
         }
 
-        # Add entries to cache
-        with integration._embedding_cache_lock:
-            for key, embedding in test_embeddings.items():
-                integration._embedding_cache[key] = embedding
+        service = integration.get_embedding_service()
+        for text, embedding in test_embeddings.items():
+            service.cache.put(EmbeddingCache.make_key(service.model, text), embedding)
 
-        # Test updated stats - covers stats calculation path
+        # Updated stats
         updated_stats = integration.get_embedding_cache_stats()
-        assert updated_stats["total_entries"] >= 3
-        assert updated_stats["cache_size_mb"] > 0
-
-        # Test thread safety - covers concurrent access path
-        def concurrent_cache_update() -> None:
-            for i in range(10):
-                with integration._embedding_cache_lock:
-                    integration._embedding_cache[f"concurrent_text_{i}"] = [
-                        float(j) for j in range(5)
-                    ]
-
-        threads = [threading.Thread(target=concurrent_cache_update) for _ in range(3)]
-        for thread in threads:
-            thread.start()
-        for thread in threads:
-            thread.join()
+        assert updated_stats["entries"] == 3
+        assert updated_stats["memory_estimate_mb"] > 0
+        assert updated_stats["by_model"][service.model]["cache"]["dimension"] == 3
 
-        # Verify cache integrity
+        # Cached texts are embedded without an API call
+        embedding = asyncio.run(integration.get_embedding("text_2"))
+        assert embedding == [4.0, 5.0, 6.0]
         final_stats = integration.get_embedding_cache_stats()
-        assert isinstance(final_stats, dict)
-        assert final_stats["total_entries"] >= 3
+        assert final_stats["by_model"][service.model]["cache_hits"] == 1
 
     def test_utility_methods_comprehensive_coverage(
         self, production_integration: GeminiIntegration
@@ -641,7 +628,7 @@ class TestGeminiIntegrationProductionCoverage:
         # Add state to clean up - covers state setup path
         integration._response_times.extend([1.0, 2.0, 3.0])
         integration._conversation_states["test_user"] = {"test": "data"}
-        integration._embedding_cache["test_text"] = [1.0, 2.0, 3.0]
+        integration.get_embedding_service().cache.put("test_text", [1.0, 2.0, 3.0])
 
         # Test cleanup - covers cleanup method path
         integration.cleanup()
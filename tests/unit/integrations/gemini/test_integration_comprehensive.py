@@ -208,13 +208,12 @@ class TestGeminiIntegrationProduction:
         assert integration._response_times.maxlen == 1000
         assert isinstance(integration._quality_history, list)
         assert isinstance(integration._conversation_states, dict)
-        assert isinstance(integration._embedding_cache, dict)
+        assert isinstance(integration.embedding_services, dict)
         assert isinstance(integration.connection_pools, dict)
 
         # Verify thread safety mechanisms
         assert isinstance(integration._metrics_lock, threading.Lock)
         assert isinstance(integration._conversation_lock, threading.Lock)
-        assert isinstance(integration._embedding_cache_lock, threading.Lock)
 
         # Verify human review configuration
         assert isinstance(integration.human_review_triggers, dict)
@@ -519,19 +518,11 @@ class TestGeminiIntegrationProduction:
                     user_id, f"query_{i}", f"response_{i}", f"intent_{i}"
                 )
 
-        def concurrent_cache_update() -> None:
-            for i in range(50):
-                with integration._embedding_cache_lock:
-                    integration._embedding_cache[f"text_{i}"] = [
-                        float(j) for j in range(10)
-                    ]
-
         # Start all concurrent operations
         threads = []
         for _ in range(3):
             threads.append(threading.Thread(target=concurrent_metrics_update))
             threads.append(threading.Thread(target=concurrent_conversation_update))
-            threads.append(threading.Thread(target=concurrent_cache_update))
 
         for thread in threads:
             thread.start()
@@ -544,7 +535,7 @@ class TestGeminiIntegrationProduction:
         assert integration._error_count >= 0
         assert integration._rate_limit_hits >= 0
         assert isinstance(integration._conversation_states, dict)
-        assert isinstance(integration._embedding_cache, dict)
+        assert isinstance(integration.embedding_services, dict)
 
         # Test conversation state access
         for user_id in [f"user_{i}" for i in range(10)]:
@@ -557,8 +548,9 @@ class TestGeminiIntegrationProduction:
         # Test embedding cache stats
         cache_stats = integration.get_embedding_cache_stats()
         assert isinstance(cache_stats, dict)
-        assert "total_entries" in cache_stats
-        assert "cache_size_mb" in cache_stats
+        assert "entries" in cache_stats
+        assert "memory_estimate_mb" in cache_stats
+        assert "by_model" in cache_stats
 
     def test_security_analysis_comprehensive(
         self, production_integration: GeminiIntegration
@@ -754,7 +746,7 @@ class TestGeminiIntegrationProduction:
         # Add some state to clean up
         integration._response_times.extend([1.0, 2.0, 3.0])
         integration._conversation_states["test_user"] = {"test": "data"}
-        integration._embedding_cache["test_text"] = [1.0, 2.0, 3.0]
+        integration.get_embedding_service().cache.put("test_text", [1.0, 2.0, 3.0])
 
         # Test cleanup
         integration.cleanup()
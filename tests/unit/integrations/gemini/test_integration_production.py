@@ -10,6 +10,7 @@ from collections import deque
 from typing import Any, Dict
 
 # Real imports from production source code
+from src.integrations.gemini.embedding_service import EmbeddingCache
 from src.integrations.gemini.integration import GeminiIntegration, LogAnalysisResult
 from src.integrations.gemini.api_key_manager import GeminiAPIKeyManager
 from src.integrations.gemini.project_config import GeminiProjectConfig
@@ -172,7 +173,7 @@ class TestGeminiIntegrationProduction:
         # Verify collections are initialized
         assert isinstance(integration.connection_pools, dict)
         assert isinstance(integration._conversation_states, dict)
-        assert isinstance(integration._embedding_cache, dict)
+        assert isinstance(integration.embedding_services, dict)
         assert isinstance(integration.human_review_callbacks, list)
         assert isinstance(integration.content_filters, list)
         assert isinstance(integration.custom_safety_guardrails, dict)
@@ -724,9 +725,9 @@ class TestGeminiIntegrationProduction:
         stats = gemini_integration.get_embedding_cache_stats()
 
         assert isinstance(stats, dict)
-        assert "cache_size" in stats
-        assert "hit_rate" in stats
-        assert "total_requests" in stats
+        assert stats["entries"] == 0
+        assert stats["memory_estimate_mb"] == 0
+        assert stats["by_model"] == {}
 
     def test_calculate_average_response_time_empty(self, gemini_integration: GeminiIntegration) -> None:
         """Test _calculate_average_response_time with empty deque."""
@@ -1004,25 +1005,21 @@ class TestGeminiIntegrationProduction:
         assert gemini_integration._total_requests > 0
         assert len(gemini_integration._response_times) > 0
 
-    def test_embedding_cache_thread_safety(self, gemini_integration: GeminiIntegration) -> None:
-        """Test embedding cache thread safety."""
+    def test_embedding_services_per_model(self, gemini_integration: GeminiIntegration) -> None:
+        """Test each embedding model gets one service with its own cache."""
+        service = gemini_integration.get_embedding_service()
+        assert gemini_integration.get_embedding_service() is service
+        other = gemini_integration.get_embedding_service("models/embedding-001")
+        assert other is not service
 
-        def cache_embeddings() -> None:
-            for i in range(50):
-                key = f"test_text_{i}"
-                value = [float(x) for x in range(10)]
-                with gemini_integration._embedding_cache_lock:
-                    gemini_integration._embedding_cache[key] = value
+        for i in range(50):
+            key = EmbeddingCache.make_key(service.model, f"test_text_{i}")
+            service.cache.put(key, [float(x) for x in range(10)])
 
-        # Run multiple threads caching embeddings
-        threads = [threading.Thread(target=cache_embeddings) for _ in range(3)]
-        for thread in threads:
-            thread.start()
-        for thread in threads:
-            thread.join()
-
-        # Verify cache was populated
-        assert len(gemini_integration._embedding_cache) > 0
+        stats = gemini_integration.get_embedding_cache_stats()
+        assert stats["entries"] == 50
+        assert stats["by_model"][service.model]["cache"]["entries"] == 50
+        assert stats["by_model"]["models/embedding-001"]["cache"]["entries"] == 0
 
     def test_conversation_state_thread_safety(self, gemini_integration: GeminiIntegration) -> None:
         """Test conversation state thread safety."""
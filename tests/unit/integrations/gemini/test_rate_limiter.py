@@ -0,0 +1,118 @@
+"""
+Tests for the Gemini rate limiter - real implementation, no mocks.
+"""
+
+import asyncio
+import time
+from typing import List
+
+import pytest
+
+from src.integrations.gemini.rate_limiter import MINUTE_SECONDS, RateLimitConfig, RateLimiter
+
+
+def limiter_with_history(config: RateLimitConfig, seconds_ago: float, count: int) -> RateLimiter:
+    """Create a limiter that recorded count requests seconds_ago."""
+    if time.monotonic() % 1 > 0.8:  # Keep the history from expiring mid-test
+        time.sleep(0.25)
+    limiter = RateLimiter(config)
+    now = time.monotonic()
+    limiter._second = int(now) - MINUTE_SECONDS  # Limiter started a minute ago
+    for _ in range(count):
+        limiter._record(100, now - seconds_ago)
+    return limiter
+
+
+class TestRateLimiterWindows:
+    """Test per-second bucket accounting with explicit timestamps."""
+
+    def test_windows_expire_old_buckets(self) -> None:
+        """Test usage leaves the minute window after 60s and the hour after 3600s."""
+        limiter = RateLimiter(RateLimitConfig(requests_per_minute=2, tokens_per_minute=1000))
+        start = float(limiter._second)
+        limiter._record(300, start)
+        limiter._record(300, start + 10.5)
+
+        assert limiter._check(0, start + 30) == (False, pytest.approx(30.0))
+        assert limiter._check(0, start + 60)[0] is True
+        assert (limiter._minute_requests, limiter._hour_requests) == (1, 2)
+        assert (limiter._minute_tokens, limiter._hour_tokens) == (300, 600)
+
+        limiter._advance(start + 3605)
+        assert (limiter._minute_requests, limiter._hour_requests) == (0, 1)
+        limiter._advance(start + 3700)
+        assert limiter._hour_tokens == 0
+
+    def test_token_wait_covers_the_excess(self) -> None:
+        """Test the wait lasts until enough tokens have left the window."""
+        limiter = RateLimiter(RateLimitConfig(tokens_per_minute=1000))
+        start = float(limiter._second)
+        for offset in range(5):
+            limiter._record(200, start + offset)
+
+        # 400 tokens must expire: the buckets at +0s and +1s
+        assert limiter._check(400, start + 5) == (False, pytest.approx(56.0))
+        # A request bigger than the whole budget runs once the window is empty
+        assert limiter._check(5000, start + 65) == (True, None)
+
+    def test_hour_limit_and_stats(self) -> None:
+        """Test the hourly request limit and usage statistics."""
+        limiter = RateLimiter(RateLimitConfig(requests_per_minute=100, requests_per_hour=3))
+        for _ in range(3):
+            limiter.record_request(50)
+
+        can_proceed, wait_time = limiter.can_make_request()
+
+        assert can_proceed is False
+        assert 3598 < wait_time <= 3600
+        stats = limiter.get_usage_stats()
+        assert stats["requests_last_hour"] == 3
+        assert stats["tokens_last_minute"] == 150
+        assert stats["waiting"] == 0
+
+
+class TestRateLimiterWaiters:
+    """Test callers waiting for capacity with real timing."""
+
+    @pytest.mark.asyncio
+    async def test_waiters_wake_in_order_when_capacity_frees(self) -> None:
+        """Test queued callers are admitted first come, first served."""
+        config = RateLimitConfig(requests_per_minute=2)
+        limiter = limiter_with_history(config, seconds_ago=59, count=2)
+        served: List[int] = []
+        waits: List[float] = []
+
+        async def request(number: int) -> None:
+            waits.append(await limiter.acquire())
+            served.append(number)
+
+        first = asyncio.create_task(request(0))
+        second = asyncio.create_task(request(1))
+        await asyncio.sleep(0.01)
+        assert limiter.get_usage_stats()["waiting"] == 2
+        await asyncio.wait_for(asyncio.gather(first, second), timeout=3)
+
+        assert served == [0, 1]
+        assert all(0 < wait <= 1.1 for wait in waits)  # Until the next second
+        assert limiter.get_usage_stats()["requests_last_minute"] == 2
+
+    @pytest.mark.asyncio
+    async def test_cancelled_head_passes_its_turn(self) -> None:
+        """Test a cancelled waiter does not hold up the queue."""
+        limiter = limiter_with_history(RateLimitConfig(requests_per_minute=1), 59, 1)
+
+        head = asyncio.create_task(limiter.acquire())
+        follower = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0.01)
+        head.cancel()
+
+        assert await asyncio.wait_for(follower, timeout=3) > 0
+        assert limiter.get_usage_stats()["waiting"] == 0
+
+    @pytest.mark.asyncio
+    async def test_free_capacity_does_not_wait(self) -> None:
+        """Test requests within the limits are admitted immediately."""
+        limiter = RateLimiter(RateLimitConfig())
+
+        assert await limiter.acquire(500) == 0.0
+        assert limiter.get_usage_stats()["tokens_last_minute"] == 500
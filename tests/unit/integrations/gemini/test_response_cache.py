@@ -0,0 +1,127 @@
+"""
+Tests for the Gemini response cache - real implementation, no mocks.
+"""
+
+import json
+from datetime import timedelta
+from pathlib import Path
+
+from src.integrations.gemini.response_cache import (
+    ResponseCache,
+    mask_volatile_fields,
+)
+
+CONFIG = {"temperature": 0.2}
+
+
+class TestResponseCacheBounds:
+    """Test size bounds, eviction and compression."""
+
+    def test_least_recently_used_evicted_by_bytes(self) -> None:
+        """Test total stored bytes stay under max_bytes."""
+        cache = ResponseCache(max_bytes=1500, compress_min_bytes=None)
+        cache.put("a", "m", CONFIG, "x" * 300)
+        cache.put("b", "m", CONFIG, "y" * 300)
+        assert cache.get("a", "m", CONFIG) == "x" * 300  # Now most recent
+
+        cache.put("c", "m", CONFIG, "z" * 300)
+
+        assert cache.get("b", "m", CONFIG) is None
+        assert cache.get("a", "m", CONFIG) == "x" * 300
+        stats = cache.get_stats()
+        assert stats["bytes"] <= 1500
+        assert stats["evictions"] == 1
+        assert stats["size"] == 2
+
+    def test_oversized_responses_are_not_cached(self) -> None:
+        """Test a response larger than the whole cache is skipped."""
+        cache = ResponseCache(max_bytes=500, compress_min_bytes=None)
+        cache.put("a", "m", CONFIG, "x" * 1000)
+
+        assert cache.get("a", "m", CONFIG) is None
+        assert cache.get_stats()["bytes"] == 0
+
+    def test_large_responses_are_compressed(self) -> None:
+        """Test compressible responses are stored compressed and read back intact."""
+        cache = ResponseCache(compress_min_bytes=1024)
+        analysis = json.dumps({"findings": [{"severity": "high", "ip": "203.0.113.7"}] * 200})
+        cache.put("big", "m", CONFIG, analysis)
+        cache.put("small", "m", CONFIG, "short answer")
+
+        assert cache.get("big", "m", CONFIG) == analysis
+        assert cache.get("small", "m", CONFIG) == "short answer"
+        stats = cache.get_stats()
+        assert stats["compressed_entries"] == 1
+        assert stats["bytes"] < len(analysis) // 5
+
+    def test_expired_entries_miss(self) -> None:
+        """Test entries past the TTL are not returned."""
+        cache = ResponseCache(ttl=timedelta(seconds=0))
+        cache.put("a", "m", CONFIG, "answer")
+
+        assert cache.get("a", "m", CONFIG) is None
+        assert cache.get_stats()["size"] == 0
+
+
+class TestPromptNormalization:
+    """Test prompt normalization before hashing."""
+
+    def test_whitespace_is_normalized_by_default(self) -> None:
+        """Test reformatted prompts share an entry."""
+        cache = ResponseCache()
+        cache.put("Analyze  these\n\nlogs ", "m", CONFIG, "answer")
+
+        assert cache.get("Analyze these logs", "m", CONFIG) == "answer"
+        assert cache.get("Analyze these logs", "other-model", CONFIG) is None
+
+    def test_volatile_fields_masked(self) -> None:
+        """Test timestamps and IDs are masked by the volatile field normalizer."""
+        cache = ResponseCache(normalizer=mask_volatile_fields)
+        cache.put(
+            "Request 3f2b8c1e-9a4d-4e6f-8b7a-1c2d3e4f5a6b at 2025-06-01T12:00:00Z: summarize",
+            "m",
+            CONFIG,
+            "answer",
+        )
+
+        assert cache.get(
+            "Request 0a1b2c3d-4e5f-6a7b-8c9d-0e1f2a3b4c5d at 2025-06-02 08:30:15+00:00: summarize",
+            "m",
+            CONFIG,
+        ) == "answer"
+        assert cache.get("Request at 1717243200: summarize", "m", CONFIG) is None
+        assert mask_volatile_fields("t=1717243200.5") == "t=<epoch>"
+
+
+class TestDiskTier:
+    """Test the persistent disk tier."""
+
+    def test_warm_cache_survives_restart(self, tmp_path: Path) -> None:
+        """Test a new cache instance serves responses written by an earlier one."""
+        first = ResponseCache(disk_dir=str(tmp_path), compress_min_bytes=10)
+        first.put("prompt", "m", CONFIG, "a" * 100)
+
+        restarted = ResponseCache(disk_dir=str(tmp_path))
+
+        assert restarted.get("prompt", "m", CONFIG) == "a" * 100
+        assert restarted.get("prompt", "m", CONFIG) == "a" * 100  # From memory
+        stats = restarted.get_stats()
+        assert stats["disk_hits"] == 1
+        assert stats["hits"] == 2
+
+        restarted.clear()
+        assert ResponseCache(disk_dir=str(tmp_path)).get("prompt", "m", CONFIG) is None
+        assert list(tmp_path.iterdir()) == []
+
+    def test_expired_and_corrupt_files_miss(self, tmp_path: Path) -> None:
+        """Test unusable disk entries are treated as misses."""
+        ResponseCache(disk_dir=str(tmp_path)).put("old", "m", CONFIG, "answer")
+        expired = ResponseCache(ttl=timedelta(seconds=0), disk_dir=str(tmp_path))
+        assert expired.get("old", "m", CONFIG) is None
+        assert list(tmp_path.glob("*.entry")) == []
+
+        cache = ResponseCache(disk_dir=str(tmp_path))
+        cache.put("p", "m", CONFIG, "answer")
+        for path in tmp_path.glob("*.entry"):
+            path.write_bytes(b"not a header")
+        assert ResponseCache(disk_dir=str(tmp_path)).get("p", "m", CONFIG) is None
@@ -0,0 +1,103 @@
+"""
+Tests for incremental streamed JSON parsing - real implementation, no mocks.
+"""
+
+import json
+from typing import List
+
+from src.integrations.gemini.streaming_parser import IncrementalJSONParser, StreamedField
+
+ANALYSIS = {
+    "severity": "HIGH",
+    "confidence": 0.92,
+    "threat_assessment": {"threat_level": "CRITICAL", "details": {"vectors": ["ssh"]}},
+    "iocs": [{"type": "ip", "value": "203.0.113.7"}, "evil\"domain}.example"],
+    "recommendations": [{"action": "block_ip", "priority": "IMMEDIATE"}],
+    "requires_review": False,
+    "notes": None,
+}
+
+
+def feed_in_chunks(parser: IncrementalJSONParser, text: str, size: int) -> List[StreamedField]:
+    """Feed text in fixed-size chunks and collect every reported field."""
+    fields: List[StreamedField] = []
+    for i in range(0, len(text), size):
+        fields.extend(parser.feed(text[i:i + size]))
+    return fields
+
+
+class TestIncrementalJSONParser:
+    """Test fields are reported as soon as they are complete."""
+
+    def test_fields_are_reported_in_document_order(self) -> None:
+        """Test one-character chunks yield every shallow field and the whole object."""
+        parser = IncrementalJSONParser()
+        fields = feed_in_chunks(parser, json.dumps(ANALYSIS), 1)
+
+        assert [field.name for field in fields] == [
+            "severity",
+            "confidence",
+            "threat_assessment.threat_level",
+            "threat_assessment.details",
+            "threat_assessment",
+            "iocs[0]",
+            "iocs[1]",
+            "iocs",
+            "recommendations[0]",
+            "recommendations",
+            "requires_review",
+            "notes",
+            "",
+        ]
+        by_name = {field.name: field.value for field in fields}
+        assert by_name["iocs[1]"] == "evil\"domain}.example"
+        assert by_name["notes"] is None
+        assert fields[-1].is_complete and fields[-1].value == ANALYSIS
+        assert parser.result == ANALYSIS
+
+    def test_severity_arrives_before_the_rest_of_the_response(self) -> None:
+        """Test an actionable field is available while the object is still open."""
+        text = json.dumps(ANALYSIS)
+        cut = text.index('"confidence"')
+        parser = IncrementalJSONParser()
+
+        early = parser.feed(text[:cut])
+
+        assert [(field.name, field.value, field.actionable) for field in early] == [
+            ("severity", "HIGH", True)
+        ]
+        assert not parser.done
+        rest = parser.feed(text[cut:])
+        assert not any(field.actionable for field in rest if field.name == "confidence")
+        assert rest[-1].is_complete
+
+    def test_markdown_fence_and_trailing_text_are_ignored(self) -> None:
+        """Test text around the object does not affect parsing."""
+        text = "Analysis follows:\n```json\n" + json.dumps(ANALYSIS, indent=2) + "\n```\nDone."
+        parser = IncrementalJSONParser()
+
+        fields = feed_in_chunks(parser, text, 17)
+
+        assert parser.result == ANALYSIS
+        assert sum(field.is_complete for field in fields) == 1
+
+    def test_max_depth_limits_reported_fields(self) -> None:
+        """Test only top-level members are reported with max_depth=1."""
+        parser = IncrementalJSONParser(max_depth=1)
+        fields = feed_in_chunks(parser, json.dumps(ANALYSIS), 64)
+
+        assert all(len(field.path) <= 1 for field in fields)
+        names = [field.name for field in fields]
+        assert names[:3] == ["severity", "confidence", "threat_assessment"]
+
+    def test_invalid_json_stops_parsing(self) -> None:
+        """Test a malformed value sets the error and reports nothing further."""
+        parser = IncrementalJSONParser()
+
+        fields = parser.feed('{"severity": HIGH, "iocs": []}')
+
+        assert fields == []
+        assert parser.done and parser.result is None
+        assert parser.error is not None and "severity" in parser.error
+        assert parser.feed("more text") == []
+        assert parser.text.endswith("more text")